@@ -1,32 +1,168 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import os, json, hashlib
-from cryptography.fernet import Fernet
+import os, json, time, asyncio, tempfile, threading
+from bisect import bisect_left
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+from receipt_watch import ReceiptIndex, is_receipt
+from receipt_query import QueryIndex
+from ben_envelope import ReceiptCodec, load_codec
+from ben_hash import receipt_hash
 
 APP_ROOT = os.path.expanduser("~/AuditaAI")
 RECEIPTS_DIR = os.path.join(APP_ROOT, "receipts")
 KEY_PATH = os.path.join(APP_ROOT, "ben_governance", "ben.key")
 REGISTRY_PATH = os.path.join(RECEIPTS_DIR, "registry.json")
+TAIL_BUFFER = int(os.environ.get("BEN_TAIL_BUFFER", "256"))   # events queued per /tail client
+TAIL_HEARTBEAT = 15.0
+QUERY_MAX_LIMIT = 1000
+QUERY_RETRY_SECONDS = float(os.environ.get("BEN_QUERY_RETRY", "5"))   # between attempts to reopen a failed index
 
 app = FastAPI(title="BEN Audit Service", version="0.1.0")
 
-def _load_key() -> Fernet:
-    with open(KEY_PATH, "rb") as f:
-        return Fernet(f.read())
+# --- Metrics (Prometheus text at /metrics; BEN_METRICS=0 turns collection off) ---
+METRICS_ON = os.environ.get("BEN_METRICS", "1").lower() not in ("0", "false", "no")
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_HELP = {
+    "ben_decrypt_seconds": ("histogram", "Latency of decrypting a .ben receipt"),
+    "ben_registry_append_seconds": ("histogram", "Latency of appending to registry.json"),
+    "ben_decrypt_failures_total": ("counter", "Receipts that failed to decrypt"),
+    "ben_verifications_total": ("counter", "Receipt verifications by result"),
+    "ben_registry_entries": ("gauge", "Entries in registry.json"),
+}
+_values = {}  # (name, label) -> value
+_hists = {}   # name -> [count per bucket (+Inf last), sum]
+_metrics_lock = threading.Lock()   # sync endpoints update these from Starlette's threadpool
+_NOOP = nullcontext()
+
+def _inc(name: str, label: str = "", n: float = 1) -> None:
+    if METRICS_ON:
+        with _metrics_lock:
+            _values[(name, label)] = _values.get((name, label), 0) + n
+
+def _set(name: str, value: float) -> None:
+    if METRICS_ON:
+        with _metrics_lock:
+            _values[(name, "")] = value
+
+class _Timer:
+    def __init__(self, name): self.name = name
+    def __enter__(self): self.start = time.perf_counter()
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _metrics_lock:
+            h = _hists.setdefault(self.name, [0] * (len(_BUCKETS) + 1) + [0.0])
+            h[bisect_left(_BUCKETS, elapsed)] += 1
+            h[-1] += elapsed
+
+def _timed(name: str):
+    return _Timer(name) if METRICS_ON else _NOOP
+
+def _render_metrics() -> str:
+    with _metrics_lock:
+        values = sorted(_values.items())
+        hists = {name: list(h) for name, h in _hists.items()}
+    lines = []
+    for name, (kind, text) in sorted(_HELP.items()):
+        lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+        if kind == "histogram":
+            h = hists.get(name)
+            if not h: continue
+            total = 0
+            for bound, n in zip(_BUCKETS + ("+Inf",), h[:-1]):
+                total += n
+                lines.append(f'{name}_bucket{{le="{bound}"}} {total}')
+            lines += [f"{name}_sum {h[-1]:g}", f"{name}_count {total}"]
+        else:
+            for (metric, label), value in values:
+                if metric == name:
+                    lines.append(f"{name}{{{label}}} {value:g}" if label else f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
+
+def _load_key() -> ReceiptCodec:
+    return load_codec(KEY_PATH)
 
 def _decrypt(path: str) -> dict:
     f = _load_key()
-    blob = f.decrypt(open(path, "rb").read()).decode()
-    return json.loads(blob)
+    with _timed("ben_decrypt_seconds"):
+        try:
+            return f.open(open(path, "rb").read())   # Fernet token or AEAD envelope
+        except Exception:
+            _inc("ben_decrypt_failures_total")
+            raise
 
 def _calc_hash(receipt: dict) -> str:
-    payload = {k: v for k, v in receipt.items() if k != "self_hash"}
-    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    try:
+        return receipt_hash(receipt)      # dispatches on the receipt's hash_alg tag
+    except ValueError:
+        return None
+
+def _inspect(path: str) -> dict:
+    rec = _decrypt(path)
+    calc = _calc_hash(rec)
+    return {
+        "event": rec.get("event"),
+        "lamport": rec.get("lamport_counter"),
+        "timestamp": rec.get("timestamp"),
+        "self_hash": rec.get("self_hash"),
+        "calc_hash": calc,
+        "verified": calc == rec.get("self_hash"),
+        "receipt": rec,
+    }
+
+QUERY = QueryIndex(RECEIPTS_DIR, KEY_PATH)
+
+def _inspect_and_index(path: str) -> dict:
+    entry = _inspect(path)
+    QUERY.add(os.path.basename(path), entry["receipt"])   # no-op when ben_event.py indexed it
+    return entry
+
+INDEX = ReceiptIndex(RECEIPTS_DIR, _inspect_and_index, buffer=TAIL_BUFFER)
+_query_ready = threading.Event()   # set once QUERY.open() finished; /query answers 503 until then
+_query_error: Optional[str] = None
+_query_failed_at = 0.0
+_query_opening = threading.Lock()  # held while QUERY.open() runs
+_query_open: Optional[asyncio.Task] = None
+
+def _open_query() -> None:
+    global _query_error, _query_failed_at
+    with _query_opening:
+        try:
+            QUERY.open()    # rebuilds query.idx from the store if it is missing
+            _query_error = None
+        except Exception as e:
+            _query_error = type(e).__name__
+            _query_failed_at = time.monotonic()
+            raise
+        finally:
+            _query_ready.set()
+
+def _retry_open_query() -> None:
+    """Reopen the index in the background after a failed open, at most every QUERY_RETRY_SECONDS"""
+    if _query_opening.locked() or time.monotonic() - _query_failed_at < QUERY_RETRY_SECONDS:
+        return
+    threading.Thread(target=_open_query, name="query-open", daemon=True).start()
+
+@app.on_event("startup")
+async def _start_index():
+    # Both scan the store, so neither runs on the event loop. The watcher only
+    # stats files; catching query.idx up may decrypt many, so it runs in the background.
+    global _query_open
+    await asyncio.to_thread(INDEX.start, asyncio.get_running_loop())
+    _query_open = asyncio.create_task(asyncio.to_thread(_open_query))
+
+@app.on_event("shutdown")
+def _stop_index():
+    INDEX.stop()
 
 def _append_registry(entry: dict) -> None:
+    _inc("ben_verifications_total", f'result="{"pass" if entry["verified"] else "fail"}"')
+    with _timed("ben_registry_append_seconds"):
+        _write_registry(entry)
+
+def _write_registry(entry: dict) -> None:
     os.makedirs(RECEIPTS_DIR, exist_ok=True)
     if os.path.exists(REGISTRY_PATH):
         try:
@@ -39,16 +175,78 @@ def _append_registry(entry: dict) -> None:
     reg.append(entry)
     with open(REGISTRY_PATH, "w") as w:
         json.dump(reg, w, indent=2)
+    _set("ben_registry_entries", len(reg))
 
 @app.get("/health")
 def health():
     return {"ok": True, "time": datetime.utcnow().isoformat() + "Z"}
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(_render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/list")
 def list_receipts() -> List[str]:
-    files = sorted([p for p in os.listdir(RECEIPTS_DIR) if p.endswith(".ben")])
+    if INDEX.mode is not None:
+        return INDEX.names()
+    files = sorted([p for p in os.listdir(RECEIPTS_DIR) if is_receipt(p)])
     return files
 
+@app.get("/tail")
+async def tail():
+    """Server-Sent Events: one `receipt` event per newly written, decrypted and verified receipt"""
+    sub = INDEX.subscribe()
+
+    async def events():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'mode': INDEX.mode, 'buffer': INDEX.buffer})}\n\n"
+            while True:
+                try:
+                    entry = await asyncio.wait_for(sub.queue.get(), TAIL_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if entry is None:   # fell more than TAIL_BUFFER events behind
+                    yield "event: dropped\ndata: {\"reason\": \"slow_consumer\"}\n\n"
+                    return
+                yield f"event: receipt\nid: {entry['name']}\ndata: {json.dumps(entry)}\n\n"
+        finally:
+            INDEX.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/query")
+def query(event: Optional[str] = None, system: Optional[str] = None,
+          lamport_min: Optional[int] = None, lamport_max: Optional[int] = None,
+          since: Optional[str] = None, until: Optional[str] = None,
+          offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=QUERY_MAX_LIMIT),
+          count_only: bool = False):
+    """Receipts matching every given filter, in lamport order; only the returned page is decrypted"""
+    if _query_error:
+        _retry_open_query()
+    if not _query_ready.is_set() or _query_error:
+        return JSONResponse({"error": _query_error or "index_loading"}, status_code=503)
+    QUERY.sync()                        # receipts appended by ben_event.py since the last query
+    names = QUERY.query(event=event, system=system, lamport_min=lamport_min,
+                        lamport_max=lamport_max, since=since, until=until)
+    if count_only:
+        return {"total": len(names)}
+    page = names[offset:offset + limit]
+    receipts = []
+    for name in page:                   # sync endpoint: decrypted on Starlette's threadpool
+        try:
+            entry = dict(_inspect(os.path.join(RECEIPTS_DIR, name)), name=name)
+        except FileNotFoundError:
+            QUERY.remove(name)
+            continue
+        except Exception as e:
+            entry = {"name": name, "verified": False, "error": type(e).__name__}
+        receipts.append(entry)
+    end = offset + len(page)
+    return {"total": len(names), "offset": offset, "limit": limit,
+            "next_offset": end if end < len(names) else None, "receipts": receipts}
+
 class VerifyPathIn(BaseModel):
     path: str
 
@@ -78,10 +276,9 @@ def verify_path(body: VerifyPathIn):
 
 @app.post("/verify-file")
 async def verify_file(file: UploadFile = File(...)):
-    # Save temp, verify, then remove
-    tmp_path = os.path.join(RECEIPTS_DIR, f"__upload__{file.filename}")
-    os.makedirs(RECEIPTS_DIR, exist_ok=True)
-    with open(tmp_path, "wb") as w:
+    # Save temp outside RECEIPTS_DIR (so the watcher and query index never see it), verify, then remove
+    fd, tmp_path = tempfile.mkstemp(prefix="__upload__", suffix=".ben")
+    with os.fdopen(fd, "wb") as w:
         w.write(await file.read())
 
     try:
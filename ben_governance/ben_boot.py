@@ -1,6 +1,8 @@
-import os, json, hashlib, time
+import os, time
 from datetime import datetime
 from cryptography.fernet import Fernet
+from ben_envelope import load_codec
+from ben_hash import receipt_hash, tag
 
 # === CONFIG ===
 RECEIPTS_DIR = os.path.expanduser("~/AuditaAI/receipts")
@@ -16,7 +18,7 @@ else:
     with open(KEY_PATH, "rb") as f:
         key = f.read()
 
-f = Fernet(key)
+f = load_codec(KEY_PATH)
 
 # === BOOT: Generate first governance receipt ===
 os.makedirs(RECEIPTS_DIR, exist_ok=True)
@@ -28,11 +30,11 @@ receipt = {
     "message": "BEN Core initialized successfully.",
 }
 
-digest = hashlib.sha256(json.dumps(receipt, sort_keys=True).encode()).hexdigest()
+digest = receipt_hash(tag(receipt))
 receipt["self_hash"] = digest
 
 # === Encrypt + store ===
-token = f.encrypt(json.dumps(receipt).encode())
+token = f.seal(receipt)
 path = os.path.join(RECEIPTS_DIR, f"receipt_boot_{int(time.time())}.ben")
 
 with open(path, "wb") as out:
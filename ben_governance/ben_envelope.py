@@ -0,0 +1,129 @@
+"""Binary AEAD envelope for .ben receipts, read side by side with Fernet tokens.
+
+    MAGIC "BEN\\0" | version 1 | alg | key id (4) | lamport (>q) |
+    hash length (1) | self_hash (raw bytes) | nonce (12) | ciphertext + tag
+
+The whole header, including lamport and self_hash, is the associated data, so
+a receipt cannot be relabelled or moved to another position without failing
+authentication. alg 1 is AES-256-GCM and alg 2 is ChaCha20-Poly1305. The
+256-bit key is derived with HKDF from ben.key itself, so rotation and the
+.next key work as for Fernet. Fernet tokens are base64 text and can never
+start with a NUL byte, so reads pick the format per file.
+
+BEN_ENVELOPE selects the format for new receipts: fernet (default, readable by
+older tools), aes-gcm or chacha20.
+"""
+import os, json, struct, hashlib
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from ben_keys import KEY_PATH, next_key_path
+
+MAGIC = b"BEN\x00"
+VERSION = 1
+FERNET = "fernet"
+ALGS = {"aes-gcm": (1, AESGCM), "chacha20": (2, ChaCha20Poly1305)}
+ALG_NAMES = {code: name for name, (code, _) in ALGS.items()}
+ENVELOPE = os.environ.get("BEN_ENVELOPE", FERNET)   # format for new receipts
+NONCE = 12
+_FIXED = struct.Struct(">4sBB4sqB")                 # magic, version, alg, key id, lamport, hash length
+
+
+def is_envelope(blob: bytes) -> bool:
+    return blob[:4] == MAGIC
+
+
+def key_id(key: bytes) -> bytes:
+    return hashlib.sha256(key).digest()[:4]
+
+
+def header(blob: bytes) -> dict:
+    """Unauthenticated header fields; decrypt() is what checks them"""
+    magic, version, alg, kid, lamport, n = _FIXED.unpack_from(blob)
+    if magic != MAGIC or version != VERSION or alg not in ALG_NAMES:
+        raise InvalidToken
+    digest = blob[_FIXED.size:_FIXED.size + n]
+    return {"alg": ALG_NAMES[alg], "key_id": kid, "lamport": None if lamport < 0 else lamport,
+            "self_hash": digest.hex() if n else None, "size": _FIXED.size + n + NONCE}
+
+
+class ReceiptCodec:
+    """Seals receipts in the configured format; opens both formats with any loaded key"""
+
+    def __init__(self, keys: list, fmt: str = ENVELOPE):
+        if fmt != FERNET and fmt not in ALGS:
+            raise ValueError(f"unsupported envelope: {fmt}")
+        self.fmt = fmt
+        self.keys = keys                             # Fernet keys, newest first
+        fernets = [Fernet(k) for k in keys]
+        self.fernet = fernets[0] if len(fernets) == 1 else MultiFernet(fernets)
+        self._ids = {key_id(k): k for k in keys}
+        self._aead = {}                              # (key id, alg) -> cipher
+
+    def _cipher(self, kid: bytes, alg: str):
+        cipher = self._aead.get((kid, alg))
+        if cipher is None:
+            derived = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                           info=b"ben-envelope-v1/" + alg.encode()).derive(self._ids[kid])
+            cipher = self._aead[(kid, alg)] = ALGS[alg][1](derived)
+        return cipher
+
+    def seal(self, receipt: dict, fmt: str = None) -> bytes:
+        data = json.dumps(receipt).encode()
+        fmt = fmt or self.fmt
+        if fmt == FERNET:
+            return self.fernet.encrypt(data)
+        kid = key_id(self.keys[0])
+        cipher = self._cipher(kid, fmt)
+        lamport = receipt.get("lamport_counter")
+        digest = bytes.fromhex(receipt["self_hash"]) if receipt.get("self_hash") else b""
+        aad = _FIXED.pack(MAGIC, VERSION, ALGS[fmt][0], kid,
+                          lamport if isinstance(lamport, int) else -1, len(digest)) + digest + os.urandom(NONCE)
+        return aad + cipher.encrypt(aad[-NONCE:], data, aad)
+
+    def decrypt(self, blob: bytes) -> bytes:
+        """Plaintext of either format; raises InvalidToken like Fernet"""
+        if not is_envelope(blob):
+            return self.fernet.decrypt(blob)
+        return self._open_envelope(blob)[1]
+
+    def _open_envelope(self, blob: bytes) -> tuple:
+        try:
+            h = header(blob)
+        except struct.error:
+            raise InvalidToken
+        if h["key_id"] not in self._ids:
+            raise InvalidToken
+        size = h["size"]
+        try:
+            return h, self._cipher(h["key_id"], h["alg"]).decrypt(blob[size - NONCE:size], blob[size:], blob[:size])
+        except Exception:
+            raise InvalidToken
+
+    def open(self, blob: bytes) -> dict:
+        """Decrypt a receipt; an envelope's lamport and self_hash must match its body"""
+        if not is_envelope(blob):
+            return json.loads(self.fernet.decrypt(blob))
+        h, data = self._open_envelope(blob)
+        receipt = json.loads(data)
+        lamport = receipt.get("lamport_counter")
+        if h["self_hash"] != receipt.get("self_hash") or h["lamport"] != (lamport if isinstance(lamport, int) else None):
+            raise InvalidToken
+        return receipt
+
+    def format_of(self, blob: bytes) -> str:
+        return header(blob)["alg"] if is_envelope(blob) else FERNET
+
+
+def load_codec(key_path: str = KEY_PATH, fmt: str = ENVELOPE) -> ReceiptCodec:
+    """Codec over ben.key, plus ben.key.next while ben_rotate.py is running (see ben_keys)"""
+    keys = []
+    try:
+        with open(next_key_path(key_path), "rb") as f:
+            keys.append(f.read().strip())
+    except FileNotFoundError:
+        pass
+    with open(key_path, "rb") as f:
+        keys.append(f.read().strip())
+    return ReceiptCodec(keys, fmt)
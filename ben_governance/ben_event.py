@@ -1,28 +1,28 @@
-import os, json, hashlib, time
+import os, json, time
 from datetime import datetime
-from cryptography.fernet import Fernet
+from ben_envelope import ReceiptCodec, load_codec
+from ben_hash import receipt_hash, tag
+from receipt_query import INDEX_NAME, append_entries, index_entry
 
 APP_ROOT = os.path.expanduser("~/AuditaAI")
 RECEIPTS_DIR = os.path.join(APP_ROOT, "receipts")
 KEY_PATH = os.path.join(APP_ROOT, "ben_governance", "ben.key")
 STATE_PATH = os.path.join(RECEIPTS_DIR, "state.json")
 
-def load_key() -> Fernet:
-    with open(KEY_PATH, "rb") as f:
-        return Fernet(f.read())
+def load_key() -> ReceiptCodec:
+    return load_codec(KEY_PATH)
 
 def latest_receipt_path():
-    files = sorted([p for p in os.listdir(RECEIPTS_DIR) if p.endswith(".ben")])
-    if not files: return None
-    return os.path.join(RECEIPTS_DIR, files[-1])
+    latest = max((p for p in os.listdir(RECEIPTS_DIR) if p.endswith(".ben")), default=None)
+    if not latest: return None
+    return os.path.join(RECEIPTS_DIR, latest)
 
 def decrypt(path: str) -> dict:
     f = load_key()
-    return json.loads(f.decrypt(open(path, "rb").read()).decode())
+    return f.open(open(path, "rb").read())
 
 def sha(payload: dict) -> str:
-    body = {k: v for k, v in payload.items() if k != "self_hash"}
-    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    return receipt_hash(payload)
 
 def load_state():
     if os.path.exists(STATE_PATH):
@@ -49,14 +49,18 @@ def create_event(event_name: str, message: str):
         "prev_hash": state["prev_hash"],    # chain pointer
         "message": message,
     }
+    tag(receipt)                            # hash_alg from BEN_HASH_ALG (sha256 untagged)
     digest = sha(receipt)
     receipt["self_hash"] = digest
 
     f = load_key()
-    token = f.encrypt(json.dumps(receipt).encode())
+    token = f.seal(receipt)                 # Fernet or AEAD envelope, per BEN_ENVELOPE
     out_path = os.path.join(RECEIPTS_DIR, f"receipt_{event_name}_{int(time.time())}.ben")
     with open(out_path, "wb") as w:
         w.write(token)
+    # Secondary index for /query, written with the receipt
+    append_entries(os.path.join(RECEIPTS_DIR, INDEX_NAME),
+                   [index_entry(os.path.basename(out_path), receipt)], f.fernet)
 
     state["lamport"] = lamport
     state["prev_hash"] = digest
@@ -0,0 +1,26 @@
+import os, json, hashlib
+
+# A receipt may carry "hash_alg"; untagged receipts are legacy SHA-256.
+# The tag sits inside the hashed body, so it cannot be swapped afterwards.
+HASHES = {
+    "sha256": hashlib.sha256,
+    "blake2b-256": lambda data: hashlib.blake2b(data, digest_size=32),
+}
+DEFAULT_ALG = "sha256"
+HASH_ALG = os.environ.get("BEN_HASH_ALG", DEFAULT_ALG)   # algorithm for new receipts
+
+def receipt_hash(r: dict) -> str:
+    """self_hash of a receipt under the algorithm it is tagged with"""
+    alg = r.get("hash_alg", DEFAULT_ALG)
+    if alg not in HASHES:
+        raise ValueError(f"unsupported hash_alg: {alg}")
+    body = {k: v for k, v in r.items() if k != "self_hash"}
+    return HASHES[alg](json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+def tag(r: dict, alg: str = HASH_ALG) -> dict:
+    """Tag a new receipt with `alg` (sha256 stays untagged, like legacy receipts)"""
+    if alg not in HASHES:
+        raise ValueError(f"unsupported hash_alg: {alg}")
+    if alg != DEFAULT_ALG:
+        r["hash_alg"] = alg
+    return r
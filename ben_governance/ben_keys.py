@@ -0,0 +1,23 @@
+import os
+from cryptography.fernet import Fernet, MultiFernet
+
+KEY_PATH = os.path.expanduser("~/AuditaAI/ben_governance/ben.key")
+
+def next_key_path(key_path: str = KEY_PATH) -> str:
+    return key_path + ".next"
+
+def load_fernet(key_path: str = KEY_PATH):
+    """The BEN key, or MultiFernet([new, old]) while ben_rotate.py is running.
+
+    MultiFernet encrypts with the new key and decrypts with either, so readers
+    and writers keep working mid-rotation. The .next file is read first: if the
+    rotation finishes in between, ben.key already holds the new key.
+    """
+    try:
+        with open(next_key_path(key_path), "rb") as f:
+            new = Fernet(f.read())
+    except FileNotFoundError:
+        new = None
+    with open(key_path, "rb") as f:
+        current = Fernet(f.read())
+    return MultiFernet([new, current]) if new else current
@@ -1,11 +1,10 @@
-import os, json
-from cryptography.fernet import Fernet
+import os
+from ben_envelope import load_codec
 
 KEY_PATH = os.path.expanduser("~/AuditaAI/ben_governance/ben.key")
 RECENTS = os.path.expanduser("~/AuditaAI/receipts")
 
-with open(KEY_PATH,"rb") as f: key = f.read()
-f = Fernet(key)
+f = load_codec(KEY_PATH)
 
 # pick the most recent .ben file
 files = sorted([p for p in os.listdir(RECENTS) if p.endswith(".ben")])
@@ -0,0 +1,169 @@
+"""Rotate ben.key: re-encrypt every .ben receipt under a new key.
+
+    python ben_rotate.py [--workers N] [--chunk 512]
+
+The new key is staged as ben.key.next. While it exists every script reads
+through MultiFernet([new, old]), so the service keeps working and new receipts
+are already written under the new key. Chunks of files are re-encrypted in a
+process pool; each file is written to a temp file, fsynced and renamed over the
+original, after checking that the new ciphertext decrypts to the same receipt
+and its self_hash still matches. Finished files are appended to a checkpoint,
+so rerunning after a crash resumes where it stopped. When every file is done
+ben.key.next is renamed over ben.key (the old key is kept as ben.key.retired-*).
+"""
+import os, json, hashlib, time, argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from ben_keys import KEY_PATH, next_key_path
+from ben_hash import receipt_hash
+from ben_envelope import ReceiptCodec
+from receipt_query import INDEX_NAME, rekey
+
+RECEIPTS_DIR = os.path.expanduser("~/AuditaAI/receipts")
+
+def sha(r: dict) -> str:
+    try:
+        return receipt_hash(r)
+    except ValueError:
+        return None
+
+def _write_atomic(path: str, data: bytes, mode: int = None) -> None:
+    tmp = f"{path}.rotate.tmp"
+    with open(tmp, "wb") as w:
+        w.write(data)
+        w.flush()
+        os.fsync(w.fileno())
+    if mode is not None:
+        os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+def _rotate_chunk(receipts_dir: str, names: list, old_key: bytes, new_key: bytes) -> list:
+    """Worker: re-encrypt one chunk; returns [(name, status)]"""
+    old, new = ReceiptCodec([old_key.strip()]), ReceiptCodec([new_key.strip()])
+    results = []
+    for name in names:
+        path = os.path.join(receipts_dir, name)
+        try:
+            token = open(path, "rb").read()
+        except FileNotFoundError:
+            results.append((name, "missing"))
+            continue
+        try:
+            new.decrypt(token)                 # rewritten before a crash, or written mid-rotation
+            results.append((name, "skipped"))
+            continue
+        except InvalidToken:
+            pass
+        try:
+            receipt = old.open(token)
+        except InvalidToken:
+            results.append((name, "failed:undecryptable"))
+            continue
+        if sha(receipt) != receipt.get("self_hash"):
+            results.append((name, "failed:hash_mismatch"))
+            continue
+        rotated = new.seal(receipt, fmt=old.format_of(token))   # Fernet stays Fernet, envelopes stay envelopes
+        check = new.open(rotated)
+        if check != receipt or sha(check) != receipt["self_hash"]:
+            results.append((name, "failed:verify_after_encrypt"))
+            continue
+        st = os.stat(path)
+        _write_atomic(path, rotated)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))   # keep receipt ordering by mtime
+        results.append((name, "rotated"))
+    return results
+
+def stage_new_key(key_path: str = KEY_PATH) -> bytes:
+    """Create ben.key.next (or reuse it when resuming)"""
+    nxt = next_key_path(key_path)
+    if os.path.exists(nxt):
+        return open(nxt, "rb").read()
+    key = Fernet.generate_key()
+    _write_atomic(nxt, key, 0o600)
+    return key
+
+def finalize(key_path: str = KEY_PATH) -> str:
+    """Retire the old key and promote ben.key.next in one rename"""
+    retired = f"{key_path}.retired-{int(time.time())}"
+    _write_atomic(retired, open(key_path, "rb").read(), 0o600)
+    os.replace(next_key_path(key_path), key_path)
+    return retired
+
+def rotate(receipts_dir: str = RECEIPTS_DIR, key_path: str = KEY_PATH,
+           workers: int = None, chunk: int = 512, verbose: bool = True) -> dict:
+    old_key = open(key_path, "rb").read()
+    new_key = stage_new_key(key_path)
+    ckpt_path = os.path.join(receipts_dir, ".rotate.ckpt")
+    ckpt_id = hashlib.sha256(new_key).hexdigest()[:16]   # a checkpoint only counts for its key
+
+    done = set()
+    if os.path.exists(ckpt_path):
+        with open(ckpt_path) as r:
+            lines = r.read().splitlines()
+        if lines and lines[0] == ckpt_id:
+            done = set(lines[1:])
+    ckpt = open(ckpt_path, "w" if not done else "a")
+    if not done:
+        ckpt.write(ckpt_id + "\n")
+
+    names = sorted(n for n in os.listdir(receipts_dir) if n.endswith(".ben") and n not in done)
+    chunks = [names[i:i + chunk] for i in range(0, len(names), chunk)]
+    counts = {"resumed": len(done)}
+    failures = []
+    start = time.time()
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        queue = iter(chunks)
+        limit = 2 * workers                             # bounded in-flight work
+        while True:
+            for c in queue:
+                pending.add(pool.submit(_rotate_chunk, receipts_dir, c, old_key, new_key))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                for name, status in fut.result():
+                    kind = status.split(":")[0]
+                    counts[kind] = counts.get(kind, 0) + 1
+                    if kind == "failed":
+                        failures.append((name, status))
+                    else:
+                        ckpt.write(name + "\n")
+                ckpt.flush()
+                os.fsync(ckpt.fileno())
+            if verbose:
+                n = sum(v for k, v in counts.items() if k != "resumed")
+                print(f"\r{n}/{len(names)} files  {n / max(time.time() - start, 1e-9):,.0f}/s", end="", flush=True)
+    ckpt.close()
+    if verbose:
+        print()
+
+    result = {"counts": counts, "failures": failures, "seconds": round(time.time() - start, 2)}
+    if failures:
+        result["finalized"] = False      # old key stays active through MultiFernet
+    else:
+        # query.idx is encrypted with the receipt key too
+        result["index_rekeyed"] = rekey(os.path.join(receipts_dir, INDEX_NAME),
+                                        MultiFernet([Fernet(new_key), Fernet(old_key)]), Fernet(new_key))
+        result["retired_key"] = finalize(key_path)
+        result["finalized"] = True
+        os.remove(ckpt_path)
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Re-encrypt all .ben receipts under a new key")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk", type=int, default=512)
+    ap.add_argument("--receipts-dir", default=RECEIPTS_DIR)
+    ap.add_argument("--key", default=KEY_PATH)
+    args = ap.parse_args()
+    res = rotate(args.receipts_dir, args.key, args.workers, args.chunk)
+    print(json.dumps({k: v for k, v in res.items() if k != "failures"}, indent=2))
+    for name, status in res["failures"][:20]:
+        print(f"❌ {name}: {status}")
+    print("✅ ROTATION COMPLETE" if res["finalized"] else "⚠️  ROTATION INCOMPLETE (old key still active; rerun to resume)")
+    raise SystemExit(0 if res["finalized"] else 1)
@@ -0,0 +1,272 @@
+"""Encrypted secondary index over the .ben store, for /query.
+
+Maps event, system, lamport and timestamp to receipt file names, so a query
+decrypts only the receipts it returns (and none at all when only counting).
+
+The index lives next to the receipts as query.idx: one Fernet token per line,
+each holding a JSON list of entries, encrypted with the same key as the
+receipts. ben_event.py appends one line per receipt at write time; the
+service adds receipts found by its watcher. When the file is missing or
+unreadable, open() rebuilds it from the store in chunks, appending a line per
+chunk, so an interrupted rebuild resumes from what it already indexed.
+Many small lines are compacted into chunked ones with write-then-rename.
+"""
+import os, json, bisect, tempfile, threading
+from cryptography.fernet import Fernet, InvalidToken
+from ben_keys import load_fernet, KEY_PATH
+from ben_envelope import load_codec
+from receipt_watch import is_receipt
+
+INDEX_NAME = "query.idx"
+CHUNK = 1024           # entries per line when rebuilding or compacting
+COMPACT_LINES = 4096   # compact once the file has this many more lines than needed
+
+
+def index_entry(name: str, receipt: dict) -> dict:
+    """The indexed fields of one receipt"""
+    return {
+        "name": name,
+        "event": receipt.get("event"),
+        "system": receipt.get("system"),
+        "lamport": receipt.get("lamport_counter"),
+        "ts": receipt.get("timestamp"),
+    }
+
+
+def append_entries(index_path: str, entries: list, f: Fernet) -> None:
+    """One encrypted line; a single O_APPEND write, so concurrent writers don't interleave"""
+    line = f.encrypt(json.dumps(entries, separators=(",", ":")).encode()) + b"\n"
+    fd = os.open(index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def rekey(index_path: str, old: Fernet, new: Fernet) -> bool:
+    """Re-encrypt the index under a new key (used by ben_rotate.py); False if it had to be dropped"""
+    try:
+        lines = open(index_path, "rb").read().splitlines()
+    except FileNotFoundError:
+        return True
+    try:
+        tokens = [new.encrypt(old.decrypt(line)) for line in lines if line]
+    except InvalidToken:
+        os.remove(index_path)            # rebuilt from the store on next open
+        return False
+    _write_lines(index_path, tokens)
+    return True
+
+
+def _write_lines(index_path: str, tokens: list) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "wb") as w:
+            w.write(b"".join(t + b"\n" for t in tokens))
+            w.flush()
+            os.fsync(w.fileno())
+        os.replace(tmp, index_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _key(entry: dict) -> tuple:
+    lamport = entry["lamport"]
+    return (lamport if isinstance(lamport, int) else -1, entry["name"])
+
+
+class QueryIndex:
+    """In-memory view of query.idx, sorted by (lamport, name), with event/system postings
+    and a (ts, name) list for time windows"""
+
+    def __init__(self, receipts_dir: str, key_path: str = KEY_PATH):
+        self.receipts_dir = receipts_dir
+        self.key_path = key_path
+        self.path = os.path.join(receipts_dir, INDEX_NAME)
+        self._lock = threading.RLock()   # watcher thread adds while requests query
+        self._reset()
+
+    def _reset(self) -> None:
+        self._entries = {}        # name -> entry
+        self._order = []          # sorted (lamport, name)
+        self._by_ts = []          # sorted (ts, name), for entries with a string timestamp
+        self._postings = {"event": {}, "system": {}}   # field -> value -> sorted (lamport, name)
+        self._offset = 0          # bytes of query.idx already read
+        self._lines = 0
+        self._inode = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    # --- maintenance ---
+    def open(self, f: Fernet = None) -> dict:
+        """Load query.idx, then index receipts it misses and drop ones that are gone"""
+        f = f or load_fernet(self.key_path)
+        os.makedirs(self.receipts_dir, exist_ok=True)
+        try:
+            self.sync(f)
+        except InvalidToken:                 # foreign or retired key: start over
+            os.remove(self.path)
+            self._reset()
+        names = set(n for n in os.listdir(self.receipts_dir) if is_receipt(n))
+        gone = [n for n in self._entries if n not in names]
+        for name in gone:
+            self.remove(name)
+        added = self.catch_up(sorted(names - set(self._entries)), f)
+        if gone or self._lines > (len(self._entries) // CHUNK + 1) + COMPACT_LINES:
+            self.compact(f)
+        return {"entries": len(self._entries), "added": added, "removed": len(gone)}
+
+    def sync(self, f: Fernet = None) -> int:
+        """Read lines appended since the last call (by this or another process)"""
+        try:
+            r = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+        with r, self._lock:
+            inode = os.fstat(r.fileno()).st_ino
+            if inode != self._inode:             # compacted or re-keyed elsewhere: re-read it all
+                self._reset()
+                self._inode = inode
+            r.seek(self._offset)
+            data = r.read()
+            end = data.rfind(b"\n") + 1          # a partly written last line is read next time
+            if not end:
+                return 0
+            f = f or load_fernet(self.key_path)
+            added = 0
+            for line in data[:end].splitlines():
+                if line:
+                    for entry in json.loads(f.decrypt(line)):
+                        if is_receipt(entry["name"]):   # older versions indexed /verify-file uploads
+                            added += self._insert(entry)
+                    self._lines += 1
+            self._offset += end
+        return added
+
+    def catch_up(self, names: list, f: Fernet = None) -> int:
+        """Decrypt and index receipts missing from the index, one appended line per chunk"""
+        f = f or load_fernet(self.key_path)
+        codec = load_codec(self.key_path)        # receipts may be Fernet tokens or AEAD envelopes
+        names = [n for n in names if is_receipt(n)]
+        added = 0
+        for i in range(0, len(names), CHUNK):
+            entries = []
+            for name in names[i:i + CHUNK]:
+                try:
+                    receipt = codec.open(open(os.path.join(self.receipts_dir, name), "rb").read())
+                except (OSError, InvalidToken, ValueError):
+                    continue                     # partial write or foreign key; retried on next open
+                entries.append(index_entry(name, receipt))
+            if entries:
+                self._append(entries, f)
+                added += len(entries)
+        return added
+
+    def add(self, name: str, receipt: dict, f: Fernet = None) -> bool:
+        """Index one receipt unless it already is (uploads being verified never are)"""
+        entry = index_entry(name, receipt)
+        if not is_receipt(name) or self._entries.get(name) == entry:
+            return False
+        self._append([entry], f or load_fernet(self.key_path))
+        return True
+
+    def _append(self, entries: list, f: Fernet) -> None:
+        with self._lock:
+            append_entries(self.path, entries, f)
+        # Pick up our own line plus anything other writers appended before it
+        self.sync(f)
+
+    def compact(self, f: Fernet = None) -> None:
+        """Rewrite as chunked lines. A line another process appends meanwhile is lost,
+        but its receipt is re-indexed by the next open()."""
+        f = f or load_fernet(self.key_path)
+        with self._lock:
+            self.sync(f)
+            entries = [self._entries[name] for _, name in self._order]
+            tokens = [
+                f.encrypt(json.dumps(entries[i:i + CHUNK], separators=(",", ":")).encode())
+                for i in range(0, len(entries), CHUNK)
+            ]
+            _write_lines(self.path, tokens)
+            st = os.stat(self.path)
+            self._inode, self._offset, self._lines = st.st_ino, st.st_size, len(tokens)
+
+    def _insert(self, entry: dict) -> int:
+        """Later lines win: a rewritten file replaces its entry"""
+        name = entry["name"]
+        if self._entries.get(name) == entry:
+            return 0
+        self.remove(name)
+        self._entries[name] = entry
+        key = _key(entry)
+        bisect.insort(self._order, key)
+        for field, postings in self._postings.items():
+            bisect.insort(postings.setdefault(entry[field], []), key)
+        if isinstance(entry["ts"], str):
+            bisect.insort(self._by_ts, (entry["ts"], name))
+        return 1
+
+    def remove(self, name: str) -> None:
+        """Forget a receipt whose file is gone (persisted at the next compaction)"""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                return
+            key = _key(entry)
+            self._order.remove(key)
+            for field, postings in self._postings.items():
+                postings[entry[field]].remove(key)
+            if isinstance(entry["ts"], str):
+                self._by_ts.remove((entry["ts"], name))
+
+    # --- queries ---
+    def query(self, event: str = None, system: str = None, lamport_min: int = None,
+              lamport_max: int = None, since: str = None, until: str = None) -> list:
+        """Names of matching receipts in (lamport, name) order.
+
+        since/until are compared with the receipts' ISO-8601 UTC timestamps as strings;
+        whichever of the time window and the other filters selects fewer entries is scanned.
+        """
+        with self._lock:
+            return self._query(event, system, lamport_min, lamport_max, since, until)
+
+    def _query(self, event, system, lamport_min, lamport_max, since, until) -> list:
+        candidates = self._order
+        for field, value in (("event", event), ("system", system)):
+            if value is not None:
+                postings = self._postings[field].get(value, [])
+                if len(postings) < len(candidates):
+                    candidates = postings
+        candidates = _lamport_range(candidates, lamport_min, lamport_max)
+        if since is not None or until is not None:
+            lo = 0 if since is None else bisect.bisect_left(self._by_ts, (since,))
+            hi = len(self._by_ts) if until is None else bisect.bisect_left(self._by_ts, (until + "\0",))
+            if hi - lo < len(candidates):
+                # The time window is narrower: scan it, then restore (lamport, name) order
+                window = sorted(_key(self._entries[name]) for _, name in self._by_ts[lo:hi])
+                candidates = _lamport_range(window, lamport_min, lamport_max)
+        names = []
+        for _, name in candidates:
+            e = self._entries[name]
+            if (event is not None and e["event"] != event) or (system is not None and e["system"] != system):
+                continue
+            if (since is not None or until is not None) and not isinstance(e["ts"], str):
+                continue
+            if (since is not None and e["ts"] < since) or (until is not None and e["ts"] > until):
+                continue
+            names.append(name)
+        return names
+
+
+def _lamport_range(keys: list, lamport_min: int = None, lamport_max: int = None) -> list:
+    """The part of a sorted (lamport, name) list inside [lamport_min, lamport_max]"""
+    lo = 0 if lamport_min is None else bisect.bisect_left(keys, (lamport_min, ""))
+    hi = len(keys) if lamport_max is None else bisect.bisect_left(keys, (lamport_max + 1, ""))
+    return keys[lo:hi]
@@ -0,0 +1,234 @@
+"""In-memory index of the receipts directory plus live fan-out to /tail subscribers.
+
+The directory is watched with Linux inotify (through ctypes, no extra
+packages) and falls back to mtime polling elsewhere. The index holds only
+each file's name, mtime and size, so loading it is one directory scan and
+its size does not depend on the receipts. Each new .ben file is decrypted
+and verified once by the watcher thread and pushed to every subscriber's
+bounded queue, but not kept; a subscriber whose queue is full is dropped
+rather than slowing the watcher or other clients down.
+"""
+import os, asyncio, bisect, ctypes, ctypes.util, select, struct, threading
+from typing import Callable, Dict, List, Optional, Set
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000   # events were dropped; carries no name
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+UPLOAD_PREFIX = "__upload__"   # /verify-file temp names; older versions wrote them into the store
+
+
+def is_receipt(name: str) -> bool:
+    """A stored .ben receipt, not an upload being verified"""
+    return name.endswith(".ben") and not name.startswith(UPLOAD_PREFIX)
+
+
+def _inotify():
+    """(init1, add_watch) from libc, or None when inotify is unavailable"""
+    if not hasattr(os, "uname") or os.uname().sysname != "Linux":
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        init1, add_watch = libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return init1, add_watch
+
+
+class Subscriber:
+    def __init__(self, buffer: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = False
+
+
+class ReceiptIndex:
+    """Sorted listing of RECEIPTS_DIR kept current by a watcher thread"""
+
+    def __init__(self, receipts_dir: str, inspect: Callable[[str], dict],
+                 poll_interval: float = 1.0, buffer: int = 256, use_inotify: bool = True):
+        self.receipts_dir = receipts_dir
+        self.inspect = inspect              # path -> decrypted + verified entry
+        self.poll_interval = poll_interval
+        self.buffer = buffer
+        self.use_inotify = use_inotify
+        self.mode = None                    # "inotify" or "poll" once started
+        self._names: List[str] = []
+        self._stats: Dict[str, tuple] = {}  # name -> (mtime_ns, size)
+        self._failed: Set[str] = set()      # last decrypt failed: published once it succeeds
+        self._lock = threading.Lock()
+        self._subscribers: List[Subscriber] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- index ---
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._names)
+
+    def get(self, name: str) -> Optional[dict]:
+        """Decrypt one indexed receipt. Blocking: call it from a worker thread"""
+        with self._lock:
+            if name not in self._stats:
+                return None
+        return self._inspect(name)
+
+    def latest(self) -> Optional[dict]:
+        with self._lock:
+            name = self._names[-1] if self._names else None
+        return self.get(name) if name else None
+
+    def _inspect(self, name: str) -> dict:
+        try:
+            return dict(self.inspect(os.path.join(self.receipts_dir, name)), name=name)
+        except Exception as e:               # partial write or foreign key: retry on next change
+            return {"name": name, "verified": False, "error": type(e).__name__}
+
+    def _scan(self) -> Dict[str, tuple]:
+        try:
+            return {e.name: (e.stat().st_mtime_ns, e.stat().st_size)
+                    for e in os.scandir(self.receipts_dir) if is_receipt(e.name)}
+        except FileNotFoundError:
+            return {}
+
+    def refresh(self, name: str, publish: bool = True) -> Optional[dict]:
+        """Decrypt a new or changed file and publish it if it is a new receipt; returns its entry"""
+        try:
+            st = os.stat(os.path.join(self.receipts_dir, name))
+        except FileNotFoundError:
+            self.remove(name)
+            return None
+        entry = self._inspect(name)
+        with self._lock:
+            known = name in self._stats
+            if not known:
+                bisect.insort(self._names, name)
+            self._stats[name] = (st.st_mtime_ns, st.st_size)
+            retried = name in self._failed
+            if "error" in entry:
+                self._failed.add(name)
+            else:
+                self._failed.discard(name)
+        # Rewrites of a known receipt (e.g. key rotation) are not new receipts
+        fresh = not known or retried
+        if publish and fresh and "error" not in entry:
+            self._notify(entry)
+        return entry
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            if self._stats.pop(name, None) is not None:
+                self._names.remove(name)
+            self._failed.discard(name)
+
+    def load(self) -> int:
+        """Initial scan: names and stats only, nothing is decrypted or published"""
+        stats = self._scan()
+        with self._lock:
+            self._stats = stats
+            self._names = sorted(stats)
+            self._failed.clear()
+        return len(self._names)
+
+    def poll_once(self) -> None:
+        seen = self._scan()
+        for name in [n for n in self._stats if n not in seen]:
+            self.remove(name)
+        for name, stat in sorted(seen.items()):
+            if self._stats.get(name) != stat:
+                self.refresh(name)
+
+    # --- watcher ---
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self._loop = loop
+        os.makedirs(self.receipts_dir, exist_ok=True)
+        self.load()
+        fd = self._open_inotify() if self.use_inotify else None
+        self.mode = "inotify" if fd is not None else "poll"
+        target = (lambda: self._run_inotify(fd)) if fd is not None else self._run_poll
+        self._thread = threading.Thread(target=target, name="receipt-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _open_inotify(self) -> Optional[int]:
+        api = _inotify()
+        if api is None:
+            return None
+        init1, add_watch = api
+        fd = init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE
+        if add_watch(fd, os.fsencode(self.receipts_dir), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _run_inotify(self, fd: int) -> None:
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                while offset < len(data):
+                    _, mask, _, length = _EVENT.unpack_from(data, offset)
+                    raw = data[offset + _EVENT.size: offset + _EVENT.size + length]
+                    offset += _EVENT.size + length
+                    if mask & IN_Q_OVERFLOW:
+                        self.poll_once()     # lost events: rescan the whole directory
+                        continue
+                    name = raw.rstrip(b"\0").decode(errors="replace")
+                    if not is_receipt(name):
+                        continue
+                    if mask & (IN_DELETE | IN_MOVED_FROM):
+                        self.remove(name)
+                    else:
+                        self.refresh(name)
+        finally:
+            os.close(fd)
+
+    def _run_poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.poll_once()
+
+    # --- fan-out ---
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.buffer)
+        self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+
+    def _notify(self, entry: dict) -> None:
+        if self._loop is None:
+            self._publish(entry)
+        else:
+            self._loop.call_soon_threadsafe(self._publish, entry)
+
+    def _publish(self, entry: dict) -> None:
+        """Runs on the event loop: never blocks, drops subscribers that fell behind"""
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                sub.dropped = True
+                self.unsubscribe(sub)
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)   # wakes the stream so it can close
@@ -1,41 +1,51 @@
-import os, json, hashlib
-from cryptography.fernet import Fernet
+import os
+from ben_envelope import ReceiptCodec, load_codec
+from ben_hash import receipt_hash
 
 APP_ROOT = os.path.expanduser("~/AuditaAI")
 RECEIPTS_DIR = os.path.join(APP_ROOT, "receipts")
 KEY_PATH = os.path.join(APP_ROOT, "ben_governance", "ben.key")
 
-def load_key():
-    return Fernet(open(KEY_PATH, "rb").read())
+def load_key(key_path: str = KEY_PATH):
+    return load_codec(key_path)
 
-def decrypt(path: str) -> dict:
-    f = load_key()
-    return json.loads(f.decrypt(open(path, "rb").read()).decode())
+def decrypt(path: str, f: ReceiptCodec = None) -> dict:
+    f = f or load_key()
+    return f.open(open(path, "rb").read())
 
 def sha(r: dict) -> str:
-    body = {k: v for k, v in r.items() if k != "self_hash"}
-    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    try:
+        return receipt_hash(r)   # per-receipt hash_alg, so mixed chains verify
+    except ValueError:
+        return None
 
-files = sorted([p for p in os.listdir(RECEIPTS_DIR) if p.endswith(".ben")])
-assert files, "No receipts found"
+def verify_chain(receipts_dir: str = RECEIPTS_DIR, key_path: str = KEY_PATH, verbose: bool = True) -> bool:
+    files = sorted([p for p in os.listdir(receipts_dir) if p.endswith(".ben")])
+    assert files, "No receipts found"
 
-prev_self = None
-prev_lamport = None
-ok = True
+    f = load_key(key_path)  # once, not per receipt
+    prev_self = None
+    prev_lamport = None
+    ok = True
 
-for fname in files:
-    path = os.path.join(RECEIPTS_DIR, fname)
-    r = decrypt(path)
-    calc = sha(r)
+    for fname in files:
+        path = os.path.join(receipts_dir, fname)
+        r = decrypt(path, f)
+        calc = sha(r)
 
-    h_ok = (calc == r.get("self_hash"))
-    chain_ok = (prev_self is None) or (r.get("prev_hash") == prev_self)
-    lamport_ok = (prev_lamport is None) or (r.get("lamport_counter") == prev_lamport + 1)
+        h_ok = (calc == r.get("self_hash"))
+        chain_ok = (prev_self is None) or (r.get("prev_hash") == prev_self)
+        lamport_ok = (prev_lamport is None) or (r.get("lamport_counter") == prev_lamport + 1)
 
-    print(f"{fname}: hash_ok={h_ok} chain_ok={chain_ok} lamport_ok={lamport_ok} event={r.get('event')}")
-    ok = ok and h_ok and chain_ok and lamport_ok
+        if verbose:
+            print(f"{fname}: hash_ok={h_ok} chain_ok={chain_ok} lamport_ok={lamport_ok} event={r.get('event')}")
+        ok = ok and h_ok and chain_ok and lamport_ok
 
-    prev_self = r.get("self_hash")
-    prev_lamport = r.get("lamport_counter")
+        prev_self = r.get("self_hash")
+        prev_lamport = r.get("lamport_counter")
 
-print("✅ CHAIN PASS" if ok else "❌ CHAIN FAIL")
+    return ok
+
+if __name__ == "__main__":
+    ok = verify_chain()
+    print("✅ CHAIN PASS" if ok else "❌ CHAIN FAIL")
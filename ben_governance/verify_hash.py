@@ -1,5 +1,6 @@
-import os, json, hashlib
-from cryptography.fernet import Fernet
+import os
+from ben_envelope import load_codec
+from ben_hash import receipt_hash
 
 KEY_PATH = os.path.expanduser("~/AuditaAI/ben_governance/ben.key")
 RECENTS = os.path.expanduser("~/AuditaAI/receipts")
@@ -7,9 +8,7 @@ RECENTS = os.path.expanduser("~/AuditaAI/receipts")
 print("🔍 Loading key and receipts...")
 print("Looking in:", RECENTS)
 
-with open(KEY_PATH, "rb") as f:
-    key = f.read()
-f = Fernet(key)
+f = load_codec(KEY_PATH)
 
 files = [p for p in os.listdir(RECENTS) if p.endswith(".ben")]
 print("Found files:", files)
@@ -19,13 +18,11 @@ if not files:
 path = os.path.join(RECENTS, sorted(files)[-1])
 print("Verifying:", path)
 
-blob = f.decrypt(open(path, "rb").read()).decode()
-receipt = json.loads(blob)
+receipt = f.open(open(path, "rb").read())
 
-calc = hashlib.sha256(
-    json.dumps({k: v for k, v in receipt.items() if k != "self_hash"}, sort_keys=True).encode()
-).hexdigest()
+calc = receipt_hash(receipt)
 
-print("\nStored self_hash:", receipt["self_hash"])
+print("\nHash algorithm :", receipt.get("hash_alg", "sha256"))
+print("Stored self_hash:", receipt["self_hash"])
 print("Calculated     :", calc)
 print("✅ PASS" if calc == receipt["self_hash"] else "❌ FAIL")
@@ -0,0 +1,103 @@
+"""
+Policy Engine Benchmark
+Version: Band-1.3 (vΩ.9)
+
+Measures compile time and batch evaluation throughput of the compiled policy
+engine with thousands of rules over thousands of receipts.
+
+    PYTHONPATH=src python benchmarks/bench_policy_engine.py --rules 5000 --receipts 20000
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from research_station.policy_engine import CompiledPolicySet
+from research_station.types import Policy, PolicyRule
+
+
+FIELDS = ["receipt_type", "band", "track", "payload.score", "payload.model", "payload.tokens"]
+
+
+def make_policies(rule_count: int, policy_size: int = 50, seed: int = 7) -> List[Policy]:
+    """Synthetic policies spread across a handful of receipt fields"""
+    rng = random.Random(seed)
+    policies = []
+    for p in range(0, rule_count, policy_size):
+        rules = []
+        for _ in range(min(policy_size, rule_count - p)):
+            field = rng.choice(FIELDS)
+            if field in ("payload.score", "payload.tokens"):
+                operator = rng.choice(["gt", "gte", "lt", "lte", "eq"])
+                value = str(rng.randint(0, 10_000))
+            else:
+                operator = rng.choice(["eq", "ne", "contains", "in", "regex"])
+                value = f"value-{rng.randint(0, 500)}"
+            rules.append(
+                PolicyRule(
+                    field=field,
+                    operator=operator,
+                    value=value,
+                    action=rng.choice(["allow", "flag", "deny"]),
+                    priority=rng.randint(0, 100),
+                )
+            )
+        policies.append(Policy(id=f"p{p}", name=f"policy-{p}", description="bench", rules=rules))
+    return policies
+
+
+def make_receipts(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """Synthetic canonical receipts"""
+    rng = random.Random(seed)
+    return [
+        {
+            "receipt_type": "Δ-ACT-REQUEST",
+            "lamport": i,
+            "band": f"band-{rng.randint(0, 9)}",
+            "track": rng.choice(["track-a", "track-b", "track-c"]),
+            "payload": {
+                "score": rng.randint(0, 10_000),
+                "model": f"value-{rng.randint(0, 500)}",
+                "tokens": rng.randint(0, 10_000),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def run(rules: int, receipts: int) -> Dict[str, float]:
+    policies = make_policies(rules)
+    batch = make_receipts(receipts)
+
+    start = time.perf_counter()
+    compiled = CompiledPolicySet(policies, default_action="allow")
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled.evaluate_batch(batch)
+    eval_s = time.perf_counter() - start
+
+    return {
+        "rules": compiled.rule_count,
+        "receipts": receipts,
+        "compile_ms": compile_s * 1000,
+        "receipts_per_s": receipts / eval_s if eval_s else float("inf"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--receipts", type=int, default=20000)
+    args = parser.parse_args()
+
+    result = run(args.rules, args.receipts)
+    print(
+        f"{result['rules']} rules compiled in {result['compile_ms']:.1f} ms; "
+        f"{result['receipts_per_s']:,.0f} receipts/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,560 @@
+"""
+Audit Service Load Test
+Version: Band-1.3 (vΩ.9)
+
+Closed-loop async load generator for the ben_governance audit service and the
+BEN ingestion front end. A synthetic encrypted receipt store is written to a
+temporary directory, then a weighted mix of requests is replayed at each
+concurrency level for a fixed duration. Latency percentiles (p50/p95/p99),
+throughput and error rates are reported per level and per operation.
+
+Requests go either straight to the ASGI apps in this process, or over HTTP
+to local uvicorn servers started for the run. Nothing external is needed:
+ingestion runs against an in-memory stand-in for `AuditService`.
+
+    PYTHONPATH=src python benchmarks/load_harness.py --store-size 2000 \
+        --concurrency 1,8,32 --duration 5 --mix verify-path=4,list=3,registry=1,verify-file=1,ingest=1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from cryptography.fernet import Fernet
+
+from ben.ben_event import BENEventProcessor
+from ben.ingest import create_ingest_app
+
+from synthetic import synthetic_ben_receipts, write_ben_files
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(BENCH_DIR, "..", "..", ".."))
+GOVERNANCE_DIR = os.path.join(REPO_ROOT, "ben_governance")
+DEFAULT_MIX = "verify-path=4,list=3,registry=1,verify-file=1,ingest=1"
+PERCENTILES = (50, 95, 99)
+
+# (status, body) of one request
+Response = Tuple[int, bytes]
+
+
+class MemoryAuditService:
+    """In-memory stand-in for the `AuditService` ingestion contract"""
+
+    def __init__(self):
+        self.processor = BENEventProcessor()
+        self.stored: set = set()
+
+    async def process_events(self, events):
+        receipts = self.processor.create_receipts(
+            [
+                {"receipt_type": e.receipt_type, "band": e.band, "track": e.track, "trace_id": e.trace_id}
+                for e in events
+            ]
+        )
+        self.stored.update(r.self_hash for r in receipts)
+        return receipts
+
+    async def ingest_receipts(self, receipts, station_id=None):
+        statuses = []
+        for receipt in receipts:
+            statuses.append("duplicate" if receipt.self_hash in self.stored else "stored")
+            self.stored.add(receipt.self_hash)
+        return statuses
+
+
+def ingest_app():
+    """uvicorn factory for the ingestion front end"""
+    return create_ingest_app(MemoryAuditService())
+
+
+# --- synthetic store ---
+
+class Store:
+    """A temporary ~/AuditaAI tree holding the key and encrypted receipts"""
+
+    def __init__(self, root: str, size: int, seed: int = 0):
+        self.home = root
+        self.receipts_dir = os.path.join(root, "AuditaAI", "receipts")
+        key_dir = os.path.join(root, "AuditaAI", "ben_governance")
+        os.makedirs(key_dir, exist_ok=True)
+        self.key = Fernet.generate_key()
+        with open(os.path.join(key_dir, "ben.key"), "wb") as w:
+            w.write(self.key)
+        fernet = Fernet(self.key)
+        self.receipts = list(synthetic_ben_receipts(size, seed=seed))
+        write_ben_files(self.receipts_dir, self.receipts, fernet)
+        self.names = sorted(n for n in os.listdir(self.receipts_dir) if n.endswith(".ben"))
+        # Upload bodies for /verify-file, encrypted once
+        self.tokens = [fernet.encrypt(json.dumps(r).encode()) for r in self.receipts[:256]]
+
+
+def load_governance_service(store: Store) -> Any:
+    """Import ben_governance/audit_service.py with ~ pointing at the store"""
+    if GOVERNANCE_DIR not in sys.path:       # it imports its siblings by plain name
+        sys.path.insert(0, GOVERNANCE_DIR)
+    home = os.environ.get("HOME")
+    os.environ["HOME"] = store.home          # its paths are resolved at import time
+    try:
+        spec = importlib.util.spec_from_file_location(
+            f"ben_governance_audit_service_{uuid.uuid4().hex}",
+            os.path.join(GOVERNANCE_DIR, "audit_service.py"),
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if home is None:
+            os.environ.pop("HOME", None)
+        else:
+            os.environ["HOME"] = home
+    return module
+
+
+# --- operations ---
+
+class Request:
+    def __init__(self, target: str, method: str, path: str, body: bytes = b"",
+                 headers: Optional[Dict[str, str]] = None):
+        self.target = target
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+
+
+def _multipart(field: str, filename: str, content: bytes) -> Tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _ingest_body(rng: random.Random, events: int) -> bytes:
+    lines = [
+        json.dumps({
+            "receipt_type": "Δ-ACT-REQUEST",
+            "band": "band-1",
+            "track": "track-a",
+            "trace_id": f"load-{rng.randrange(1000)}",
+        })
+        for _ in range(events)
+    ]
+    return "\n".join(lines).encode()
+
+
+def build_operations(store: Store, ingest_events: int) -> Dict[str, Callable[[random.Random], Request]]:
+    """Request builders by operation name"""
+
+    def verify_path(rng):
+        body = json.dumps({"path": rng.choice(store.names)}).encode()
+        return Request("governance", "POST", "/verify-path", body, {"content-type": "application/json"})
+
+    def verify_file(rng):
+        body, content_type = _multipart("file", f"{uuid.uuid4().hex}.ben", rng.choice(store.tokens))
+        return Request("governance", "POST", "/verify-file", body, {"content-type": content_type})
+
+    return {
+        "verify-path": verify_path,
+        "verify-file": verify_file,
+        "registry": lambda rng: Request("governance", "GET", "/registry"),
+        "list": lambda rng: Request("governance", "GET", "/list"),
+        "ingest": lambda rng: Request(
+            "ingest", "POST", "/ingest", _ingest_body(rng, ingest_events),
+            {"content-type": "application/x-ndjson"},
+        ),
+    }
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    if not mix or any(w < 0 for w in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"invalid mix: {spec!r}")
+    return mix
+
+
+# --- transports ---
+
+class InProcessClient:
+    """Calls ASGI apps directly, running their lifespan around the test"""
+
+    def __init__(self, apps: Dict[str, Any]):
+        self.apps = apps
+        self._lifespans: List[Tuple[asyncio.Queue, asyncio.Task]] = []
+
+    async def start(self) -> None:
+        for app in self.apps.values():
+            inbox: asyncio.Queue = asyncio.Queue()
+            started = asyncio.get_running_loop().create_future()
+
+            async def send(message, started=started):
+                if message["type"].startswith("lifespan.startup") and not started.done():
+                    started.set_result(message)
+
+            scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+            task = asyncio.create_task(app(scope, inbox.get, send))
+            await inbox.put({"type": "lifespan.startup"})
+            message = await started
+            if message["type"] != "lifespan.startup.complete":
+                raise RuntimeError(f"app failed to start: {message.get('message')}")
+            self._lifespans.append((inbox, task))
+
+    async def stop(self) -> None:
+        for inbox, task in self._lifespans:
+            await inbox.put({"type": "lifespan.shutdown"})
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(task, 5)
+
+    def session(self) -> "InProcessClient":
+        return self
+
+    async def close(self) -> None:
+        pass
+
+    async def request(self, req: Request) -> Response:
+        path, _, query = req.path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": req.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"loadtest")]
+            + [(k.lower().encode(), v.encode()) for k, v in req.headers.items()]
+            + [(b"content-length", str(len(req.body)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+            "state": {},
+        }
+        sent = False
+        done = asyncio.Event()
+        status = 0
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": req.body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    done.set()
+
+        await self.apps[req.target](scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class HttpSession:
+    """One keep-alive HTTP/1.1 connection per target"""
+
+    def __init__(self, ports: Dict[str, int]):
+        self.ports = ports
+        self._conns: Dict[str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+    async def close(self) -> None:
+        for _, writer in self._conns.values():
+            writer.close()
+        self._conns.clear()
+
+    async def request(self, req: Request) -> Response:
+        if req.target not in self._conns:
+            self._conns[req.target] = await asyncio.open_connection("127.0.0.1", self.ports[req.target])
+        reader, writer = self._conns[req.target]
+        head = [f"{req.method} {req.path} HTTP/1.1", "Host: 127.0.0.1", f"Content-Length: {len(req.body)}"]
+        head += [f"{k}: {v}" for k, v in req.headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + req.body)
+        try:
+            await writer.drain()
+            return await self._read_response(reader)
+        except BaseException:
+            writer.close()
+            del self._conns[req.target]
+            raise
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Response:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            return status, b"".join(chunks)
+        return status, await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+class UvicornClient:
+    """Serves each target from its own local uvicorn process"""
+
+    def __init__(self, store: Store, targets: List[str]):
+        self.store = store
+        self.targets = targets
+        self.ports: Dict[str, int] = {}
+        self._procs: List[subprocess.Popen] = []
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    async def start(self) -> None:
+        src = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+        for target in self.targets:
+            port = self._free_port()
+            env = dict(os.environ, HOME=self.store.home)
+            if target == "governance":
+                cmd = ["audit_service:app"]
+                env["PYTHONPATH"] = GOVERNANCE_DIR
+            else:
+                cmd = ["--factory", "load_harness:ingest_app"]
+                env["PYTHONPATH"] = os.pathsep.join([BENCH_DIR, src, env.get("PYTHONPATH", "")])
+            self._procs.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", *cmd, "--port", str(port), "--log-level", "warning"],
+                env=env, stdout=subprocess.DEVNULL,
+            ))
+            self.ports[target] = port
+            await self._wait_ready(port)
+
+    @staticmethod
+    async def _wait_ready(port: int, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                session = HttpSession({"t": port})
+                status, _ = await session.request(Request("t", "GET", "/health"))
+                await session.close()
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            await asyncio.sleep(0.1)
+        raise RuntimeError(f"uvicorn on port {port} did not become ready")
+
+    async def stop(self) -> None:
+        for proc in self._procs:
+            proc.terminate()
+        for proc in self._procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    def session(self) -> HttpSession:
+        return HttpSession(self.ports)
+
+
+# --- load generation ---
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Percentiles in milliseconds, throughput and error rate"""
+    count = len(latencies)
+    result: Dict[str, Any] = {
+        "requests": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput": count / elapsed if elapsed else 0.0,
+    }
+    values = np.percentile(np.asarray(latencies) * 1000, PERCENTILES) if count else [0.0] * len(PERCENTILES)
+    for p, value in zip(PERCENTILES, values):
+        result[f"p{p}_ms"] = float(value)
+    return result
+
+
+async def run_level(
+    client: Any,
+    operations: Dict[str, Callable[[random.Random], Request]],
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """`concurrency` workers issue back-to-back requests for `duration` seconds"""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+    error_kinds: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed * 1_000_003 + index)
+        session = client.session()
+        try:
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                req = operations[name](rng)
+                start = time.perf_counter()
+                try:
+                    status, _ = await session.request(req)
+                    failed = status >= 400
+                    kind = f"http_{status}"
+                except Exception as e:
+                    failed, kind = True, type(e).__name__
+                samples[name].append(time.perf_counter() - start)
+                if failed:
+                    errors[name] += 1
+                    error_kinds[kind] = error_kinds.get(kind, 0) + 1
+        finally:
+            await session.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    overall = summarize([x for n in names for x in samples[n]], sum(errors.values()), elapsed)
+    overall["concurrency"] = concurrency
+    overall["error_kinds"] = error_kinds
+    overall["operations"] = {
+        n: summarize(samples[n], errors[n], elapsed) for n in names if samples[n]
+    }
+    return overall
+
+
+async def run_load_test(
+    store_size: int,
+    concurrency: List[int],
+    duration: float,
+    mix: Dict[str, float],
+    mode: str = "inprocess",
+    ingest_events: int = 10,
+    workdir: Optional[str] = None,
+    seed: int = 0,
+    report: Callable[[Dict[str, Any]], None] = lambda level: None,
+) -> Dict[str, Any]:
+    """Build a store, serve the needed targets and run every concurrency level"""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        store = Store(tmp, store_size, seed=seed)
+        operations = build_operations(store, ingest_events)
+        unknown = set(mix) - set(operations)
+        if unknown:
+            raise ValueError(f"unknown operations: {', '.join(sorted(unknown))}")
+        targets = sorted({operations[name](random.Random(0)).target for name in mix})
+
+        if mode == "inprocess":
+            apps = {}
+            if "governance" in targets:
+                apps["governance"] = load_governance_service(store).app
+            if "ingest" in targets:
+                apps["ingest"] = ingest_app()
+            client: Any = InProcessClient(apps)
+        elif mode == "uvicorn":
+            client = UvicornClient(store, targets)
+        else:
+            raise ValueError(f"unknown mode: {mode}")
+
+        levels = []
+        await client.start()
+        try:
+            for level in concurrency:
+                result = await run_level(client, operations, mix, level, duration, seed=seed)
+                report(result)
+                levels.append(result)
+        finally:
+            await client.stop()
+
+    return {
+        "meta": {
+            "mode": mode,
+            "store_size": store_size,
+            "duration": duration,
+            "mix": mix,
+            "ingest_events": ingest_events,
+            "python": sys.version.split()[0],
+        },
+        "levels": levels,
+    }
+
+
+def _print_level(level: Dict[str, Any]) -> None:
+    print(
+        f"c={level['concurrency']:<4} {level['throughput']:>9,.0f} req/s  "
+        f"p50 {level['p50_ms']:>8.2f} ms  p95 {level['p95_ms']:>8.2f} ms  "
+        f"p99 {level['p99_ms']:>8.2f} ms  errors {level['error_rate']:.2%}"
+    )
+    for name, op in level["operations"].items():
+        print(
+            f"    {name:<12} {op['requests']:>8,}  p50 {op['p50_ms']:>8.2f}  "
+            f"p95 {op['p95_ms']:>8.2f}  p99 {op['p99_ms']:>8.2f}  errors {op['error_rate']:.2%}"
+        )
+    if level["error_kinds"]:
+        print(f"    errors by kind: {level['error_kinds']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--store-size", type=int, default=1000, help="receipts in the synthetic store")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight pairs")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--ingest-events", type=int, default=10, help="events per /ingest request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--workdir", help="where to create the synthetic store")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    concurrency = [int(c) for c in args.concurrency.split(",") if c]
+
+    result = asyncio.run(run_load_test(
+        args.store_size, concurrency, args.duration, mix,
+        mode=args.mode, ingest_events=args.ingest_events,
+        workdir=args.workdir, seed=args.seed, report=_print_level,
+    ))
+    if args.output:
+        with open(args.output, "w") as w:
+            json.dump(result, w, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+"""
+BEN Hot-Path Benchmark Suite
+Version: Band-1.3 (vΩ.9)
+
+Times the receipt hot paths over synthetic chains of configurable size,
+writes the results as JSON and compares them with a stored baseline. Exits
+non-zero when any case got slower than the baseline by more than the
+regression threshold.
+
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --sizes 1000,10000 \
+        --baseline benchmarks/baselines/reference.json --threshold 0.25
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cryptography.fernet import Fernet
+
+from ben.ben_event import BENEventProcessor
+from ben.dedup import DuplicateFilter
+from ben.field_engine import FieldEngine
+from ben.hashing import BLAKE2B_256, DEFAULT_HASH_ALG, SHA256
+from ben.receipt_utils import canonicalize_receipt
+from ben.types import BandLevel, ReceiptType, Track
+from ben.verify_chain import ChainValidator, ChainVerifier, default_rules
+from ben.verify_hash import HashVerifier
+
+from synthetic import (
+    synthetic_ben_receipts,
+    synthetic_chain,
+    synthetic_field_points,
+    synthetic_public_key,
+    take,
+    write_ben_files,
+)
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+GOVERNANCE_DIR = os.path.join(REPO_ROOT, "ben_governance")
+PROOF_SAMPLES = 100
+
+# A case prepares its inputs for a size and returns the timed callable
+Case = Callable[["Inputs", int], Callable[[], Any]]
+
+
+class Inputs:
+    """Synthetic inputs shared between cases, generated once per size"""
+
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self.key = Fernet.generate_key()
+        self.fernet = Fernet(self.key)
+        self._chains: Dict[Tuple[int, str], list] = {}
+        self._ben: Dict[int, list] = {}
+        self._tokens: Dict[int, List[bytes]] = {}
+        self._dirs: Dict[int, str] = {}
+
+    def chain(self, size: int, hash_alg: str = DEFAULT_HASH_ALG) -> list:
+        if (size, hash_alg) not in self._chains:
+            self._chains[size, hash_alg] = take(synthetic_chain(size, hash_alg=hash_alg), size)
+        return self._chains[size, hash_alg]
+
+    def ben_receipts(self, size: int) -> list:
+        if size not in self._ben:
+            self._ben[size] = take(synthetic_ben_receipts(size), size)
+        return self._ben[size]
+
+    def tokens(self, size: int) -> List[bytes]:
+        if size not in self._tokens:
+            self._tokens[size] = [
+                self.fernet.encrypt(json.dumps(r).encode()) for r in self.ben_receipts(size)
+            ]
+        return self._tokens[size]
+
+    def ben_dir(self, size: int) -> Tuple[str, str]:
+        """Directory of encrypted `.ben` files plus the key file that opens them"""
+        if size not in self._dirs:
+            directory = os.path.join(self.workdir, f"ben-{size}")
+            write_ben_files(directory, self.ben_receipts(size), self.fernet)
+            self._dirs[size] = directory
+        key_path = os.path.join(self.workdir, "ben.key")
+        if not os.path.exists(key_path):
+            with open(key_path, "wb") as w:
+                w.write(self.key)
+        return self._dirs[size], key_path
+
+
+def _create_receipt(inputs: Inputs, size: int) -> Callable[[], Any]:
+    def run():
+        processor = BENEventProcessor()
+        for i in range(size):
+            processor.create_receipt(
+                receipt_type=ReceiptType.ACT_REQUEST,
+                band=BandLevel.BAND_1,
+                track=Track.TRACK_A,
+                trace_id=f"trace-{i % 1000}",
+            )
+    return run
+
+
+def _verify_chain(inputs: Inputs, size: int) -> Callable[[], Any]:
+    receipts = inputs.chain(size)
+    verifier = ChainVerifier()
+
+    def run():
+        ok, error = verifier.verify_chain(receipts)
+        assert ok, error
+    return run
+
+
+def _validate_chain(inputs: Inputs, size: int) -> Callable[[], Any]:
+    """Order, links, self-hashes and signatures in one pass"""
+    receipts = inputs.chain(size)
+    validator = ChainValidator(default_rules(synthetic_public_key()))
+
+    def run():
+        report = validator.validate(receipts)
+        assert report.is_valid, report.error
+    return run
+
+
+def _chain_hashing(hash_alg: str) -> Case:
+    """Re-hash every receipt, check the links and build the Merkle root"""
+    def case(inputs: Inputs, size: int) -> Callable[[], Any]:
+        receipts = inputs.chain(size, hash_alg)
+        hashes = [r.self_hash for r in receipts]
+        verifier = ChainVerifier()
+
+        def run():
+            ok, error = verifier.verify_chain(receipts, verify_hashes=True)
+            assert ok, error
+            HashVerifier.compute_merkle_root(hashes, hash_alg=hash_alg)
+        return run
+    return case
+
+
+def _compute_merkle_root(inputs: Inputs, size: int) -> Callable[[], Any]:
+    hashes = [r.self_hash for r in inputs.chain(size)]
+    return lambda: HashVerifier.compute_merkle_root(hashes)
+
+
+def _generate_merkle_proof(inputs: Inputs, size: int) -> Callable[[], Any]:
+    hashes = [r.self_hash for r in inputs.chain(size)]
+    step = max(1, size // PROOF_SAMPLES)
+    targets = hashes[::step][:PROOF_SAMPLES]
+
+    def run():
+        for target in targets:
+            HashVerifier.generate_merkle_proof(hashes, target)
+    return run
+
+
+def _duplicate_filter(inputs: Inputs, size: int) -> Callable[[], Any]:
+    """Replay check: every hash is already stored, so all must hit"""
+    hashes = [r.self_hash for r in inputs.chain(size)]
+    dedup = DuplicateFilter(initial_capacity=max(size, 1024))
+    dedup.add_many(hashes)
+
+    def run():
+        assert all(dedup.might_contain_many(hashes))
+    return run
+
+
+def _canonicalize_receipt(inputs: Inputs, size: int) -> Callable[[], Any]:
+    receipts = inputs.chain(size)
+
+    def run():
+        for receipt in receipts:
+            canonicalize_receipt(receipt)
+    return run
+
+
+def _fernet_encrypt(inputs: Inputs, size: int) -> Callable[[], Any]:
+    payloads = [json.dumps(r).encode() for r in inputs.ben_receipts(size)]
+    encrypt = inputs.fernet.encrypt
+
+    def run():
+        for payload in payloads:
+            encrypt(payload)
+    return run
+
+
+def _fernet_decrypt(inputs: Inputs, size: int) -> Callable[[], Any]:
+    tokens = inputs.tokens(size)
+    decrypt = inputs.fernet.decrypt
+
+    def run():
+        for token in tokens:
+            json.loads(decrypt(token))
+    return run
+
+
+def _envelope_codec(inputs: Inputs, fmt: str) -> Any:
+    return _load_governance_module("ben_envelope").ReceiptCodec([inputs.key], fmt)
+
+
+def _receipt_seal(fmt: str) -> Case:
+    """Serialize and encrypt governance receipts as Fernet tokens or AEAD envelopes"""
+    def case(inputs: Inputs, size: int) -> Callable[[], Any]:
+        receipts = inputs.ben_receipts(size)
+        codec = _envelope_codec(inputs, fmt)
+
+        def run():
+            for receipt in receipts:
+                codec.seal(receipt)
+        run.bytes_per_op = sum(len(codec.seal(r)) for r in receipts) / len(receipts)
+        return run
+    return case
+
+
+def _receipt_open(fmt: str) -> Case:
+    """Decrypt and parse receipts, detecting the format per blob"""
+    def case(inputs: Inputs, size: int) -> Callable[[], Any]:
+        codec = _envelope_codec(inputs, fmt)
+        blobs = [codec.seal(r) for r in inputs.ben_receipts(size)]
+
+        def run():
+            for blob in blobs:
+                codec.open(blob)
+        run.bytes_per_op = sum(map(len, blobs)) / len(blobs)
+        return run
+    return case
+
+
+def _field_engine(window: int, stride: int) -> Case:
+    """Window summaries of interleaved field points fed in batches of 100k"""
+    def case(inputs: Inputs, size: int) -> Callable[[], Any]:
+        field_ids, t, values = synthetic_field_points(size)
+        batch = 100_000
+
+        def run():
+            engine = FieldEngine(window=window, stride=stride, max_fields=128)
+            for start in range(0, size, batch):
+                end = start + batch
+                engine.add_many(field_ids[start:end], t[start:end], values[start:end])
+            engine.take(partial=True)
+        return run
+    return case
+
+
+def _load_governance_module(name: str) -> Any:
+    if GOVERNANCE_DIR not in sys.path:       # scripts import their siblings by plain name
+        sys.path.insert(0, GOVERNANCE_DIR)
+    spec = importlib.util.spec_from_file_location(
+        f"ben_governance_{name}", os.path.join(GOVERNANCE_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _governance_verify_chain(inputs: Inputs, size: int) -> Callable[[], Any]:
+    module = _load_governance_module("verify_chain")
+    directory, key_path = inputs.ben_dir(size)
+
+    def run():
+        assert module.verify_chain(directory, key_path, verbose=False)
+    return run
+
+
+CASES: Dict[str, Case] = {
+    "create_receipt": _create_receipt,
+    "verify_chain": _verify_chain,
+    "validate_chain": _validate_chain,
+    "chain_hashing_sha256": _chain_hashing(SHA256),
+    "chain_hashing_blake2b": _chain_hashing(BLAKE2B_256),
+    "compute_merkle_root": _compute_merkle_root,
+    "generate_merkle_proof": _generate_merkle_proof,
+    "duplicate_filter": _duplicate_filter,
+    "canonicalize_receipt": _canonicalize_receipt,
+    "fernet_encrypt": _fernet_encrypt,
+    "fernet_decrypt": _fernet_decrypt,
+    "receipt_seal_fernet": _receipt_seal("fernet"),
+    "receipt_seal_aesgcm": _receipt_seal("aes-gcm"),
+    "receipt_seal_chacha20": _receipt_seal("chacha20"),
+    "receipt_open_fernet": _receipt_open("fernet"),
+    "receipt_open_aesgcm": _receipt_open("aes-gcm"),
+    "receipt_open_chacha20": _receipt_open("chacha20"),
+    "governance_verify_chain": _governance_verify_chain,
+    "field_engine_tumbling": _field_engine(1024, 1024),
+    "field_engine_sliding": _field_engine(1024, 128),
+}
+
+# Work items per run when a case does not process the whole chain
+OPS = {"generate_merkle_proof": lambda size: min(size, PROOF_SAMPLES)}
+
+
+def run_suite(
+    sizes: List[int],
+    cases: List[str],
+    repeat: int = 3,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run every case at every size; keeps the best of `repeat` timings"""
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        inputs = Inputs(tmp)
+        for name in cases:
+            for size in sizes:
+                fn = CASES[name](inputs, size)
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - start)
+                ops = OPS.get(name, lambda n: n)(size)
+                result = results.setdefault(name, {})[str(size)] = {
+                    "seconds": best,
+                    "ops": ops,
+                    "ops_per_s": ops / best if best else float("inf"),
+                }
+                line = f"{name:<24} {size:>10,}  {best * 1000:>10.1f} ms  {ops / best:>12,.0f} ops/s"
+                # Cases that produce stored artifacts also report their size
+                if hasattr(fn, "bytes_per_op"):
+                    result["bytes_per_op"] = fn.bytes_per_op
+                    line += f"  {fn.bytes_per_op:>8,.0f} B/op"
+                print(line)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    """Cases whose throughput fell more than `threshold` below the baseline"""
+    regressions = []
+    for name, by_size in current["results"].items():
+        for size, result in by_size.items():
+            reference = baseline.get("results", {}).get(name, {}).get(size)
+            if reference is None:
+                continue
+            change = result["ops_per_s"] / reference["ops_per_s"] - 1
+            if change < -threshold:
+                regressions.append(
+                    f"{name}@{size}: {result['ops_per_s']:,.0f} ops/s vs "
+                    f"{reference['ops_per_s']:,.0f} baseline ({change:+.1%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated chain sizes")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated case names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed fractional throughput drop before failing")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="overwrite --baseline with this run instead of comparing")
+    parser.add_argument("--workdir", help="where to write temporary .ben files")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s.replace("_", "")) for s in args.sizes.split(",") if s]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    current = run_suite(sizes, cases, repeat=args.repeat, workdir=args.workdir)
+    if args.output:
+        with open(args.output, "w") as w:
+            json.dump(current, w, indent=2)
+
+    if args.baseline and args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as w:
+            json.dump(current, w, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,12 +11,37 @@ from .types import (
     Track,
     ReceiptType,
     BaseReceipt,
+    EventRequest,
     CRIESMetrics,
     StabilityMetrics
 )
-from .verify_chain import ChainVerifier
-from .verify_hash import HashVerifier
-from .receipt_utils import canonicalize_receipt
+from .verify_chain import ChainValidator, ChainVerifier, ValidationReport
+from .verify_hash import HashVerifier, MerkleAccumulator
+from .receipt_utils import canonicalize_receipt, canonicalize_receipts
+from .export import ExportManifest, ReceiptExporter
+from .shards import ShardAnchor, ShardedEventProcessor
+from .trace_index import TraceIndex
+from .clock_sync import ClockSync, DirectoryHeadTransport, InMemoryHeadTransport
+from .quota import QuotaExceededError, QuotaStore, QuotaTracker
+from .metrics import REGISTRY as METRICS, MetricsRegistry
+from .rollups import MetricBucket, MetricRollupStore, RollupPolicy
+from .dedup import DuplicateFilter
+from .state import load_signing_key, recover_head
+from .importer import ImportReport, ReceiptImporter
+from .replication import (
+    DirectoryLogTransport,
+    InMemoryLogTransport,
+    LogServer,
+    ReadReplica,
+    ReplicaWindowError,
+    ReplicationLog,
+    SocketLogTransport,
+)
+from .witness import WitnessAggregator, WitnessClaim, WitnessOutcome
+from .field_engine import FieldEngine, FieldWindow
+from .db import DataAccess, DeadlineExceeded, PartialWriteError, PoolConfig, QueryStats, deadline
+from .spot_check import IntegritySpotChecker, Mismatch, SpotCheckBudget, SpotCheckCoverage
+from .hashing import BLAKE2B_256, DEFAULT_HASH_ALG, HASH_ALGORITHMS, SHA256
 
 __all__ = [
     'AuditService',
@@ -27,12 +52,64 @@ __all__ = [
     'Track',
     'ReceiptType',
     'BaseReceipt',
+    'EventRequest',
     'CRIESMetrics',
     'StabilityMetrics',
     'ChainVerifier',
+    'ChainValidator',
+    'ValidationReport',
     'HashVerifier'
     ,
-    'canonicalize_receipt'
+    'canonicalize_receipt',
+    'canonicalize_receipts',
+    'ExportManifest',
+    'ReceiptExporter',
+    'MerkleAccumulator',
+    'ShardAnchor',
+    'ShardedEventProcessor',
+    'ClockSync',
+    'DirectoryHeadTransport',
+    'InMemoryHeadTransport',
+    'TraceIndex',
+    'QuotaExceededError',
+    'QuotaStore',
+    'QuotaTracker',
+    'MetricBucket',
+    'MetricRollupStore',
+    'RollupPolicy',
+    'METRICS',
+    'MetricsRegistry',
+    'SHA256',
+    'BLAKE2B_256',
+    'DEFAULT_HASH_ALG',
+    'HASH_ALGORITHMS',
+    'DuplicateFilter',
+    'load_signing_key',
+    'recover_head',
+    'ImportReport',
+    'ReceiptImporter',
+    'ReplicationLog',
+    'ReadReplica',
+    'ReplicaWindowError',
+    'InMemoryLogTransport',
+    'DirectoryLogTransport',
+    'SocketLogTransport',
+    'LogServer',
+    'WitnessAggregator',
+    'WitnessClaim',
+    'WitnessOutcome',
+    'FieldEngine',
+    'FieldWindow',
+    'DataAccess',
+    'DeadlineExceeded',
+    'PartialWriteError',
+    'PoolConfig',
+    'QueryStats',
+    'deadline',
+    'IntegritySpotChecker',
+    'Mismatch',
+    'SpotCheckBudget',
+    'SpotCheckCoverage'
 ]
 
 __version__ = "1.3.0"
\ No newline at end of file
@@ -3,37 +3,121 @@ Central Governance and Receipt Dispatcher
 Version: Band-1.3 (vΩ.9)
 """
 
-from datetime import datetime
-from typing import List, Optional
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
 
-from prisma import Prisma
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from prisma import Json
 from pydantic import BaseModel
 
 from .ben_event import BENEventProcessor
 from .ben_boot import BENBootSystem, RuntimeConfig
+from .clock_sync import ClockSync, HeadTransport
+from .db import DataAccess, PartialWriteError, PoolConfig
+from .dedup import DuplicateFilter
+from .export import ExportManifest, ReceiptExporter, iter_receipt_rows
+from .hashing import DEFAULT_HASH_ALG
+from .importer import IMPORT_CHAIN_ID
+from .metrics import (
+    REGISTRY,
+    CHAIN_VERIFICATIONS,
+    CHAIN_VERIFY_SECONDS,
+    CRIES_REFRESH_SECONDS,
+    DB_WRITE_FAILURES,
+    DEDUP_CHECKS,
+    DB_WRITE_SECONDS,
+    QUOTA_REJECTIONS,
+    RECEIPTS_MINTED,
+)
+from .quota import QuotaExceededError, QuotaTracker
+from .receipt_utils import cries_from_receipts, receipt_from_row
+from .replication import BLOCK, INGEST, ReplicationLog
+from .rollups import MetricBucket, MetricRollupStore
+from .trace_index import DEFAULT_MAX_TRACES, TraceIndex, TraceProof, TraceTimeline
+from .shards import ANCHOR_CHAIN_ID, ShardAnchor, ShardedEventProcessor, ShardHead
+from .state import HeadRecovery, head_lane, head_upsert, lane_upsert, load_signing_key, recover_head
 from .types import (
     BaseReceipt,
     BandLevel,
     Track,
     ReceiptType,
+    EventRequest,
     CRIESMetrics,
     StabilityMetrics
 )
-from .verify_chain import ChainVerifier
+from .verify_chain import ChainVerifier, SignatureRule
 from .verify_hash import HashVerifier
 
 
+def _same_key(a: ed25519.Ed25519PublicKey, b: ed25519.Ed25519PublicKey) -> bool:
+    raw = (serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return a.public_bytes(*raw) == b.public_bytes(*raw)
+
+
 class AuditService:
     """Central audit service for governance and receipt management"""
 
-    def __init__(self):
-        self.event_processor = BENEventProcessor()
+    # Receipt types that invalidate the cached CRIES metrics
+    _CRIES_TRIGGERS = (
+        ReceiptType.WITNESS_CLAIM,
+        ReceiptType.WITNESS_CONSENSUS,
+        ReceiptType.RISK_GATE,
+    )
+
+    def __init__(
+        self,
+        shards: Optional[ShardedEventProcessor] = None,
+        node_id: Optional[str] = None,
+        quota: Optional[QuotaTracker] = None,
+        hash_alg: str = DEFAULT_HASH_ALG,
+        dedup: Optional[DuplicateFilter] = None,
+        signing_key_path: Optional[str] = None,
+        replication: Optional[ReplicationLog] = None,
+        db_config: Optional[PoolConfig] = None,
+        db: Optional[DataAccess] = None,
+        max_traces: Optional[int] = DEFAULT_MAX_TRACES,
+        ingest_keys: Union[ed25519.Ed25519PublicKey, Mapping[Optional[str], ed25519.Ed25519PublicKey], None] = None,
+        clock_transport: Optional[HeadTransport] = None,
+        clock_interval: float = 0.5,
+    ):
+        # Without a key file every start signs with a fresh key, and restarts
+        # cannot check the stored tail's signature
+        self.signing_key_path = signing_key_path
+        private_key = load_signing_key(signing_key_path) if signing_key_path else None
+        self.event_processor = BENEventProcessor(
+            node_id=node_id, hash_alg=hash_alg, private_key=private_key
+        )
         self.boot_system = BENBootSystem()
         self.chain_verifier = ChainVerifier()
         self.hash_verifier = HashVerifier()
-        self.db = Prisma()
+        self.logger = logging.getLogger("ben.audit")
+        # Pool size and query timeouts; defaults to the BEN_DB_* environment
+        self.db = db if db is not None else DataAccess(config=db_config or PoolConfig.from_env())
+        self.shards = shards
+        # Filled lazily: a trace is read from storage on its first lookup, so
+        # starting does not scan the Receipt table
+        self.trace_index = TraceIndex(max_traces, complete=False)
+        self.quota = quota
+        self.dedup = dedup if dedup is not None else DuplicateFilter()
+        self.rollups = MetricRollupStore(self.db)
+        # Committed blocks are shipped to read-only followers
+        self.replication = replication
+        # Public keys of the nodes whose receipts ingest_receipts accepts, by node_id
+        self._ingest_signatures = SignatureRule(ingest_keys if ingest_keys is not None else {})
         self._current_cries: Optional[CRIESMetrics] = None
         self._current_stability: Optional[StabilityMetrics] = None
+        # One writer per chain, and per lane of ingested receipts; shards are written in parallel
+        self._write_locks: Dict[Any, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._committed_heads: Dict[str, ShardHead] = {}
+        # Other writer nodes of the legacy chain; heads are exchanged under its write lock
+        self.clock_sync = ClockSync(self.event_processor, clock_transport) if clock_transport is not None else None
+        self.clock_interval = clock_interval
+        self._clock_task: Optional[asyncio.Task] = None
 
     async def initialize(self, config: RuntimeConfig):
         """Initialize the audit service"""
@@ -43,6 +127,54 @@ class AuditService:
         # Connect to database
         await self.db.connect()
 
+        # Continue each chain from its stored head instead of forking it
+        await self.recover_heads()
+
+        # Known self_hash values, so replays skip the database
+        await self.rebuild_dedup()
+
+        # Audits already spent today count against each station's quota
+        await self.rebuild_quota()
+
+        # Blocks committed while the transport was down, then ship off the event loop
+        if self.replication is not None:
+            await self.replay_unshipped()
+            self.replication.start()
+
+        # Mint after every peer head already seen, then keep exchanging
+        if self.clock_sync is not None:
+            await self.sync_clock()
+            self._clock_task = asyncio.create_task(self._run_clock_sync())
+
+    async def close(self) -> None:
+        """Stop exchanging clock heads and ship what is still pending to followers"""
+        if self._clock_task is not None:
+            self._clock_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._clock_task
+            self._clock_task = None
+        if self.replication is not None:
+            await self.replication.stop()
+
+    async def sync_clock(self) -> int:
+        """Publish the legacy chain's head and merge peer heads into its clock.
+
+        Runs under the chain's write lock, so a merge never lands between a
+        block's minting and the rewind of a failed write.
+        """
+        if self.clock_sync is None:
+            raise RuntimeError("No clock transport configured")
+        async with self._write_locks[None]:
+            return await asyncio.to_thread(self.clock_sync.exchange)
+
+    async def _run_clock_sync(self) -> None:
+        while True:
+            await asyncio.sleep(self.clock_interval)
+            try:
+                await self.sync_clock()
+            except OSError as exc:
+                self.logger.warning(f"Head exchange failed: {exc}")
+
     async def process_event(
         self,
         receipt_type: ReceiptType,
@@ -52,48 +184,500 @@ class AuditService:
         **kwargs
     ) -> BaseReceipt:
         """Process an event and create a receipt"""
-        # Create receipt
-        receipt = self.event_processor.create_receipt(
-            receipt_type=receipt_type,
-            band=band,
-            track=track,
-            trace_id=trace_id,
-            **kwargs
-        )
+        station_id = kwargs.pop("station_id", None)
+        event = {
+            "receipt_type": receipt_type,
+            "band": band,
+            "track": track,
+            "trace_id": trace_id,
+            **kwargs,
+        }
+        chain_id = self._chain_for({**event, "station_id": station_id})
+        if self.quota is not None and not await asyncio.to_thread(self.quota.try_consume, station_id):
+            QUOTA_REJECTIONS.inc()
+            raise QuotaExceededError(station_id)
 
-        # Store in database
-        await self.db.receipt.create(
-            data={
-                "receipt_type": receipt.receipt_type.value,
-                "lamport": receipt.lamport,
-                "prev_digest": receipt.prev_digest,
-                "self_hash": receipt.self_hash,
-                "trace_id": receipt.trace_id,
-                "timestamp": receipt.timestamp,
-                "actor_signature": receipt.actor_signature,
-                "band": receipt.band.value,
-                "track": receipt.track.value,
-            }
-        )
+        # Create and store receipt
+        [receipt] = await self._mint_block(chain_id, [event], [{"station_id": station_id}])
 
         # Update CRIES metrics if needed
-        if receipt_type in [
-            ReceiptType.WITNESS_CLAIM,
-            ReceiptType.WITNESS_CONSENSUS,
-            ReceiptType.RISK_GATE
-        ]:
+        if receipt_type in self._CRIES_TRIGGERS:
             await self._update_cries_metrics()
 
+        await self._maybe_anchor()
         return receipt
 
+    async def process_events(self, events: List[EventRequest]) -> List[BaseReceipt]:
+        """Mint a batch of events in contiguous Lamport blocks and store them.
+
+        Without sharding the whole batch is one block. With sharding each
+        shard gets its own block and blocks are written concurrently, so a
+        storage failure on one shard does not roll back the others: it
+        raises `PartialWriteError` with the receipts of the stored blocks
+        and the error of every other event. A batch that is a single block
+        raises its storage error as is. Raises `QuotaExceededError`
+        (minting nothing) if any station in the batch is over its quota.
+        """
+        if not events:
+            return []
+        # Leasing waits on the shared quota file's lock
+        await asyncio.to_thread(self._consume_quota, events)
+
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, event in enumerate(events):
+            chain_id = self._chain_for(event.model_dump())
+            groups.setdefault(chain_id, []).append(index)
+
+        blocks = await asyncio.gather(
+            *(
+                self._mint_block(
+                    chain_id,
+                    [self._event_fields(events[i]) for i in indexes],
+                    [
+                        {"station_id": events[i].station_id, "metadata": events[i].metadata}
+                        for i in indexes
+                    ],
+                )
+                for chain_id, indexes in groups.items()
+            ),
+            return_exceptions=True,
+        )
+
+        receipts: List[Optional[BaseReceipt]] = [None] * len(events)
+        errors: Dict[int, Exception] = {}
+        for indexes, block in zip(groups.values(), blocks):
+            if isinstance(block, BaseException):
+                if len(groups) == 1 or not isinstance(block, Exception):
+                    raise block
+                errors.update(dict.fromkeys(indexes, block))
+                continue
+            for i, receipt in zip(indexes, block):
+                receipts[i] = receipt
+
+        # One CRIES refresh per batch instead of per receipt
+        if any(
+            receipt is not None and receipt.receipt_type in self._CRIES_TRIGGERS
+            for receipt in receipts
+        ):
+            await self._update_cries_metrics()
+
+        await self._maybe_anchor()
+        self.dedup.maybe_save()
+        if errors:
+            raise PartialWriteError(receipts, errors)
+        return receipts
+
+    async def ingest_receipts(
+        self,
+        receipts: List[BaseReceipt],
+        station_id: Optional[str] = None,
+    ) -> List[str]:
+        """Store receipts minted by other nodes (e.g. a replay), skipping known ones.
+
+        Returns one status per receipt: "stored", "duplicate",
+        "invalid_hash", "invalid_signature" (no key in `ingest_keys` for its
+        node, or a bad signature), "own_lane" (it claims a lane this node
+        writes) or "out_of_order" (it does not extend its lane's stored
+        head). The duplicate filter answers for most receipts; only its
+        probable hits are confirmed against the database, in one query.
+        Each lane is then written under its lock together with its head, so
+        it stays one unbroken chain. When only some lanes fail to store,
+        raises `PartialWriteError` with the statuses of the others.
+        """
+        # Hashes and signatures are checked off the event loop
+        statuses: List[Optional[str]] = await asyncio.to_thread(
+            lambda: [self._ingest_check(receipt) for receipt in receipts]
+        )
+        candidates: List[int] = []
+        seen = set()
+        for i, receipt in enumerate(receipts):
+            if statuses[i] is not None:
+                continue
+            if receipt.self_hash in seen:
+                statuses[i] = "duplicate"
+            else:
+                seen.add(receipt.self_hash)
+                candidates.append(i)
+
+        fresh: List[int] = []
+        probable: List[int] = []
+        hits = self.dedup.might_contain_many([receipts[i].self_hash for i in candidates])
+        for i, hit in zip(candidates, hits):
+            (probable if hit else fresh).append(i)
+        DEDUP_CHECKS.inc("new", amount=len(fresh))
+
+        if probable:
+            rows = await self.db.receipt.find_many(
+                where={"self_hash": {"in": [receipts[i].self_hash for i in probable]}}
+            )
+            stored = {row.self_hash for row in rows}
+            false_positives = [i for i in probable if receipts[i].self_hash not in stored]
+            for i in probable:
+                if receipts[i].self_hash in stored:
+                    statuses[i] = "duplicate"
+            DEDUP_CHECKS.inc("duplicate", amount=len(probable) - len(false_positives))
+            DEDUP_CHECKS.inc("false_positive", amount=len(false_positives))
+            fresh = fresh + false_positives
+
+        lanes: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        for i in fresh:
+            lanes.setdefault((receipts[i].chain_id, receipts[i].node_id), []).append(i)
+
+        errors: Dict[int, Exception] = {}
+        for lane, indexes in lanes.items():
+            try:
+                await self._ingest_lane(lane, receipts, indexes, statuses, station_id)
+            except Exception as exc:
+                if len(lanes) == 1:
+                    raise
+                errors.update(dict.fromkeys(indexes, exc))
+        self.dedup.maybe_save()
+        if errors:
+            raise PartialWriteError(statuses, errors)
+        return statuses
+
+    def _own_node(self, node_id: Optional[str]) -> bool:
+        """Whether lanes of `node_id` are written by this service"""
+        return node_id == self.event_processor.node_id or (
+            self.shards is not None and node_id == self.shards.node_id
+        )
+
+    def _ingest_check(self, receipt: BaseReceipt) -> Optional[str]:
+        """Why a foreign receipt cannot be stored, short of looking at storage"""
+        if not self.hash_verifier.verify_receipt_hash(receipt).is_valid:
+            return "invalid_hash"
+        if self._own_node(receipt.node_id):
+            return "own_lane"
+        if self._ingest_signatures.check(receipt) is not None:
+            return "invalid_signature"
+        return None
+
+    async def _ingest_lane(
+        self,
+        lane: Tuple[Optional[str], Optional[str]],
+        receipts: List[BaseReceipt],
+        indexes: List[int],
+        statuses: List[Optional[str]],
+        station_id: Optional[str],
+    ) -> None:
+        """Append the receipts that extend a foreign lane's head, and move the head"""
+        chain_id, node_id = lane
+        async with self._write_locks[lane]:
+            record = await self.db.chainhead.find_unique(where={"lane": head_lane(chain_id, node_id)})
+            if record is not None:
+                lamport, digest = record.lamport, record.digest
+            else:
+                tail = await self.db.receipt.find_first(
+                    where={"chain_id": chain_id, "node_id": node_id},
+                    order={"lamport": "desc"},
+                )
+                lamport, digest = (tail.lamport, tail.self_hash) if tail is not None else (0, None)
+
+            batch: List[BaseReceipt] = []
+            for i in sorted(indexes, key=lambda i: receipts[i].lamport):
+                receipt = receipts[i]
+                if receipt.lamport <= lamport or receipt.prev_digest != digest:
+                    statuses[i] = "out_of_order"
+                    continue
+                batch.append(receipt)
+                lamport, digest = receipt.lamport, receipt.self_hash
+            if not batch:
+                return
+
+            rows = [self._receipt_row(r, station_id=station_id) for r in batch]
+            try:
+                with DB_WRITE_SECONDS.time("ingest"):
+                    # A concurrent writer of the same rows fails the batch on self_hash
+                    # instead of being counted as stored; a retry reports them as duplicates
+                    async with self.db.batch() as write:
+                        if len(rows) == 1:
+                            write.receipt.create(data=rows[0])
+                        else:
+                            write.receipt.create_many(data=rows)
+                        write.chainhead.upsert(**lane_upsert(chain_id, node_id, lamport, digest))
+            except Exception:
+                DB_WRITE_FAILURES.inc("ingest")
+                raise
+            self.dedup.add_many([r.self_hash for r in batch])
+            self.trace_index.add_many(batch)
+            if self.replication is not None:
+                # Inside the lane's lock, so it ships in Lamport order
+                self.replication.append(batch, kind=INGEST)
+            for i in indexes:
+                if statuses[i] is None:
+                    statuses[i] = "stored"
+
+    async def recover_heads(self) -> List[HeadRecovery]:
+        """Restore every local lane's head from its ChainHead row and tail receipt"""
+        check = self.signing_key_path is not None
+        recovered = [await recover_head(self.db, self.event_processor, None, check)]
+        if self.shards is not None:
+            # Shard chains are only checked when they sign with the persistent key too
+            check = check and _same_key(self.shards.public_key, self.event_processor.public_key)
+            records = await self.db.chainhead.find_many(
+                where={"chain_id": {"not": None}, "node_id": self.shards.node_id}
+            )
+            for record in records:
+                if record.chain_id == ANCHOR_CHAIN_ID:
+                    processor = self.shards.anchor_processor
+                else:
+                    processor = self.shards.processor(record.chain_id)
+                result = await recover_head(self.db, processor, record.chain_id, check)
+                recovered.append(result)
+                if record.chain_id != ANCHOR_CHAIN_ID and result.digest is not None:
+                    self._committed_heads[record.chain_id] = ShardHead(
+                        chain_id=record.chain_id, lamport=result.lamport, digest=result.digest
+                    )
+        return recovered
+
+    async def replay_unshipped(self, batch_size: int = 1000) -> int:
+        """Re-log committed receipts that never reached the replication transport.
+
+        Pending log entries are only held in memory, so a crash while the
+        transport was down loses them. Every lane's rows past the Lamport
+        value last shipped for it are logged again, as blocks for this
+        node's lanes and as ingest entries for the others.
+        """
+        head = self.replication.head
+        if head.seq and not head.lanes:
+            self.logger.warning("Replication head predates per-lane tracking; not replaying")
+            return 0
+        count = 0
+        for record in await self.db.chainhead.find_many():
+            if record.chain_id == IMPORT_CHAIN_ID:
+                continue  # Imported governance chains are not replicated
+            after = head.lanes.get(head_lane(record.chain_id, record.node_id), 0)
+            kind = BLOCK if self._own_node(record.node_id) else INGEST
+            while after < record.lamport:
+                rows = await self.db.receipt.find_many(
+                    where={"chain_id": record.chain_id, "node_id": record.node_id, "lamport": {"gt": after}},
+                    order={"lamport": "asc"},
+                    take=batch_size,
+                )
+                if not rows:
+                    break
+                self.replication.append([self._to_receipt(row) for row in rows], kind=kind)
+                after = rows[-1].lamport
+                count += len(rows)
+        if count:
+            self.logger.info(f"Re-logged {count} receipts the replication transport never got")
+        return count
+
+    async def rebuild_dedup(self, batch_size: int = 10_000) -> int:
+        """Load the duplicate filter snapshot, or rebuild it from storage.
+
+        The snapshot is reused only when it covers exactly as many receipts
+        as the table holds; otherwise every stored self_hash is re-added.
+        """
+        rows = await self.db.receipt.count()
+        if self.dedup.path is not None:
+            snapshot = DuplicateFilter.load(self.dedup.path, self.dedup.save_interval)
+            if snapshot is not None and len(snapshot) == rows:
+                self.dedup = snapshot
+                return rows
+
+        self.dedup.clear()
+        batch: List[str] = []
+        async for row in iter_receipt_rows(self.db, batch_size=batch_size):
+            batch.append(row.self_hash)
+            if len(batch) >= batch_size:
+                self.dedup.add_many(batch)
+                batch = []
+        self.dedup.add_many(batch)
+        if self.dedup.path is not None:
+            self.dedup.save()
+        return len(self.dedup)
+
+    def _consume_quota(self, events: List[EventRequest]) -> None:
+        """Charge a batch against station quotas, all or nothing"""
+        if self.quota is None:
+            return
+        charged: List[Tuple[Optional[str], int]] = []
+        for station_id, count in Counter(e.station_id for e in events).items():
+            if not self.quota.try_consume(station_id, count):
+                for done_id, done_count in charged:
+                    self.quota.refund(done_id, done_count)
+                QUOTA_REJECTIONS.inc(amount=count)
+                raise QuotaExceededError(station_id, count)
+            charged.append((station_id, count))
+
+    async def rebuild_quota(self) -> None:
+        """Seed quota buckets missing from the shared file from the last day of stored receipts"""
+        if self.quota is None:
+            return
+        stations = await asyncio.to_thread(self.quota.missing)
+        if not stations:
+            return
+        since = datetime.utcnow() - timedelta(days=1)
+        used = dict.fromkeys(stations, 0)
+        groups = await self.db.receipt.group_by(
+            by=["station_id"],
+            where={"station_id": {"in": stations}, "timestamp": {"gte": since}},
+            count=True,
+        )
+        for group in groups:
+            used[group["station_id"]] = group["_count"]["_all"]
+        await asyncio.to_thread(self.quota.rebuild, used)
+
+    async def anchor_shards(self) -> Optional[ShardAnchor]:
+        """Commit the Merkle root of all stored shard heads to the global chain"""
+        if self.shards is None:
+            return None
+
+        async with self._write_locks[ANCHOR_CHAIN_ID]:
+            processor = self.shards.anchor_processor
+            head = processor.head()
+            anchor = self.shards.anchor(heads=list(self._committed_heads.values()))
+            try:
+                with DB_WRITE_SECONDS.time("anchor"):
+                    async with self.db.batch() as batch:
+                        batch.receipt.create(
+                            data=self._receipt_row(
+                                anchor.receipt,
+                                metadata={"heads": [h.model_dump() for h in anchor.heads]},
+                            )
+                        )
+                        batch.chainhead.upsert(**head_upsert(processor, ANCHOR_CHAIN_ID))
+            except Exception:
+                DB_WRITE_FAILURES.inc("anchor")
+                processor.restore_head(*head)
+                raise
+            self.dedup.add(anchor.receipt.self_hash)
+            self.trace_index.add(anchor.receipt)
+            if self.replication is not None:
+                self.replication.append([anchor.receipt])
+        return anchor
+
+    @staticmethod
+    def _event_fields(event: EventRequest) -> Dict[str, Any]:
+        """Receipt fields of an event request"""
+        fields = {
+            "receipt_type": event.receipt_type,
+            "band": event.band,
+            "track": event.track,
+            "trace_id": event.trace_id,
+        }
+        if event.commitment is not None:
+            fields["commitment"] = event.commitment
+        return fields
+
+    def _chain_for(self, event: Dict[str, Any]) -> Optional[str]:
+        """Chain id an event belongs to (None without sharding)"""
+        return self.shards.shard_id(event) if self.shards is not None else None
+
+    async def _mint_block(
+        self,
+        chain_id: Optional[str],
+        events: List[Dict[str, Any]],
+        extras: List[Dict[str, Any]],
+    ) -> List[BaseReceipt]:
+        """Mint one contiguous block on a chain and store it, rewinding on failure"""
+        try:
+            return await self._store_block(chain_id, events, extras)
+        except Exception:
+            if self.quota is not None:
+                for extra in extras:
+                    self.quota.refund(extra.get("station_id"))
+            raise
+
+    async def _store_block(
+        self,
+        chain_id: Optional[str],
+        events: List[Dict[str, Any]],
+        extras: List[Dict[str, Any]],
+    ) -> List[BaseReceipt]:
+        async with self._write_locks[chain_id]:
+            if chain_id is None:
+                processor = self.event_processor
+                head = processor.head()
+                receipts = processor.create_receipts(events)
+            else:
+                processor = self.shards.processor(chain_id)
+                head = processor.head()
+                receipts = self.shards.create_receipts(chain_id, events)
+
+            rows = [
+                self._receipt_row(receipt, **extra)
+                for receipt, extra in zip(receipts, extras)
+            ]
+            op = "create" if len(rows) == 1 else "create_many"
+            try:
+                with DB_WRITE_SECONDS.time(op):
+                    # One round trip; the head record commits or rolls back with its receipts
+                    async with self.db.batch() as batch:
+                        if len(rows) == 1:
+                            batch.receipt.create(data=rows[0])
+                        else:
+                            batch.receipt.create_many(data=rows)
+                        batch.chainhead.upsert(**head_upsert(processor, chain_id))
+            except Exception:
+                DB_WRITE_FAILURES.inc(op)
+                processor.restore_head(*head)
+                raise
+
+            if REGISTRY.enabled:
+                for receipt in receipts:
+                    RECEIPTS_MINTED.inc(receipt.receipt_type.value)
+
+            self.dedup.add_many([r.self_hash for r in receipts])
+            self.trace_index.add_many(receipts)
+            if self.replication is not None:
+                # Inside the chain's write lock, so each lane ships in Lamport order
+                self.replication.append(receipts)
+            if chain_id is not None:
+                lamport, digest = processor.head()
+                self._committed_heads[chain_id] = ShardHead(
+                    chain_id=chain_id, lamport=lamport, digest=digest
+                )
+        return receipts
+
+    async def _maybe_anchor(self) -> None:
+        """Emit a global anchor once enough shard receipts accumulated"""
+        if self.shards is not None and self.shards.needs_anchor():
+            await self.anchor_shards()
+
+    @staticmethod
+    def _receipt_row(
+        receipt: BaseReceipt,
+        station_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Map a receipt onto a Receipt table row"""
+        row: Dict[str, Any] = {
+            "receipt_type": receipt.receipt_type.value,
+            "lamport": receipt.lamport,
+            "prev_digest": receipt.prev_digest,
+            "self_hash": receipt.self_hash,
+            "trace_id": receipt.trace_id,
+            "timestamp": receipt.timestamp,
+            "actor_signature": receipt.actor_signature,
+            "band": receipt.band.value,
+            "track": receipt.track.value,
+        }
+        if receipt.chain_id is not None:
+            row["chain_id"] = receipt.chain_id
+        if receipt.commitment is not None:
+            row["commitment"] = receipt.commitment
+        if receipt.node_id is not None:
+            row["node_id"] = receipt.node_id
+        if receipt.hash_alg != DEFAULT_HASH_ALG:
+            row["hash_alg"] = receipt.hash_alg
+        if station_id is not None:
+            row["station_id"] = station_id
+        if metadata is not None:
+            row["metadata"] = Json(metadata)
+        return row
+
     async def verify_receipt_chain(
         self,
         start_lamport: int,
-        end_lamport: int
+        end_lamport: int,
+        chain_id: Optional[str] = None
     ) -> bool:
-        """Verify receipt chain between Lamport clocks"""
+        """Verify receipt chain between Lamport clocks (legacy chain by default)"""
         receipts = await self.db.receipt.find_many(
             where={
+                "chain_id": chain_id,
                 "lamport": {
                     "gte": start_lamport,
                     "lte": end_lamport
@@ -103,27 +687,92 @@ class AuditService:
         )
 
         # Convert to BaseReceipt objects
-        receipt_objects = [
-            BaseReceipt(
-                receipt_type=ReceiptType(r.receipt_type),
-                lamport=r.lamport,
-                prev_digest=r.prev_digest,
-                self_hash=r.self_hash,
-                trace_id=r.trace_id,
-                timestamp=r.timestamp,
-                actor_signature=r.actor_signature,
-                band=BandLevel(r.band),
-                track=Track(r.track)
-            )
-            for r in receipts
-        ]
+        receipt_objects = [self._to_receipt(r) for r in receipts]
 
-        is_valid, error = self.chain_verifier.verify_chain(receipt_objects)
+        with CHAIN_VERIFY_SECONDS.time():
+            is_valid, error = self.chain_verifier.verify_chain(receipt_objects)
+        CHAIN_VERIFICATIONS.inc("valid" if is_valid else "invalid")
         if not is_valid:
             raise ValueError(f"Chain verification failed: {error}")
 
         return True
 
+    async def verify_shards(
+        self,
+        chain_ids: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """Verify shard chains independently and in parallel"""
+        if chain_ids is None:
+            rows = await self.db.receipt.find_many(
+                where={"chain_id": {"not": None}},
+                distinct=["chain_id"],
+            )
+            # Imported ben_governance chains are hashed the governance way
+            chain_ids = [
+                r.chain_id for r in rows if r.chain_id not in (ANCHOR_CHAIN_ID, IMPORT_CHAIN_ID)
+            ]
+
+        chains = {}
+        for chain_id in chain_ids:
+            rows = await self.db.receipt.find_many(
+                where={"chain_id": chain_id},
+                order={"lamport": "asc"},
+            )
+            chains[chain_id] = [self._to_receipt(r) for r in rows]
+
+        return self.chain_verifier.verify_shards(chains, max_workers=max_workers)
+
+    @staticmethod
+    def _to_receipt(row: Any) -> BaseReceipt:
+        """Map a Receipt table row back onto a BaseReceipt"""
+        return receipt_from_row(row)
+
+    async def get_trace_timeline(self, trace_id: str) -> Optional[TraceTimeline]:
+        """Ordered receipts and summary of a trace from the write-time index"""
+        await self._load_trace(trace_id)
+        return self.trace_index.timeline(trace_id)
+
+    async def get_trace_proof(self, trace_id: str, self_hash: str) -> Optional[TraceProof]:
+        """Inclusion proof of a receipt in its trace's Merkle tree"""
+        await self._load_trace(trace_id)
+        return self.trace_index.inclusion_proof(trace_id, self_hash)
+
+    async def _load_trace(self, trace_id: str) -> None:
+        """Read a trace not indexed since this start (or evicted) from storage"""
+        index = self.trace_index
+        if not index.needs_load(trace_id):
+            return
+        token = index.reserve(trace_id)
+        try:
+            rows = await self.db.receipt.find_many(where={"trace_id": trace_id})
+        except BaseException:
+            index.loaded(trace_id, token, None)
+            raise
+        index.loaded(trace_id, token, (self._to_receipt(row) for row in rows))
+
+    async def export_receipts(
+        self,
+        output_dir: str,
+        start_lamport: Optional[int] = None,
+        end_lamport: Optional[int] = None,
+        formats: Iterable[str] = ("ndjson",),
+        chunk_size: int = 100_000,
+    ) -> ExportManifest:
+        """Stream a receipt range to disk for an external auditor"""
+        exporter = ReceiptExporter(output_dir, formats=formats, chunk_size=chunk_size)
+        rows = iter_receipt_rows(
+            self.db,
+            start_lamport=start_lamport,
+            end_lamport=end_lamport,
+            batch_size=exporter.batch_size,
+        )
+        return await exporter.export(
+            rows,
+            start_lamport=start_lamport,
+            end_lamport=end_lamport,
+        )
+
     async def get_cries_metrics(self) -> CRIESMetrics:
         """Get current CRIES metrics"""
         if not self._current_cries:
@@ -136,50 +785,36 @@ class AuditService:
             await self._update_stability_metrics()
         return self._current_stability
 
+    async def rollup_metrics(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Roll up metric history, then compact it under the retention policy"""
+        written = {}
+        for kind in ("cries", "stability"):
+            written[kind] = await self.rollups.rollup(kind, now=now)
+            await self.rollups.compact(kind, now=now)
+        return written
+
+    async def get_metric_trend(
+        self,
+        kind: str,
+        field: str,
+        start: datetime,
+        end: datetime,
+        **kwargs
+    ) -> List[MetricBucket]:
+        """Trend of one metric field from rollup buckets"""
+        return await self.rollups.trend(kind, field, start, end, **kwargs)
+
     async def _update_cries_metrics(self):
         """Update CRIES metrics based on recent receipts"""
-        # Get recent receipts for analysis
-        recent_receipts = await self.db.receipt.find_many(
-            order={"lamport": "desc"},
-            take=100  # Analyze last 100 receipts
-        )
-
-        # Initialize metrics
-        clarity = reliability = integrity = efficiency = safety = 1.0
-        
-        for receipt in recent_receipts:
-            # Update reliability based on hash verification
-            if HashVerifier.verify_receipt_hash(
-                BaseReceipt(
-                    receipt_type=ReceiptType(receipt.receipt_type),
-                    lamport=receipt.lamport,
-                    prev_digest=receipt.prev_digest,
-                    self_hash=receipt.self_hash,
-                    trace_id=receipt.trace_id,
-                    timestamp=receipt.timestamp,
-                    actor_signature=receipt.actor_signature,
-                    band=BandLevel(receipt.band),
-                    track=Track(receipt.track)
-                )
-            ).is_valid:
-                reliability *= 0.99  # Small penalty for any verification issue
-            
-            # Update safety based on risk gates
-            if receipt.receipt_type == ReceiptType.RISK_GATE.value:
-                safety *= 0.95  # Significant safety impact
-                
-            # Integrity based on signature verification
-            if not receipt.actor_signature:
-                integrity *= 0.90
-
-        # Store updated metrics
-        self._current_cries = CRIESMetrics(
-            clarity=clarity,
-            reliability=reliability,
-            integrity=integrity,
-            efficiency=efficiency,
-            safety=safety
-        )
+        with CRIES_REFRESH_SECONDS.time():
+            # Get recent receipts for analysis
+            recent_receipts = await self.db.receipt.find_many(
+                order={"lamport": "desc"},
+                take=100  # Analyze last 100 receipts
+            )
+            self._current_cries = cries_from_receipts(
+                self._to_receipt(r) for r in recent_receipts
+            )
 
     async def _update_stability_metrics(self):
         """Update tri-actor stability metrics"""
@@ -187,13 +822,10 @@ class AuditService:
         if not config:
             raise RuntimeError("BEN system not initialized")
 
-        # Get track-specific receipts
-        track_receipts = {
-            track: await self.db.receipt.count(
-                where={"track": track.value}
-            )
-            for track in Track
-        }
+        # Receipts per track, counted in one query
+        groups = await self.db.receipt.group_by(by=["track"], count=True)
+        counts = {group["track"]: group["_count"]["_all"] for group in groups}
+        track_receipts = {track: counts.get(track.value, 0) for track in Track}
 
         total_receipts = sum(track_receipts.values())
         if total_receipts == 0:
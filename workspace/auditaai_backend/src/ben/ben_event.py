@@ -3,25 +3,51 @@ BEN Event Processing Core
 Version: Band-1.3 (vΩ.9)
 """
 
-import hashlib
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ed25519
 
-from .types import BaseReceipt, BandLevel, Track, ReceiptType
+from .hashing import DEFAULT_HASH_ALG, get_hash
+from .types import BaseReceipt, BandLevel, Track, ReceiptType, receipt_digest_content
 
 
 class BENEventProcessor:
     """Core event processor for the Blockchain Event Network"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        chain_id: Optional[str] = None,
+        private_key: Optional[ed25519.Ed25519PrivateKey] = None,
+        node_id: Optional[str] = None,
+        hash_alg: str = DEFAULT_HASH_ALG,
+    ):
+        self.chain_id = chain_id
+        self.node_id = node_id
+        self.hash_alg = hash_alg
         self._lamport_clock: int = 0
+        self._merged_lamport: int = 0  # Highest clock value observed from another node
         self._last_digest: Optional[str] = None
-        self._private_key = ed25519.Ed25519PrivateKey.generate()
+        self._private_key = private_key or ed25519.Ed25519PrivateKey.generate()
         self._public_key = self._private_key.public_key()
 
+    @property
+    def public_key(self) -> ed25519.Ed25519PublicKey:
+        """Public half of the signing key"""
+        return self._public_key
+
+    @property
+    def hash_alg(self) -> str:
+        """Digest algorithm tagged on receipts minted from now on"""
+        return self._hash_alg
+
+    @hash_alg.setter
+    def hash_alg(self, alg: str) -> None:
+        # Switching mid-chain is fine: each receipt is verified under its own tag
+        self._hash = get_hash(alg)
+        self._hash_alg = alg
+
     def get_lamport(self) -> int:
         """Get current Lamport clock value"""
         return self._lamport_clock
@@ -31,14 +57,32 @@ class BENEventProcessor:
         self._lamport_clock += 1
         return self._lamport_clock
 
+    def merge_lamport(self, remote_lamport: int) -> int:
+        """Lamport receive: advance past a clock value observed from another node"""
+        self._merged_lamport = max(self._merged_lamport, remote_lamport)
+        self._lamport_clock = max(self._lamport_clock, remote_lamport) + 1
+        return self._lamport_clock
+
+    def head(self) -> Tuple[int, Optional[str]]:
+        """Get current chain head as (lamport, last digest)"""
+        return self._lamport_clock, self._last_digest
+
+    def restore_head(self, lamport: int, digest: Optional[str]) -> None:
+        """Rewind the chain head, e.g. after a failed storage write.
+
+        Never behind a clock merged meanwhile: the next receipt still follows it.
+        """
+        self._lamport_clock = max(lamport, self._merged_lamport)
+        self._last_digest = digest
+
     def compute_hash(self, content: str) -> str:
-        """Compute SHA-256 hash of content"""
-        return hashlib.sha256(content.encode()).hexdigest()
+        """Compute the digest of content with this processor's algorithm"""
+        return self._hash(content.encode()).hexdigest()
 
     def sign_receipt(self, receipt: BaseReceipt) -> str:
         """Sign receipt with Ed25519"""
         signature = self._private_key.sign(
-            f"{receipt.receipt_type}:{receipt.lamport}:{receipt.prev_digest}".encode()
+            receipt_digest_content(receipt).encode()
         )
         return signature.hex()
 
@@ -51,7 +95,7 @@ class BENEventProcessor:
             signature_bytes = bytes.fromhex(receipt.actor_signature)
             self._public_key.verify(
                 signature_bytes,
-                f"{receipt.receipt_type}:{receipt.lamport}:{receipt.prev_digest}".encode()
+                receipt_digest_content(receipt).encode()
             )
             return True
         except Exception:
@@ -63,28 +107,41 @@ class BENEventProcessor:
         band: BandLevel,
         track: Track,
         trace_id: str,
+        *,
+        prev_digest: Optional[str] = None,
         **kwargs
     ) -> BaseReceipt:
-        """Create a new signed receipt"""
-        
+        """Create a new signed receipt.
+
+        `prev_digest` links the first receipt of a chain (genesis, or resuming
+        after a stored digest); once the processor has a head it is rejected.
+        """
+        if prev_digest is None:
+            prev_digest = self._last_digest
+        elif self._last_digest is not None:
+            raise ValueError("prev_digest can only be set before the chain has a head")
+
         # Increment Lamport clock
         lamport = self.increment_lamport()
         
-        # Create receipt
+        # Create receipt (self_hash is filled in below)
         receipt = BaseReceipt(
             receipt_type=receipt_type,
             lamport=lamport,
-            prev_digest=self._last_digest,
+            prev_digest=prev_digest,
+            self_hash="",
             trace_id=trace_id,
             band=band,
             track=track,
             timestamp=datetime.utcnow(),
+            chain_id=kwargs.pop("chain_id", self.chain_id),
+            node_id=kwargs.pop("node_id", self.node_id),
+            hash_alg=self.hash_alg,
             **kwargs
         )
         
         # Compute self hash
-        content = f"{receipt.receipt_type}:{receipt.lamport}:{receipt.prev_digest}"
-        receipt.self_hash = self.compute_hash(content)
+        receipt.self_hash = self.compute_hash(receipt_digest_content(receipt))
         
         # Sign receipt
         receipt.actor_signature = self.sign_receipt(receipt)
@@ -92,4 +149,13 @@ class BENEventProcessor:
         # Update last digest
         self._last_digest = receipt.self_hash
         
-        return receipt
\ No newline at end of file
+        return receipt
+
+    def create_receipts(self, events: List[Dict[str, Any]]) -> List[BaseReceipt]:
+        """Create signed receipts for a batch as one contiguous Lamport block"""
+        head = self.head()
+        try:
+            return [self.create_receipt(**event) for event in events]
+        except Exception:
+            self.restore_head(*head)
+            raise
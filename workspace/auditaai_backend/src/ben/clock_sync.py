@@ -0,0 +1,148 @@
+"""
+Multi-Node Lamport Clock Synchronization
+Version: Band-1.3 (vΩ.9)
+
+Lets several writer nodes append to one logical chain. Each node signs and
+links its own receipts; nodes exchange chain heads through a swappable
+transport and apply Lamport receive semantics (max(local, remote) + 1) to
+every newly observed remote head. The merged chain is the deterministic
+total order (lamport, node_id), which `ChainVerifier.verify_chain` checks.
+`AuditService(clock_transport=...)` exchanges heads under the chain's write lock.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .ben_event import BENEventProcessor
+from .types import BaseReceipt
+from .verify_chain import merge_order_key
+
+
+class NodeHead(BaseModel):
+    """Chain head advertised by a writer node"""
+    node_id: str
+    lamport: int
+    digest: Optional[str]
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class HeadTransport(ABC):
+    """Exchanges node heads between writers"""
+
+    @abstractmethod
+    def publish(self, head: NodeHead) -> None:
+        """Advertise this node's head"""
+
+    @abstractmethod
+    def fetch(self) -> List[NodeHead]:
+        """Return the latest head of every known node"""
+
+
+class InMemoryHeadTransport(HeadTransport):
+    """Shares heads between processors in the same process"""
+
+    def __init__(self):
+        self._heads: Dict[str, NodeHead] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, head: NodeHead) -> None:
+        with self._lock:
+            self._heads[head.node_id] = head
+
+    def fetch(self) -> List[NodeHead]:
+        with self._lock:
+            return list(self._heads.values())
+
+
+class DirectoryHeadTransport(HeadTransport):
+    """Shares heads between local processes through one JSON file per node"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def publish(self, head: NodeHead) -> None:
+        # Write-then-rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as w:
+            w.write(head.model_dump_json())
+        os.replace(tmp, os.path.join(self.path, f"{head.node_id}.head.json"))
+
+    def fetch(self) -> List[NodeHead]:
+        heads = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".head.json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name)) as f:
+                    heads.append(NodeHead.model_validate(json.load(f)))
+            except (OSError, ValueError):
+                continue  # Removed or replaced while listing
+        return heads
+
+
+class ClockSync:
+    """Keeps a node's Lamport clock causally ahead of its peers"""
+
+    def __init__(self, processor: BENEventProcessor, transport: HeadTransport):
+        if not processor.node_id:
+            raise ValueError("ClockSync requires a processor with a node_id")
+        self.processor = processor
+        self.transport = transport
+        self.logger = logging.getLogger("ben.clock_sync")
+        self._seen: Dict[str, int] = {}
+
+    def publish(self) -> NodeHead:
+        """Advertise the local head"""
+        lamport, digest = self.processor.head()
+        head = NodeHead(node_id=self.processor.node_id, lamport=lamport, digest=digest)
+        self.transport.publish(head)
+        return head
+
+    def sync(self) -> int:
+        """Merge newly observed remote heads into the local clock"""
+        for head in self.transport.fetch():
+            if head.node_id == self.processor.node_id:
+                continue
+            if head.lamport <= self._seen.get(head.node_id, -1):
+                continue
+            self._seen[head.node_id] = head.lamport
+            self.processor.merge_lamport(head.lamport)
+        return self.processor.get_lamport()
+
+    def exchange(self) -> int:
+        """Publish the local head, then merge remote heads"""
+        self.publish()
+        return self.sync()
+
+    async def run(self, interval: float = 0.5) -> None:
+        """Exchange heads every `interval` seconds until cancelled.
+
+        Only for a processor nothing else writes concurrently; `AuditService`
+        runs its own loop under the chain's write lock.
+        """
+        while True:
+            try:
+                self.exchange()
+            except OSError as exc:
+                self.logger.warning(f"Head exchange failed: {exc}")
+            await asyncio.sleep(interval)
+
+    def remote_heads(self) -> Dict[str, int]:
+        """Last Lamport value observed from each peer"""
+        return dict(self._seen)
+
+
+def merge_receipt_streams(*streams: Iterable[BaseReceipt]) -> Iterator[BaseReceipt]:
+    """Merge per-node receipt streams (each in Lamport order) into the total order"""
+    return heapq.merge(*streams, key=merge_order_key)
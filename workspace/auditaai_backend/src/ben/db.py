@@ -0,0 +1,359 @@
+"""
+Database Access Layer
+Version: Band-1.3 (vΩ.9)
+
+`DataAccess` wraps the Prisma client used by `AuditService` and its helpers
+(`db.receipt.find_many(...)` etc. keep working unchanged) and adds:
+
+- a configurable connection pool: `PoolConfig` is merged into the datasource
+  URL as the query engine's `connection_limit` / `pool_timeout` /
+  `connect_timeout` parameters;
+- per-query timeouts and deadline propagation: `with deadline(seconds):`
+  bounds every query issued inside it, including from tasks and threads it
+  starts, and nested deadlines only ever shorten. Reads are cancelled when
+  their budget runs out; writes are refused once the deadline has passed but
+  never abandoned in flight, since their outcome would be unknown;
+- coalescing: identical reads issued concurrently share one round trip, and
+  `batch()` sends several writes as one transactional request;
+- per-query latency: every `model.op` is timed into
+  `ben_db_query_seconds{query}` and into recent samples for `stats()`.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .metrics import DB_QUERIES_COALESCED, DB_QUERY_SECONDS, DB_QUERY_TIMEOUTS
+
+
+# Model operations that only read, and may be coalesced and cancelled
+READ_OPS = frozenset({
+    "count",
+    "find_first",
+    "find_first_or_raise",
+    "find_many",
+    "find_unique",
+    "find_unique_or_raise",
+    "group_by",
+})
+
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("ben_db_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """A query ran past its timeout or the caller's deadline"""
+
+
+class PartialWriteError(RuntimeError):
+    """Some blocks of a batch were stored and others were not.
+
+    `results` holds the outcome at each batch index (the minted receipt, or
+    the ingest status) and `errors` the exception of every failed index.
+    """
+
+    def __init__(self, results: List[Any], errors: Dict[int, Exception]):
+        self.results = results
+        self.errors = errors
+        super().__init__(f"{len(errors)} of {len(results)} were not stored: {next(iter(errors.values()))}")
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound every query issued inside the block to finish within `seconds`"""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    token = _DEADLINE.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None without one)"""
+    at = _DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+
+class PoolConfig(BaseModel):
+    """Connection pool and timeout settings of the query engine"""
+    url: Optional[str] = None  # Defaults to the datasource in schema.prisma
+    connection_limit: Optional[int] = None  # Engine default: 2 * CPUs + 1
+    pool_timeout: Optional[float] = None  # Seconds to wait for a free connection
+    connect_timeout: Optional[float] = None  # Seconds to open a new connection
+    query_timeout: Optional[float] = 10.0  # Per-query budget; None for no limit
+    # Budgets overriding query_timeout for single queries, e.g. {"receipt.find_many": 30}
+    timeouts: Dict[str, float] = Field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """Settings from BEN_DB_URL (or DATABASE_URL), BEN_DB_CONNECTION_LIMIT,
+        BEN_DB_POOL_TIMEOUT, BEN_DB_CONNECT_TIMEOUT and BEN_DB_QUERY_TIMEOUT"""
+        env = os.environ
+        values: Dict[str, Any] = {"url": env.get("BEN_DB_URL") or env.get("DATABASE_URL")}
+        for name in ("connection_limit", "pool_timeout", "connect_timeout", "query_timeout"):
+            raw = env.get(f"BEN_DB_{name.upper()}")
+            if raw:
+                values[name] = raw
+        return cls(**values)
+
+    def datasource_url(self) -> Optional[str]:
+        """The URL with the pool settings as engine query parameters"""
+        pool = {
+            "connection_limit": self.connection_limit,
+            "pool_timeout": self.pool_timeout,
+            "connect_timeout": self.connect_timeout,
+        }
+        pool = {k: f"{v:g}" if isinstance(v, float) else str(v) for k, v in pool.items() if v is not None}
+        if self.url is None:
+            if pool:
+                raise ValueError("Connection pool settings need a database url")
+            return None
+        if not pool:
+            return self.url
+        parts = urlsplit(self.url)
+        query = dict(parse_qsl(parts.query)) | pool
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def create_client(config: PoolConfig) -> Any:
+    """Prisma client using the configured pool"""
+    from prisma import Prisma
+
+    kwargs: Dict[str, Any] = {}
+    url = config.datasource_url()
+    if url is not None:
+        kwargs["datasource"] = {"url": url}
+    if config.query_timeout is not None:
+        # Transport timeout for writes, which are not cancelled client side
+        kwargs["http"] = {"timeout": max([config.query_timeout, *config.timeouts.values()])}
+    return Prisma(**kwargs)
+
+
+class QueryStats(BaseModel):
+    """Latency of one query kind, e.g. "receipt.find_many" """
+    query: str
+    count: int
+    errors: int
+    timeouts: int
+    coalesced: int  # Calls answered by an identical read already in flight
+    total_seconds: float
+    mean_ms: float
+    p50_ms: float  # Percentiles over the most recent samples
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class _Tally:
+    __slots__ = ("count", "errors", "timeouts", "coalesced", "total", "samples")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+
+class _ModelProxy:
+    """One model's actions (`db.receipt`), timed and bounded"""
+
+    __slots__ = ("_access", "_model", "_name", "_coalesce")
+
+    def __init__(self, access: "DataAccess", model: Any, name: str, coalesce: bool):
+        self._access = access
+        self._model = model
+        self._name = name
+        self._coalesce = coalesce
+
+    def __getattr__(self, op: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._model, op)
+        query = f"{self._name}.{op}"
+        read = op in READ_OPS
+        coalesce = self._coalesce and read
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._access._query(query, method, args, kwargs, read, coalesce)
+
+        return call
+
+
+class _ClientProxy:
+    """A client or transaction whose model attributes are wrapped"""
+
+    def __init__(self, access: "DataAccess", client: Any, coalesce: bool):
+        self._access = access
+        self._client = client
+        self._coalesce = coalesce
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name.startswith("_") or callable(attr):
+            return attr
+        return _ModelProxy(self._access, attr, name, self._coalesce)
+
+
+class DataAccess(_ClientProxy):
+    """Prisma client with pool settings, query timeouts, coalescing and latency stats"""
+
+    def __init__(
+        self,
+        client: Any = None,
+        config: Optional[PoolConfig] = None,
+        sample_size: int = 1024,
+    ):
+        self.config = config or PoolConfig()
+        super().__init__(self, client if client is not None else create_client(self.config), True)
+        self.client = self._client
+        self.sample_size = sample_size
+        self._tallies: Dict[str, _Tally] = {}
+        # Identical reads in flight -> the task answering them
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def _budget(self, query: str) -> Optional[float]:
+        """Seconds a query may take, failing fast once the deadline passed"""
+        timeout = self.config.timeouts.get(query, self.config.query_timeout)
+        left = remaining()
+        if left is None:
+            return timeout
+        if left <= 0:
+            self._tally(query).timeouts += 1
+            DB_QUERY_TIMEOUTS.inc(query)
+            raise DeadlineExceeded(f"Deadline passed before {query}")
+        return left if timeout is None else min(timeout, left)
+
+    def _tally(self, query: str) -> _Tally:
+        tally = self._tallies.get(query)
+        if tally is None:
+            tally = self._tallies[query] = _Tally(self.sample_size)
+        return tally
+
+    def _record(self, query: str, seconds: float, outcome: str) -> None:
+        tally = self._tally(query)
+        tally.count += 1
+        tally.total += seconds
+        tally.samples.append(seconds)
+        if outcome == "timeout":
+            tally.timeouts += 1
+            DB_QUERY_TIMEOUTS.inc(query)
+        elif outcome == "error":
+            tally.errors += 1
+        DB_QUERY_SECONDS.observe(seconds, query)
+
+    async def _query(
+        self,
+        query: str,
+        method: Callable[..., Awaitable[Any]],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        read: bool,
+        coalesce: bool,
+    ) -> Any:
+        timeout = self._budget(query)
+        if not coalesce:
+            return await self._timed(query, lambda: method(*args, **kwargs), timeout if read else None)
+
+        key = (query, repr((args, sorted(kwargs.items()))))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._timed(query, lambda: method(*args, **kwargs), timeout))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+            # Shielded: the first caller giving up does not cancel the read for the others
+            return await asyncio.shield(task)
+        self._tally(query).coalesced += 1
+        DB_QUERIES_COALESCED.inc(query)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except DeadlineExceeded:
+            raise
+        except TimeoutError:
+            self._tally(query).timeouts += 1
+            DB_QUERY_TIMEOUTS.inc(query)
+            raise DeadlineExceeded(f"{query} exceeded {timeout:.3f}s") from None
+
+    def _settle(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved, even when every caller gave up
+
+    async def _timed(
+        self,
+        query: str,
+        run: Callable[[], Awaitable[Any]],
+        timeout: Optional[float],
+    ) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(run(), timeout) if timeout is not None else await run()
+        except TimeoutError:
+            self._record(query, time.perf_counter() - start, "timeout")
+            raise DeadlineExceeded(f"{query} exceeded {timeout:.3f}s") from None
+        except BaseException:
+            self._record(query, time.perf_counter() - start, "error")
+            raise
+        self._record(query, time.perf_counter() - start, "ok")
+        return result
+
+    @asynccontextmanager
+    async def tx(self, **kwargs: Any):
+        """Interactive transaction; the engine rolls it back past the query budget"""
+        timeout = self._budget("tx")
+        if timeout is not None:
+            kwargs.setdefault("timeout", timedelta(seconds=timeout))
+        start = time.perf_counter()
+        try:
+            async with self.client.tx(**kwargs) as tx:
+                yield _ClientProxy(self, tx, False)
+        except BaseException:
+            self._record("tx", time.perf_counter() - start, "error")
+            raise
+        self._record("tx", time.perf_counter() - start, "ok")
+
+    @asynccontextmanager
+    async def batch(self):
+        """Queue writes on `batch.<model>.<op>(...)` and send them as one transaction on exit"""
+        batcher = self.client.batch_()
+        yield batcher
+        self._budget("batch")
+        await self._timed("batch", batcher.commit, None)
+
+    def stats(self) -> List[QueryStats]:
+        """Latency per query, most total time first"""
+        report = []
+        for query, tally in self._tallies.items():
+            samples = np.fromiter(tally.samples, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(samples, (50, 95, 99)) if samples.size else (0.0,) * 3
+            report.append(QueryStats(
+                query=query,
+                count=tally.count,
+                errors=tally.errors,
+                timeouts=tally.timeouts,
+                coalesced=tally.coalesced,
+                total_seconds=tally.total,
+                mean_ms=tally.total * 1000 / tally.count if tally.count else 0.0,
+                p50_ms=float(p50),
+                p95_ms=float(p95),
+                p99_ms=float(p99),
+                max_ms=float(samples.max()) if samples.size else 0.0,
+            ))
+        return sorted(report, key=lambda s: s.total_seconds, reverse=True)
+
+    def reset_stats(self) -> None:
+        """Forget the collected latency samples"""
+        self._tallies.clear()
@@ -0,0 +1,268 @@
+"""
+Duplicate Receipt Filter
+Version: Band-1.3 (vΩ.9)
+
+Probabilistic membership over stored `self_hash` values, so replayed receipts
+can be rejected before they reach the database. A negative answer is exact
+(the receipt is new); a positive one is only "probably stored" and must be
+confirmed against the Receipt table. The filter grows as a scalable Bloom
+filter: when a slice fills up a larger slice with a tighter error rate is
+added, keeping the overall false-positive rate under `error_rate` without
+knowing the final size in advance.
+
+Positions are derived from a salted BLAKE2b digest, so receipts crafted to
+collide in the filter cannot be precomputed. Snapshots are written with
+write-then-rename and carry the number of rows they cover; a snapshot is
+only reused at startup when that still matches the table.
+"""
+
+import hashlib
+import json
+import math
+import os
+import struct
+import tempfile
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+MAGIC = b"BENBLOOM1\n"
+_MASK64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter using double hashing over a 128-bit digest"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size, self.hashes = self.layout(capacity, error_rate)
+        self.bits = bits if bits is not None else bytearray(self.nbytes(capacity, error_rate))
+        if len(self.bits) != self.nbytes(capacity, error_rate):
+            raise ValueError("bit array does not match capacity and error rate")
+        self.count = count
+
+    @staticmethod
+    def layout(capacity: int, error_rate: float) -> tuple:
+        """(bits, hash functions) for the target capacity and error rate"""
+        size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        return size, max(1, round(size / capacity * math.log(2)))
+
+    @classmethod
+    def nbytes(cls, capacity: int, error_rate: float) -> int:
+        return (cls.layout(capacity, error_rate)[0] + 7) // 8
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def _positions(self, h1: int, h2: int) -> List[int]:
+        size = self.size
+        return [((h1 + i * h2) & _MASK64) % size for i in range(self.hashes)]
+
+    def add(self, h1: int, h2: int) -> None:
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits = self.bits
+        for pos in self._positions(h1, h2):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _positions_many(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        # uint64 arithmetic wraps like the scalar path's & _MASK64
+        steps = np.arange(self.hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            combined = h1[:, None] + steps[None, :] * h2[:, None]
+        return combined % np.uint64(self.size)
+
+    def add_many(self, h1: np.ndarray, h2: np.ndarray) -> None:
+        positions = self._positions_many(h1, h2).ravel()
+        view = np.frombuffer(self.bits, dtype=np.uint8)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(view, (positions >> np.uint64(3)).astype(np.intp), masks)
+        self.count += len(h1)
+
+    def contains_many(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        positions = self._positions_many(h1, h2)
+        view = np.frombuffer(self.bits, dtype=np.uint8)
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        hits = view[(positions >> np.uint64(3)).astype(np.intp)] & masks
+        return hits.all(axis=1)
+
+
+class DuplicateFilter:
+    """Scalable, persistable Bloom filter over receipt self_hash values"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        initial_capacity: int = 1 << 20,
+        error_rate: float = 0.001,
+        save_interval: float = 60.0,
+        salt: Optional[bytes] = None,
+    ):
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.save_interval = save_interval
+        self.salt = salt if salt is not None else os.urandom(16)
+        self.slices: List[BloomFilter] = []
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def __len__(self) -> int:
+        """Number of hashes added (one per stored receipt)"""
+        return sum(s.count for s in self.slices)
+
+    def clear(self) -> None:
+        self.slices = []
+        self._dirty = True
+
+    # --- hashing ---
+    def _digest(self, key: str) -> tuple:
+        d = hashlib.blake2b(key.encode(), digest_size=16, key=self.salt).digest()
+        return int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+
+    def _digests(self, keys: Sequence[str]) -> tuple:
+        raw = b"".join(
+            hashlib.blake2b(k.encode(), digest_size=16, key=self.salt).digest() for k in keys
+        )
+        words = np.frombuffer(raw, dtype="<u8").reshape(-1, 2)
+        return words[:, 0].copy(), words[:, 1] | np.uint64(1)
+
+    def _slice_for_add(self) -> BloomFilter:
+        if not self.slices or self.slices[-1].full:
+            # Capacity doubles and error halves per slice: total stays under error_rate
+            n = len(self.slices)
+            self.slices.append(
+                BloomFilter(self.initial_capacity << n, self.error_rate / 2 ** (n + 1))
+            )
+        return self.slices[-1]
+
+    # --- membership ---
+    def might_contain(self, key: str) -> bool:
+        """False means definitely new; True means probably stored"""
+        h1, h2 = self._digest(key)
+        return any(s.contains(h1, h2) for s in self.slices)
+
+    def might_contain_many(self, keys: Sequence[str]) -> List[bool]:
+        if not keys or not self.slices:
+            return [False] * len(keys)
+        h1, h2 = self._digests(keys)
+        hits = np.zeros(len(keys), dtype=bool)
+        for s in self.slices:
+            hits |= s.contains_many(h1, h2)
+        return hits.tolist()
+
+    def add(self, key: str) -> None:
+        self._slice_for_add().add(*self._digest(key))
+        self._dirty = True
+
+    def add_many(self, keys: Sequence[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        h1, h2 = self._digests(keys)
+        start = 0
+        while start < len(keys):
+            target = self._slice_for_add()
+            end = min(len(keys), start + target.capacity - target.count)
+            target.add_many(h1[start:end], h2[start:end])
+            start = end
+        self._dirty = True
+
+    def rebuild(self, keys: Iterable[str], batch_size: int = 10_000) -> int:
+        """Replace the contents with `keys`; returns how many were added"""
+        self.clear()
+        batch: List[str] = []
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= batch_size:
+                self.add_many(batch)
+                batch = []
+        self.add_many(batch)
+        return len(self)
+
+    # --- persistence ---
+    def save(self, path: Optional[str] = None) -> None:
+        """Write a snapshot atomically (write-then-rename)"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("DuplicateFilter has no snapshot path")
+        header = json.dumps({
+            "salt": self.salt.hex(),
+            "initial_capacity": self.initial_capacity,
+            "error_rate": self.error_rate,
+            "rows": len(self),
+            "slices": [
+                {"capacity": s.capacity, "error_rate": s.error_rate, "count": s.count}
+                for s in self.slices
+            ],
+        }).encode()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as w:
+                w.write(MAGIC)
+                w.write(struct.pack("<I", len(header)))
+                w.write(header)
+                for s in self.slices:
+                    w.write(s.bits)
+                w.flush()
+                os.fsync(w.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def maybe_save(self) -> bool:
+        """Save when there are unsaved additions and `save_interval` has passed"""
+        if (
+            self.path is None
+            or not self._dirty
+            or time.monotonic() - self._saved_at < self.save_interval
+        ):
+            return False
+        self.save()
+        return True
+
+    @classmethod
+    def load(cls, path: str, save_interval: float = 60.0) -> Optional["DuplicateFilter"]:
+        """Read a snapshot; None when missing or unreadable"""
+        try:
+            with open(path, "rb") as r:
+                if r.read(len(MAGIC)) != MAGIC:
+                    return None
+                (length,) = struct.unpack("<I", r.read(4))
+                header = json.loads(r.read(length))
+                dup = cls(
+                    path=path,
+                    initial_capacity=header["initial_capacity"],
+                    error_rate=header["error_rate"],
+                    save_interval=save_interval,
+                    salt=bytes.fromhex(header["salt"]),
+                )
+                for meta in header["slices"]:
+                    bits = bytearray(r.read(BloomFilter.nbytes(meta["capacity"], meta["error_rate"])))
+                    dup.slices.append(
+                        BloomFilter(meta["capacity"], meta["error_rate"], bits, meta["count"])
+                    )
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+        dup._dirty = False
+        return dup
@@ -0,0 +1,348 @@
+"""
+Streaming Receipt Export
+Version: Band-1.3 (vΩ.9)
+
+Streams receipts from storage through the batch canonicalizer into chunked
+NDJSON and (when pyarrow is installed) Arrow IPC / Parquet files, and writes a
+manifest carrying the Merkle root of the exported range. Rows without a
+self_hash cannot be attested: they are skipped and counted as invalid.
+Writing happens in worker threads, overlapped with fetching the next batch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
+
+from pydantic import BaseModel, Field
+
+from .receipt_utils import (
+    CANONICAL_ORDER,
+    canonicalize_receipt,
+    canonicalize_receipts,
+    dumps_canonical,
+)
+from .verify_hash import MerkleAccumulator
+
+try:  # Optional columnar output
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover - depends on environment
+    pa = None
+    pa_ipc = None
+    pa_parquet = None
+
+
+EXPORT_FORMATS = ("ndjson", "arrow", "parquet")
+MANIFEST_NAME = "manifest.json"
+
+_FILE_SUFFIX = {"ndjson": ".ndjson", "arrow": ".arrow", "parquet": ".parquet"}
+
+
+class ExportChunk(BaseModel):
+    """A single exported chunk file"""
+    path: str
+    format: str
+    receipt_count: int
+    first_lamport: Optional[int] = None
+    last_lamport: Optional[int] = None
+    sha256: str
+
+
+class ExportManifest(BaseModel):
+    """Manifest describing an exported receipt range"""
+    start_lamport: Optional[int] = None
+    end_lamport: Optional[int] = None
+    receipt_count: int
+    invalid_count: int = 0  # Rows skipped for lacking a self_hash
+    merkle_root: str
+    formats: List[str]
+    chunks: List[ExportChunk]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+async def iter_receipt_rows(
+    db: Any,
+    start_lamport: Optional[int] = None,
+    end_lamport: Optional[int] = None,
+    batch_size: int = 5000,
+) -> AsyncIterator[Any]:
+    """Page through Receipt rows in lamport order using a keyset cursor"""
+    lamport: Dict[str, int] = {}
+    if start_lamport is not None:
+        lamport["gte"] = start_lamport
+    if end_lamport is not None:
+        lamport["lte"] = end_lamport
+    where = {"lamport": lamport} if lamport else {}
+
+    cursor: Optional[str] = None
+    while True:
+        query: Dict[str, Any] = {
+            "where": where,
+            "order": [{"lamport": "asc"}, {"id": "asc"}],
+            "take": batch_size,
+        }
+        if cursor is not None:
+            query["cursor"] = {"id": cursor}
+            query["skip"] = 1
+
+        rows = await db.receipt.find_many(**query)
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        cursor = rows[-1].id
+
+
+def _row_to_dict(row: Any) -> Dict[str, Any]:
+    """Flatten a receipt or DB row into a dict ready for canonicalization"""
+    if isinstance(row, dict):
+        data = dict(row)
+    elif isinstance(row, BaseModel):
+        data = row.model_dump()
+    else:
+        data = dict(row.__dict__)
+
+    data.pop("research_station", None)
+    metadata = data.pop("metadata", None)
+    if isinstance(metadata, dict) and "payload" not in data:
+        data["payload"] = metadata
+    return {k: v for k, v in data.items() if v is not None}
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _arrow_schema():
+    return pa.schema(
+        [
+            ("receipt_type", pa.string()),
+            ("lamport", pa.int64()),
+            ("timestamp", pa.string()),
+            ("prev_digest", pa.string()),
+            ("self_hash", pa.string()),
+            ("trace_id", pa.string()),
+            ("who", pa.string()),
+            ("band", pa.string()),
+            ("track", pa.string()),
+            ("payload", pa.string()),
+            ("notes", pa.string()),
+        ]
+    )
+
+
+def _to_record_batch(batch: List[Dict[str, Any]]):
+    columns: Dict[str, List[Any]] = {name: [] for name in CANONICAL_ORDER}
+    for receipt in batch:
+        for name in CANONICAL_ORDER:
+            value = receipt.get(name)
+            if isinstance(value, Enum):
+                value = value.value
+            elif value is not None and name != "lamport" and not isinstance(value, str):
+                value = dumps_canonical(value)
+            columns[name].append(value)
+    return pa.RecordBatch.from_pydict(columns, schema=_arrow_schema())
+
+
+class _ChunkWriter:
+    """Writes one format, rolling over to a new file every `chunk_size` rows"""
+
+    def __init__(self, output_dir: str, fmt: str, chunk_size: int, prefix: str):
+        self.output_dir = output_dir
+        self.format = fmt
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.chunks: List[ExportChunk] = []
+        self._index = 0
+        self._handle: Any = None
+        self._path: Optional[str] = None
+        self._count = 0
+        self._first: Optional[int] = None
+        self._last: Optional[int] = None
+
+    def write(self, batch: List[Dict[str, Any]]) -> None:
+        start = 0
+        while start < len(batch):
+            if self._handle is None:
+                self._open()
+            room = self.chunk_size - self._count
+            part = batch[start:start + room]
+            self._write_part(part)
+            self._count += len(part)
+            if self._first is None:
+                self._first = part[0].get("lamport")
+            self._last = part[-1].get("lamport")
+            start += len(part)
+            if self._count >= self.chunk_size:
+                self._close()
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._close()
+
+    def _open(self) -> None:
+        self._index += 1
+        name = f"{self.prefix}-{self._index:06d}{_FILE_SUFFIX[self.format]}"
+        self._path = os.path.join(self.output_dir, name)
+        if self.format == "ndjson":
+            self._handle = open(self._path, "w", encoding="utf-8")
+        elif self.format == "arrow":
+            sink = pa.OSFile(self._path, "wb")
+            self._handle = (sink, pa_ipc.new_file(sink, _arrow_schema()))
+        else:
+            self._handle = pa_parquet.ParquetWriter(self._path, _arrow_schema())
+
+    def _write_part(self, part: List[Dict[str, Any]]) -> None:
+        if self.format == "ndjson":
+            self._handle.write("".join(dumps_canonical(r) + "\n" for r in part))
+        elif self.format == "arrow":
+            self._handle[1].write_batch(_to_record_batch(part))
+        else:
+            self._handle.write_batch(_to_record_batch(part))
+
+    def _close(self) -> None:
+        if self.format == "arrow":
+            writer, sink = self._handle[1], self._handle[0]
+            writer.close()
+            sink.close()
+        else:
+            self._handle.close()
+
+        self.chunks.append(
+            ExportChunk(
+                path=os.path.basename(self._path),
+                format=self.format,
+                receipt_count=self._count,
+                first_lamport=self._first,
+                last_lamport=self._last,
+                sha256=_file_sha256(self._path),
+            )
+        )
+        self._handle = None
+        self._path = None
+        self._count = 0
+        self._first = None
+        self._last = None
+
+
+class ReceiptExporter:
+    """Exports receipt ranges for external auditors in constant memory"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        formats: Iterable[str] = ("ndjson",),
+        chunk_size: int = 100_000,
+        batch_size: int = 5_000,
+        prefix: str = "receipts",
+    ):
+        self.output_dir = output_dir
+        self.formats = list(formats)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.prefix = prefix
+
+        for fmt in self.formats:
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"Unsupported export format: {fmt}")
+            if fmt != "ndjson" and pa is None:
+                raise RuntimeError(f"pyarrow is required for {fmt} export")
+        if chunk_size < 1 or batch_size < 1:
+            raise ValueError("chunk_size and batch_size must be >= 1")
+
+    async def export(
+        self,
+        receipts: Union[Iterable[Any], AsyncIterable[Any]],
+        start_lamport: Optional[int] = None,
+        end_lamport: Optional[int] = None,
+    ) -> ExportManifest:
+        """Export receipts (sync or async iterable) and write the manifest"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        writers = [
+            _ChunkWriter(self.output_dir, fmt, self.chunk_size, self.prefix)
+            for fmt in self.formats
+        ]
+        merkle = MerkleAccumulator()
+        invalid = 0
+
+        def write(batch: List[Dict[str, Any]]) -> None:
+            nonlocal invalid
+            valid = [receipt for receipt in batch if receipt.get("self_hash")]
+            invalid += len(batch) - len(valid)
+            for receipt in valid:
+                merkle.add(receipt["self_hash"])
+            if valid:
+                for writer in writers:
+                    writer.write(valid)
+
+        def write_rows(rows: List[Dict[str, Any]]) -> None:
+            write([canonicalize_receipt(r, copy=False) for r in rows])
+
+        def write_all() -> None:
+            rows = (_row_to_dict(row) for row in receipts)
+            for batch in canonicalize_receipts(rows, self.batch_size, copy=False):
+                write(batch)
+
+        def finish() -> ExportManifest:
+            chunks: List[ExportChunk] = []
+            for writer in writers:
+                writer.close()
+                chunks.extend(writer.chunks)
+
+            manifest = ExportManifest(
+                start_lamport=start_lamport,
+                end_lamport=end_lamport,
+                receipt_count=merkle.count,
+                invalid_count=invalid,
+                merkle_root=merkle.root(),
+                formats=self.formats,
+                chunks=chunks,
+            )
+            with open(os.path.join(self.output_dir, MANIFEST_NAME), "w") as w:
+                w.write(manifest.model_dump_json(indent=2))
+            return manifest
+
+        # Canonicalizing, hashing and file I/O run off the event loop
+        if hasattr(receipts, "__aiter__"):
+            # One batch is written in a worker thread while the next is fetched
+            writing: Optional[asyncio.Future] = None
+            try:
+                pending: List[Any] = []
+                async for row in receipts:
+                    pending.append(_row_to_dict(row))
+                    if len(pending) >= self.batch_size:
+                        if writing is not None:
+                            await writing
+                        writing = asyncio.ensure_future(asyncio.to_thread(write_rows, pending))
+                        pending = []
+                if writing is not None:
+                    await writing
+                if pending:
+                    await asyncio.to_thread(write_rows, pending)
+            finally:
+                if writing is not None:
+                    # Never leave a thread writing to files the caller may clean up
+                    await asyncio.gather(writing, return_exceptions=True)
+        else:
+            await asyncio.to_thread(write_all)
+
+        return await asyncio.to_thread(finish)
@@ -0,0 +1,258 @@
+"""
+Field Learning Engine
+Version: Band-1.3 (vΩ.9)
+
+Consumes FIELD_POINT samples — (t, value) pairs per field — into NumPy
+buffers and summarises them over sliding windows of `window` points that
+start every `stride` points. All windows completed by one batch are
+computed together on a strided view of the field's buffer plus the new
+points: least-squares gradient of value over t, trapezoidal flux, and
+mean/min/max. Each window becomes one FIELD_GRADIENT and one FIELD_FLUX
+receipt committing to a digest of its raw points, instead of one receipt
+per point.
+
+Memory is bounded by `max_fields * window` buffered points: buffers are
+rows of two preallocated arrays, and the least recently fed field is
+evicted (its partial window summarised) when a new one needs a row.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from pydantic import BaseModel
+
+from .db import PartialWriteError
+from .hashing import DEFAULT_HASH_ALG, hash_hex
+from .types import BandLevel, EventRequest, ReceiptType, Track
+
+
+class FieldWindow(BaseModel):
+    """Summary of one window of a field's points"""
+    field_id: str
+    start_t: float
+    end_t: float
+    count: int  # Less than the window size only for evicted or flushed partial windows
+    mean: float
+    minimum: float
+    maximum: float
+    gradient: float  # Least-squares slope of value over t
+    flux: float  # Trapezoidal integral of value over t
+    digest: str  # Hash of the window's float64 t values followed by its values
+
+
+def summarize_windows(
+    field_id: str,
+    t: np.ndarray,
+    values: np.ndarray,
+    hash_alg: str = DEFAULT_HASH_ALG,
+) -> List[FieldWindow]:
+    """Summaries of equal-length windows, one per row of `t` and `values`"""
+    t_mean = t.mean(axis=1, keepdims=True)
+    v_mean = values.mean(axis=1, keepdims=True)
+    dt = t - t_mean
+    covariance = (dt * (values - v_mean)).sum(axis=1)
+    variance = (dt * dt).sum(axis=1)
+    gradient = np.divide(covariance, variance, out=np.zeros_like(covariance), where=variance > 0)
+    flux = ((values[:, 1:] + values[:, :-1]) * np.diff(t, axis=1)).sum(axis=1) / 2
+
+    columns = zip(
+        t[:, 0].tolist(), t[:, -1].tolist(), v_mean[:, 0].tolist(),
+        values.min(axis=1).tolist(), values.max(axis=1).tolist(),
+        gradient.tolist(), flux.tolist(),
+    )
+    count = t.shape[1]
+    windows = []
+    for i, (start, end, mean, low, high, slope, area) in enumerate(columns):
+        raw = np.ascontiguousarray(t[i], dtype="<f8").tobytes()
+        raw += np.ascontiguousarray(values[i], dtype="<f8").tobytes()
+        windows.append(FieldWindow(
+            field_id=field_id, start_t=start, end_t=end, count=count, mean=mean,
+            minimum=low, maximum=high, gradient=slope, flux=area,
+            digest=hash_hex(raw, hash_alg),
+        ))
+    return windows
+
+
+class FieldEngine:
+    """Streams field points into bounded buffers and emits window summaries"""
+
+    def __init__(
+        self,
+        service: Any = None,
+        window: int = 1024,
+        stride: Optional[int] = None,
+        max_fields: int = 1024,
+        batch_size: int = 500,
+        band: BandLevel = BandLevel.BAND_3,
+        track: Track = Track.TRACK_A,
+        hash_alg: str = DEFAULT_HASH_ALG,
+    ):
+        stride = window if stride is None else stride
+        if window < 2 or not 1 <= stride <= window:
+            raise ValueError("window must be at least 2 and stride between 1 and window")
+        self.service = service  # Anything with AuditService.process_events; None to only collect
+        self.window = window
+        self.stride = stride
+        self.max_fields = max_fields
+        self.batch_size = batch_size
+        self.band = band
+        self.track = track
+        self.hash_alg = hash_alg
+        # Row r buffers the points of one field from the start of its next window
+        self._t = np.empty((max_fields, window))
+        self._v = np.empty((max_fields, window))
+        self._count = np.zeros(max_fields, dtype=np.int64)
+        self._rows: "OrderedDict[str, int]" = OrderedDict()  # Least recently fed first
+        self._free = list(range(max_fields - 1, -1, -1))
+        self._pending: List[FieldWindow] = []
+
+    @property
+    def pending(self) -> int:
+        """Window summaries not yet taken or minted"""
+        return len(self._pending)
+
+    @property
+    def buffer_bytes(self) -> int:
+        """Fixed size of the point buffers"""
+        return self._t.nbytes + self._v.nbytes
+
+    def buffered(self, field_id: str) -> int:
+        """Points of a field waiting for their window to complete"""
+        row = self._rows.get(field_id)
+        return 0 if row is None else int(self._count[row])
+
+    def add(self, field_id: str, t: Any, values: Any) -> int:
+        """Append a field's points (in t order); returns how many windows they completed"""
+        t = np.asarray(t, dtype=np.float64).ravel()
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if t.shape != values.shape:
+            raise ValueError("t and values must have the same length")
+        if not t.size:
+            return 0
+        if not (np.isfinite(t).all() and np.isfinite(values).all()):
+            raise ValueError(f"Non-finite field point for {field_id}")
+
+        row = self._row(field_id)
+        n = int(self._count[row])
+        if n + t.size < self.window:
+            # No window completes: append in place
+            self._t[row, n:n + t.size] = t
+            self._v[row, n:n + t.size] = values
+            self._count[row] = n + t.size
+            return 0
+
+        t = np.concatenate((self._t[row, :n], t))
+        values = np.concatenate((self._v[row, :n], values))
+        windows = (t.size - self.window) // self.stride + 1
+        self._pending.extend(summarize_windows(
+            field_id,
+            sliding_window_view(t, self.window)[::self.stride][:windows],
+            sliding_window_view(values, self.window)[::self.stride][:windows],
+            self.hash_alg,
+        ))
+        # The next window starts `stride` points after the last completed one
+        rest = t.size - windows * self.stride
+        self._t[row, :rest] = t[t.size - rest:]
+        self._v[row, :rest] = values[t.size - rest:]
+        self._count[row] = rest
+        return windows
+
+    def add_many(self, field_ids: Sequence[Any], t: Any, values: Any) -> int:
+        """Append points of many fields at once, grouped by field with one sort"""
+        field_ids = np.asarray(field_ids)
+        t = np.asarray(t, dtype=np.float64).ravel()
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not field_ids.shape == t.shape == values.shape:
+            raise ValueError("field_ids, t and values must have the same length")
+        fields, inverse = np.unique(field_ids, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(inverse, minlength=fields.size))))
+        windows = 0
+        for i, field_id in enumerate(fields.tolist()):
+            points = order[bounds[i]:bounds[i + 1]]
+            windows += self.add(str(field_id), t[points], values[points])
+        return windows
+
+    def _row(self, field_id: str) -> int:
+        row = self._rows.get(field_id)
+        if row is not None:
+            self._rows.move_to_end(field_id)
+            return row
+        if not self._free:
+            evicted, row = self._rows.popitem(last=False)
+            self._summarize_partial(evicted, row)
+            self._free.append(row)
+        row = self._free.pop()
+        self._rows[field_id] = row
+        self._count[row] = 0
+        return row
+
+    def _summarize_partial(self, field_id: str, row: int) -> None:
+        n = int(self._count[row])
+        if n:
+            self._pending.extend(summarize_windows(
+                field_id, self._t[row:row + 1, :n], self._v[row:row + 1, :n], self.hash_alg
+            ))
+        self._count[row] = 0
+
+    def take(self, partial: bool = False) -> List[FieldWindow]:
+        """Remove and return pending summaries; `partial` also closes every incomplete window"""
+        if partial:
+            for field_id, row in self._rows.items():
+                self._summarize_partial(field_id, row)
+        windows, self._pending = self._pending, []
+        return windows
+
+    async def consume(self, events: Iterable[EventRequest]) -> int:
+        """Feed FIELD_POINT events (metadata "value" and optional "t"); mints once `batch_size` summaries wait"""
+        field_ids, t, values = [], [], []
+        now = time.time()
+        for event in events:
+            if event.receipt_type != ReceiptType.FIELD_POINT:
+                raise ValueError(f"Not a field point: {event.receipt_type.value}")
+            metadata = event.metadata or {}
+            if "value" not in metadata:
+                raise ValueError(f"Field point for {event.trace_id} has no value")
+            field_ids.append(event.trace_id)
+            t.append(metadata.get("t", now))
+            values.append(metadata["value"])
+        windows = self.add_many(field_ids, t, values) if field_ids else 0
+        if self.service is not None and len(self._pending) >= self.batch_size:
+            await self.flush()
+        return windows
+
+    async def flush(self, partial: bool = False) -> List[FieldWindow]:
+        """Mint a FIELD_GRADIENT and a FIELD_FLUX receipt per pending summary"""
+        windows = self.take(partial)
+        if not windows or self.service is None:
+            return windows
+        events = []
+        for w in windows:
+            span = {"field": w.field_id, "start_t": w.start_t, "end_t": w.end_t, "count": w.count}
+            events.append(EventRequest(
+                receipt_type=ReceiptType.FIELD_GRADIENT, band=self.band, track=self.track,
+                trace_id=w.field_id, commitment=w.digest,
+                metadata={**span, "gradient": w.gradient, "mean": w.mean,
+                          "min": w.minimum, "max": w.maximum},
+            ))
+            events.append(EventRequest(
+                receipt_type=ReceiptType.FIELD_FLUX, band=self.band, track=self.track,
+                trace_id=w.field_id, commitment=w.digest,
+                metadata={**span, "flux": w.flux},
+            ))
+        try:
+            await self.service.process_events(events)
+        except PartialWriteError as exc:
+            # Windows whose blocks committed are done; keep the others for the next flush.
+            # Events 2i and 2i + 1 are window i's, and share its trace and station.
+            failed = sorted({i // 2 for i in exc.errors})
+            self._pending = [windows[i] for i in failed] + self._pending
+            raise
+        except Exception:
+            # Keep them for the next flush
+            self._pending = windows + self._pending
+            raise
+        return windows
@@ -0,0 +1,43 @@
+"""
+Digest Algorithms
+Version: Band-1.3 (vΩ.9)
+
+Registry of the digest algorithms a receipt can be tagged with. SHA-256 is
+the default and what every untagged (legacy) receipt used; BLAKE2b-256
+(hashlib's blake2b with a 32-byte digest) is available as an alternative.
+Both produce 64 hex characters, so stored digests and Merkle proofs keep
+their shape whichever algorithm minted them.
+"""
+
+import hashlib
+from functools import partial
+from typing import Callable, Dict
+
+
+SHA256 = "sha256"
+BLAKE2B_256 = "blake2b-256"
+DEFAULT_HASH_ALG = SHA256
+
+# Tag -> hashlib constructor
+HASH_ALGORITHMS: Dict[str, Callable[[bytes], "hashlib._Hash"]] = {
+    SHA256: hashlib.sha256,
+    BLAKE2B_256: partial(hashlib.blake2b, digest_size=32),
+}
+
+
+def get_hash(alg: str = DEFAULT_HASH_ALG) -> Callable[[bytes], "hashlib._Hash"]:
+    """hashlib constructor for a tag; raises ValueError for unknown tags"""
+    try:
+        return HASH_ALGORITHMS[alg]
+    except KeyError:
+        raise ValueError(f"Unsupported hash algorithm: {alg}") from None
+
+
+def hash_hex(data: bytes, alg: str = DEFAULT_HASH_ALG) -> str:
+    """Hex digest of `data` under `alg`"""
+    return get_hash(alg)(data).hexdigest()
+
+
+def hash_text(content: str, alg: str = DEFAULT_HASH_ALG) -> str:
+    """Hex digest of UTF-8 `content` under `alg`"""
+    return get_hash(alg)(content.encode()).hexdigest()
@@ -0,0 +1,364 @@
+"""
+Bulk .ben Receipt Importer
+Version: Band-1.3 (vΩ.9)
+
+Backfills the Receipt table from the encrypted file store written by
+ben_governance (`ben_boot.py`, `ben_event.py`). Files are decrypted, checked
+against their self_hash and mapped through `canonicalize_receipt` in a
+process pool, while the event loop writes the resulting rows: each batch is
+one transaction of several `create_many` statements with `skip_duplicates`,
+so receipts already stored (same `self_hash`) are skipped by the database.
+
+Progress is appended to a checkpoint file after every committed batch. A
+rerun skips the files listed there and retries the ones that failed; a crash
+between commit and checkpoint only means that batch is decoded again and
+skipped as duplicates.
+
+Both .ben formats are read: Fernet tokens and the binary AEAD envelope
+defined in ben_governance/ben_envelope.py.
+
+    python -m ben.importer --receipts-dir ~/AuditaAI/receipts \
+        --key ~/AuditaAI/ben_governance/ben.key --workers 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from prisma import Json
+from pydantic import BaseModel, Field
+
+from .hashing import DEFAULT_HASH_ALG, hash_text
+from .receipt_utils import canonicalize_receipt
+from .types import BandLevel, ReceiptType, Track
+
+
+IMPORT_CHAIN_ID = "governance"
+CHECKPOINT_NAME = ".import.ckpt"
+# Postgres allows 65535 bind parameters per statement; a row binds about 13
+ROWS_PER_STATEMENT = 4000
+MAX_FAILURES = 1000
+
+# ben_governance events without a ReceiptType of their own
+EVENT_TYPES: Dict[str, ReceiptType] = {
+    "Δ-BOOTCONFIRM": ReceiptType.MERKLE_ROOT,  # like the BENBootSystem genesis
+}
+_RECEIPT_TYPES = {t.value: t for t in ReceiptType}
+
+# Binary envelope layout, see ben_governance/ben_envelope.py
+_ENVELOPE_MAGIC = b"BEN\x00"
+_ENVELOPE = struct.Struct(">4sBB4sqB")
+_ENVELOPE_ALGS = {1: ("aes-gcm", AESGCM), 2: ("chacha20", ChaCha20Poly1305)}
+_NONCE = 12
+
+
+class ImportReport(BaseModel):
+    """Outcome of one importer run"""
+    files: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    resumed: int = 0
+    seconds: float = 0.0
+    failures: List[Tuple[str, str]] = Field(default_factory=list)
+
+    @property
+    def rate(self) -> float:
+        """Files processed per second"""
+        return (self.files - self.resumed) / self.seconds if self.seconds else 0.0
+
+
+class BenDecoder:
+    """Opens .ben files in either format with the BEN key (and its rotation successor)"""
+
+    def __init__(self, keys: List[bytes]):
+        self.keys = [k.strip() for k in keys]
+        fernets = [Fernet(k) for k in self.keys]
+        self.fernet = fernets[0] if len(fernets) == 1 else MultiFernet(fernets)
+        self._ids = {hashlib.sha256(k).digest()[:4]: k for k in self.keys}
+        self._aead: Dict[Tuple[bytes, int], Any] = {}
+
+    def open(self, blob: bytes) -> Dict[str, Any]:
+        if blob[:4] != _ENVELOPE_MAGIC:
+            return json.loads(self.fernet.decrypt(blob))
+        try:
+            _, version, alg, kid, lamport, n = _ENVELOPE.unpack_from(blob)
+        except struct.error:
+            raise InvalidToken
+        if version != 1 or alg not in _ENVELOPE_ALGS or kid not in self._ids:
+            raise InvalidToken
+        size = _ENVELOPE.size + n + _NONCE
+        try:
+            data = self._cipher(kid, alg).decrypt(blob[size - _NONCE:size], blob[size:], blob[:size])
+        except Exception:
+            raise InvalidToken
+        receipt = json.loads(data)
+        # As in ben_envelope.open: the authenticated header must describe its own body
+        digest = blob[_ENVELOPE.size:_ENVELOPE.size + n]
+        body_lamport = receipt.get("lamport_counter")
+        if receipt.get("self_hash") != (digest.hex() if n else None) or (
+            (lamport if lamport >= 0 else None) != (body_lamport if isinstance(body_lamport, int) else None)
+        ):
+            raise InvalidToken
+        return receipt
+
+    def _cipher(self, kid: bytes, alg: int) -> Any:
+        cipher = self._aead.get((kid, alg))
+        if cipher is None:
+            name, cls = _ENVELOPE_ALGS[alg]
+            key = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None,
+                info=b"ben-envelope-v1/" + name.encode(),
+            ).derive(self._ids[kid])
+            cipher = self._aead[(kid, alg)] = cls(key)
+        return cipher
+
+
+def load_keys(key_path: str) -> List[bytes]:
+    """ben.key, preceded by ben.key.next while a rotation is in progress"""
+    keys = []
+    for path in (key_path + ".next", key_path):
+        try:
+            with open(path, "rb") as f:
+                keys.append(f.read())
+        except FileNotFoundError:
+            if path == key_path:
+                raise
+    return keys
+
+
+def governance_hash(receipt: Dict[str, Any]) -> str:
+    """self_hash as ben_governance computes it: sorted-key JSON of the other fields"""
+    body = {k: v for k, v in receipt.items() if k != "self_hash"}
+    return hash_text(json.dumps(body, sort_keys=True), receipt.get("hash_alg", DEFAULT_HASH_ALG))
+
+
+def governance_row(
+    name: str,
+    receipt: Dict[str, Any],
+    default_type: ReceiptType = ReceiptType.ACT_REQUEST,
+) -> Dict[str, Any]:
+    """Map a decrypted ben_governance receipt onto a Receipt row.
+
+    Fields without a column (event, system, message, ...) end up in the
+    canonical payload, stored as row metadata together with the source file.
+    Rows always land on IMPORT_CHAIN_ID, which the live chain's checks skip.
+    """
+    data = dict(receipt)
+    lamport = data.pop("lamport_counter", None)
+    if not isinstance(lamport, int):
+        raise ValueError("missing lamport_counter")
+    event = data.get("event")
+    system = data.get("system")
+    receipt_type = _RECEIPT_TYPES.get(event) or EVENT_TYPES.get(event, default_type)
+    timestamp = datetime.fromisoformat(data.pop("timestamp"))
+    data.update(
+        receipt_type=receipt_type.value,
+        lamport=lamport,
+        timestamp=timestamp,
+        prev_digest=data.pop("prev_hash", None),
+        trace_id=f"{IMPORT_CHAIN_ID}/{system or 'unknown'}",
+        band=BandLevel.BAND_0.value,
+        track=Track.TRACK_A.value,
+    )
+    canonical = canonicalize_receipt(data, copy=False)
+    row: Dict[str, Any] = {
+        "receipt_type": canonical["receipt_type"],
+        "lamport": canonical["lamport"],
+        "timestamp": timestamp,
+        "prev_digest": canonical.get("prev_digest"),
+        "self_hash": canonical["self_hash"],
+        "trace_id": canonical["trace_id"],
+        "band": canonical["band"],
+        "track": canonical["track"],
+        "chain_id": IMPORT_CHAIN_ID,
+        "metadata": {**canonical.get("payload", {}), "source": name},
+    }
+    if system is not None:
+        row["node_id"] = system
+    alg = receipt.get("hash_alg", DEFAULT_HASH_ALG)
+    if alg != DEFAULT_HASH_ALG:
+        row["hash_alg"] = alg
+    return row
+
+
+def decode_chunk(
+    receipts_dir: str,
+    names: List[str],
+    keys: List[bytes],
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """Worker: (name, row, None) per importable file, (name, None, reason) otherwise"""
+    decoder = BenDecoder(keys)
+    out = []
+    for name in names:
+        try:
+            with open(os.path.join(receipts_dir, name), "rb") as r:
+                receipt = decoder.open(r.read())
+        except FileNotFoundError:
+            out.append((name, None, "missing"))
+            continue
+        except (InvalidToken, ValueError):
+            out.append((name, None, "undecryptable"))
+            continue
+        try:
+            if governance_hash(receipt) != receipt.get("self_hash"):
+                out.append((name, None, "hash_mismatch"))
+                continue
+            out.append((name, governance_row(name, receipt), None))
+        except (KeyError, TypeError, ValueError) as e:
+            out.append((name, None, f"malformed: {e}"))
+    return out
+
+
+class ReceiptImporter:
+    """Parallel, resumable backfill of the Receipt table from a .ben directory"""
+
+    def __init__(
+        self,
+        db: Any,
+        receipts_dir: str,
+        key_path: str,
+        workers: Optional[int] = None,
+        chunk_size: int = 1000,
+        batch_size: int = 20_000,
+        checkpoint_path: Optional[str] = None,
+    ):
+        if chunk_size < 1 or batch_size < 1:
+            raise ValueError("chunk_size and batch_size must be >= 1")
+        self.db = db
+        self.receipts_dir = receipts_dir
+        self.key_path = key_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path or os.path.join(receipts_dir, CHECKPOINT_NAME)
+
+    def _done(self) -> Set[str]:
+        try:
+            with open(self.checkpoint_path) as r:
+                return set(r.read().split())
+        except FileNotFoundError:
+            return set()
+
+    async def run(self, progress: Optional[Any] = None) -> ImportReport:
+        """Import every .ben file not yet checkpointed; returns the run's counts"""
+        start = time.monotonic()
+        done = self._done()
+        names = sorted(
+            n for n in os.listdir(self.receipts_dir) if n.endswith(".ben") and n not in done
+        )
+        report = ImportReport(files=len(names) + len(done), resumed=len(done))
+        keys = load_keys(self.key_path)
+        chunks = [names[i:i + self.chunk_size] for i in range(0, len(names), self.chunk_size)]
+
+        loop = asyncio.get_running_loop()
+        pending_rows: List[Dict[str, Any]] = []
+        pending_names: List[str] = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool, \
+                open(self.checkpoint_path, "a") as ckpt:
+            queue = iter(chunks)
+            in_flight: Set[asyncio.Future] = set()
+            while True:
+                # Bounded read-ahead: workers keep decoding while a batch is written
+                for chunk in queue:
+                    in_flight.add(loop.run_in_executor(
+                        pool, decode_chunk, self.receipts_dir, chunk, keys
+                    ))
+                    if len(in_flight) >= 2 * self.workers:
+                        break
+                if not in_flight:
+                    break
+                finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    for name, row, reason in future.result():
+                        if row is None:
+                            # Not checkpointed, so a rerun (e.g. with the right key) retries it
+                            report.invalid += 1
+                            if len(report.failures) < MAX_FAILURES:
+                                report.failures.append((name, reason))
+                            continue
+                        pending_rows.append(row)
+                        pending_names.append(name)
+                if len(pending_rows) >= self.batch_size:
+                    await self._commit(pending_rows, report)
+                    self._checkpoint(ckpt, pending_names)
+                    pending_rows, pending_names = [], []
+                if progress is not None:
+                    progress(report)
+            if pending_rows:
+                await self._commit(pending_rows, report)
+            self._checkpoint(ckpt, pending_names)
+
+        report.seconds = time.monotonic() - start
+        return report
+
+    async def _commit(self, rows: List[Dict[str, Any]], report: ImportReport) -> None:
+        """One transaction per batch, split into statements under the parameter limit"""
+        inserted = 0
+        async with self.db.tx() as tx:
+            for i in range(0, len(rows), ROWS_PER_STATEMENT):
+                data = [
+                    {**row, "metadata": Json(row["metadata"])}
+                    for row in rows[i:i + ROWS_PER_STATEMENT]
+                ]
+                inserted += await tx.receipt.create_many(data=data, skip_duplicates=True)
+        report.imported += inserted
+        report.duplicates += len(rows) - inserted
+
+    @staticmethod
+    def _checkpoint(ckpt: Any, names: Iterable[str]) -> None:
+        ckpt.write("".join(f"{name}\n" for name in names))
+        ckpt.flush()
+        os.fsync(ckpt.fileno())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import .ben receipts into the Receipt table")
+    parser.add_argument("--receipts-dir", default=os.path.expanduser("~/AuditaAI/receipts"))
+    parser.add_argument("--key", default=os.path.expanduser("~/AuditaAI/ben_governance/ben.key"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="files per worker task")
+    parser.add_argument("--batch-size", type=int, default=20_000,
+                        help="rows per transaction (at least; whole worker chunks are committed)")
+    parser.add_argument("--checkpoint", help=f"defaults to <receipts-dir>/{CHECKPOINT_NAME}")
+    args = parser.parse_args(argv)
+
+    from prisma import Prisma
+
+    async def run() -> ImportReport:
+        db = Prisma()
+        await db.connect()
+        try:
+            importer = ReceiptImporter(
+                db, args.receipts_dir, args.key, args.workers, args.chunk_size,
+                args.batch_size, args.checkpoint,
+            )
+            return await importer.run(
+                progress=lambda r: print(
+                    f"\r{r.imported + r.duplicates + r.invalid:,} files", end="", flush=True
+                )
+            )
+        finally:
+            await db.disconnect()
+
+    report = asyncio.run(run())
+    print()
+    print(json.dumps(report.model_dump(exclude={"failures"}) | {"rate": round(report.rate)}, indent=2))
+    for name, reason in report.failures[:20]:
+        print(f"{name}: {reason}")
+    return 0 if not report.failures else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+"""
+Bulk Receipt Ingestion Service
+Version: Band-1.3 (vΩ.9)
+
+FastAPI front end for `AuditService.process_events`. Producers POST an NDJSON
+stream of event requests to `/ingest`; lines are validated in batches, minted
+in contiguous Lamport blocks and answered with one NDJSON result per line.
+Already-minted receipts (replays, migrations) go to `/ingest/receipts`, where
+known ones are skipped through `AuditService.ingest_receipts`.
+
+Flow control: parsed batches pass through a bounded queue to a single storage
+writer. When storage falls behind the queue fills, the handler stops pulling
+the request body, and the server's transport stops reading from the socket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+from .db import PartialWriteError, deadline
+from .metrics import CONTENT_TYPE, REGISTRY
+from .quota import QuotaExceededError
+from .types import BaseReceipt, EventRequest
+
+
+# Results are spooled to disk past this size instead of held in memory
+RESULT_SPOOL_BYTES = 1 << 20
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = 1 << 20,
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into (line_no, line) pairs.
+
+    Blank lines are skipped but still counted. Lines longer than
+    `max_line_bytes` are yielded as ``None`` and their bytes discarded, so a
+    missing newline can never make the buffer grow without bound.
+    """
+    buffer = b""
+    line_no = 0
+    overlong = False
+
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_no += 1
+            if overlong:
+                overlong = False
+                yield line_no, None
+            elif len(line) > max_line_bytes:
+                yield line_no, None
+            elif line.strip():
+                yield line_no, line
+        if len(buffer) > max_line_bytes:
+            overlong = True
+            buffer = b""
+
+    if overlong or buffer.strip():
+        line_no += 1
+        yield line_no, None if overlong else buffer
+
+
+def _error(line_no: int, error: str) -> Dict[str, Any]:
+    return {"line": line_no, "ok": False, "error": error}
+
+
+def _minted(line_no: int, receipt: BaseReceipt) -> Dict[str, Any]:
+    return {"line": line_no, "ok": True, "lamport": receipt.lamport, "self_hash": receipt.self_hash}
+
+
+def _validation_error(prefix: str, exc: ValidationError) -> str:
+    return prefix + "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+
+async def process_batch(
+    service: Any,
+    batch: List[Tuple[int, Optional[bytes]]],
+) -> List[Dict[str, Any]]:
+    """Validate one batch of lines, mint the valid ones and return per-line results"""
+    results: Dict[int, Dict[str, Any]] = {}
+    valid: List[Tuple[int, EventRequest]] = []
+
+    for line_no, line in batch:
+        if line is None:
+            results[line_no] = _error(line_no, "line_too_long")
+            continue
+        try:
+            valid.append((line_no, EventRequest.model_validate(json.loads(line))))
+        except json.JSONDecodeError as exc:
+            results[line_no] = _error(line_no, f"invalid_json: {exc.msg}")
+        except ValidationError as exc:
+            results[line_no] = _error(line_no, _validation_error("invalid_event: ", exc))
+
+    while valid:
+        try:
+            receipts = await service.process_events([event for _, event in valid])
+        except QuotaExceededError as exc:
+            # Reject the exhausted station's lines and retry the rest
+            for line_no, event in valid:
+                if event.station_id == exc.station_id:
+                    results[line_no] = _error(line_no, f"quota_exceeded: {exc.station_id}")
+            valid = [item for item in valid if item[1].station_id != exc.station_id]
+            continue
+        except PartialWriteError as exc:
+            # Shards that committed keep their receipts; only the failed ones' lines are errors
+            for i, ((line_no, _), receipt) in enumerate(zip(valid, exc.results)):
+                if i in exc.errors:
+                    results[line_no] = _error(line_no, f"storage_error: {exc.errors[i]}")
+                else:
+                    results[line_no] = _minted(line_no, receipt)
+        except Exception as exc:
+            for line_no, _ in valid:
+                results[line_no] = _error(line_no, f"storage_error: {exc}")
+        else:
+            for (line_no, _), receipt in zip(valid, receipts):
+                results[line_no] = _minted(line_no, receipt)
+        break
+
+    return [results[line_no] for line_no, _ in batch]
+
+
+async def process_receipt_batch(
+    service: Any,
+    batch: List[Tuple[int, Optional[bytes]]],
+) -> List[Dict[str, Any]]:
+    """Validate one batch of receipt lines and store the ones not seen before.
+
+    Duplicates are answered ``ok`` with ``"duplicate": true`` so replaying
+    the same stream twice is idempotent.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    valid: List[Tuple[int, BaseReceipt]] = []
+
+    for line_no, line in batch:
+        if line is None:
+            results[line_no] = _error(line_no, "line_too_long")
+            continue
+        try:
+            valid.append((line_no, BaseReceipt.model_validate(json.loads(line))))
+        except json.JSONDecodeError as exc:
+            results[line_no] = _error(line_no, f"invalid_json: {exc.msg}")
+        except ValidationError as exc:
+            results[line_no] = _error(line_no, _validation_error("invalid_receipt: ", exc))
+
+    if valid:
+        errors: Dict[int, Exception] = {}
+        try:
+            statuses = await service.ingest_receipts([receipt for _, receipt in valid])
+        except PartialWriteError as exc:
+            statuses, errors = exc.results, exc.errors
+        except Exception as exc:
+            statuses, errors = [None] * len(valid), dict.fromkeys(range(len(valid)), exc)
+        for i, ((line_no, receipt), status) in enumerate(zip(valid, statuses)):
+            if i in errors:
+                results[line_no] = _error(line_no, f"storage_error: {errors[i]}")
+            elif status not in ("stored", "duplicate"):
+                # invalid_hash, invalid_signature, own_lane or out_of_order
+                results[line_no] = _error(line_no, status)
+            else:
+                results[line_no] = {
+                    "line": line_no,
+                    "ok": True,
+                    "duplicate": status == "duplicate",
+                    "lamport": receipt.lamport,
+                    "self_hash": receipt.self_hash,
+                }
+
+    return [results[line_no] for line_no, _ in batch]
+
+
+def create_ingest_app(
+    service: Any,
+    config: Optional[Any] = None,
+    batch_size: int = 500,
+    max_pending_batches: int = 4,
+    max_line_bytes: int = 1 << 20,
+    batch_timeout: Optional[float] = None,
+) -> FastAPI:
+    """Build the ingestion app around an `AuditService`.
+
+    When `config` is given the service is initialized on startup. With
+    `batch_timeout` every database query made while storing a batch shares
+    that deadline; a batch running out of it answers its lines with errors.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if config is not None:
+            await service.initialize(config)
+        yield
+        if config is not None:
+            await service.close()
+
+    app = FastAPI(title="BEN Ingestion Service", version="1.3.0", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/db/stats")
+    async def db_stats():
+        """Per-query database latency, most total time first"""
+        db = getattr(service, "db", None)
+        return [s.model_dump() for s in db.stats()] if hasattr(db, "stats") else []
+
+    async def stream_batches(request: Request, handle) -> StreamingResponse:
+        """Feed request lines to `handle` in batches and stream back the results"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+        spool = tempfile.SpooledTemporaryFile(max_size=RESULT_SPOOL_BYTES)
+        counts = {"accepted": 0, "rejected": 0}
+
+        async def writer() -> None:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                with deadline(batch_timeout):
+                    results = await handle(service, batch)
+                for result in results:
+                    counts["accepted" if result["ok"] else "rejected"] += 1
+                    spool.write(json.dumps(result).encode() + b"\n")
+
+        writer_task = asyncio.create_task(writer())
+
+        async def send(batch: Optional[List[Tuple[int, Optional[bytes]]]]) -> None:
+            """Queue a batch for the writer, raising its error if it dies instead of waiting forever"""
+            if writer_task.done():
+                writer_task.result()
+            put = asyncio.ensure_future(queue.put(batch))
+            done, _ = await asyncio.wait({put, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if put not in done:
+                put.cancel()
+                writer_task.result()
+
+        try:
+            batch: List[Tuple[int, Optional[bytes]]] = []
+            async for item in iter_ndjson_lines(request.stream(), max_line_bytes):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    # Blocks while the writer is behind: this is the backpressure
+                    await send(batch)
+                    batch = []
+            if batch:
+                await send(batch)
+            await send(None)
+            await writer_task
+        except BaseException:
+            writer_task.cancel()
+            spool.close()
+            raise
+
+        spool.seek(0)
+
+        def stream_results():
+            try:
+                for block in iter(lambda: spool.read(1 << 16), b""):
+                    yield block
+            finally:
+                spool.close()
+
+        return StreamingResponse(
+            stream_results(),
+            media_type="application/x-ndjson",
+            headers={
+                "X-Ingest-Accepted": str(counts["accepted"]),
+                "X-Ingest-Rejected": str(counts["rejected"]),
+            },
+        )
+
+    @app.post("/ingest")
+    async def ingest(request: Request):
+        return await stream_batches(request, process_batch)
+
+    @app.post("/ingest/receipts")
+    async def ingest_receipts(request: Request):
+        return await stream_batches(request, process_receipt_batch)
+
+    return app
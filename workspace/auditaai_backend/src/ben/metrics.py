@@ -0,0 +1,294 @@
+"""
+Operational Metrics
+Version: Band-1.3 (vΩ.9)
+
+Minimal counters and latency histograms rendered in the Prometheus text
+exposition format. Every update first checks the registry's `enabled` flag,
+and `Histogram.time()` hands back a shared no-op context manager when
+disabled, so instrumented hot paths pay one attribute check.
+
+Set BEN_METRICS=0 to disable collection at startup.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Seconds; covers sub-millisecond hashing up to multi-second DB stalls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class _NullTimer:
+    """Context manager that does nothing (metrics disabled)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Shared state of a named metric family"""
+
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, labels: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add `amount` to the series selected by `labels`"""
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Cumulative latency histogram with fixed bucket bounds"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, *labels: str):
+        """Context manager observing the elapsed wall time"""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}"
+                )
+            suffix = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{suffix} {total[0]:g}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Owns metric families and renders them for `/metrics`"""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("BEN_METRICS", "1").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help_text, labels, buckets=buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition of every registered metric"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Process-wide registry used by the BEN services
+REGISTRY = MetricsRegistry()
+
+RECEIPTS_MINTED = REGISTRY.counter(
+    "ben_receipts_minted_total", "Receipts minted and stored", ["receipt_type"]
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "ben_db_write_seconds", "Latency of receipt writes to the database", ["op"]
+)
+DB_WRITE_FAILURES = REGISTRY.counter(
+    "ben_db_write_failures_total", "Receipt writes that failed and were rolled back", ["op"]
+)
+CRIES_REFRESH_SECONDS = REGISTRY.histogram(
+    "ben_cries_refresh_seconds", "Time spent recomputing CRIES metrics"
+)
+CHAIN_VERIFICATIONS = REGISTRY.counter(
+    "ben_chain_verifications_total", "Chain verifications by outcome", ["result"]
+)
+CHAIN_VERIFY_SECONDS = REGISTRY.histogram(
+    "ben_chain_verify_seconds", "Latency of chain verification requests"
+)
+QUOTA_REJECTIONS = REGISTRY.counter(
+    "ben_quota_rejections_total", "Events rejected for exceeding a station quota"
+)
+DEDUP_CHECKS = REGISTRY.counter(
+    "ben_dedup_checks_total",
+    "Ingested receipts by duplicate check outcome (new, duplicate, false_positive)",
+    ["result"],
+)
+REPLICATION_SHIPPED = REGISTRY.counter(
+    "ben_replication_shipped_total", "Receipt log entries shipped to followers"
+)
+REPLICATION_SHIP_FAILURES = REGISTRY.counter(
+    "ben_replication_ship_failures_total", "Attempts to ship log entries that failed and were retried"
+)
+REPLICATION_APPLIED = REGISTRY.counter(
+    "ben_replication_applied_total", "Receipts applied by this follower", ["result"]
+)
+REPLICATION_LAG_ENTRIES = REGISTRY.gauge(
+    "ben_replication_lag_entries", "Log entries shipped by the primary but not yet applied here"
+)
+REPLICATION_LAG_SECONDS = REGISTRY.gauge(
+    "ben_replication_lag_seconds", "Ship-time gap between the primary's newest entry and the newest applied one"
+)
+WITNESS_CLAIMS = REGISTRY.counter(
+    "ben_witness_claims_total",
+    "Witness claims by outcome (accepted, invalid_signature, unknown_witness, duplicate, late)",
+    ["result"],
+)
+WITNESS_OUTCOMES = REGISTRY.counter(
+    "ben_witness_outcomes_total", "Witness groups closed by quorum or timeout", ["outcome"]
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "ben_db_query_seconds", "Latency of database queries by model and operation", ["query"]
+)
+DB_QUERY_TIMEOUTS = REGISTRY.counter(
+    "ben_db_query_timeouts_total", "Queries that ran past their timeout or the caller's deadline", ["query"]
+)
+DB_QUERIES_COALESCED = REGISTRY.counter(
+    "ben_db_queries_coalesced_total", "Reads answered by an identical read already in flight", ["query"]
+)
+INTEGRITY_CHECKS = REGISTRY.counter(
+    "ben_integrity_checks_total", "Receipts and .ben files re-verified by spot checks", ["source", "result"]
+)
+INTEGRITY_MISMATCHES = REGISTRY.counter(
+    "ben_integrity_mismatches_total", "Spot-checked receipts failing re-verification", ["source", "check"]
+)
+INTEGRITY_COVERAGE = REGISTRY.gauge(
+    "ben_integrity_coverage_ratio", "Estimated share of stored receipts verified by spot checks so far"
+)
@@ -0,0 +1,266 @@
+"""
+Per-Station Audit Quotas
+Version: Band-1.3 (vΩ.9)
+
+Token-bucket quota per research station: capacity is the station's daily
+`audit_limit` and the bucket refills continuously at that many audits per day.
+
+Bucket state lives in a local SQLite file shared by every worker on the host.
+Workers do not touch it per receipt; each one leases a small block of tokens
+and spends it in memory, so the ingest hot path is a dictionary lookup and a
+decrement. The file is the persisted state: a restarted worker simply leases
+again, and `QuotaTracker.rebuild` reseeds a lost file from receipt counts
+(only buckets that have no row; live ones keep other workers' leases).
+Store calls may wait on the file lock, so async callers run the tracker in
+a worker thread.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+SECONDS_PER_DAY = 86400.0
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when a station has no audits left in its quota window"""
+
+    def __init__(self, station_id: str, requested: int = 1):
+        super().__init__(f"Audit quota exceeded for station {station_id}")
+        self.station_id = station_id
+        self.requested = requested
+
+
+class QuotaStore:
+    """Token buckets in a SQLite file, safe across processes"""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS quota_bucket ("
+                " station_id TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _refilled(self, station_id: str, capacity: int, now: float) -> float:
+        row = self._conn.execute(
+            "SELECT tokens, updated_at FROM quota_bucket WHERE station_id = ?",
+            (station_id,),
+        ).fetchone()
+        if row is None:
+            return float(capacity)
+        tokens, updated_at = row
+        elapsed = max(0.0, now - updated_at)
+        return min(float(capacity), tokens + elapsed * capacity / SECONDS_PER_DAY)
+
+    def _write(self, station_id: str, tokens: float, now: float) -> None:
+        self._conn.execute(
+            "INSERT INTO quota_bucket (station_id, tokens, updated_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(station_id) DO UPDATE SET"
+            " tokens = excluded.tokens, updated_at = excluded.updated_at",
+            (station_id, tokens, now),
+        )
+
+    def _transaction(self, fn):
+        with self._lock:
+            # IMMEDIATE takes the write lock up front so concurrent workers
+            # serialize instead of failing on upgrade
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def lease(
+        self,
+        station_id: str,
+        capacity: int,
+        amount: int,
+        now: Optional[float] = None,
+    ) -> Tuple[int, float]:
+        """Take up to `amount` whole tokens; returns (granted, tokens left)"""
+        now = time.time() if now is None else now
+
+        def take():
+            tokens = self._refilled(station_id, capacity, now)
+            granted = max(0, min(amount, math.floor(tokens)))
+            self._write(station_id, tokens - granted, now)
+            return granted, tokens - granted
+        return self._transaction(take)
+
+    def give_back(
+        self,
+        station_id: str,
+        capacity: int,
+        amount: int,
+        now: Optional[float] = None,
+    ) -> None:
+        """Return unspent tokens to the bucket"""
+        now = time.time() if now is None else now
+
+        def put():
+            tokens = self._refilled(station_id, capacity, now)
+            self._write(station_id, min(float(capacity), tokens + amount), now)
+        self._transaction(put)
+
+    def reset(self, station_id: str, tokens: float, now: Optional[float] = None) -> None:
+        """Overwrite a bucket"""
+        now = time.time() if now is None else now
+        self._transaction(lambda: self._write(station_id, tokens, now))
+
+    def seed(self, station_id: str, tokens: float, now: Optional[float] = None) -> bool:
+        """Create a bucket unless it exists; returns whether it was created"""
+        now = time.time() if now is None else now
+        return self._transaction(lambda: self._conn.execute(
+            "INSERT INTO quota_bucket (station_id, tokens, updated_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(station_id) DO NOTHING",
+            (station_id, tokens, now),
+        ).rowcount == 1)
+
+    def missing(self, station_ids: List[str]) -> List[str]:
+        """Stations among `station_ids` that have no bucket yet"""
+        with self._lock:
+            known = {
+                row[0] for row in self._conn.execute(
+                    "SELECT station_id FROM quota_bucket WHERE station_id IN"
+                    f" ({', '.join('?' * len(station_ids))})",
+                    station_ids,
+                )
+            } if station_ids else set()
+        return [station_id for station_id in station_ids if station_id not in known]
+
+    def available(self, station_id: str, capacity: int, now: Optional[float] = None) -> float:
+        """Tokens currently in the shared bucket (excluding worker leases)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._refilled(station_id, capacity, now)
+
+
+class QuotaTracker:
+    """In-memory quota front end for one worker.
+
+    Stations without a registered limit are unlimited. Thread-safe, so it can
+    be called from worker threads.
+    """
+
+    def __init__(self, store: QuotaStore, lease_size: int = 32):
+        if lease_size < 1:
+            raise ValueError("lease_size must be >= 1")
+        self.store = store
+        self.lease_size = lease_size
+        self._limits: Dict[str, int] = {}
+        self._leased: Dict[str, int] = {}
+        self._exhausted_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_limit(self, station_id: str, audit_limit: int) -> None:
+        """Register (or change) a station's daily audit limit"""
+        if self._limits.get(station_id) != audit_limit:
+            self._limits[station_id] = audit_limit
+            self._exhausted_until.pop(station_id, None)
+
+    def stations(self) -> List[str]:
+        """Stations with a registered limit"""
+        return list(self._limits)
+
+    def _lease_size(self, capacity: int) -> int:
+        # Small quotas get small leases so idle workers cannot strand much
+        return max(1, min(self.lease_size, capacity // 100))
+
+    def try_consume(self, station_id: Optional[str], count: int = 1) -> bool:
+        """Spend `count` audits; False (and nothing spent) when over quota"""
+        capacity = self._limits.get(station_id) if station_id is not None else None
+        if capacity is None:
+            return True
+        with self._lock:
+            return self._try_consume(station_id, capacity, count)
+
+    def _try_consume(self, station_id: str, capacity: int, count: int) -> bool:
+        leased = self._leased.get(station_id, 0)
+        if leased >= count:
+            self._leased[station_id] = leased - count
+            return True
+
+        now = time.time()
+        if now < self._exhausted_until.get(station_id, 0.0):
+            return False
+
+        granted, left = self.store.lease(
+            station_id, capacity, count - leased + self._lease_size(capacity), now
+        )
+        leased += granted
+        if leased >= count:
+            self._leased[station_id] = leased - count
+            return True
+
+        # Keep what we got for smaller requests and skip the store until at
+        # least one more token has refilled
+        self._leased[station_id] = leased
+        if capacity > 0:
+            self._exhausted_until[station_id] = now + (1 - (left % 1)) * SECONDS_PER_DAY / capacity
+        else:
+            self._exhausted_until[station_id] = float("inf")
+        return False
+
+    def consume(self, station_id: Optional[str], count: int = 1) -> None:
+        """Spend `count` audits or raise `QuotaExceededError`"""
+        if not self.try_consume(station_id, count):
+            raise QuotaExceededError(station_id, count)
+
+    def refund(self, station_id: Optional[str], count: int = 1) -> None:
+        """Undo a consume whose receipts were never stored"""
+        if station_id is not None and station_id in self._limits:
+            with self._lock:
+                self._leased[station_id] = self._leased.get(station_id, 0) + count
+
+    def remaining(self, station_id: str) -> Optional[int]:
+        """Audits left for a station, or None when it is unlimited"""
+        capacity = self._limits.get(station_id)
+        if capacity is None:
+            return None
+        return math.floor(self.store.available(station_id, capacity)) + self._leased.get(station_id, 0)
+
+    def flush(self) -> None:
+        """Return this worker's unspent leases to the shared store"""
+        with self._lock:
+            for station_id, leased in list(self._leased.items()):
+                if leased:
+                    self.store.give_back(station_id, self._limits[station_id], leased)
+                self._leased[station_id] = 0
+            self._exhausted_until.clear()
+
+    def missing(self) -> List[str]:
+        """Stations with a limit but no bucket in the store (new, or the file was lost)"""
+        return self.store.missing(self.stations())
+
+    def rebuild(self, used: Dict[str, int]) -> None:
+        """Seed missing buckets from audits counted in the last day of storage.
+
+        Existing buckets are left alone: other workers hold leases from them
+        and they carry their own refill state.
+        """
+        for station_id, count in used.items():
+            capacity = self._limits.get(station_id)
+            if capacity is not None:
+                self.store.seed(station_id, float(max(0, capacity - count)))
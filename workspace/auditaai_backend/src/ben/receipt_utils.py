@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List
 
 from pydantic import BaseModel
 
-from .types import BaseReceipt
+from .hashing import DEFAULT_HASH_ALG
+from .types import BaseReceipt, BandLevel, CRIESMetrics, ReceiptType, Track
+from .verify_hash import HashVerifier
 
 
 CANONICAL_ORDER: List[str] = [
@@ -29,7 +33,7 @@ def _iso8601z(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def canonicalize_receipt(obj: Any) -> Dict[str, Any]:
+def canonicalize_receipt(obj: Any, copy: bool = True) -> Dict[str, Any]:
     """Return a canonical dict for a receipt-like object.
 
     Rules (from Rosetta v208/v271):
@@ -37,13 +41,16 @@ def canonicalize_receipt(obj: Any) -> Dict[str, Any]:
     - `timestamp` normalized to ISO8601Z
     - `lamport` as int
     - preserve unknown fields under `payload`
+
+    Pass ``copy=False`` when the caller owns a plain dict input and does not
+    need it afterwards; the dict is then consumed in place.
     """
 
     # Convert Pydantic/BaseReceipt
     if isinstance(obj, BaseModel):
         data = obj.model_dump()
     elif isinstance(obj, dict):
-        data = dict(obj)
+        data = dict(obj) if copy else obj
     else:
         # Try attrs
         data = obj.__dict__ if hasattr(obj, "__dict__") else dict(obj)
@@ -114,3 +121,89 @@ def canonicalize_receipt(obj: Any) -> Dict[str, Any]:
             out[k] = values[k]
 
     return out
+
+
+def canonicalize_receipts(
+    items: Iterable[Any],
+    batch_size: int = 1000,
+    copy: bool = True,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Canonicalize a stream of receipts, yielding lists of at most `batch_size`.
+
+    Only one batch is held in memory at a time, so arbitrarily long inputs
+    (e.g. a paged database cursor) can be processed in constant memory.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append(canonicalize_receipt(item, copy=copy))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def receipt_from_row(row: Any) -> BaseReceipt:
+    """Map a Receipt table row back onto a BaseReceipt"""
+    return BaseReceipt(
+        receipt_type=ReceiptType(row.receipt_type),
+        lamport=row.lamport,
+        prev_digest=row.prev_digest,
+        self_hash=row.self_hash,
+        trace_id=row.trace_id,
+        timestamp=row.timestamp,
+        actor_signature=row.actor_signature,
+        band=BandLevel(row.band),
+        track=Track(row.track),
+        chain_id=row.chain_id,
+        commitment=row.commitment,
+        node_id=row.node_id,
+        hash_alg=row.hash_alg or DEFAULT_HASH_ALG,
+    )
+
+
+def cries_from_receipts(receipts: Iterable[BaseReceipt]) -> CRIESMetrics:
+    """CRIES metrics over a window of recent receipts"""
+    clarity = reliability = integrity = efficiency = safety = 1.0
+
+    for receipt in receipts:
+        # Update reliability based on hash verification
+        if HashVerifier.verify_receipt_hash(receipt).is_valid:
+            reliability *= 0.99  # Small penalty for any verification issue
+
+        # Update safety based on risk gates
+        if receipt.receipt_type == ReceiptType.RISK_GATE:
+            safety *= 0.95  # Significant safety impact
+
+        # Integrity based on signature verification
+        if not receipt.actor_signature:
+            integrity *= 0.90
+
+    return CRIESMetrics(
+        clarity=clarity,
+        reliability=reliability,
+        integrity=integrity,
+        efficiency=efficiency,
+        safety=safety
+    )
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return _iso8601z(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_canonical(receipt: Dict[str, Any]) -> str:
+    """Serialize a canonical receipt dict to a single compact JSON line."""
+    return json.dumps(
+        receipt,
+        default=_json_default,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
@@ -0,0 +1,792 @@
+"""
+Receipt Log Replication
+Version: Band-1.3 (vΩ.9)
+
+The primary numbers every committed receipt block as a log entry and ships it
+over a swappable transport: in-process, a shared directory, or a Unix socket
+in front of either. Read-only followers pull the entries after the last one
+they applied, verify them incrementally per (chain_id, node_id) lane — Lamport
+order, prev-digest links, self-hashes and, given public keys, signatures —
+and serve chain verification, trace proofs and CRIES metrics from memory, so
+read traffic never reaches the writer's database. A client that just wrote
+passes the receipt's Lamport value as `min_lamport` to read its own write.
+Memory is bounded: a follower keeps a window of the newest receipts per chain
+and answers ranges that start before it with ReplicaWindowError (409).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+
+from .metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    CHAIN_VERIFICATIONS,
+    CHAIN_VERIFY_SECONDS,
+    REPLICATION_APPLIED,
+    REPLICATION_LAG_ENTRIES,
+    REPLICATION_LAG_SECONDS,
+    REPLICATION_SHIPPED,
+    REPLICATION_SHIP_FAILURES,
+)
+from .receipt_utils import cries_from_receipts
+from .state import head_lane
+from .trace_index import DEFAULT_MAX_TRACES, TraceIndex, TraceProof, TraceTimeline
+from .types import BaseReceipt, CRIESMetrics
+from .verify_chain import (
+    ChainRule,
+    ChainVerifier,
+    Lane,
+    LamportOrderRule,
+    PrevDigestRule,
+    SelfHashRule,
+    SignatureRule,
+    merge_order_key,
+)
+
+
+# Entry kinds: blocks minted by the primary are fully verified; receipts it
+# stored through `ingest_receipts` were minted elsewhere and only self-hashed
+BLOCK = "block"
+INGEST = "ingest"
+
+# Largest request or response line a `LogServer` accepts
+MAX_MESSAGE_BYTES = 1 << 26
+
+# Receipts a follower keeps per chain for range verification
+DEFAULT_CHAIN_WINDOW = 100_000
+
+
+def chain_key(chain_id: Optional[str]) -> str:
+    """JSON-safe key of a chain ("" for the legacy chain)"""
+    return chain_id or ""
+
+
+class LogEntry(BaseModel):
+    """One committed block of receipts, numbered by the primary"""
+    seq: int
+    kind: str = BLOCK
+    receipts: List[BaseReceipt]
+    committed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LogHead(BaseModel):
+    """Newest entry the primary has shipped"""
+    seq: int = 0
+    committed_at: Optional[datetime] = None
+    lamports: Dict[str, int] = {}  # Highest shipped Lamport per chain_key
+    lanes: Dict[str, int] = {}  # Highest shipped Lamport per head_lane, to re-log unshipped blocks
+
+
+class LogTransport(ABC):
+    """Carries log entries from the primary to its followers"""
+
+    @abstractmethod
+    def ship(self, entries: List[LogEntry], head: LogHead) -> None:
+        """Append consecutive entries, then advertise `head`"""
+
+    @abstractmethod
+    def fetch(self, after_seq: int, limit: int) -> List[LogEntry]:
+        """Up to `limit` entries following `after_seq`, in order"""
+
+    @abstractmethod
+    def head(self) -> LogHead:
+        """The newest shipped entry"""
+
+
+class InMemoryLogTransport(LogTransport):
+    """Keeps the newest `capacity` entries for followers in the same process"""
+
+    def __init__(self, capacity: int = 100_000):
+        self._entries: Deque[LogEntry] = deque(maxlen=capacity)
+        self._head = LogHead()
+        self._lock = threading.Lock()
+
+    def ship(self, entries: List[LogEntry], head: LogHead) -> None:
+        with self._lock:
+            last = self._entries[-1].seq if self._entries else 0
+            self._entries.extend(e for e in entries if e.seq > last)
+            self._head = head
+
+    def fetch(self, after_seq: int, limit: int) -> List[LogEntry]:
+        with self._lock:
+            if not self._entries or after_seq >= self._entries[-1].seq:
+                return []
+            first = self._entries[0].seq
+            if after_seq < first - 1:
+                raise RuntimeError(
+                    f"Log truncated: entry {after_seq + 1} is gone, the oldest kept is {first}"
+                )
+            start = after_seq - first + 1
+            return list(islice(self._entries, start, start + limit))
+
+    def head(self) -> LogHead:
+        with self._lock:
+            return self._head
+
+
+class DirectoryLogTransport(LogTransport):
+    """Ships entries through NDJSON segment files in a shared directory.
+
+    Segments are named after the first seq they hold, so a reader finds any
+    entry without listing the directory, and each follower resumes reading at
+    the byte offset where its last fetch stopped. `head.json` is replaced
+    only after the entries it names are appended.
+    """
+
+    HEAD = "head.json"
+
+    def __init__(self, path: str, segment_entries: int = 10_000):
+        self.path = path
+        self.segment_entries = segment_entries
+        os.makedirs(path, exist_ok=True)
+        self._cursor: Optional[Tuple[int, str, int]] = None  # (next seq, segment, byte offset)
+
+    def _segment(self, seq: int) -> Tuple[int, str]:
+        start = (seq - 1) // self.segment_entries * self.segment_entries + 1
+        return start, os.path.join(self.path, f"{start:012d}.log")
+
+    def ship(self, entries: List[LogEntry], head: LogHead) -> None:
+        segments: Dict[str, List[bytes]] = {}
+        for entry in entries:
+            lines = segments.setdefault(self._segment(entry.seq)[1], [])
+            lines.append(entry.model_dump_json().encode() + b"\n")
+        for path, lines in segments.items():
+            # One O_APPEND write per segment; a retried ship may repeat
+            # entries, which readers skip
+            data = memoryview(b"".join(lines))
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+
+        # Write-then-rename so readers never see a partial head
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as w:
+            w.write(head.model_dump_json())
+        os.replace(tmp, os.path.join(self.path, self.HEAD))
+
+    def fetch(self, after_seq: int, limit: int) -> List[LogEntry]:
+        entries: List[LogEntry] = []
+        seq = after_seq + 1
+        while len(entries) < limit:
+            start, path = self._segment(seq)
+            offset = self._cursor[2] if self._cursor and self._cursor[:2] == (seq, path) else 0
+            try:
+                with open(path, "rb") as r:
+                    r.seek(offset)
+                    data = r.read()
+            except FileNotFoundError:
+                break
+            # A partly written last line is read on the next fetch
+            for line in data[:data.rfind(b"\n") + 1].splitlines(keepends=True):
+                offset += len(line)
+                entry = LogEntry.model_validate_json(line)
+                if entry.seq < seq:
+                    continue
+                if entry.seq != seq:
+                    raise RuntimeError(f"Log gap in {path}: expected entry {seq}, found {entry.seq}")
+                entries.append(entry)
+                seq += 1
+                self._cursor = (seq, path, offset)
+                if len(entries) >= limit:
+                    break
+            if seq < start + self.segment_entries:
+                break  # The segment holds nothing newer yet
+        return entries
+
+    def head(self) -> LogHead:
+        try:
+            with open(os.path.join(self.path, self.HEAD)) as f:
+                return LogHead.model_validate_json(f.read())
+        except FileNotFoundError:
+            return LogHead()
+
+
+class LogServer:
+    """Serves a transport to other processes on a Unix socket, one JSON line per message"""
+
+    def __init__(self, transport: LogTransport, path: str):
+        self.transport = transport
+        self.path = path
+        self.logger = logging.getLogger("ben.replication")
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=self.path, limit=MAX_MESSAGE_BYTES
+        )
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self._dispatch(json.loads(line))
+                except (OSError, RuntimeError, ValueError, KeyError) as exc:
+                    response = {"error": str(exc)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as exc:
+            self.logger.warning(f"Dropping log client: {exc}")
+        finally:
+            writer.close()
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "fetch":
+            entries = self.transport.fetch(request["after"], request["limit"])
+            return {"entries": [e.model_dump(mode="json") for e in entries]}
+        if op == "head":
+            return {"head": self.transport.head().model_dump(mode="json")}
+        if op == "ship":
+            self.transport.ship(
+                [LogEntry.model_validate(e) for e in request["entries"]],
+                LogHead.model_validate(request["head"]),
+            )
+            return {"ok": True}
+        raise ValueError(f"Unknown op: {op}")
+
+
+class SocketLogTransport(LogTransport):
+    """Client of a `LogServer`; one connection, reopened after a failure"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    self._sock.settimeout(self.timeout)
+                    self._sock.connect(self.path)
+                    self._reader = self._sock.makefile("rb")
+                self._sock.sendall(json.dumps(request).encode() + b"\n")
+                line = self._reader.readline()
+                if not line:
+                    raise ConnectionError("Log server closed the connection")
+            except OSError:
+                self.close()
+                raise
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = self._reader = None
+
+    def ship(self, entries: List[LogEntry], head: LogHead) -> None:
+        self._call({
+            "op": "ship",
+            "entries": [e.model_dump(mode="json") for e in entries],
+            "head": head.model_dump(mode="json"),
+        })
+
+    def fetch(self, after_seq: int, limit: int) -> List[LogEntry]:
+        response = self._call({"op": "fetch", "after": after_seq, "limit": limit})
+        return [LogEntry.model_validate(e) for e in response["entries"]]
+
+    def head(self) -> LogHead:
+        return LogHead.model_validate(self._call({"op": "head"})["head"])
+
+
+class ReplicationLog:
+    """Primary side: numbers committed blocks and ships them in order.
+
+    After `start()` a background task ships pending entries in a worker
+    thread, so appending never waits on the transport; without it each
+    append ships inline. A failed ship keeps its entries pending and they
+    are shipped first next time, so followers never see a gap. Pending
+    entries live in memory only: after a restart the owner re-logs the
+    blocks the transport never got (`AuditService.replay_unshipped`).
+    """
+
+    def __init__(self, transport: LogTransport, retry_interval: float = 1.0):
+        self.transport = transport
+        self.retry_interval = retry_interval
+        self.logger = logging.getLogger("ben.replication")
+        # Continue numbering after a restart
+        self._head = transport.head()
+        self._seq = self._head.seq
+        self._pending: List[LogEntry] = []
+        self._lock = threading.Lock()  # Guards _seq and _pending against the shipping thread
+        self._ship_lock = threading.Lock()  # One ship at a time, in entry order
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def head(self) -> LogHead:
+        """Newest entry shipped successfully"""
+        return self._head
+
+    @property
+    def pending(self) -> int:
+        """Entries waiting for the transport to recover"""
+        return len(self._pending)
+
+    def append(self, receipts: Iterable[BaseReceipt], kind: str = BLOCK) -> LogEntry:
+        """Log one committed block (receipts in Lamport order) and ship it"""
+        with self._lock:
+            self._seq += 1
+            entry = LogEntry(seq=self._seq, kind=kind, receipts=list(receipts))
+            self._pending.append(entry)
+        if self._task is None:
+            self.flush()
+        else:
+            self._wake.set()
+        return entry
+
+    def flush(self) -> bool:
+        """Ship pending entries; False if the transport failed and they stay pending"""
+        with self._ship_lock:
+            with self._lock:
+                entries = list(self._pending)
+            if not entries:
+                return True
+            lamports = dict(self._head.lamports)
+            lanes = dict(self._head.lanes)
+            for entry in entries:
+                for receipt in entry.receipts:
+                    key = chain_key(receipt.chain_id)
+                    lamports[key] = max(lamports.get(key, 0), receipt.lamport)
+                    lane = head_lane(receipt.chain_id, receipt.node_id)
+                    lanes[lane] = max(lanes.get(lane, 0), receipt.lamport)
+            last = entries[-1]
+            head = LogHead(seq=last.seq, committed_at=last.committed_at, lamports=lamports, lanes=lanes)
+            try:
+                self.transport.ship(entries, head)
+            except (OSError, RuntimeError) as exc:
+                REPLICATION_SHIP_FAILURES.inc()
+                self.logger.warning(f"Shipping {len(entries)} log entries failed: {exc}")
+                return False
+            REPLICATION_SHIPPED.inc(amount=len(entries))
+            with self._lock:
+                del self._pending[:len(entries)]
+            self._head = head
+            return True
+
+    def start(self) -> None:
+        """Ship from a background task on the running loop instead of inline"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+            if self._pending:
+                self._wake.set()
+
+    async def stop(self) -> bool:
+        """Stop the background task and try a last ship; False if entries stay pending"""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        return await asyncio.to_thread(self.flush)
+
+    async def run(self) -> None:
+        """Ship whenever entries are appended, retrying while the transport is down"""
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if not await asyncio.to_thread(self.flush):
+                await asyncio.sleep(self.retry_interval)
+                self._wake.set()
+
+
+class LaneOrderRule(ChainRule):
+    """Lamport values strictly increase within each (chain_id, node_id) lane"""
+
+    name = "lane_order"
+
+    def reset(self) -> None:
+        self._last: Dict[Lane, int] = {}
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        lane = (receipt.chain_id, receipt.node_id)
+        last = self._last.get(lane)
+        self._last[lane] = receipt.lamport
+        if last is not None and receipt.lamport <= last:
+            return f"Non-monotonic Lamport clock at {receipt.lamport}"
+        return None
+
+
+class ReplicaWindowError(ValueError):
+    """A range starts before the receipts a follower still keeps"""
+
+
+class ReplicaStatus(BaseModel):
+    """Replication progress of a follower"""
+    applied_seq: int
+    primary_seq: int
+    entries_behind: int
+    lamport_behind: int  # Largest per-chain gap to the primary's shipped Lamport
+    seconds_behind: float  # Commit-time gap between the newest shipped and newest applied entry
+    receipts: int
+    lamports: Dict[str, int]  # Highest applied Lamport per chain_key
+    window_start: Dict[str, int] = Field(default_factory=dict)  # Lowest Lamport still served, per trimmed chain_key
+    error: Optional[str] = None  # Why the follower stopped applying, if it did
+
+
+class ReadReplica:
+    """Read-only follower: applies the shipped log after verifying it, and serves reads.
+
+    An entry becomes visible only once every receipt in it verified. On the
+    first violation the follower stops applying and keeps serving the
+    verified prefix; `status().error` says why.
+
+    Each chain keeps its newest `chain_window` receipts (trimmed in steps of a
+    quarter window) and the trace index its `max_traces` most recent traces.
+    """
+
+    def __init__(
+        self,
+        transport: LogTransport,
+        public_keys: Union[ed25519.Ed25519PublicKey, Mapping[Optional[str], ed25519.Ed25519PublicKey], None] = None,
+        batch_size: int = 256,
+        cries_window: int = 100,
+        chain_window: int = DEFAULT_CHAIN_WINDOW,
+        max_traces: Optional[int] = DEFAULT_MAX_TRACES,
+    ):
+        if chain_window < 1:
+            raise ValueError("chain_window must be at least 1")
+        self.transport = transport
+        self.batch_size = batch_size
+        self.chain_window = chain_window
+        self.chain_verifier = ChainVerifier()
+        self.trace_index = TraceIndex(max_traces)
+        self.logger = logging.getLogger("ben.replication")
+        self.error: Optional[str] = None
+
+        # Rule state persists across entries, so each receipt is checked once
+        self._rules: List[ChainRule] = [LaneOrderRule(), PrevDigestRule(), SelfHashRule()]
+        if public_keys is not None:
+            self._rules.append(SignatureRule(public_keys))
+        self._ingest_rules: List[ChainRule] = [SelfHashRule()]
+        for rule in self._rules + self._ingest_rules:
+            rule.reset()
+
+        self._chains: Dict[Optional[str], List[BaseReceipt]] = {}
+        self._window_start: Dict[Optional[str], int] = {}  # Set once a chain is trimmed
+        self._trimmed_heads: Dict[Optional[str], Dict[Lane, str]] = {}  # Last dropped digest per lane
+        self._recent: Deque[BaseReceipt] = deque(maxlen=cries_window)
+        self._lamports: Dict[str, int] = {}
+        self._count = 0
+        self._applied_seq = 0
+        self._applied_at: Optional[datetime] = None
+        self._head = LogHead()
+        self._cries: Optional[CRIESMetrics] = None
+        self._poll_lock = asyncio.Lock()
+
+    # --- applying ---
+    async def poll(self) -> int:
+        """Fetch and apply entries shipped since the last poll; returns how many were applied"""
+        async with self._poll_lock:
+            if self.error is not None:
+                return 0
+            self._head = await asyncio.to_thread(self.transport.head)
+            applied = 0
+            while self._applied_seq < self._head.seq:
+                entries = await asyncio.to_thread(
+                    self.transport.fetch, self._applied_seq, self.batch_size
+                )
+                if not entries:
+                    break
+                for entry in entries:
+                    if not self.apply(entry):
+                        self._report()
+                        return applied
+                    applied += 1
+            if self._head.seq < self._applied_seq:
+                self._halt(
+                    f"Primary log is at entry {self._head.seq}, behind the "
+                    f"{self._applied_seq} already applied here"
+                )
+            self._report()
+            return applied
+
+    def apply(self, entry: LogEntry) -> bool:
+        """Verify and apply the next entry; False (and halted) if it does not verify"""
+        if self.error is not None:
+            return False
+        if entry.seq != self._applied_seq + 1:
+            self._halt(f"Log gap: expected entry {self._applied_seq + 1}, got {entry.seq}")
+            return False
+        rules = [(rule.name, rule.check) for rule in (self._rules if entry.kind == BLOCK else self._ingest_rules)]
+        for receipt in entry.receipts:
+            for name, check in rules:
+                message = check(receipt)
+                if message is not None:
+                    REPLICATION_APPLIED.inc("rejected")
+                    self._halt(f"Entry {entry.seq} failed {name}: {message}")
+                    return False
+
+        for receipt in entry.receipts:
+            self._store(receipt)
+        REPLICATION_APPLIED.inc("verified", amount=len(entry.receipts))
+        self._applied_seq = entry.seq
+        self._applied_at = entry.committed_at
+        self._cries = None
+        return True
+
+    def _halt(self, error: str) -> None:
+        self.error = error
+        self.logger.error(f"Replication stopped: {error}")
+
+    def _store(self, receipt: BaseReceipt) -> None:
+        chain = self._chains.setdefault(receipt.chain_id, [])
+        if not chain or merge_order_key(receipt) > merge_order_key(chain[-1]):
+            chain.append(receipt)
+        elif receipt.lamport >= self._window_start.get(receipt.chain_id, 0):
+            insort(chain, receipt, key=merge_order_key)  # Another writer node's lane
+        if len(chain) > self.chain_window + self.chain_window // 4:
+            # Ranges from the new start on are complete: every lane's older receipts are gone
+            dropped = len(chain) - self.chain_window
+            heads = self._trimmed_heads.setdefault(receipt.chain_id, {})
+            for old in chain[:dropped]:
+                heads[(old.chain_id, old.node_id)] = old.self_hash
+            self._window_start[receipt.chain_id] = chain[dropped - 1].lamport + 1
+            del chain[:dropped]
+        key = chain_key(receipt.chain_id)
+        self._lamports[key] = max(self._lamports.get(key, 0), receipt.lamport)
+        self.trace_index.add(receipt)
+        self._recent.append(receipt)
+        self._count += 1
+
+    async def run(self, interval: float = 0.2) -> None:
+        """Poll every `interval` seconds until cancelled"""
+        while True:
+            try:
+                await self.poll()
+            except (OSError, RuntimeError, ValueError) as exc:
+                self.logger.warning(f"Replication poll failed: {exc}")
+            await asyncio.sleep(interval)
+
+    # --- progress ---
+    def applied_lamport(self, chain_id: Optional[str] = None) -> int:
+        """Highest Lamport value applied on a chain"""
+        return self._lamports.get(chain_key(chain_id), 0)
+
+    async def wait_for(
+        self,
+        lamport: int,
+        chain_id: Optional[str] = None,
+        timeout: float = 2.0,
+        interval: float = 0.02,
+    ) -> bool:
+        """Read-your-writes: wait until `lamport` on `chain_id` is applied here.
+
+        Polls on demand instead of waiting for `run`'s next tick. False on
+        timeout or when the follower has stopped.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.applied_lamport(chain_id) < lamport:
+            remaining = deadline - loop.time()
+            if self.error is not None or remaining <= 0:
+                return False
+            if not await self.poll():
+                await asyncio.sleep(min(interval, remaining))
+        return True
+
+    def status(self) -> ReplicaStatus:
+        """Applied position and lag behind the primary's last advertised head"""
+        head = self._head
+        behind = max(head.seq - self._applied_seq, 0)
+        seconds = 0.0
+        if behind and head.committed_at is not None:
+            # With nothing applied yet, the age of the newest shipped entry
+            since, until = (self._applied_at, head.committed_at) if self._applied_at else (head.committed_at, datetime.utcnow())
+            seconds = max((until - since).total_seconds(), 0.0)
+        lamport_behind = max(
+            (lamport - self._lamports.get(key, 0) for key, lamport in head.lamports.items()),
+            default=0,
+        )
+        return ReplicaStatus(
+            applied_seq=self._applied_seq,
+            primary_seq=head.seq,
+            entries_behind=behind,
+            lamport_behind=max(lamport_behind, 0),
+            seconds_behind=seconds,
+            receipts=self._count,
+            lamports=dict(self._lamports),
+            window_start={chain_key(c): lamport for c, lamport in self._window_start.items()},
+            error=self.error,
+        )
+
+    def _report(self) -> None:
+        if REGISTRY.enabled:
+            status = self.status()
+            REPLICATION_LAG_ENTRIES.set(status.entries_behind)
+            REPLICATION_LAG_SECONDS.set(status.seconds_behind)
+
+    # --- reads (same contract as the AuditService methods) ---
+    async def verify_receipt_chain(
+        self,
+        start_lamport: int,
+        end_lamport: int,
+        chain_id: Optional[str] = None
+    ) -> bool:
+        """Verify receipt chain between Lamport clocks (legacy chain by default).
+
+        The range links onto the receipts before it, which were verified as
+        they were applied, so it may start anywhere inside the window.
+        """
+        window_start = self._window_start.get(chain_id, 0)
+        if start_lamport < window_start:
+            raise ReplicaWindowError(
+                f"Lamport {start_lamport} is older than this replica keeps "
+                f"(from {window_start}); verify the range on the primary"
+            )
+        chain = self._chains.get(chain_id, [])
+        lamport = lambda r: r.lamport  # noqa: E731
+        lo = bisect_left(chain, start_lamport, key=lamport)
+        receipts = chain[lo:bisect_right(chain, end_lamport, key=lamport)]
+        heads = dict(self._trimmed_heads.get(chain_id, {}))
+        for receipt in chain[:lo]:
+            heads[(receipt.chain_id, receipt.node_id)] = receipt.self_hash
+        with CHAIN_VERIFY_SECONDS.time():
+            report = self.chain_verifier.validate(
+                receipts, [LamportOrderRule(), PrevDigestRule(heads)], fail_fast=True
+            )
+        CHAIN_VERIFICATIONS.inc("valid" if report.is_valid else "invalid")
+        if not report.is_valid:
+            raise ValueError(f"Chain verification failed: {report.error}")
+        return True
+
+    def get_trace_timeline(self, trace_id: str) -> Optional[TraceTimeline]:
+        """Ordered receipts and summary of a trace"""
+        return self.trace_index.timeline(trace_id)
+
+    def get_trace_proof(self, trace_id: str, self_hash: str) -> Optional[TraceProof]:
+        """Inclusion proof of a receipt in its trace's Merkle tree"""
+        return self.trace_index.inclusion_proof(trace_id, self_hash)
+
+    async def get_cries_metrics(self) -> CRIESMetrics:
+        """CRIES metrics over the most recently applied receipts"""
+        if self._cries is None:
+            self._cries = cries_from_receipts(self._recent)
+        return self._cries
+
+
+def create_replica_app(
+    replica: ReadReplica,
+    interval: float = 0.2,
+    wait_timeout: float = 2.0,
+) -> FastAPI:
+    """Read-only HTTP front end of a follower.
+
+    Every read takes an optional `min_lamport` (on `chain_id`): the request
+    waits up to `wait_timeout` for the follower to apply it and is answered
+    503 if it does not, so the client can retry or go to the primary.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        task = asyncio.create_task(replica.run(interval))
+        yield
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    app = FastAPI(title="BEN Read Replica", version="1.3.0", lifespan=lifespan)
+
+    async def behind(min_lamport: Optional[int], chain_id: Optional[str]) -> Optional[JSONResponse]:
+        if min_lamport is None or await replica.wait_for(min_lamport, chain_id, timeout=wait_timeout):
+            return None
+        return JSONResponse(
+            status_code=503,
+            content={"error": "replica_behind", "status": replica.status().model_dump(mode="json")},
+        )
+
+    @app.get("/health")
+    async def health():
+        return {"ok": replica.error is None}
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    @app.get("/replication/status")
+    async def status():
+        return replica.status()
+
+    @app.get("/verify")
+    async def verify(
+        start_lamport: int,
+        end_lamport: int,
+        chain_id: Optional[str] = None,
+        min_lamport: Optional[int] = None,
+    ):
+        if (waiting := await behind(min_lamport, chain_id)) is not None:
+            return waiting
+        try:
+            await replica.verify_receipt_chain(start_lamport, end_lamport, chain_id)
+        except ReplicaWindowError as exc:
+            return JSONResponse(status_code=409, content={"error": "outside_window", "detail": str(exc)})
+        except ValueError as exc:
+            return JSONResponse(status_code=409, content={"valid": False, "error": str(exc)})
+        return {"valid": True}
+
+    @app.get("/traces/{trace_id}")
+    async def trace(trace_id: str, min_lamport: Optional[int] = None, chain_id: Optional[str] = None):
+        if (waiting := await behind(min_lamport, chain_id)) is not None:
+            return waiting
+        timeline = replica.get_trace_timeline(trace_id)
+        if timeline is None:
+            return JSONResponse(status_code=404, content={"error": "unknown_trace"})
+        return timeline
+
+    @app.get("/traces/{trace_id}/proof/{self_hash}")
+    async def proof(
+        trace_id: str,
+        self_hash: str,
+        min_lamport: Optional[int] = None,
+        chain_id: Optional[str] = None,
+    ):
+        if (waiting := await behind(min_lamport, chain_id)) is not None:
+            return waiting
+        result = replica.get_trace_proof(trace_id, self_hash)
+        if result is None:
+            return JSONResponse(status_code=404, content={"error": "unknown_receipt"})
+        return result
+
+    @app.get("/cries")
+    async def cries(min_lamport: Optional[int] = None, chain_id: Optional[str] = None):
+        if (waiting := await behind(min_lamport, chain_id)) is not None:
+            return waiting
+        return await replica.get_cries_metrics()
+
+    return app
@@ -0,0 +1,341 @@
+"""
+Metric History Rollups
+Version: Band-1.3 (vΩ.9)
+
+Downsamples CRIESMetrics and StabilityMetrics snapshots into 1-minute,
+1-hour and 1-day buckets holding count, min, max, mean and percentiles.
+Buckets are computed from raw rows with NumPy (one sort per field, then
+segment reductions) for the whole series and for each `model_id`,
+`policy_id` and `trace_id` slice. Trend queries read only the rollup rows of
+one resolution, and raw rows are compacted once every resolution covers them.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+
+RESOLUTIONS: Dict[str, int] = {"1m": 60, "1h": 3600, "1d": 86400}
+PERCENTILES: Tuple[int, ...] = (50, 90, 95, 99)
+
+ALL_SLICE = "all"
+
+# kind -> (Prisma model accessor, value fields, slice dimensions)
+METRIC_KINDS: Dict[str, Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = {
+    "cries": (
+        "criesmetrics",
+        ("clarity", "reliability", "integrity", "efficiency", "safety"),
+        ("model_id", "policy_id", "trace_id"),
+    ),
+    "stability": (
+        "stabilitymetrics",
+        ("sigma_t", "omega_t", "eta", "gamma_b"),
+        (),
+    ),
+}
+
+
+class MetricBucket(BaseModel):
+    """Summary of one metric field over one time bucket and slice"""
+    kind: str
+    resolution: str
+    dimension: str = ALL_SLICE
+    slice_value: str = ""
+    field: str
+    bucket_start: datetime
+    count: int
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p90: float
+    p95: float
+    p99: float
+
+
+class RollupPolicy(BaseModel):
+    """How long raw snapshots and each rollup resolution are kept"""
+    raw_retention: timedelta = timedelta(days=2)
+    # Resolutions missing here are kept forever
+    retention: Dict[str, timedelta] = Field(
+        default_factory=lambda: {"1m": timedelta(days=7), "1h": timedelta(days=90)}
+    )
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _datetime(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def grouped_stats(
+    groups: np.ndarray,
+    values: np.ndarray,
+    percentiles: Sequence[int] = PERCENTILES,
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Per-group statistics of an (n, fields) value matrix.
+
+    Returns the distinct group ids, their counts and a dict of (groups,
+    fields) arrays for min, max, mean and each percentile (linear
+    interpolation, as `np.percentile`).
+    """
+    order = np.argsort(groups, kind="stable")
+    groups = groups[order]
+    values = values[order]
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    stats = {
+        "min": np.minimum.reduceat(values, starts, axis=0),
+        "max": np.maximum.reduceat(values, starts, axis=0),
+        "mean": np.add.reduceat(values, starts, axis=0) / counts[:, None],
+    }
+
+    # Sort each column within its group once; every percentile is then an
+    # index lookup at start + q * (count - 1)
+    ranked = np.empty_like(values)
+    for j in range(values.shape[1]):
+        ranked[:, j] = values[np.lexsort((values[:, j], groups)), j]
+    for q in percentiles:
+        pos = starts + (q / 100.0) * (counts - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        frac = (pos - lo)[:, None]
+        stats[f"p{q}"] = ranked[lo] + (ranked[hi] - ranked[lo]) * frac
+
+    return groups[starts], counts, stats
+
+
+def compute_buckets(
+    kind: str,
+    resolution: str,
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    fields: Sequence[str],
+    slices: Optional[Dict[str, Sequence[Optional[str]]]] = None,
+) -> List[MetricBucket]:
+    """Bucket raw snapshots for the whole series and each slice dimension"""
+    if len(timestamps) == 0:
+        return []
+
+    width = RESOLUTIONS[resolution]
+    bucket_ids = np.floor_divide(timestamps, width).astype(np.int64)
+    base = int(bucket_ids.min())
+    span = int(bucket_ids.max()) - base + 1
+    bucket_ids -= base
+
+    dimensions: List[Tuple[str, np.ndarray, List[str]]] = [
+        (ALL_SLICE, np.zeros(len(timestamps), dtype=np.int64), [""])
+    ]
+    for dimension, labels in (slices or {}).items():
+        keys = np.array(["" if label is None else str(label) for label in labels], dtype=object)
+        names, inverse = np.unique(keys, return_inverse=True)
+        dimensions.append((dimension, inverse.astype(np.int64), list(names)))
+
+    buckets: List[MetricBucket] = []
+    for dimension, slice_ids, names in dimensions:
+        if dimension != ALL_SLICE:
+            # Rows without a value for this dimension only count towards "all"
+            keep = np.array([name != "" for name in names])[slice_ids]
+            if not keep.any():
+                continue
+            group_ids = slice_ids[keep] * span + bucket_ids[keep]
+            group_values = values[keep]
+        else:
+            group_ids = bucket_ids
+            group_values = values
+
+        ids, counts, stats = grouped_stats(group_ids, group_values)
+        for g, group in enumerate(ids):
+            slice_index, bucket = divmod(int(group), span)
+            start = _datetime((base + bucket) * width)
+            for j, field in enumerate(fields):
+                buckets.append(MetricBucket(
+                    kind=kind,
+                    resolution=resolution,
+                    dimension=dimension,
+                    slice_value=names[slice_index],
+                    field=field,
+                    bucket_start=start,
+                    count=int(counts[g]),
+                    **{name: float(column[g, j]) for name, column in stats.items()},
+                ))
+    return buckets
+
+
+class MetricRollupStore:
+    """Maintains MetricRollup rows from raw metric history in the database"""
+
+    def __init__(
+        self,
+        db: Any,
+        policy: Optional[RollupPolicy] = None,
+        batch_size: int = 5000,
+        max_points: int = 1000,
+    ):
+        self.db = db
+        self.policy = policy or RollupPolicy()
+        self.batch_size = batch_size
+        self.max_points = max_points
+
+    def _table(self, kind: str) -> Any:
+        if kind not in METRIC_KINDS:
+            raise ValueError(f"Unknown metric kind: {kind}")
+        return getattr(self.db, METRIC_KINDS[kind][0])
+
+    async def _raw_rows(self, kind: str, start: datetime, end: datetime) -> List[Any]:
+        """Raw snapshots in [start, end), paged with a keyset cursor"""
+        table = self._table(kind)
+        rows: List[Any] = []
+        cursor: Optional[str] = None
+        while True:
+            query: Dict[str, Any] = {
+                "where": {"timestamp": {"gte": start, "lt": end}},
+                "order": [{"timestamp": "asc"}, {"id": "asc"}],
+                "take": self.batch_size,
+            }
+            if cursor is not None:
+                query["cursor"] = {"id": cursor}
+                query["skip"] = 1
+            page = await table.find_many(**query)
+            rows.extend(page)
+            if len(page) < self.batch_size:
+                return rows
+            cursor = page[-1].id
+
+    async def _watermark(self, kind: str, resolution: str) -> Optional[float]:
+        """End of the newest rolled-up bucket, in epoch seconds"""
+        latest = await self.db.metricrollup.find_first(
+            where={"kind": kind, "resolution": resolution},
+            order={"bucket_start": "desc"},
+        )
+        if latest is None:
+            return None
+        return _epoch(latest.bucket_start) + RESOLUTIONS[resolution]
+
+    async def rollup(self, kind: str, now: Optional[datetime] = None) -> int:
+        """Roll up every closed bucket not yet rolled up; returns rows written"""
+        _, fields, dimensions = METRIC_KINDS[kind]
+        now_s = _epoch(now or datetime.utcnow())
+
+        oldest = await self._table(kind).find_first(order={"timestamp": "asc"})
+        if oldest is None:
+            return 0
+
+        written = 0
+        for resolution, width in RESOLUTIONS.items():
+            start = await self._watermark(kind, resolution)
+            if start is None:
+                start = (_epoch(oldest.timestamp) // width) * width
+            end = (now_s // width) * width
+
+            # One day of raw rows in memory at a time
+            step = max(width, RESOLUTIONS["1d"])
+            while start < end:
+                stop = min(start + step, end)
+                rows = await self._raw_rows(kind, _datetime(start), _datetime(stop))
+                if rows:
+                    written += await self._write(
+                        kind, resolution, start, stop, rows, fields, dimensions
+                    )
+                start = stop
+        return written
+
+    async def _write(
+        self,
+        kind: str,
+        resolution: str,
+        start: float,
+        stop: float,
+        rows: List[Any],
+        fields: Sequence[str],
+        dimensions: Sequence[str],
+    ) -> int:
+        timestamps = np.fromiter((_epoch(r.timestamp) for r in rows), dtype=np.float64, count=len(rows))
+        values = np.array([[getattr(r, f) for f in fields] for r in rows], dtype=np.float64)
+        slices = {d: [getattr(r, d, None) for r in rows] for d in dimensions}
+        buckets = compute_buckets(kind, resolution, timestamps, values, fields, slices)
+
+        # Replace rather than append so re-running a window is idempotent
+        await self.db.metricrollup.delete_many(
+            where={
+                "kind": kind,
+                "resolution": resolution,
+                "bucket_start": {"gte": _datetime(start), "lt": _datetime(stop)},
+            }
+        )
+        await self.db.metricrollup.create_many(data=[b.model_dump() for b in buckets])
+        return len(buckets)
+
+    def pick_resolution(self, start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+        """Finest retained resolution that keeps a trend under `max_points`"""
+        span = _epoch(end) - _epoch(start)
+        age = _epoch(now or datetime.utcnow()) - _epoch(start)
+        for resolution, width in RESOLUTIONS.items():
+            retention = self.policy.retention.get(resolution)
+            if retention is not None and age > retention.total_seconds():
+                continue
+            if span / width <= self.max_points:
+                return resolution
+        return "1d"
+
+    async def trend(
+        self,
+        kind: str,
+        field: str,
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        dimension: str = ALL_SLICE,
+        slice_value: str = "",
+    ) -> List[MetricBucket]:
+        """Rollup buckets of one field and slice over [start, end)"""
+        if kind not in METRIC_KINDS or field not in METRIC_KINDS[kind][1]:
+            raise ValueError(f"Unknown metric field: {kind}.{field}")
+        resolution = resolution or self.pick_resolution(start, end)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        rows = await self.db.metricrollup.find_many(
+            where={
+                "kind": kind,
+                "resolution": resolution,
+                "dimension": dimension,
+                "slice_value": slice_value,
+                "field": field,
+                "bucket_start": {"gte": start, "lt": end},
+            },
+            order={"bucket_start": "asc"},
+        )
+        return [
+            MetricBucket(**{name: getattr(row, name) for name in MetricBucket.model_fields})
+            for row in rows
+        ]
+
+    async def compact(self, kind: str, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Apply the retention policy; raw rows go only once fully rolled up"""
+        now_s = _epoch(now or datetime.utcnow())
+        deleted: Dict[str, int] = {}
+
+        watermarks = [await self._watermark(kind, r) for r in RESOLUTIONS]
+        if all(w is not None for w in watermarks):
+            cutoff = min(now_s - self.policy.raw_retention.total_seconds(), *watermarks)
+            deleted["raw"] = await self._table(kind).delete_many(
+                where={"timestamp": {"lt": _datetime(cutoff)}}
+            )
+
+        for resolution, retention in self.policy.retention.items():
+            deleted[resolution] = await self.db.metricrollup.delete_many(
+                where={
+                    "kind": kind,
+                    "resolution": resolution,
+                    "bucket_start": {"lt": _datetime(now_s - retention.total_seconds())},
+                }
+            )
+        return deleted
@@ -0,0 +1,188 @@
+"""
+Sharded Receipt Chains
+Version: Band-1.3 (vΩ.9)
+
+Partitions receipts into independent chains (one per research station by
+default), each with its own Lamport clock and digest head, so shards can be
+written in parallel. A periodic anchor receipt on the global chain commits the
+Merkle root of all shard heads.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from pydantic import BaseModel
+
+from .ben_event import BENEventProcessor
+from .hashing import DEFAULT_HASH_ALG
+from .types import BaseReceipt, BandLevel, Track, ReceiptType
+from .verify_hash import HashVerifier
+
+
+ANCHOR_CHAIN_ID = "global"
+DEFAULT_SHARD = "unassigned"
+
+ShardKey = Callable[[Mapping[str, Any]], Optional[str]]
+
+
+def station_shard_key(event: Mapping[str, Any]) -> Optional[str]:
+    """Default shard key: one chain per research station"""
+    return event.get("station_id")
+
+
+class ShardHead(BaseModel):
+    """Head of a single shard chain"""
+    chain_id: str
+    lamport: int
+    digest: Optional[str]
+
+
+class ShardAnchor(BaseModel):
+    """Global anchor committing to the heads of all shards"""
+    receipt: BaseReceipt
+    merkle_root: str
+    heads: List[ShardHead]
+
+
+def shard_head_leaf(head: ShardHead) -> str:
+    """Merkle leaf for a shard head (binds chain id, lamport and digest)"""
+    return hashlib.sha256(
+        f"{head.chain_id}:{head.lamport}:{head.digest}".encode()
+    ).hexdigest()
+
+
+def compute_anchor_root(heads: List[ShardHead]) -> str:
+    """Merkle root over shard heads in chain-id order"""
+    ordered = sorted(heads, key=lambda h: h.chain_id)
+    return HashVerifier.compute_merkle_root([shard_head_leaf(h) for h in ordered])
+
+
+class ShardedEventProcessor:
+    """Routes events to per-shard `BENEventProcessor` chains"""
+
+    def __init__(
+        self,
+        shard_key: ShardKey = station_shard_key,
+        anchor_every: int = 1000,
+        private_key: Optional[ed25519.Ed25519PrivateKey] = None,
+        node_id: Optional[str] = None,
+        hash_alg: str = DEFAULT_HASH_ALG,
+    ):
+        if anchor_every < 1:
+            raise ValueError("anchor_every must be >= 1")
+        self.shard_key = shard_key
+        self.anchor_every = anchor_every
+        self.node_id = node_id
+        self.hash_alg = hash_alg
+        self._private_key = private_key or ed25519.Ed25519PrivateKey.generate()
+        self._shards: Dict[str, BENEventProcessor] = {}
+        self.anchor_processor = BENEventProcessor(
+            chain_id=ANCHOR_CHAIN_ID,
+            private_key=self._private_key,
+            node_id=node_id,
+            hash_alg=hash_alg,
+        )
+        self._since_anchor = 0
+
+    @property
+    def public_key(self) -> ed25519.Ed25519PublicKey:
+        """Public key shared by all shard chains"""
+        return self._private_key.public_key()
+
+    def shard_id(self, event: Mapping[str, Any]) -> str:
+        """Resolve the shard chain id for an event"""
+        key = self.shard_key(event)
+        return str(key) if key is not None else DEFAULT_SHARD
+
+    def processor(self, chain_id: str) -> BENEventProcessor:
+        """Get (or create) the processor that owns a shard chain"""
+        if chain_id == ANCHOR_CHAIN_ID:
+            raise ValueError(f"'{ANCHOR_CHAIN_ID}' is reserved for anchor receipts")
+        processor = self._shards.get(chain_id)
+        if processor is None:
+            processor = BENEventProcessor(
+                chain_id=chain_id,
+                private_key=self._private_key,
+                node_id=self.node_id,
+                hash_alg=self.hash_alg,
+            )
+            self._shards[chain_id] = processor
+        return processor
+
+    def create_receipts(
+        self,
+        chain_id: str,
+        events: List[Dict[str, Any]],
+    ) -> List[BaseReceipt]:
+        """Mint a contiguous block of receipts on one shard"""
+        receipts = self.processor(chain_id).create_receipts(events)
+        self._since_anchor += len(receipts)
+        return receipts
+
+    def heads(self) -> List[ShardHead]:
+        """Current heads of all shard chains"""
+        heads = []
+        for chain_id, processor in sorted(self._shards.items()):
+            lamport, digest = processor.head()
+            heads.append(ShardHead(chain_id=chain_id, lamport=lamport, digest=digest))
+        return heads
+
+    def needs_anchor(self) -> bool:
+        """True once `anchor_every` shard receipts were minted since the last anchor"""
+        return self._since_anchor >= self.anchor_every
+
+    def anchor(
+        self,
+        heads: Optional[List[ShardHead]] = None,
+        trace_id: Optional[str] = None,
+    ) -> ShardAnchor:
+        """Mint a global MERKLE_ROOT receipt committing to shard heads.
+
+        Callers that write asynchronously should pass the heads already
+        persisted; by default the in-memory heads of every shard are used.
+        """
+        heads = sorted(heads if heads is not None else self.heads(), key=lambda h: h.chain_id)
+        root = compute_anchor_root(heads)
+        lamport, _ = self.anchor_processor.head()
+        receipt = self.anchor_processor.create_receipt(
+            receipt_type=ReceiptType.MERKLE_ROOT,
+            band=BandLevel.BAND_4,
+            track=Track.TRACK_B,
+            trace_id=trace_id or f"ANCHOR:{lamport + 1}",
+            commitment=root,
+        )
+        self._since_anchor = 0
+        return ShardAnchor(receipt=receipt, merkle_root=root, heads=heads)
+
+
+def group_by_chain(receipts: List[BaseReceipt]) -> Dict[Optional[str], List[BaseReceipt]]:
+    """Split a mixed receipt list into per-chain lists"""
+    chains: Dict[Optional[str], List[BaseReceipt]] = {}
+    for receipt in receipts:
+        chains.setdefault(receipt.chain_id, []).append(receipt)
+    return chains
+
+
+def verify_anchor(
+    anchor: BaseReceipt,
+    heads: List[ShardHead],
+    chains: Optional[Mapping[str, List[BaseReceipt]]] = None,
+) -> Tuple[bool, Optional[str]]:
+    """Check an anchor receipt against its heads and, optionally, the shard chains"""
+    if anchor.commitment is None or compute_anchor_root(heads) != anchor.commitment:
+        return False, "Anchor Merkle root mismatch"
+
+    for head in heads if chains is not None else []:
+        if head.lamport == 0:
+            continue
+        receipt = next(
+            (r for r in chains.get(head.chain_id, []) if r.lamport == head.lamport),
+            None,
+        )
+        if receipt is None:
+            return False, f"Anchored head {head.chain_id}@{head.lamport} missing"
+        if receipt.self_hash != head.digest:
+            return False, f"Anchored head {head.chain_id}@{head.lamport} digest mismatch"
+
+    return True, None
@@ -0,0 +1,564 @@
+"""
+Integrity Spot Checker
+Version: Band-1.3 (vΩ.9)
+
+Full-chain verification is too expensive to run continuously, so
+`IntegritySpotChecker` re-verifies a small sample of stored receipts each
+round instead: the newest receipts of every lane this node writes, plus
+receipts drawn uniformly at random from the lanes' full history (and,
+optionally, random `.ben` files of the governance store). Each sampled
+receipt is checked for its self-hash, its signature and its Merkle
+inclusion: in its trace's tree, and for receipts committing to a root
+(shard anchors, witness quorums) against that stored root. Deleted rows are
+caught too: a drawn lamport without a row must be one a clock merge skipped,
+with the rows around it still linked, and a `.ben` file the importer
+checkpointed must still have its row.
+
+Rounds are paced by `SpotCheckBudget`: the pause after a round is long
+enough that verification stays under `cpu_share` of one core and reads
+under `rows_per_second` / `bytes_per_second`. Every mismatch is reported
+once as a RISK_GATE receipt and counted in `ben_integrity_mismatches_total`;
+`coverage()` estimates how much of the history has been verified and how
+likely a given fraction of tampered receipts would have been caught.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from pydantic import BaseModel
+
+from .db import PartialWriteError
+from .dedup import DuplicateFilter
+from .importer import CHECKPOINT_NAME, IMPORT_CHAIN_ID, decode_chunk, load_keys
+from .metrics import INTEGRITY_CHECKS, INTEGRITY_COVERAGE, INTEGRITY_MISMATCHES
+from .receipt_utils import receipt_from_row
+from .shards import ShardHead, verify_anchor
+from .types import BandLevel, BaseReceipt, EventRequest, ReceiptType, Track
+from .verify_chain import SignatureRule
+from .verify_hash import HashVerifier
+
+# Sources of sampled receipts
+DB = "db"
+BEN = "ben"
+
+Lane = Tuple[Optional[str], Optional[str]]  # (chain_id, node_id)
+
+# Governance row columns compared against the .ben file they were imported from
+_BEN_COLUMNS = ("receipt_type", "lamport", "prev_digest", "trace_id")
+
+
+class SpotCheckBudget(BaseModel):
+    """Sampling rate and the resources spot checks may use"""
+    batch_size: int = 32  # Database receipts per round
+    recent_fraction: float = 0.25  # Share of a round spent on the newest receipts
+    ben_files: int = 8  # .ben files per round, when a store is configured
+    cpu_share: float = 0.05  # Fraction of one core spent verifying
+    rows_per_second: float = 200.0  # Receipt rows read from the database
+    bytes_per_second: float = float(1 << 20)  # .ben bytes read from disk
+    min_pause: float = 1.0  # Shortest pause between rounds, however cheap
+    max_pause: float = 60.0  # Longest pause between rounds
+
+
+class Mismatch(BaseModel):
+    """A sampled receipt that failed re-verification"""
+    source: str  # "db" or "ben"
+    check: str  # hash, signature, merkle, missing_row, or ben_row for a .ben file disagreeing with its row
+    detail: str
+    self_hash: Optional[str] = None
+    lamport: Optional[int] = None
+    chain_id: Optional[str] = None
+    trace_id: Optional[str] = None
+    name: Optional[str] = None  # .ben file name
+    receipt: Optional[BaseReceipt] = None  # The RISK_GATE receipt reporting it
+
+
+class SpotCheckCoverage(BaseModel):
+    """What the spot checks have covered since start"""
+    started_at: datetime
+    rounds: int
+    population: int  # Receipts in the sampled lanes
+    random_checked: int  # Uniform random draws, including repeats
+    recent_checked: int
+    distinct_checked: int  # Distinct receipts verified (Bloom filter estimate)
+    coverage: float  # distinct_checked / population
+    recent_lag: int  # New receipts recent sampling skipped or has not reached yet
+    ben_files: int  # .ben files in the store at the last listing
+    ben_checked: int
+    mismatches: int
+    cpu_seconds: float
+    rows_read: int
+    bytes_read: int
+
+    def detection_probability(self, tampered_fraction: float) -> float:
+        """Chance the random draws so far hit at least one receipt if this fraction were tampered"""
+        return 1.0 - (1.0 - tampered_fraction) ** self.random_checked
+
+
+def _verify_receipts(
+    receipts: List[BaseReceipt],
+    rule_for: Callable[[BaseReceipt], SignatureRule],
+) -> Tuple[List[Tuple[int, str, str]], float]:
+    """(index, check, detail) of each hash or signature failure, and the CPU time spent (worker thread)"""
+    start = time.thread_time()
+    failures = []
+    for i, receipt in enumerate(receipts):
+        verification = HashVerifier.verify_receipt_hash(receipt)
+        if not verification.is_valid:
+            failures.append((i, "hash", f"{verification.error} at {receipt.lamport}"))
+            continue
+        error = rule_for(receipt).check(receipt)
+        if error is not None:
+            failures.append((i, "signature", error))
+    return failures, time.thread_time() - start
+
+
+def _check_ben_files(
+    receipts_dir: str,
+    names: List[str],
+    keys: List[bytes],
+) -> Tuple[List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]], int, float]:
+    """Decoded rows (or failure reasons) of .ben files, bytes read and CPU time (worker thread)"""
+    start = time.thread_time()
+    size = 0
+    for name in names:
+        try:
+            size += os.path.getsize(os.path.join(receipts_dir, name))
+        except OSError:
+            pass
+    results = decode_chunk(receipts_dir, names, keys)
+    return results, size, time.thread_time() - start
+
+
+class IntegritySpotChecker:
+    """Continuously re-verifies sampled receipts within a resource budget"""
+
+    def __init__(
+        self,
+        service: Any,
+        budget: Optional[SpotCheckBudget] = None,
+        public_keys: Union[ed25519.Ed25519PublicKey, Mapping[Optional[str], ed25519.Ed25519PublicKey], None] = None,
+        receipts_dir: Optional[str] = None,
+        key_path: Optional[str] = None,
+        band: BandLevel = BandLevel.BAND_4,
+        track: Track = Track.TRACK_B,
+        seed: Optional[int] = None,
+        reported_capacity: int = 100_000,
+        list_interval: float = 300.0,
+    ):
+        self.service = service  # AuditService, or anything with its db, trace_index and process_events
+        self.budget = budget or SpotCheckBudget()
+        if receipts_dir is not None and key_path is None:
+            raise ValueError("Checking a .ben store needs its key_path")
+        self.receipts_dir = receipts_dir  # .ben store to sample as well, with its ben.key
+        self.keys = load_keys(key_path) if receipts_dir is not None else []
+        self.band = band
+        self.track = track
+        self.reported_capacity = reported_capacity
+        self.list_interval = list_interval
+        self.logger = logging.getLogger("ben.spot_check")
+        self._rng = random.Random(seed)
+        # Without explicit keys only this node's lanes are sampled, under the
+        # service's own keys: the main chain's, and the shards' for every other chain
+        self._node_id = service.event_processor.node_id
+        self._own_lanes = public_keys is None
+        if public_keys is None:
+            self._main_rule = SignatureRule(service.event_processor.public_key)
+            shards = getattr(service, "shards", None)
+            self._chain_rule = SignatureRule(shards.public_key) if shards is not None else self._main_rule
+        else:
+            self._main_rule = self._chain_rule = SignatureRule(public_keys)
+        self._checked_upto: Dict[Lane, int] = {}
+        self._head_digests: Dict[Lane, Optional[str]] = {}
+        self._seen = DuplicateFilter(initial_capacity=1 << 16, save_interval=float("inf"))
+        # Receipts missing from their trace tree, which may just be mid-write;
+        # reported if still missing next round
+        self._suspects: Dict[str, BaseReceipt] = {}
+        self._reported: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._unsent: List[Mismatch] = []
+        self._ben_names: List[str] = []
+        self._ben_imported: Set[str] = set()  # Names in the importer's checkpoint, which must have rows
+        self._listed_at = float("-inf")
+        self._stats: Dict[str, Any] = {
+            "rounds": 0, "population": 0, "random": 0, "recent": 0, "distinct": 0, "lag": 0,
+            "ben": 0, "mismatches": 0, "cpu": 0.0, "rows": 0, "bytes": 0,
+        }
+        self._started_at = datetime.utcnow()
+        self._pause = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def pause(self) -> float:
+        """Seconds the budget asks to wait after the last round"""
+        return self._pause
+
+    def coverage(self) -> SpotCheckCoverage:
+        """Coverage of the checks so far"""
+        stats = self._stats
+        population = stats["population"]
+        return SpotCheckCoverage(
+            started_at=self._started_at,
+            rounds=stats["rounds"],
+            population=population,
+            random_checked=stats["random"],
+            recent_checked=stats["recent"],
+            distinct_checked=stats["distinct"],
+            coverage=min(1.0, stats["distinct"] / population) if population else 0.0,
+            recent_lag=stats["lag"],
+            ben_files=len(self._ben_names),
+            ben_checked=stats["ben"],
+            mismatches=stats["mismatches"],
+            cpu_seconds=stats["cpu"],
+            rows_read=stats["rows"],
+            bytes_read=stats["bytes"],
+        )
+
+    async def check_once(self) -> List[Mismatch]:
+        """Run one sampling round; returns the mismatches it newly found"""
+        async with self._lock:
+            started = time.monotonic()
+            rows_before, bytes_before = self._stats["rows"], self._stats["bytes"]
+
+            lanes = await self._lanes()
+            recent_count = round(self.budget.batch_size * self.budget.recent_fraction)
+            recent = await self._sample_recent(lanes, recent_count)
+            drawn, missing = await self._sample_random(lanes, self.budget.batch_size - recent_count)
+            self._stats["recent"] += len(recent)
+            self._stats["random"] += len(drawn) + len(missing)
+            mismatches, cpu = await self._verify_rows(recent + drawn)
+            mismatches.extend(missing)
+            ben_mismatches, ben_cpu = await self._check_ben()
+            mismatches.extend(ben_mismatches)
+
+            cpu += ben_cpu
+            self._stats["rounds"] += 1
+            self._stats["cpu"] += cpu
+            coverage = self.coverage()
+            INTEGRITY_COVERAGE.set(coverage.coverage)
+
+            # Long enough that this round's work fits the budget
+            budget = self.budget
+            cost = max(
+                cpu / budget.cpu_share,
+                (self._stats["rows"] - rows_before) / budget.rows_per_second,
+                (self._stats["bytes"] - bytes_before) / budget.bytes_per_second,
+            )
+            self._pause = min(budget.max_pause, max(budget.min_pause, cost - (time.monotonic() - started)))
+            return await self._report(mismatches)
+
+    async def run(self) -> None:
+        """Check rounds until cancelled, pausing as the budget requires"""
+        while True:
+            try:
+                await self.check_once()
+            except Exception as exc:
+                self.logger.warning(f"Spot check round failed: {exc}")
+                self._pause = self.budget.max_pause
+            await asyncio.sleep(self._pause)
+
+    # --- sampling ---
+
+    async def _lanes(self) -> List[Tuple[Lane, int]]:
+        """Sampled lanes and their head lamports, from the ChainHead table"""
+        records = await self.service.db.chainhead.find_many()
+        lanes = []
+        for record in records:
+            # Imported governance chains are hashed the governance way; .ben sampling covers them
+            if record.chain_id == IMPORT_CHAIN_ID or record.lamport <= 0:
+                continue
+            if self._own_lanes and record.node_id != self._node_id:
+                continue
+            lanes.append(((record.chain_id, record.node_id), record.lamport))
+            self._head_digests[(record.chain_id, record.node_id)] = record.digest
+        lanes.sort(key=lambda lane: (lane[0][0] or "", lane[0][1] or ""))
+        self._stats["population"] = sum(head for _, head in lanes)
+        return lanes
+
+    async def _fetch(self, lane: Lane, lamports: Dict[str, Any], take: Optional[int] = None) -> List[Any]:
+        chain_id, node_id = lane
+        rows = await self.service.db.receipt.find_many(
+            where={"chain_id": chain_id, "node_id": node_id, "lamport": lamports},
+            order={"lamport": "asc"},
+            take=take,
+        )
+        self._stats["rows"] += len(rows)
+        return rows
+
+    async def _sample_recent(self, lanes: List[Tuple[Lane, int]], count: int) -> List[Any]:
+        """Receipts written since the last round, newest first when there are too many"""
+        behind = [(lane, head) for lane, head in lanes if self._checked_upto.get(lane, 0) < head]
+        rows: List[Any] = []
+        if behind and count:
+            if len(behind) > count:
+                behind = self._rng.sample(behind, count)
+            per_lane = max(1, count // len(behind))
+            for lane, head in behind:
+                # Writes outpacing the budget are skipped here and left to random sampling
+                start = max(self._checked_upto.get(lane, 0), head - per_lane)
+                fetched = await self._fetch(lane, {"gt": start, "lte": head}, take=per_lane)
+                rows.extend(fetched)
+                self._checked_upto[lane] = head if len(fetched) < per_lane else fetched[-1].lamport
+        self._stats["lag"] = sum(head - self._checked_upto.get(lane, 0) for lane, head in lanes)
+        return rows
+
+    async def _sample_random(self, lanes: List[Tuple[Lane, int]], count: int) -> Tuple[List[Any], List[Mismatch]]:
+        """Receipts drawn uniformly from the lanes' history, and the drawn lamports whose row was deleted"""
+        total = self._stats["population"]
+        if not total or count <= 0:
+            return [], []
+        bounds = list(accumulate(head for _, head in lanes))
+        picks: Dict[Lane, set] = {}
+        for _ in range(count):
+            x = self._rng.randrange(total)
+            i = bisect_right(bounds, x)
+            picks.setdefault(lanes[i][0], set()).add(x - (bounds[i - 1] if i else 0) + 1)
+        rows: List[Any] = []
+        missing: List[Mismatch] = []
+        for lane, lamports in picks.items():
+            fetched = await self._fetch(lane, {"in": sorted(lamports)})
+            rows.extend(fetched)
+            for lamport in sorted(lamports - {row.lamport for row in fetched}):
+                mismatch = await self._gap_error(lane, lamport)
+                if mismatch is not None:
+                    missing.append(mismatch)
+        INTEGRITY_CHECKS.inc(DB, "mismatch", amount=len(missing))
+        return rows, missing
+
+    async def _gap_error(self, lane: Lane, lamport: int) -> Optional[Mismatch]:
+        """A lamport with no row is one a clock merge skipped when the rows around it still link"""
+        chain_id, node_id = lane
+        where = {"chain_id": chain_id, "node_id": node_id}
+        before = await self.service.db.receipt.find_first(
+            where={**where, "lamport": {"lt": lamport}}, order={"lamport": "desc"}
+        )
+        after = await self.service.db.receipt.find_first(
+            where={**where, "lamport": {"gt": lamport}}, order={"lamport": "asc"}
+        )
+        self._stats["rows"] += (before is not None) + (after is not None)
+        # The receipt after the gap, or the head record past the last row, names its predecessor
+        link = after.prev_digest if after is not None else self._head_digests.get(lane)
+        if link == (before.self_hash if before is not None else None):
+            return None
+        return Mismatch(
+            source=DB, check="missing_row", self_hash=link, lamport=lamport, chain_id=chain_id,
+            detail=f"No row at {lamport} of lane {chain_id or '-'}/{node_id or '-'} and the chain does not link across it",
+        )
+
+    # --- verification ---
+
+    def _rule_for(self, receipt: BaseReceipt) -> SignatureRule:
+        return self._main_rule if receipt.chain_id is None else self._chain_rule
+
+    async def _verify_rows(self, rows: List[Any]) -> Tuple[List[Mismatch], float]:
+        """Hash and signature off the event loop, then Merkle inclusion"""
+        receipts = [receipt_from_row(row) for row in rows]
+        failures, cpu = await asyncio.to_thread(_verify_receipts, receipts, self._rule_for)
+        failed = {i for i, _, _ in failures}
+        mismatches = [self._mismatch(receipts[i], check, detail) for i, check, detail in failures]
+
+        start = time.thread_time()
+        suspects, self._suspects = self._suspects, {}
+        for receipt in suspects.values():
+            error = self._trace_error(receipt)
+            if error is not None:
+                mismatches.append(self._mismatch(receipt, "merkle", error))
+        anchored: List[Tuple[BaseReceipt, List[ShardHead]]] = []
+        for i, (row, receipt) in enumerate(zip(rows, receipts)):
+            if i in failed:
+                continue
+            if self._trace_error(receipt) is not None:
+                self._suspects[receipt.self_hash] = receipt
+            error = self._commitment_error(row, receipt, anchored)
+            if error is not None:
+                mismatches.append(self._mismatch(receipt, "merkle", error))
+        cpu += time.thread_time() - start
+
+        if anchored:
+            mismatches.extend(await self._check_anchored_heads(anchored))
+        for receipt in receipts:
+            if not self._seen.might_contain(receipt.self_hash):
+                self._seen.add(receipt.self_hash)
+                self._stats["distinct"] += 1
+        bad = {m.self_hash for m in mismatches}
+        INTEGRITY_CHECKS.inc(DB, "mismatch", amount=len(bad))
+        INTEGRITY_CHECKS.inc(DB, "ok", amount=sum(r.self_hash not in bad for r in receipts))
+        return mismatches, cpu
+
+    def _trace_error(self, receipt: BaseReceipt) -> Optional[str]:
+        """Why a receipt is not in its trace's Merkle tree (None when it is, or the trace is not fully indexed)"""
+        index = getattr(self.service, "trace_index", None)
+        # Only a trace holding every stored receipt (rebuilt or loaded from storage) tells a
+        # missing receipt from one the index never saw, e.g. before a restart
+        if index is None or not index.covers(receipt.trace_id):
+            return None
+        proof = index.inclusion_proof(receipt.trace_id, receipt.self_hash)
+        if proof is None:
+            return f"Receipt at {receipt.lamport} is not in the Merkle tree of trace {receipt.trace_id}"
+        if not HashVerifier.verify_merkle_proof(receipt.self_hash, proof.merkle_root, proof.proof, proof.index):
+            return f"Inclusion proof of the receipt at {receipt.lamport} does not reach its trace root"
+        return None
+
+    @staticmethod
+    def _commitment_error(
+        row: Any,
+        receipt: BaseReceipt,
+        anchored: List[Tuple[BaseReceipt, List[ShardHead]]],
+    ) -> Optional[str]:
+        """Recompute the root a receipt commits to from the leaves stored with it"""
+        metadata = getattr(row, "metadata", None) or {}
+        if receipt.receipt_type == ReceiptType.MERKLE_ROOT and "heads" in metadata:
+            heads = [ShardHead(**head) for head in metadata["heads"]]
+            ok, error = verify_anchor(receipt, heads)
+            if not ok:
+                return f"{error} at {receipt.lamport}"
+            anchored.append((receipt, heads))
+        elif receipt.receipt_type in (ReceiptType.WITNESS_CLAIM, ReceiptType.WITNESS_CONSENSUS) \
+                and "leaves" in metadata:
+            hash_alg = metadata.get("hash_alg", receipt.hash_alg)
+            if HashVerifier.compute_merkle_root(metadata["leaves"], hash_alg) != receipt.commitment:
+                return f"Witness Merkle root mismatch at {receipt.lamport}"
+        return None
+
+    async def _check_anchored_heads(
+        self,
+        anchored: List[Tuple[BaseReceipt, List[ShardHead]]],
+    ) -> List[Mismatch]:
+        """Anchored shard heads must still be the stored receipts they name"""
+        digests = {h.digest for _, heads in anchored for h in heads if h.lamport > 0}
+        rows = await self.service.db.receipt.find_many(where={"self_hash": {"in": sorted(digests)}})
+        self._stats["rows"] += len(rows)
+        stored = {row.self_hash: (row.chain_id, row.lamport) for row in rows}
+        mismatches = []
+        for anchor, heads in anchored:
+            for head in heads:
+                if head.lamport > 0 and stored.get(head.digest) != (head.chain_id, head.lamport):
+                    mismatches.append(self._mismatch(
+                        anchor, "merkle", f"Anchored head {head.chain_id}@{head.lamport} is not stored"
+                    ))
+                    break
+        return mismatches
+
+    async def _check_ben(self) -> Tuple[List[Mismatch], float]:
+        """Decrypt and re-hash sampled .ben files, and compare them with their imported rows"""
+        if self.receipts_dir is None or not self.budget.ben_files:
+            return [], 0.0
+        now = time.monotonic()
+        if now - self._listed_at >= self.list_interval:
+            self._ben_names, self._ben_imported = await asyncio.to_thread(self._list_ben)
+            self._listed_at = now
+        if not self._ben_names:
+            return [], 0.0
+
+        names = self._rng.sample(self._ben_names, min(self.budget.ben_files, len(self._ben_names)))
+        results, size, cpu = await asyncio.to_thread(_check_ben_files, self.receipts_dir, names, self.keys)
+        self._stats["bytes"] += size
+        mismatches = []
+        decoded: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        checked = 0
+        for name, row, reason in results:
+            if reason == "missing":  # Removed since the last listing
+                continue
+            checked += 1
+            if reason is not None:
+                mismatches.append(Mismatch(source=BEN, check="hash", detail=reason, name=name))
+            else:
+                decoded[row["self_hash"]] = (name, row)
+
+        if decoded:
+            stored = await self.service.db.receipt.find_many(where={"self_hash": {"in": sorted(decoded)}})
+            self._stats["rows"] += len(stored)
+            for self_hash in sorted(decoded.keys() - {record.self_hash for record in stored}):
+                # Files not imported yet have no row; imported ones must keep theirs
+                name, row = decoded[self_hash]
+                if name in self._ben_imported:
+                    mismatches.append(Mismatch(
+                        source=BEN, check="missing_row", name=name, self_hash=self_hash,
+                        lamport=row["lamport"], chain_id=row["chain_id"], trace_id=row["trace_id"],
+                        detail=f"{name} was imported but its row is gone",
+                    ))
+            for record in stored:
+                name, row = decoded[record.self_hash]
+                differs = [c for c in _BEN_COLUMNS if getattr(record, c) != row.get(c)]
+                if differs:
+                    mismatches.append(Mismatch(
+                        source=BEN, check="ben_row", name=name, self_hash=record.self_hash,
+                        lamport=record.lamport, chain_id=record.chain_id, trace_id=record.trace_id,
+                        detail=f"Stored row differs from {name} in {', '.join(differs)}",
+                    ))
+        self._stats["ben"] += checked
+        INTEGRITY_CHECKS.inc(BEN, "mismatch", amount=len(mismatches))
+        INTEGRITY_CHECKS.inc(BEN, "ok", amount=checked - len(mismatches))
+        return mismatches, cpu
+
+    def _list_ben(self) -> Tuple[List[str], Set[str]]:
+        """.ben files in the store, and the ones the importer checkpointed (worker thread)"""
+        names = sorted(n for n in os.listdir(self.receipts_dir) if n.endswith(".ben"))
+        try:
+            with open(os.path.join(self.receipts_dir, CHECKPOINT_NAME)) as r:
+                imported = set(r.read().split())
+        except FileNotFoundError:
+            imported = set()
+        return names, imported
+
+    # --- reporting ---
+
+    @staticmethod
+    def _mismatch(receipt: BaseReceipt, check: str, detail: str) -> Mismatch:
+        return Mismatch(
+            source=DB, check=check, detail=detail, self_hash=receipt.self_hash,
+            lamport=receipt.lamport, chain_id=receipt.chain_id, trace_id=receipt.trace_id,
+        )
+
+    async def _report(self, mismatches: List[Mismatch]) -> List[Mismatch]:
+        """Count and log new mismatches and mint a RISK_GATE receipt for each"""
+        fresh = []
+        for mismatch in mismatches:
+            key = (mismatch.name or mismatch.self_hash or f"{mismatch.chain_id}@{mismatch.lamport}", mismatch.check)
+            if key in self._reported:
+                continue
+            self._reported[key] = None
+            while len(self._reported) > self.reported_capacity:
+                self._reported.popitem(last=False)
+            INTEGRITY_MISMATCHES.inc(mismatch.source, mismatch.check)
+            self.logger.warning(f"Integrity mismatch ({mismatch.source}/{mismatch.check}): {mismatch.detail}")
+            fresh.append(mismatch)
+        self._stats["mismatches"] += len(fresh)
+
+        pending, self._unsent = self._unsent + fresh, []
+        if not pending:
+            return fresh
+        events = [
+            EventRequest(
+                receipt_type=ReceiptType.RISK_GATE,
+                band=self.band,
+                track=self.track,
+                trace_id=m.trace_id or f"{m.source}:{m.name or m.self_hash}",
+                metadata=m.model_dump(exclude={"receipt"}, exclude_none=True),
+            )
+            for m in pending
+        ]
+        try:
+            receipts = await self.service.process_events(events)
+        except PartialWriteError as exc:
+            # Mismatches whose blocks committed keep their receipts; only the rest are retried
+            self.logger.warning(f"Storing {len(exc.errors)} of {len(pending)} RISK_GATE receipts failed: {exc}")
+            for i, mismatch in enumerate(pending):
+                if i not in exc.errors:
+                    mismatch.receipt = exc.results[i]
+            self._unsent = [pending[i] for i in sorted(exc.errors)]
+            raise
+        except Exception as exc:
+            self.logger.warning(f"Storing {len(pending)} RISK_GATE receipts failed: {exc}")
+            self._unsent = pending
+            raise
+        for mismatch, receipt in zip(pending, receipts):
+            mismatch.receipt = receipt
+        return fresh
@@ -0,0 +1,166 @@
+"""
+Durable Processor State
+Version: Band-1.3 (vΩ.9)
+
+Keeps a processor's identity and chain head across restarts. The Ed25519
+signing key lives in a file created once (mode 0600) and reloaded on every
+start, so old signatures stay verifiable. The head of each lane, i.e.
+(lamport, digest) per (chain_id, node_id), is a ChainHead row written in the
+same transaction as the receipts that move it, along with the public key
+that signed the head. Recovery therefore reads one head row and the lane's
+tail receipt and cross-checks them, instead of replaying the chain. A tail
+signed by another key is only adopted while the head row does not name this
+processor's key, e.g. when a key file is first configured on an existing
+database.
+"""
+
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from pydantic import BaseModel
+
+from .ben_event import BENEventProcessor
+from .receipt_utils import receipt_from_row
+from .verify_hash import HashVerifier
+
+
+logger = logging.getLogger("ben.state")
+
+
+class HeadRecovery(BaseModel):
+    """Outcome of restoring one lane's head"""
+    lane: str
+    lamport: int
+    digest: Optional[str]
+    source: str  # "record", "tail" (no record yet) or "empty"
+
+
+def load_signing_key(path: str) -> ed25519.Ed25519PrivateKey:
+    """Load the raw Ed25519 key at `path`, creating it on first use.
+
+    Creation links a fully written temp file into place, so two processes
+    starting together end up sharing whichever key landed first.
+    """
+    try:
+        with open(path, "rb") as f:
+            return ed25519.Ed25519PrivateKey.from_private_bytes(f.read())
+    except FileNotFoundError:
+        pass
+
+    key = ed25519.Ed25519PrivateKey.generate()
+    raw = key.private_bytes(
+        serialization.Encoding.Raw,
+        serialization.PrivateFormat.Raw,
+        serialization.NoEncryption(),
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "wb") as w:
+            w.write(raw)
+            w.flush()
+            os.fsync(w.fileno())
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            return load_signing_key(path)
+    finally:
+        os.remove(tmp)
+    return key
+
+
+def key_id(public_key: ed25519.Ed25519PublicKey) -> str:
+    """Hex of the raw public key, as stored in ChainHead.signer"""
+    return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+
+
+def head_lane(chain_id: Optional[str], node_id: Optional[str]) -> str:
+    """ChainHead primary key of a (chain_id, node_id) lane"""
+    return f"{chain_id or ''}/{node_id or ''}"
+
+
+def lane_upsert(
+    chain_id: Optional[str],
+    node_id: Optional[str],
+    lamport: int,
+    digest: Optional[str],
+    signer: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Arguments for `db.chainhead.upsert` recording a lane's head"""
+    lane = head_lane(chain_id, node_id)
+    values = {"lamport": lamport, "digest": digest, "signer": signer}
+    return {
+        "where": {"lane": lane},
+        "data": {
+            "create": {"lane": lane, "chain_id": chain_id, "node_id": node_id, **values},
+            "update": values,
+        },
+    }
+
+
+def head_upsert(processor: BENEventProcessor, chain_id: Optional[str]) -> Dict[str, Any]:
+    """Arguments for `db.chainhead.upsert` recording the processor's head"""
+    return lane_upsert(chain_id, processor.node_id, *processor.head(), signer=key_id(processor.public_key))
+
+
+async def recover_head(
+    db: Any,
+    processor: BENEventProcessor,
+    chain_id: Optional[str],
+    check_signature: bool = True,
+) -> HeadRecovery:
+    """Restore `processor`'s head from its ChainHead row and the lane's tail.
+
+    Raises RuntimeError when the record and the stored tail disagree, or the
+    tail does not verify; starting anyway would fork the chain. A tail not
+    signed by this processor's key is adopted unless the record says this
+    key signed it: the key was just configured, or has never signed a row of
+    the lane.
+    """
+    lane = head_lane(chain_id, processor.node_id)
+    record = await db.chainhead.find_unique(where={"lane": lane})
+    row = await db.receipt.find_first(
+        where={"chain_id": chain_id, "node_id": processor.node_id},
+        order={"lamport": "desc"},
+    )
+
+    if row is None:
+        if record is not None and record.digest is not None:
+            raise RuntimeError(
+                f"Chain head {lane} records lamport {record.lamport} but the lane has no receipts"
+            )
+        processor.restore_head(0, None)
+        return HeadRecovery(lane=lane, lamport=0, digest=None, source="empty")
+
+    tail = receipt_from_row(row)
+    if record is not None and (record.lamport, record.digest) != (tail.lamport, tail.self_hash):
+        raise RuntimeError(
+            f"Chain head {lane} records ({record.lamport}, {record.digest}) "
+            f"but the stored tail is ({tail.lamport}, {tail.self_hash})"
+        )
+    if not HashVerifier.verify_receipt_hash(tail).is_valid:
+        raise RuntimeError(f"Tail receipt of {lane} at {tail.lamport} fails its self-hash")
+    if check_signature and not processor.verify_signature(tail):
+        if record is not None and record.signer == key_id(processor.public_key):
+            raise RuntimeError(
+                f"Tail receipt of {lane} at {tail.lamport} was not signed by this processor's key"
+            )
+        logger.warning(
+            "Tail of %s at %s predates this processor's signing key; adopting it", lane, tail.lamport
+        )
+
+    if record is None:
+        logger.warning("No head record for %s; adopting stored tail at %s", lane, tail.lamport)
+    processor.restore_head(tail.lamport, tail.self_hash)
+    return HeadRecovery(
+        lane=lane,
+        lamport=tail.lamport,
+        digest=tail.self_hash,
+        source="record" if record is not None else "tail",
+    )
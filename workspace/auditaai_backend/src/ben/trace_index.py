@@ -0,0 +1,266 @@
+"""
+Trace Index
+Version: Band-1.3 (vΩ.9)
+
+Maintained at write time so "what happened in trace X" is one dictionary
+lookup: each trace keeps its receipts in merged Lamport order plus running
+summary counters, and its Merkle tree is cached until the trace changes.
+
+Memory is bounded by `max_traces`: the least recently used traces are
+evicted. An index that is not `complete` (it evicted a trace, or was never
+rebuilt from storage) only holds the traces it has loaded; the owner loads
+any other trace from storage (`needs_load`, `reserve`, `loaded`) before
+reading it.
+"""
+
+from bisect import insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .types import BaseReceipt, ReceiptType
+from .verify_chain import merge_order_key
+from .verify_hash import merkle_levels, merkle_proof
+
+# Traces an AuditService keeps in memory before evicting the least recently used
+DEFAULT_MAX_TRACES = 100_000
+
+
+class TraceEntry(BaseModel):
+    """One receipt on a trace timeline"""
+    lamport: int
+    receipt_type: ReceiptType
+    band: str
+    track: str
+    timestamp: datetime
+    self_hash: str
+    chain_id: Optional[str] = None
+    node_id: Optional[str] = None
+
+
+class TraceSummary(BaseModel):
+    """Precomputed per-trace summary"""
+    trace_id: str
+    receipt_count: int
+    band_counts: Dict[str, int]
+    track_counts: Dict[str, int]
+    first_timestamp: datetime
+    last_timestamp: datetime
+    first_lamport: int
+    last_lamport: int
+    risk_gate_hits: int
+    merkle_root: str
+
+
+class TraceTimeline(BaseModel):
+    """Ordered receipts of a trace with its summary"""
+    summary: TraceSummary
+    entries: List[TraceEntry]
+
+
+class TraceProof(BaseModel):
+    """Inclusion proof of a receipt in its trace's Merkle tree"""
+    trace_id: str
+    self_hash: str
+    index: int
+    proof: List[str]
+    merkle_root: str
+
+
+class _Trace:
+    """Mutable per-trace state"""
+
+    __slots__ = (
+        "keys", "entries", "positions", "band_counts", "track_counts",
+        "first_ts", "last_ts", "risk_gate_hits", "loading", "_levels",
+    )
+
+    def __init__(self):
+        self.keys: List[Tuple[int, str, str]] = []
+        self.entries: Dict[Tuple[int, str, str], TraceEntry] = {}
+        self.positions: Optional[Dict[str, int]] = None
+        self.band_counts: Dict[str, int] = {}
+        self.track_counts: Dict[str, int] = {}
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+        self.risk_gate_hits = 0
+        self.loading = 0  # Loads from storage in flight
+        self._levels: Optional[List[List[str]]] = None
+
+    def add(self, receipt: BaseReceipt) -> bool:
+        key = merge_order_key(receipt)
+        if key in self.entries:
+            return False
+
+        entry = TraceEntry(
+            lamport=receipt.lamport,
+            receipt_type=receipt.receipt_type,
+            band=receipt.band.value,
+            track=receipt.track.value,
+            timestamp=receipt.timestamp,
+            self_hash=receipt.self_hash,
+            chain_id=receipt.chain_id,
+            node_id=receipt.node_id,
+        )
+        self.entries[key] = entry
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+        else:
+            insort(self.keys, key)
+
+        self.band_counts[entry.band] = self.band_counts.get(entry.band, 0) + 1
+        self.track_counts[entry.track] = self.track_counts.get(entry.track, 0) + 1
+        if self.first_ts is None or entry.timestamp < self.first_ts:
+            self.first_ts = entry.timestamp
+        if self.last_ts is None or entry.timestamp > self.last_ts:
+            self.last_ts = entry.timestamp
+        if entry.receipt_type == ReceiptType.RISK_GATE:
+            self.risk_gate_hits += 1
+
+        self._levels = None
+        self.positions = None
+        return True
+
+    def levels(self) -> List[List[str]]:
+        if self._levels is None:
+            self._levels = merkle_levels([self.entries[k].self_hash for k in self.keys])
+        return self._levels
+
+    def position(self, self_hash: str) -> Optional[int]:
+        if self.positions is None:
+            self.positions = {
+                self.entries[k].self_hash: i for i, k in enumerate(self.keys)
+            }
+        return self.positions.get(self_hash)
+
+
+class TraceIndex:
+    """In-memory index of receipts by trace_id, least recently used traces evicted first"""
+
+    def __init__(self, max_traces: Optional[int] = None, complete: bool = True):
+        if max_traces is not None and max_traces < 1:
+            raise ValueError("max_traces must be at least 1")
+        self.max_traces = max_traces
+        # Every stored trace is resident (or unknown to storage too)
+        self.complete = complete
+        self.evictions = 0
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def __contains__(self, trace_id: str) -> bool:
+        return trace_id in self._traces
+
+    def covers(self, trace_id: str) -> bool:
+        """Whether every stored receipt of the trace is indexed (writes in flight aside)"""
+        trace = self._traces.get(trace_id)
+        return trace is not None and not trace.loading
+
+    def needs_load(self, trace_id: str) -> bool:
+        """Whether the trace must be loaded from storage before it is read"""
+        return not self.complete and not self.covers(trace_id)
+
+    def _get(self, trace_id: str) -> Optional[_Trace]:
+        trace = self._traces.get(trace_id)
+        if trace is not None:
+            self._traces.move_to_end(trace_id)
+        return trace
+
+    def _create(self, trace_id: str) -> _Trace:
+        trace = self._traces[trace_id] = _Trace()
+        if self.max_traces is not None:
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+                self.evictions += 1
+                self.complete = False
+        return trace
+
+    def add(self, receipt: BaseReceipt) -> bool:
+        """Index a receipt; returns False if it was already indexed or its trace is not loaded"""
+        trace = self._get(receipt.trace_id)
+        if trace is None:
+            if not self.complete:
+                return False  # Read from storage when the trace is next loaded
+            trace = self._create(receipt.trace_id)
+        return trace.add(receipt)
+
+    def add_many(self, receipts: Iterable[BaseReceipt]) -> int:
+        """Index several receipts; returns how many were new"""
+        return sum(1 for receipt in receipts if self.add(receipt))
+
+    def rebuild(self, receipts: Iterable[BaseReceipt]) -> int:
+        """Discard the index and rebuild it from stored receipts"""
+        self._traces.clear()
+        self.complete = True
+        return self.add_many(receipts)
+
+    def reserve(self, trace_id: str) -> _Trace:
+        """Start loading a trace from storage; receipts written meanwhile are kept"""
+        trace = self._get(trace_id) or self._create(trace_id)
+        trace.loading += 1
+        return trace
+
+    def loaded(self, trace_id: str, token: _Trace, receipts: Optional[Iterable[BaseReceipt]]) -> int:
+        """Finish a load started by `reserve` with the trace's stored receipts (None if it failed)"""
+        if self._traces.get(trace_id) is not token:
+            return 0  # Evicted while loading
+        if receipts is None:
+            del self._traces[trace_id]  # Partial: the next read loads it again
+            return 0
+        added = sum(1 for receipt in receipts if token.add(receipt))
+        token.loading -= 1
+        if not token.keys and not token.loading:
+            del self._traces[trace_id]  # Unknown to storage as well
+        return added
+
+    def summary(self, trace_id: str) -> Optional[TraceSummary]:
+        """Per-trace summary, or None for an unknown trace"""
+        trace = self._get(trace_id)
+        if trace is None or not trace.keys:
+            return None
+
+        first, last = trace.entries[trace.keys[0]], trace.entries[trace.keys[-1]]
+        return TraceSummary(
+            trace_id=trace_id,
+            receipt_count=len(trace.keys),
+            band_counts=dict(trace.band_counts),
+            track_counts=dict(trace.track_counts),
+            first_timestamp=trace.first_ts,
+            last_timestamp=trace.last_ts,
+            first_lamport=first.lamport,
+            last_lamport=last.lamport,
+            risk_gate_hits=trace.risk_gate_hits,
+            merkle_root=trace.levels()[-1][0],
+        )
+
+    def timeline(self, trace_id: str) -> Optional[TraceTimeline]:
+        """Receipts of a trace in merged Lamport order"""
+        summary = self.summary(trace_id)
+        if summary is None:
+            return None
+        trace = self._traces[trace_id]
+        return TraceTimeline(
+            summary=summary,
+            entries=[trace.entries[k] for k in trace.keys],
+        )
+
+    def inclusion_proof(self, trace_id: str, self_hash: str) -> Optional[TraceProof]:
+        """Merkle inclusion proof of a receipt in its trace"""
+        trace = self._get(trace_id)
+        if trace is None or not trace.keys:
+            return None
+        index = trace.position(self_hash)
+        if index is None:
+            return None
+
+        levels = trace.levels()
+        return TraceProof(
+            trace_id=trace_id,
+            self_hash=self_hash,
+            index=index,
+            proof=merkle_proof(levels, index),
+            merkle_root=levels[-1][0],
+        )
@@ -5,10 +5,12 @@ Version: Band-1.3 (vΩ.9)
 
 from datetime import datetime
 from enum import Enum
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Optional, Union
 
 from pydantic import BaseModel, Field
 
+from .hashing import DEFAULT_HASH_ALG
+
 
 class BandLevel(Enum):
     """Rosetta Monolith Band Hierarchy"""
@@ -54,9 +56,37 @@ class BaseReceipt(BaseModel):
     self_hash: str
     trace_id: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    actor_signature: Optional[str]
+    actor_signature: Optional[str] = None
     band: BandLevel
     track: Track
+    chain_id: Optional[str] = None  # Shard chain; None for the legacy single chain
+    commitment: Optional[str] = None  # Digest committed by this receipt (e.g. Merkle root)
+    node_id: Optional[str] = None  # Writer node when several nodes share a chain
+    hash_alg: str = DEFAULT_HASH_ALG  # Digest algorithm of self_hash (see ben.hashing)
+
+def receipt_digest_content(receipt: BaseReceipt) -> str:
+    """Content covered by a receipt's self_hash and signature"""
+    content = f"{receipt.receipt_type}:{receipt.lamport}:{receipt.prev_digest}"
+    # Optional fields are labelled so legacy receipts keep their original hash
+    if receipt.chain_id is not None:
+        content += f":chain={receipt.chain_id}"
+    if receipt.commitment is not None:
+        content += f":commit={receipt.commitment}"
+    if receipt.node_id is not None:
+        content += f":node={receipt.node_id}"
+    if receipt.hash_alg != DEFAULT_HASH_ALG:
+        content += f":alg={receipt.hash_alg}"
+    return content
+
+class EventRequest(BaseModel):
+    """Inbound event to be minted into a receipt"""
+    receipt_type: ReceiptType
+    band: BandLevel
+    track: Track
+    trace_id: str
+    station_id: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    commitment: Optional[str] = None  # Digest the receipt commits to (e.g. a Merkle root)
 
 class CRIESMetrics(BaseModel):
     """CRIES Metrics Model"""
@@ -1,68 +1,349 @@
 """
 Chain Verification System
 Version: Band-1.3 (vΩ.9)
+
+`ChainValidator` streams a chain once in merged order and applies every
+`ChainRule` to each receipt in that single pass: Lamport order, prev-digest
+links, self-hash recomputation, signatures and the band state machine.
+Inputs already in order are not sorted, and rules keep only per-lane state,
+so a database cursor can be validated in constant memory.
 """
 
-from typing import List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from pydantic import BaseModel
+
+from .hashing import DEFAULT_HASH_ALG, get_hash
+from .types import BaseReceipt, receipt_digest_content
+from .verify_hash import HashVerifier
+
+
+# Band state machine: a trace may stay in its band or step to the next one
+BAND_TRANSITIONS: Dict[str, List[str]] = {
+    "band-0": ["band-1"],
+    "band-1": ["band-2"],
+    "band-2": ["band-3"],
+    "band-3": ["band-4"],
+    "band-4": ["band-5"],
+    "band-5": ["band-6"],
+    "band-6": ["band-7"],
+    "band-7": ["band-8"],
+    "band-8": ["band-9"],
+    "band-9": ["band-z"],
+}
+
+Lane = Tuple[Optional[str], Optional[str]]
+
+
+def merge_order_key(receipt: BaseReceipt) -> Tuple[int, str, str]:
+    """Deterministic total order: Lamport clock, then node id, then chain id"""
+    return receipt.lamport, receipt.node_id or "", receipt.chain_id or ""
+
+
+def _lane(receipt: BaseReceipt) -> Lane:
+    """Each writer node links its own receipts within a chain"""
+    return receipt.chain_id, receipt.node_id
+
+
+class Violation(BaseModel):
+    """A rule failure at one receipt"""
+    position: int  # Index of the receipt in the caller's input
+    lamport: int
+    rule: str
+    message: str
+
+
+class ValidationReport(BaseModel):
+    """Outcome of a `ChainValidator` pass"""
+    is_valid: bool
+    checked: int
+    sorted_input: bool  # False when the input had to be sorted first
+    violations: List[Violation] = []
+
+    @property
+    def error(self) -> Optional[str]:
+        """Message of the first violation"""
+        return self.violations[0].message if self.violations else None
+
+
+class ChainRule:
+    """One integrity rule applied to each receipt in chain order"""
+
+    name = "rule"
+
+    def reset(self) -> None:
+        """Forget state left over from a previous chain"""
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        """Violation message for this receipt, or None"""
+        raise NotImplementedError
+
+
+class LamportOrderRule(ChainRule):
+    """Merge-order keys strictly increase (ties broken by node id)"""
+
+    name = "lamport_order"
+
+    def reset(self) -> None:
+        self._last: Optional[Tuple[int, str, str]] = None
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        key = merge_order_key(receipt)
+        last = self._last
+        if last is not None and key <= last:
+            return f"Non-monotonic Lamport clock at {receipt.lamport}"
+        self._last = key
+        return None
+
+
+class PrevDigestRule(ChainRule):
+    """prev_digest names the previous receipt of the same lane"""
+
+    name = "prev_digest"
+
+    def __init__(self, heads: Optional[Mapping[Lane, str]] = None):
+        self.heads = dict(heads or {})  # Lane digests preceding the validated range
+
+    def reset(self) -> None:
+        self._last: Dict[Lane, Optional[str]] = dict(self.heads)
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        lane = _lane(receipt)
+        expected = self._last.get(lane)
+        # Follow the actual link so one break is reported once, not cascaded
+        self._last[lane] = receipt.self_hash
+        if receipt.prev_digest != expected:
+            return f"Hash chain broken at {receipt.lamport}"
+        return None
+
+
+class SelfHashRule(ChainRule):
+    """self_hash matches the digest content under the receipt's hash_alg"""
+
+    name = "self_hash"
 
-from .types import BaseReceipt
+    def reset(self) -> None:
+        self._hashes: Dict[str, Callable] = {}
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        new = self._hashes.get(receipt.hash_alg)
+        if new is None:
+            try:
+                new = self._hashes[receipt.hash_alg] = get_hash(receipt.hash_alg)
+            except ValueError as e:
+                return f"{e} at {receipt.lamport}"
+        if new(receipt_digest_content(receipt).encode()).hexdigest() != receipt.self_hash:
+            return f"Self-hash mismatch at {receipt.lamport}"
+        return None
+
+
+class SignatureRule(ChainRule):
+    """actor_signature verifies under the writer node's public key"""
+
+    name = "signature"
+
+    def __init__(
+        self,
+        public_keys: Union[ed25519.Ed25519PublicKey, Mapping[Optional[str], ed25519.Ed25519PublicKey]],
+    ):
+        # A single key signs every lane; a mapping is keyed by node_id
+        if isinstance(public_keys, ed25519.Ed25519PublicKey):
+            self._default: Optional[ed25519.Ed25519PublicKey] = public_keys
+            self._keys: Dict[Optional[str], ed25519.Ed25519PublicKey] = {}
+        else:
+            self._default = None
+            self._keys = dict(public_keys)
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        key = self._keys.get(receipt.node_id, self._default)
+        if key is None:
+            return f"No public key for node {receipt.node_id} at {receipt.lamport}"
+        if not receipt.actor_signature:
+            return f"Missing signature at {receipt.lamport}"
+        try:
+            key.verify(
+                bytes.fromhex(receipt.actor_signature),
+                receipt_digest_content(receipt).encode(),
+            )
+        except Exception:
+            return f"Invalid signature at {receipt.lamport}"
+        return None
+
+
+class BandTransitionRule(ChainRule):
+    """Within a trace, the band stays put or follows `BAND_TRANSITIONS`"""
+
+    name = "band_transition"
+
+    def reset(self) -> None:
+        self._bands: Dict[str, str] = {}
+
+    def check(self, receipt: BaseReceipt) -> Optional[str]:
+        band = receipt.band.value
+        previous = self._bands.get(receipt.trace_id)
+        self._bands[receipt.trace_id] = band
+        if previous is None or band == previous or band in BAND_TRANSITIONS.get(previous, ()):
+            return None
+        return f"Invalid band transition {previous} -> {band} at {receipt.lamport}"
+
+
+def default_rules(
+    public_keys: Union[ed25519.Ed25519PublicKey, Mapping[Optional[str], ed25519.Ed25519PublicKey], None] = None,
+    bands: bool = False,
+) -> List[ChainRule]:
+    """Order, links and self-hashes; signatures when keys are given; bands on request"""
+    rules: List[ChainRule] = [LamportOrderRule(), PrevDigestRule(), SelfHashRule()]
+    if public_keys is not None:
+        rules.append(SignatureRule(public_keys))
+    if bands:
+        rules.append(BandTransitionRule())
+    return rules
+
+
+class ChainValidator:
+    """Single-pass chain validation with pluggable rules"""
+
+    def __init__(self, rules: Optional[Sequence[ChainRule]] = None, fail_fast: bool = False):
+        self.rules = list(rules) if rules is not None else default_rules()
+        self.fail_fast = fail_fast
+
+    def validate(self, receipts: Iterable[BaseReceipt]) -> ValidationReport:
+        """Apply every rule to every receipt in merged order.
+
+        Sequences are sorted only when they are not already in order; other
+        iterables are streamed as given, so out-of-order receipts surface as
+        Lamport violations. Positions always refer to the caller's input.
+        """
+        for rule in self.rules:
+            rule.reset()
+
+        sorted_input = True
+        if isinstance(receipts, Sequence):
+            keys = [merge_order_key(r) for r in receipts]
+            if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+                sorted_input = False
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                stream: Iterable[Tuple[int, BaseReceipt]] = ((i, receipts[i]) for i in order)
+            else:
+                stream = enumerate(receipts)
+        else:
+            stream = enumerate(receipts)
+
+        violations: List[Violation] = []
+        checked = 0
+        rules = [(rule.name, rule.check) for rule in self.rules]
+        for position, receipt in stream:
+            checked += 1
+            for name, check in rules:
+                message = check(receipt)
+                if message is None:
+                    continue
+                violations.append(Violation(
+                    position=position, lamport=receipt.lamport, rule=name, message=message,
+                ))
+                if self.fail_fast:
+                    return ValidationReport(
+                        is_valid=False, checked=checked, sorted_input=sorted_input,
+                        violations=violations,
+                    )
+
+        return ValidationReport(
+            is_valid=not violations, checked=checked, sorted_input=sorted_input,
+            violations=violations,
+        )
+
+
+def _verify_chain_task(
+    receipts: List[BaseReceipt], verify_hashes: bool = False
+) -> Tuple[bool, Optional[str]]:
+    return ChainVerifier().verify_chain(receipts, verify_hashes=verify_hashes)
 
 
 class ChainVerifier:
     """Verifies cryptographic receipt chains"""
 
-    def verify_chain(self, receipts: List[BaseReceipt]) -> Tuple[bool, Optional[str]]:
+    def verify_chain(
+        self, receipts: List[BaseReceipt], verify_hashes: bool = False
+    ) -> Tuple[bool, Optional[str]]:
         """
         Verify a chain of receipts:
         - Lamport clock monotonicity
         - Hash chain integrity
-        - Signature validation
-        """
-        if not receipts:
-            return True, None
+        - Self-hashes, each under its own `hash_alg` (with `verify_hashes`)
 
-        # Sort by Lamport clock
-        sorted_receipts = sorted(receipts, key=lambda r: r.lamport)
+        Stops at the first violation; use `validate` for a full report.
+        """
+        rules: List[ChainRule] = [LamportOrderRule(), PrevDigestRule()]
+        if verify_hashes:
+            rules.append(SelfHashRule())
+        report = ChainValidator(rules, fail_fast=True).validate(receipts)
+        return report.is_valid, report.error
 
-        # Verify Lamport monotonicity
-        last_lamport = -1
-        for receipt in sorted_receipts:
-            if receipt.lamport <= last_lamport:
-                return False, f"Non-monotonic Lamport clock at {receipt.lamport}"
-            last_lamport = receipt.lamport
+    def validate(
+        self,
+        receipts: Iterable[BaseReceipt],
+        rules: Optional[Sequence[ChainRule]] = None,
+        fail_fast: bool = False,
+    ) -> ValidationReport:
+        """Single-pass validation with `rules` (default: `default_rules()`)"""
+        return ChainValidator(rules, fail_fast=fail_fast).validate(receipts)
 
-        # Verify hash chain
-        last_hash = None
-        for receipt in sorted_receipts:
-            if receipt.prev_digest != last_hash:
-                return False, f"Hash chain broken at {receipt.lamport}"
-            last_hash = receipt.self_hash
+    def verify_shards(
+        self,
+        chains: Dict[str, List[BaseReceipt]],
+        max_workers: Optional[int] = None,
+        verify_hashes: bool = False,
+    ) -> Dict[str, Tuple[bool, Optional[str]]]:
+        """Verify independent shard chains in parallel, one chain per task"""
+        if len(chains) <= 1 or max_workers == 1:
+            return {
+                chain_id: self.verify_chain(r, verify_hashes=verify_hashes)
+                for chain_id, r in chains.items()
+            }
 
-        return True, None
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                chain_id: pool.submit(_verify_chain_task, receipts, verify_hashes)
+                for chain_id, receipts in chains.items()
+            }
+            return {chain_id: f.result() for chain_id, f in futures.items()}
 
     def verify_merkle_proof(
         self, 
         receipt: BaseReceipt, 
         merkle_root: str,
-        proof: List[str]
+        proof: List[str],
+        index: Optional[int] = None,
+        hash_alg: str = DEFAULT_HASH_ALG,
     ) -> bool:
-        """Verify a Merkle proof for a receipt"""
+        """Verify a Merkle proof for a receipt.
+
+        Pass the leaf `index` for proofs from `HashVerifier.generate_merkle_proof`;
+        without it the legacy sorted-pair scheme is used. `hash_alg` is the
+        tree's algorithm, which need not match the receipt's own tag.
+        """
+        if index is not None:
+            return HashVerifier.verify_merkle_proof(
+                receipt.self_hash, merkle_root, proof, index, hash_alg
+            )
+
         current = receipt.self_hash
         
         for sibling in proof:
             # Sort hashes to ensure deterministic ordering
             if current < sibling:
-                current = self._hash_pair(current, sibling)
+                current = self._hash_pair(current, sibling, hash_alg)
             else:
-                current = self._hash_pair(sibling, current)
+                current = self._hash_pair(sibling, current, hash_alg)
         
         return current == merkle_root
 
-    def _hash_pair(self, left: str, right: str) -> str:
+    def _hash_pair(self, left: str, right: str, hash_alg: str = DEFAULT_HASH_ALG) -> str:
         """Hash a pair of strings"""
-        import hashlib
         combined = f"{left}{right}".encode()
-        return hashlib.sha256(combined).hexdigest()
+        return get_hash(hash_alg)(combined).hexdigest()
 
     def verify_band_transition(
         self,
@@ -76,20 +357,7 @@ class ChainVerifier:
         Band-2 → Band-3: Field learning engagement
         etc.
         """
-        valid_transitions = {
-            "band-0": ["band-1"],
-            "band-1": ["band-2"],
-            "band-2": ["band-3"],
-            "band-3": ["band-4"],
-            "band-4": ["band-5"],
-            "band-5": ["band-6"],
-            "band-6": ["band-7"],
-            "band-7": ["band-8"],
-            "band-8": ["band-9"],
-            "band-9": ["band-z"],
-        }
-
         return (
-            receipt_b.band.value in valid_transitions.get(receipt_a.band.value, [])
+            receipt_b.band.value in BAND_TRANSITIONS.get(receipt_a.band.value, [])
             and receipt_b.lamport > receipt_a.lamport
         )
\ No newline at end of file
@@ -3,12 +3,12 @@ Hash Verification System
 Version: Band-1.3 (vΩ.9)
 """
 
-import hashlib
 from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel
 
-from .types import BaseReceipt
+from .hashing import DEFAULT_HASH_ALG, get_hash, hash_hex
+from .types import BaseReceipt, receipt_digest_content
 
 
 class HashVerification(BaseModel):
@@ -18,15 +18,116 @@ class HashVerification(BaseModel):
     computed_hash: str
     expected_hash: str
 
+class MerkleAccumulator:
+    """Incremental Merkle root builder using O(log n) memory.
+
+    Produces the same root as `HashVerifier.compute_merkle_root` for the same
+    leaves in the same order and `hash_alg`, without holding the leaf list in
+    memory.
+    """
+
+    def __init__(self, hash_alg: str = DEFAULT_HASH_ALG):
+        self.hash_alg = hash_alg
+        self._levels: List[Optional[str]] = []
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        """Number of leaves added so far"""
+        return self._count
+
+    def add(self, item: Union[str, BaseReceipt]) -> None:
+        """Append a leaf (hash string or receipt)"""
+        node = item if isinstance(item, str) else item.self_hash
+        height = 0
+        while height < len(self._levels) and self._levels[height] is not None:
+            node = _hash_concat(self._levels[height], node, self.hash_alg)
+            self._levels[height] = None
+            height += 1
+        if height == len(self._levels):
+            self._levels.append(node)
+        else:
+            self._levels[height] = node
+        self._count += 1
+
+    def root(self) -> str:
+        """Return the Merkle root of all leaves added so far"""
+        if self._count == 0:
+            return hash_hex(b"", self.hash_alg)
+
+        # Pending subtrees sit right-to-left from low to high levels; fold
+        # them upward, duplicating the last node of any odd-sized level.
+        top = max(h for h, node in enumerate(self._levels) if node is not None)
+        carry: Optional[str] = None
+        for height in range(top + 1):
+            node = self._levels[height]
+            if node is not None and carry is not None:
+                carry = _hash_concat(node, carry, self.hash_alg)
+            elif node is not None or carry is not None:
+                last = node if node is not None else carry
+                if height == top and self._count > 1:
+                    return last
+                carry = _hash_concat(last, last, self.hash_alg)
+        return carry
+
+
+def _hash_concat(left: str, right: str, alg: str = DEFAULT_HASH_ALG) -> str:
+    return get_hash(alg)(f"{left}{right}".encode()).hexdigest()
+
+
+def merkle_levels(leaves: List[str], hash_alg: str = DEFAULT_HASH_ALG) -> List[List[str]]:
+    """Build every level of the Merkle tree, leaves first.
+
+    Odd levels are padded with a copy of their last node, and a lone leaf
+    is paired with itself, matching `HashVerifier.compute_merkle_root`; the
+    root is ``levels[-1][0]``.
+    """
+    if not leaves:
+        return [[hash_hex(b"", hash_alg)]]
+
+    new = get_hash(hash_alg)
+    level = list(leaves)
+    if len(level) == 1:
+        level.append(level[0])
+    levels = [level]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+        levels.append([
+            new(f"{level[i]}{level[i + 1]}".encode()).hexdigest()
+            for i in range(0, len(level), 2)
+        ])
+    return levels
+
+
+def merkle_proof(levels: List[List[str]], index: int) -> List[str]:
+    """Sibling path for the leaf at `index`, given levels from `merkle_levels`"""
+    proof = []
+    for level in levels[:-1]:
+        proof.append(level[index ^ 1])
+        index //= 2
+    return proof
+
+
 class HashVerifier:
     """Performs hash integrity checks"""
 
     @staticmethod
     def verify_receipt_hash(receipt: BaseReceipt) -> HashVerification:
-        """Verify the self_hash of a receipt"""
-        content = f"{receipt.receipt_type}:{receipt.lamport}:{receipt.prev_digest}"
-        computed_hash = hashlib.sha256(content.encode()).hexdigest()
-        
+        """Verify the self_hash of a receipt with the algorithm it is tagged with"""
+        try:
+            new = get_hash(receipt.hash_alg)
+        except ValueError as e:
+            return HashVerification(
+                is_valid=False,
+                computed_hash="",
+                expected_hash=receipt.self_hash,
+                error=str(e),
+            )
+        content = receipt_digest_content(receipt)
+        computed_hash = new(content.encode()).hexdigest()
+
         return HashVerification(
             is_valid=computed_hash == receipt.self_hash,
             computed_hash=computed_hash,
@@ -35,10 +136,15 @@ class HashVerifier:
         )
 
     @staticmethod
-    def compute_merkle_root(items: List[Union[str, BaseReceipt]]) -> str:
+    def compute_merkle_root(
+        items: List[Union[str, BaseReceipt]],
+        hash_alg: str = DEFAULT_HASH_ALG,
+    ) -> str:
         """Compute Merkle root from list of items"""
         if not items:
-            return hashlib.sha256(b"").hexdigest()
+            return hash_hex(b"", hash_alg)
+
+        new = get_hash(hash_alg)
 
         # Convert receipts to hashes if needed
         leaves = [
@@ -46,15 +152,19 @@ class HashVerifier:
             for item in items
         ]
 
-        # Handle odd number of leaves
-        if len(leaves) % 2 == 1:
-            leaves.append(leaves[-1])
+        # A lone leaf is hashed with itself, so one leaf's root is H(l||l), never the leaf
+        if len(leaves) == 1:
+            leaves.append(leaves[0])
 
         while len(leaves) > 1:
+            # Handle odd number of nodes by duplicating the last one
+            if len(leaves) % 2 == 1:
+                leaves.append(leaves[-1])
+
             temp = []
             for i in range(0, len(leaves), 2):
                 combined = f"{leaves[i]}{leaves[i+1]}".encode()
-                temp.append(hashlib.sha256(combined).hexdigest())
+                temp.append(new(combined).hexdigest())
             leaves = temp
 
         return leaves[0]
@@ -62,7 +172,8 @@ class HashVerifier:
     @staticmethod
     def generate_merkle_proof(
         items: List[Union[str, BaseReceipt]],
-        target_hash: str
+        target_hash: str,
+        hash_alg: str = DEFAULT_HASH_ALG,
     ) -> List[str]:
         """Generate Merkle proof for target hash"""
         if not items:
@@ -80,25 +191,22 @@ class HashVerifier:
         except ValueError:
             return []
 
-        proof = []
-        while len(leaves) > 1:
-            temp = []
-            for i in range(0, len(leaves), 2):
-                if i + 1 >= len(leaves):
-                    temp.append(leaves[i])
-                    if i == target_idx:
-                        target_idx = len(temp) - 1
-                    continue
-
-                if i == target_idx:
-                    proof.append(leaves[i + 1])
-                    target_idx = len(temp)
-                elif i + 1 == target_idx:
-                    proof.append(leaves[i])
-                    target_idx = len(temp)
+        return merkle_proof(merkle_levels(leaves, hash_alg), target_idx)
 
-                combined = f"{leaves[i]}{leaves[i+1]}".encode()
-                temp.append(hashlib.sha256(combined).hexdigest())
-            leaves = temp
-
-        return proof
\ No newline at end of file
+    @staticmethod
+    def verify_merkle_proof(
+        leaf: str,
+        merkle_root: str,
+        proof: List[str],
+        index: int,
+        hash_alg: str = DEFAULT_HASH_ALG,
+    ) -> bool:
+        """Verify a positional Merkle proof for the leaf at `index`"""
+        current = leaf
+        for sibling in proof:
+            if index % 2 == 0:
+                current = _hash_concat(current, sibling, hash_alg)
+            else:
+                current = _hash_concat(sibling, current, hash_alg)
+            index //= 2
+        return current == merkle_root
@@ -0,0 +1,252 @@
+"""
+Witness Quorum Aggregation
+Version: Band-1.3 (vΩ.9)
+
+Witnesses submit signed claims about a trace to `WitnessAggregator` instead
+of each claim minting its own WITNESS_CLAIM receipt. Claims are buffered
+per (trace_id, statement) and their signatures checked in batches off the
+event loop. Once `quorum` distinct witnesses agree, one WITNESS_CONSENSUS
+receipt is minted whose commitment is the Merkle root of the contributing
+claims; a group that misses the quorum within `timeout` seconds is recorded
+as one WITNESS_CLAIM receipt committing to the claims that did arrive.
+Everything closed in one flush is minted through a single
+`process_events` call: one block write and one CRIES refresh.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from pydantic import BaseModel, Field
+
+from .db import PartialWriteError
+from .hashing import DEFAULT_HASH_ALG, hash_text
+from .metrics import WITNESS_CLAIMS, WITNESS_OUTCOMES
+from .types import BandLevel, BaseReceipt, EventRequest, ReceiptType, Track
+from .verify_hash import HashVerifier, merkle_levels, merkle_proof
+
+
+def _encode(*fields: str) -> str:
+    """Canonical JSON array of the fields; unlike joining them, no two field lists collide"""
+    return json.dumps(list(fields), ensure_ascii=False, separators=(",", ":"))
+
+
+def claim_message(trace_id: str, statement: str, witness_id: str) -> bytes:
+    """Bytes a witness signs to attest `statement` for a trace"""
+    return _encode("witness", trace_id, statement, witness_id).encode()
+
+
+class WitnessClaim(BaseModel):
+    """A witness's signed attestation of `statement` (e.g. a receipt digest) for a trace"""
+    trace_id: str
+    statement: str
+    witness_id: str
+    signature: str  # Hex Ed25519 signature over claim_message()
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+def claim_leaf(claim: WitnessClaim, hash_alg: str = DEFAULT_HASH_ALG) -> str:
+    """Merkle leaf of a claim, covering its signature"""
+    return hash_text(
+        _encode(claim.trace_id, claim.statement, claim.witness_id, claim.signature), hash_alg
+    )
+
+
+class WitnessOutcome(BaseModel):
+    """A closed claim group and the receipt recording it"""
+    trace_id: str
+    statement: str
+    reached: bool  # False when the group timed out below quorum
+    witnesses: List[str]  # Contributing witnesses, in leaf order
+    leaves: List[str]
+    commitment: str
+    receipt: Optional[BaseReceipt] = None
+
+    def proof(self, witness_id: str, hash_alg: str = DEFAULT_HASH_ALG) -> Tuple[int, List[str]]:
+        """Leaf index and sibling path proving a witness's claim is in the commitment"""
+        index = self.witnesses.index(witness_id)
+        return index, merkle_proof(merkle_levels(self.leaves, hash_alg), index)
+
+
+class _Group:
+    """Verified claims of one (trace_id, statement), by witness"""
+
+    __slots__ = ("claims", "opened")
+
+    def __init__(self, opened: float):
+        self.claims: Dict[str, WitnessClaim] = {}
+        self.opened = opened
+
+
+def _verify_batch(
+    keys: Mapping[str, ed25519.Ed25519PublicKey],
+    claims: List[WitnessClaim],
+) -> List[str]:
+    """Outcome of each claim's signature check (runs in a worker thread)"""
+    results = []
+    for claim in claims:
+        key = keys.get(claim.witness_id)
+        if key is None:
+            results.append("unknown_witness")
+            continue
+        try:
+            key.verify(
+                bytes.fromhex(claim.signature),
+                claim_message(claim.trace_id, claim.statement, claim.witness_id),
+            )
+        except Exception:
+            results.append("invalid_signature")
+        else:
+            results.append("accepted")
+    return results
+
+
+class WitnessAggregator:
+    """Buffers witness claims and mints one receipt per quorum or timeout"""
+
+    def __init__(
+        self,
+        service: Any,
+        witness_keys: Mapping[str, ed25519.Ed25519PublicKey],
+        quorum: int,
+        timeout: float = 30.0,
+        batch_size: int = 1000,
+        band: BandLevel = BandLevel.BAND_4,
+        track: Track = Track.TRACK_B,
+        hash_alg: str = DEFAULT_HASH_ALG,
+        closed_capacity: int = 100_000,
+    ):
+        if quorum < 1:
+            raise ValueError("quorum must be at least 1")
+        self.service = service  # Anything with AuditService.process_events
+        self.witness_keys = dict(witness_keys)
+        self.quorum = quorum
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.band = band
+        self.track = track
+        self.hash_alg = hash_alg
+        self.closed_capacity = closed_capacity
+        self.logger = logging.getLogger("ben.witness")
+        self._inbox: List[WitnessClaim] = []
+        self._groups: Dict[Tuple[str, str], _Group] = {}
+        # Recently closed groups, so late claims are not reopened as new groups
+        self._closed: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        # Outcomes whose receipts failed to store; retried on the next flush
+        self._unsent: List[WitnessOutcome] = []
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Claims buffered but not yet in a closed group"""
+        return len(self._inbox) + sum(len(g.claims) for g in self._groups.values())
+
+    async def submit(self, claim: WitnessClaim) -> List[WitnessOutcome]:
+        """Buffer a claim; flushes once `batch_size` claims are waiting"""
+        self._inbox.append(claim)
+        if len(self._inbox) >= self.batch_size:
+            return await self.flush()
+        return []
+
+    async def flush(self, now: Optional[float] = None) -> List[WitnessOutcome]:
+        """Verify buffered claims, close groups at quorum or past their timeout, mint their receipts"""
+        async with self._flush_lock:
+            now = time.monotonic() if now is None else now
+            claims, self._inbox = self._inbox, []
+            if claims:
+                results = await asyncio.to_thread(_verify_batch, self.witness_keys, claims)
+                for claim, result in zip(claims, results):
+                    WITNESS_CLAIMS.inc(self._add(claim, now) if result == "accepted" else result)
+
+            closed: List[WitnessOutcome] = []
+            for key, group in list(self._groups.items()):
+                if len(group.claims) >= self.quorum:
+                    closed.append(self._close(key, reached=True))
+                elif now - group.opened >= self.timeout:
+                    closed.append(self._close(key, reached=False))
+
+            outcomes = self._unsent + closed
+            self._unsent = []
+            if outcomes:
+                await self._mint(outcomes)
+            return outcomes
+
+    def _add(self, claim: WitnessClaim, now: float) -> str:
+        key = (claim.trace_id, claim.statement)
+        if key in self._closed:
+            return "late"
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(now)
+        if claim.witness_id in group.claims:
+            return "duplicate"
+        group.claims[claim.witness_id] = claim
+        return "accepted"
+
+    def _close(self, key: Tuple[str, str], reached: bool) -> WitnessOutcome:
+        group = self._groups.pop(key)
+        self._closed[key] = None
+        while len(self._closed) > self.closed_capacity:
+            self._closed.popitem(last=False)
+
+        # Sorted by witness so the commitment does not depend on arrival order
+        claims = [group.claims[w] for w in sorted(group.claims)]
+        leaves = [claim_leaf(c, self.hash_alg) for c in claims]
+        WITNESS_OUTCOMES.inc("consensus" if reached else "timeout")
+        return WitnessOutcome(
+            trace_id=key[0],
+            statement=key[1],
+            reached=reached,
+            witnesses=[c.witness_id for c in claims],
+            leaves=leaves,
+            commitment=HashVerifier.compute_merkle_root(leaves, self.hash_alg),
+        )
+
+    async def _mint(self, outcomes: List[WitnessOutcome]) -> None:
+        events = [
+            EventRequest(
+                receipt_type=ReceiptType.WITNESS_CONSENSUS if o.reached else ReceiptType.WITNESS_CLAIM,
+                band=self.band,
+                track=self.track,
+                trace_id=o.trace_id,
+                commitment=o.commitment,
+                metadata={
+                    "statement": o.statement,
+                    "quorum": self.quorum,
+                    "witnesses": o.witnesses,
+                    "leaves": o.leaves,
+                    "hash_alg": self.hash_alg,
+                },
+            )
+            for o in outcomes
+        ]
+        try:
+            receipts = await self.service.process_events(events)
+        except PartialWriteError as exc:
+            # Outcomes whose blocks committed keep their receipts; only the rest are retried
+            self.logger.warning(f"Storing {len(exc.errors)} of {len(outcomes)} witness receipts failed: {exc}")
+            for i, outcome in enumerate(outcomes):
+                if i not in exc.errors:
+                    outcome.receipt = exc.results[i]
+            self._unsent = [outcomes[i] for i in sorted(exc.errors)]
+            raise
+        except Exception as exc:
+            self.logger.warning(f"Storing {len(outcomes)} witness receipts failed: {exc}")
+            self._unsent = outcomes
+            raise
+        for outcome, receipt in zip(outcomes, receipts):
+            outcome.receipt = receipt
+
+    async def run(self, interval: float = 1.0) -> None:
+        """Flush every `interval` seconds until cancelled, so timeouts fire without new claims"""
+        while True:
+            try:
+                await self.flush()
+            except Exception as exc:
+                self.logger.warning(f"Witness flush failed: {exc}")
+            await asyncio.sleep(interval)
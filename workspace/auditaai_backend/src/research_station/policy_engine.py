@@ -0,0 +1,341 @@
+"""
+Research Station Policy Engine
+Version: Band-1.3 (vΩ.9)
+
+Compiles a station's active policies into a decision structure once, then
+evaluates receipts against it in batches. Rules are grouped by field so each
+field is read once per receipt; `eq`/`in` rules become a hash lookup, numeric
+range rules a bisect over sorted thresholds, and the remaining operators are
+prepared predicates scanned in priority order. A station's compiled
+form is reused until one of its policies' `updated_at` (or activation) changes.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from .types import Policy, PolicyRule
+
+
+_MISSING = object()
+
+NUMERIC_OPERATORS = ("gt", "gte", "lt", "lte")
+OPERATORS = NUMERIC_OPERATORS + (
+    "eq", "ne", "contains", "not_contains", "in", "not_in", "regex", "exists",
+)
+
+
+class PolicyDecision(BaseModel):
+    """Outcome of evaluating one receipt"""
+    action: str
+    policy_id: Optional[str] = None
+    policy_name: str
+    field: str
+    operator: str
+    priority: int
+
+
+class _CompiledRule:
+    """A rule with its comparison prepared ahead of time"""
+
+    __slots__ = ("rank", "priority", "predicate", "decision")
+
+    def __init__(
+        self,
+        rank: Tuple[int, int],
+        predicate: Optional[Callable[[Any], bool]],
+        decision: PolicyDecision,
+    ):
+        self.rank = rank  # (-priority, declaration order): lower wins
+        self.priority = decision.priority
+        self.predicate = predicate
+        self.decision = decision
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _normalize(value: Any) -> Any:
+    """Key used for equality: numbers compare numerically, enums by value"""
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    number = _as_number(value)
+    if number is not None:
+        return number
+    return str(value)
+
+
+def _split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _predicate(rule: PolicyRule) -> Callable[[Any], bool]:
+    """Build a prepared comparison for operators that cannot be indexed"""
+    op = rule.operator
+
+    if op == "ne":
+        target = _normalize(rule.value)
+        return lambda value: value is _MISSING or _normalize(value) != target
+    if op in ("contains", "not_contains"):
+        needle = rule.value
+        negate = op == "not_contains"
+
+        def contains(value: Any) -> bool:
+            if value is _MISSING or value is None:
+                return negate
+            haystack = value if isinstance(value, (list, tuple, set, dict)) else str(value)
+            return (needle in haystack) != negate
+        return contains
+    if op == "not_in":
+        members = {_normalize(item) for item in _split_list(rule.value)}
+        return lambda value: value is _MISSING or _normalize(value) not in members
+    if op == "regex":
+        pattern = re.compile(rule.value)
+        return lambda value: value is not _MISSING and value is not None and bool(pattern.search(str(value)))
+    if op == "exists":
+        expected = rule.value.strip().lower() not in ("false", "0", "no")
+        return lambda value: (value is not _MISSING and value is not None) == expected
+
+    raise ValueError(f"Unsupported policy operator: {op}")
+
+
+class _ThresholdIndex:
+    """Range rules of one operator sorted by threshold.
+
+    Matching rules always form a prefix (gt/gte) or suffix (lt/lte) of the
+    sorted thresholds, so the best-ranked match is a bisect plus a lookup in a
+    precomputed running-best array.
+    """
+
+    __slots__ = ("op", "pending", "keys", "best")
+
+    def __init__(self, op: str):
+        self.op = op
+        self.pending: List[Tuple[float, _CompiledRule]] = []
+        self.keys: List[float] = []
+        self.best: List[_CompiledRule] = []
+
+    def finalize(self) -> None:
+        self.pending.sort(key=lambda item: item[0])
+        self.keys = [threshold for threshold, _ in self.pending]
+        rules = [rule for _, rule in self.pending]
+        if self.op in ("lt", "lte"):
+            rules.reverse()
+        running: List[_CompiledRule] = []
+        for rule in rules:
+            running.append(rule if not running or rule.rank < running[-1].rank else running[-1])
+        if self.op in ("lt", "lte"):
+            running.reverse()
+        self.best = running
+        self.pending = []
+
+    def match(self, number: float) -> Optional[_CompiledRule]:
+        if self.op == "gt":  # threshold < number
+            idx = bisect_left(self.keys, number)
+            return self.best[idx - 1] if idx else None
+        if self.op == "gte":  # threshold <= number
+            idx = bisect_right(self.keys, number)
+            return self.best[idx - 1] if idx else None
+        if self.op == "lt":  # threshold > number
+            idx = bisect_right(self.keys, number)
+            return self.best[idx] if idx < len(self.keys) else None
+        idx = bisect_left(self.keys, number)  # lte: threshold >= number
+        return self.best[idx] if idx < len(self.keys) else None
+
+
+class _FieldGroup:
+    """All rules on one field: an equality hash table, range indexes and
+    ordered predicates for the remaining operators"""
+
+    __slots__ = ("path", "eq", "ranges", "scan", "best_priority")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.eq: Dict[Any, _CompiledRule] = {}
+        self.ranges: Dict[str, _ThresholdIndex] = {}
+        self.scan: List[_CompiledRule] = []
+        self.best_priority = float("-inf")
+
+    def add(self, rule: _CompiledRule, policy_rule: PolicyRule) -> None:
+        op = policy_rule.operator
+        if op in ("eq", "in"):
+            values = [policy_rule.value] if op == "eq" else _split_list(policy_rule.value)
+            for value in values:
+                key = _normalize(value)
+                current = self.eq.get(key)
+                if current is None or rule.rank < current.rank:
+                    self.eq[key] = rule
+        elif op in NUMERIC_OPERATORS:
+            index = self.ranges.get(op)
+            if index is None:
+                index = self.ranges[op] = _ThresholdIndex(op)
+            index.pending.append((_as_number(policy_rule.value), rule))
+        else:
+            self.scan.append(rule)
+        self.best_priority = max(self.best_priority, rule.priority)
+
+    def finalize(self) -> None:
+        self.scan.sort(key=lambda r: r.rank)
+        for index in self.ranges.values():
+            index.finalize()
+
+    def match(self, value: Any) -> Optional[_CompiledRule]:
+        best = None
+        if value is not _MISSING:
+            if self.eq:
+                best = self.eq.get(_normalize(value))
+            number = _as_number(value) if self.ranges else None
+            if number is not None:
+                for index in self.ranges.values():
+                    rule = index.match(number)
+                    if rule is not None and (best is None or rule.rank < best.rank):
+                        best = rule
+        for rule in self.scan:
+            if best is not None and best.rank < rule.rank:
+                break
+            if rule.predicate(value):
+                return rule
+        return best
+
+
+def _lookup(receipt: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = receipt
+    for part in path:
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        else:
+            value = getattr(value, part, _MISSING)
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+class CompiledPolicySet:
+    """Decision structure for one station's active policies"""
+
+    def __init__(self, policies: Sequence[Policy], default_action: Optional[str] = None):
+        self.default_action = default_action
+        self.rule_count = 0
+        groups: Dict[str, _FieldGroup] = {}
+        order = 0
+
+        for policy in policies:
+            if not policy.is_active:
+                continue
+            for rule in policy.rules:
+                if rule.operator not in OPERATORS:
+                    raise ValueError(f"Unsupported policy operator: {rule.operator}")
+                decision = PolicyDecision(
+                    action=rule.action,
+                    policy_id=policy.id,
+                    policy_name=policy.name,
+                    field=rule.field,
+                    operator=rule.operator,
+                    priority=rule.priority,
+                )
+                group = groups.get(rule.field)
+                if group is None:
+                    group = groups[rule.field] = _FieldGroup(tuple(rule.field.split(".")))
+
+                rank = (-rule.priority, order)
+                indexed = rule.operator in ("eq", "in") + NUMERIC_OPERATORS
+                if rule.operator in NUMERIC_OPERATORS and _as_number(rule.value) is None:
+                    raise ValueError(
+                        f"Operator '{rule.operator}' on '{rule.field}' needs a numeric value"
+                    )
+                predicate = None if indexed else _predicate(rule)
+                group.add(_CompiledRule(rank, predicate, decision), rule)
+                order += 1
+                self.rule_count += 1
+
+        for group in groups.values():
+            group.finalize()
+        # Fields holding the highest-priority rules are checked first
+        self._groups = sorted(groups.values(), key=lambda g: -g.best_priority)
+
+    def evaluate(self, receipt: Any) -> Optional[PolicyDecision]:
+        """Return the highest-priority matching decision for one receipt"""
+        if isinstance(receipt, BaseModel):
+            receipt = receipt.model_dump()
+
+        best: Optional[_CompiledRule] = None
+        for group in self._groups:
+            if best is not None and best.priority > group.best_priority:
+                break
+            rule = group.match(_lookup(receipt, group.path))
+            if rule is not None and (best is None or rule.rank < best.rank):
+                best = rule
+
+        if best is not None:
+            return best.decision
+        if self.default_action is not None:
+            return PolicyDecision(
+                action=self.default_action,
+                policy_name="default",
+                field="",
+                operator="",
+                priority=0,
+            )
+        return None
+
+    def evaluate_batch(self, receipts: Iterable[Any]) -> List[Optional[PolicyDecision]]:
+        """Evaluate many receipts against the same compiled policies"""
+        evaluate = self.evaluate
+        return [evaluate(receipt) for receipt in receipts]
+
+
+def _fingerprint(policies: Sequence[Policy]) -> Tuple[Tuple[Optional[str], datetime, bool], ...]:
+    return tuple((p.id, p.updated_at, p.is_active) for p in policies)
+
+
+class PolicyEngine:
+    """Caches compiled policy sets per research station"""
+
+    def __init__(self, default_action: Optional[str] = None):
+        self.default_action = default_action
+        self._compiled: Dict[str, Tuple[tuple, CompiledPolicySet]] = {}
+        self.compilations = 0
+
+    def compiled_for(self, station_id: str, policies: Sequence[Policy]) -> CompiledPolicySet:
+        """Compiled policies for a station, recompiled only when they changed"""
+        fingerprint = _fingerprint(policies)
+        cached = self._compiled.get(station_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        compiled = CompiledPolicySet(policies, default_action=self.default_action)
+        self._compiled[station_id] = (fingerprint, compiled)
+        self.compilations += 1
+        return compiled
+
+    def evaluate_batch(
+        self,
+        station_id: str,
+        policies: Sequence[Policy],
+        receipts: Iterable[Any],
+    ) -> List[Optional[PolicyDecision]]:
+        """Evaluate receipts against a station's current policies"""
+        return self.compiled_for(station_id, policies).evaluate_batch(receipts)
+
+    def invalidate(self, station_id: Optional[str] = None) -> None:
+        """Drop cached compilations for one station, or all of them"""
+        if station_id is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(station_id, None)
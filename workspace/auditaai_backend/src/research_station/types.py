@@ -5,9 +5,9 @@ Version: Band-1.3 (vΩ.9)
 
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class StationType(str, Enum):
@@ -115,6 +115,8 @@ class ResearchStation(BaseModel):
     models: List[ModelType] = []
     policies: List[Policy] = []
 
+    _quota: Any = PrivateAttr(default=None)
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -126,8 +128,16 @@ class ResearchStation(BaseModel):
     @property
     def remaining_daily_audits(self) -> int:
         """Get remaining daily audit quota"""
-        # TODO: Implement audit counting logic
-        return self.limits.audit_limit
+        if self._quota is None or self.id is None:
+            return self.limits.audit_limit
+        return self._quota.remaining(self.id)
+
+    def attach_quota(self, tracker: Any) -> None:
+        """Count audits through a `ben.quota.QuotaTracker`"""
+        if self.id is None:
+            raise ValueError("Station must have an id to track its quota")
+        tracker.set_limit(self.id, self.limits.audit_limit)
+        self._quota = tracker
 
     def can_add_analyst(self) -> bool:
         """Check if an analyst can be added"""
@@ -0,0 +1,259 @@
+import asyncio
+import importlib
+import itertools
+import os
+import sys
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from ben.audit_service import AuditService
+from ben.types import BaseReceipt
+
+
+GOVERNANCE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "ben_governance"))
+
+# Nullable columns a Prisma row always carries, by model
+COLUMNS = {
+    "receipt": dict.fromkeys((
+        "id", "prev_digest", "actor_signature", "chain_id", "commitment",
+        "node_id", "hash_alg", "station_id", "metadata",
+    )),
+    "chainhead": dict.fromkeys(("chain_id", "node_id", "digest", "signer")),
+    "metricrollup": {"id": None},
+}
+
+# Unique key of each model, for upserts and skip_duplicates
+KEYS = {"receipt": "self_hash", "chainhead": "lane", "metricrollup": "id"}
+
+
+def _matches(row, where):
+    for field, cond in (where or {}).items():
+        value = getattr(row, field, None)
+        if not isinstance(cond, dict):
+            if value != cond:
+                return False
+            continue
+        if "in" in cond and value not in cond["in"]:
+            return False
+        if "not" in cond and value == cond["not"]:
+            return False
+        if "gt" in cond and not value > cond["gt"]:
+            return False
+        if "gte" in cond and not value >= cond["gte"]:
+            return False
+        if "lt" in cond and not value < cond["lt"]:
+            return False
+        if "lte" in cond and not value <= cond["lte"]:
+            return False
+    return True
+
+
+def _sorted(rows, order):
+    orders = order if isinstance(order, list) else [order]
+    for spec in reversed(orders):
+        for field, direction in spec.items():
+            rows = sorted(rows, key=lambda r: getattr(r, field), reverse=direction == "desc")
+    return rows
+
+
+class FakeTable:
+    """One Prisma model: rows in insertion order, unique on `key`"""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.key = KEYS[name]
+        self.rows = []
+        self.calls = []
+
+    def row(self, item, **fields):
+        """A stored row for a receipt (mapped the way AuditService writes it) or a dict"""
+        if isinstance(item, BaseReceipt):
+            item = AuditService._receipt_row(item)
+        if isinstance(item, SimpleNamespace):
+            item = vars(item)
+        data = {**COLUMNS[self.name], **item, **fields}
+        if "id" in data and data["id"] is None:
+            data["id"] = f"{next(self.client.ids):012d}"
+        return SimpleNamespace(**data)
+
+    def insert(self, items, **fields):
+        """Store rows directly, e.g. to seed a test"""
+        rows = [self.row(item, **fields) for item in items]
+        self.rows.extend(rows)
+        return rows
+
+    def get(self, key):
+        """The row with this unique key, or None"""
+        return next((r for r in self.rows if getattr(r, self.key) == key), None)
+
+    async def _query(self, op, kwargs):
+        self.calls.append((op, kwargs))
+        if self.client.delay:
+            await asyncio.sleep(self.client.delay)
+
+    async def find_many(self, where=None, order=None, take=None, skip=0, cursor=None, distinct=None):
+        await self._query("find_many", {"where": where, "order": order, "take": take})
+        rows = [r for r in self.rows if _matches(r, where)]
+        if order:
+            rows = _sorted(rows, order)
+        if cursor:
+            [(field, value)] = cursor.items()
+            rows = rows[next(i for i, r in enumerate(rows) if getattr(r, field) == value):]
+        rows = rows[skip:]
+        if distinct:
+            firsts = {}
+            for r in rows:
+                firsts.setdefault(tuple(getattr(r, f) for f in distinct), r)
+            rows = list(firsts.values())
+        return rows[:take] if take is not None else rows
+
+    async def find_first(self, where=None, order=None):
+        rows = await self.find_many(where=where, order=order, take=1)
+        return rows[0] if rows else None
+
+    async def find_unique(self, where):
+        await self._query("find_unique", {"where": where})
+        return next((r for r in self.rows if _matches(r, where)), None)
+
+    async def count(self, where=None):
+        await self._query("count", {"where": where})
+        return sum(1 for r in self.rows if _matches(r, where))
+
+    async def group_by(self, by, where=None, count=False):
+        await self._query("group_by", {"by": by, "where": where})
+        groups = {}
+        for r in self.rows:
+            if _matches(r, where):
+                key = tuple(getattr(r, f) for f in by)
+                groups[key] = groups.get(key, 0) + 1
+        return [{**dict(zip(by, key)), "_count": {"_all": n}} for key, n in groups.items()]
+
+    async def create(self, data):
+        await self._query("create", {"data": data})
+        return self._create(data)
+
+    async def create_many(self, data, skip_duplicates=False):
+        await self._query("create_many", {"data": data})
+        return self._create_many(data, skip_duplicates)
+
+    async def upsert(self, where, data):
+        await self._query("upsert", {"where": where})
+        return self._upsert(where, data)
+
+    async def delete_many(self, where=None):
+        await self._query("delete_many", {"where": where})
+        kept = [r for r in self.rows if not _matches(r, where)]
+        deleted, self.rows[:] = len(self.rows) - len(kept), kept
+        return deleted
+
+    def _create(self, data):
+        row = self.row(data)
+        if self.get(getattr(row, self.key)) is not None:
+            raise RuntimeError(f"Unique constraint failed on {self.name}.{self.key}")
+        self.rows.append(row)
+        return row
+
+    def _create_many(self, data, skip_duplicates=False):
+        inserted = 0
+        for item in data:
+            if skip_duplicates and self.get(item[self.key]) is not None:
+                continue
+            self._create(item)
+            inserted += 1
+        return inserted
+
+    def _upsert(self, where, data):
+        row = next((r for r in self.rows if _matches(r, where)), None)
+        if row is None:
+            return self._create(data["create"])
+        for field, value in data["update"].items():
+            setattr(row, field, value)
+        return row
+
+
+class _BatchTable:
+    """Writes to one model queued in a batch"""
+
+    def __init__(self, batch, table):
+        self._batch = batch
+        self._table = table
+
+    def create(self, data):
+        self._batch.created.append(data)
+        self._batch.queued.append((self._table._create, (data,)))
+
+    def create_many(self, data, skip_duplicates=False):
+        self._batch.created.extend(data)
+        self._batch.queued.append((self._table._create_many, (data, skip_duplicates)))
+
+    def upsert(self, where, data):
+        self._batch.queued.append((self._table._upsert, (where, data)))
+
+
+class FakeBatch:
+    """Prisma batch: queued writes applied together on commit, or none of them"""
+
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+        self.created = []
+        for name in client.tables:
+            setattr(self, name, _BatchTable(self, getattr(client, name)))
+
+    async def commit(self):
+        if self.client.delay:
+            await asyncio.sleep(self.client.delay)
+        if self.client.fail:
+            raise RuntimeError("db down")
+        if any(row.get("chain_id") in self.client.down for row in self.created):
+            raise RuntimeError("shard down")
+        self.client.commits += 1
+        for write, args in self.queued:
+            write(*args)
+
+
+class FakePrisma:
+    """In-memory Prisma client: the model queries, batches and transactions the services use
+
+    Writes fail while `fail` is set, and batches touching a chain in `down`;
+    every query waits `delay` seconds first.
+    """
+
+    tables = tuple(KEYS)
+
+    def __init__(self, receipts=(), heads=(), down=(), delay=0.0):
+        self.ids = itertools.count(1)
+        self.down = set(down)
+        self.fail = False
+        self.delay = delay
+        self.commits = 0
+        self.transactions = 0
+        for name in self.tables:
+            setattr(self, name, FakeTable(self, name))
+        self.receipt.insert(receipts)
+        self.chainhead.insert(heads)
+
+    def batch_(self):
+        return FakeBatch(self)
+
+    @asynccontextmanager
+    async def tx(self, **kwargs):
+        self.transactions += 1
+        yield self
+
+
+@pytest.fixture
+def fake_prisma():
+    """Factory for in-memory Prisma clients, e.g. `fake_prisma(receipts=..., down={"s2"})`"""
+    return FakePrisma
+
+
+@pytest.fixture(scope="session")
+def governance():
+    """Importer for ben_governance scripts by plain name, the way they import each other"""
+    if GOVERNANCE_DIR not in sys.path:
+        sys.path.insert(0, GOVERNANCE_DIR)
+    return importlib.import_module
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from synthetic import synthetic_ben_receipts, take  # noqa: E402
+
+
+FORMATS = ("aes-gcm", "chacha20")
+# Offsets into the fixed header: magic (4) | version | alg | key id (4) | lamport (8) | hash length
+ALG, KEY_ID, LAMPORT, HASH = 5, 6, 10, 19
+
+
+@pytest.fixture
+def envelope(governance):
+    return governance("ben_envelope")
+
+
+def _receipt():
+    return take(synthetic_ben_receipts(3), 3)[2]
+
+
+def _flip(blob, offset):
+    return blob[:offset] + bytes([blob[offset] ^ 0x01]) + blob[offset + 1:]
+
+
+def _seal_as(envelope, codec, fmt, receipt, lamport, self_hash):
+    """A validly authenticated envelope whose header claims other fields than its body"""
+    kid = envelope.key_id(codec.keys[0])
+    digest = bytes.fromhex(self_hash)
+    aad = envelope._FIXED.pack(envelope.MAGIC, envelope.VERSION, envelope.ALGS[fmt][0], kid,
+                               lamport, len(digest)) + digest + os.urandom(envelope.NONCE)
+    return aad + codec._cipher(kid, fmt).encrypt(aad[-envelope.NONCE:], json.dumps(receipt).encode(), aad)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip_and_header(envelope, fmt):
+    receipt = _receipt()
+    codec = envelope.ReceiptCodec([Fernet.generate_key()], fmt)
+    blob = codec.seal(receipt)
+
+    assert envelope.is_envelope(blob) and codec.format_of(blob) == fmt
+    header = envelope.header(blob)
+    assert (header["lamport"], header["self_hash"]) == (receipt["lamport_counter"], receipt["self_hash"])
+    assert codec.open(blob) == receipt
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_tampered_header_fails_authentication(envelope, fmt):
+    codec = envelope.ReceiptCodec([Fernet.generate_key()], fmt)
+    blob = codec.seal(_receipt())
+
+    # lamport, hash length, self_hash, nonce and tag
+    for offset in (LAMPORT, LAMPORT + 7, HASH - 1, HASH, HASH + 31, HASH + 32, len(blob) - 1):
+        with pytest.raises(InvalidToken):
+            codec.open(_flip(blob, offset))
+        with pytest.raises(InvalidToken):
+            codec.decrypt(_flip(blob, offset))
+    with pytest.raises(InvalidToken):
+        codec.open(blob[:HASH + 8])                    # truncated
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_body_must_agree_with_header(envelope, fmt):
+    receipt = _receipt()
+    codec = envelope.ReceiptCodec([Fernet.generate_key()], fmt)
+    other = _receipt() | {"self_hash": "ab" * 32}
+
+    assert codec.open(_seal_as(envelope, codec, fmt, receipt, receipt["lamport_counter"], receipt["self_hash"])) == receipt
+    for lamport, self_hash in ((receipt["lamport_counter"] + 1, receipt["self_hash"]),
+                               (-1, receipt["self_hash"]),
+                               (receipt["lamport_counter"], other["self_hash"])):
+        blob = _seal_as(envelope, codec, fmt, receipt, lamport, self_hash)
+        assert codec.decrypt(blob) == json.dumps(receipt).encode()   # authentic, but relabelled
+        with pytest.raises(InvalidToken):
+            codec.open(blob)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_unknown_key_id_or_algorithm_is_rejected(envelope, fmt):
+    codec = envelope.ReceiptCodec([Fernet.generate_key()], fmt)
+    blob = codec.seal(_receipt())
+
+    with pytest.raises(InvalidToken):
+        envelope.ReceiptCodec([Fernet.generate_key()], fmt).open(blob)
+    with pytest.raises(InvalidToken):
+        codec.open(blob[:KEY_ID] + b"\x00\x00\x00\x00" + blob[KEY_ID + 4:])
+    for alg in (0, 3, 255, 3 - blob[ALG]):              # unknown, or the other cipher
+        with pytest.raises(InvalidToken):
+            codec.open(blob[:ALG] + bytes([alg]) + blob[ALG + 1:])
+    with pytest.raises(InvalidToken):
+        codec.open(blob[:4] + b"\x09" + blob[5:])     # unknown version
@@ -0,0 +1,55 @@
+import pytest
+
+from ben.ben_event import BENEventProcessor
+from ben.types import ReceiptType, BandLevel, Track
+from ben.verify_chain import ChainVerifier
+
+
+def _event(trace_id="t-1"):
+    return {
+        "receipt_type": ReceiptType.ACT_REQUEST,
+        "band": BandLevel.BAND_1,
+        "track": Track.TRACK_A,
+        "trace_id": trace_id,
+    }
+
+
+def test_create_receipts_mints_contiguous_block():
+    processor = BENEventProcessor()
+    processor.create_receipt(**_event())
+
+    receipts = processor.create_receipts([_event(), _event(), _event()])
+
+    assert [r.lamport for r in receipts] == [2, 3, 4]
+    assert all(processor.verify_signature(r) for r in receipts)
+    assert processor.head() == (4, receipts[-1].self_hash)
+
+
+def test_create_receipts_rolls_back_on_failure():
+    processor = BENEventProcessor()
+    processor.create_receipt(**_event())
+    head = processor.head()
+
+    with pytest.raises(Exception):
+        processor.create_receipts([_event(), {"receipt_type": "bogus"}])
+
+    assert processor.head() == head
+
+
+def test_receipts_form_a_valid_chain():
+    processor = BENEventProcessor()
+    receipts = processor.create_receipts([_event() for _ in range(5)])
+    assert ChainVerifier().verify_chain(receipts) == (True, None)
+
+
+def test_prev_digest_is_only_accepted_before_the_chain_has_a_head():
+    processor = BENEventProcessor()
+    first = processor.create_receipt(**_event(), prev_digest="a" * 64)
+    assert first.prev_digest == "a" * 64
+
+    with pytest.raises(ValueError):
+        processor.create_receipt(**_event(), prev_digest="b" * 64)
+    with pytest.raises(ValueError):
+        processor.create_receipts([{**_event(), "prev_digest": "b" * 64}])
+    assert processor.head() == (1, first.self_hash)
+    assert processor.create_receipt(**_event()).prev_digest == first.self_hash
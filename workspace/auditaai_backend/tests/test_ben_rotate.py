@@ -0,0 +1,130 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from synthetic import synthetic_ben_receipts, take, write_ben_files  # noqa: E402
+
+
+def _store(tmp_path, governance, count):
+    """A receipts dir with `count` Fernet files plus one AES-GCM envelope, and its ben.key"""
+    key = Fernet.generate_key()
+    key_path = tmp_path / "ben.key"
+    key_path.write_bytes(key)
+    receipts = take(synthetic_ben_receipts(count + 1), count + 1)
+    receipts_dir = tmp_path / "receipts"
+    write_ben_files(str(receipts_dir), receipts[:count], Fernet(key))
+    codec = governance("ben_envelope").ReceiptCodec([key], "aes-gcm")
+    (receipts_dir / "receipt_envelope.ben").write_bytes(codec.seal(receipts[count]))
+    return str(receipts_dir), str(key_path), key
+
+
+def _names(receipts_dir):
+    return sorted(n for n in os.listdir(receipts_dir) if n.endswith(".ben"))
+
+
+def _read_all(receipts_dir, codec):
+    return [codec.open(open(os.path.join(receipts_dir, n), "rb").read()) for n in _names(receipts_dir)]
+
+
+def test_killed_rotation_resumes_and_ends_under_the_new_key_only(tmp_path, governance):
+    rotate = governance("ben_rotate")
+    ReceiptCodec = governance("ben_envelope").ReceiptCodec
+    receipts_dir, key_path, old_key = _store(tmp_path, governance, 9)
+    before = _read_all(receipts_dir, ReceiptCodec([old_key]))
+
+    # A directory where a receipt should be crashes the worker mid-run, like a kill
+    os.mkdir(os.path.join(receipts_dir, "receipt_0000000004x.ben"))
+    with pytest.raises(IsADirectoryError):
+        rotate.rotate(receipts_dir, key_path, workers=1, chunk=3, verbose=False)
+    new_key = open(key_path + ".next", "rb").read()
+    assert open(key_path, "rb").read() == old_key
+
+    checkpoint = open(os.path.join(receipts_dir, ".rotate.ckpt")).read().splitlines()
+    assert checkpoint[1:4] == _names(receipts_dir)[:3]
+    os.rmdir(os.path.join(receipts_dir, "receipt_0000000004x.ben"))
+
+    result = rotate.rotate(receipts_dir, key_path, workers=1, chunk=3, verbose=False)
+    counts = result["counts"]
+    assert result["finalized"] and result["failures"] == []
+    assert counts["resumed"] == len(checkpoint) - 1
+    # Files rewritten before the crash but not yet checkpointed are recognised, not re-encrypted
+    assert counts["resumed"] + counts.get("skipped", 0) + counts.get("rotated", 0) == 10
+    assert not os.path.exists(os.path.join(receipts_dir, ".rotate.ckpt"))
+
+    assert open(key_path, "rb").read() == new_key
+    assert _read_all(receipts_dir, ReceiptCodec([new_key])) == before
+    for name in _names(receipts_dir):
+        with pytest.raises(InvalidToken):
+            ReceiptCodec([old_key]).open(open(os.path.join(receipts_dir, name), "rb").read())
+    envelope = open(os.path.join(receipts_dir, "receipt_envelope.ben"), "rb").read()
+    assert ReceiptCodec([new_key]).format_of(envelope) == "aes-gcm"
+
+
+def test_readers_accept_both_keys_while_rotating(tmp_path, governance):
+    rotate = governance("ben_rotate")
+    keys = governance("ben_keys")
+    envelope = governance("ben_envelope")
+    receipts_dir, key_path, old_key = _store(tmp_path, governance, 6)
+    expected = _read_all(receipts_dir, envelope.ReceiptCodec([old_key]))
+
+    new_key = rotate.stage_new_key(key_path)
+    assert rotate.stage_new_key(key_path) == new_key        # a resumed run reuses it
+    rotate._rotate_chunk(receipts_dir, _names(receipts_dir)[:3], old_key, new_key)
+
+    # Half the store is under each key; readers open all of it
+    assert _read_all(receipts_dir, envelope.load_codec(key_path)) == expected
+    old_token = open(os.path.join(receipts_dir, _names(receipts_dir)[-2]), "rb").read()
+    fernet = keys.load_fernet(key_path)
+    assert fernet.decrypt(old_token)
+
+    # New writes already use the new key
+    token = fernet.encrypt(b"{}")
+    assert Fernet(new_key).decrypt(token) == b"{}"
+    with pytest.raises(InvalidToken):
+        Fernet(old_key).decrypt(token)
+
+
+def test_finalize_promotes_next_and_retires_the_old_key(tmp_path, governance):
+    rotate = governance("ben_rotate")
+    keys = governance("ben_keys")
+    key_path = tmp_path / "ben.key"
+    old_key = Fernet.generate_key()
+    key_path.write_bytes(old_key)
+    new_key = rotate.stage_new_key(str(key_path))
+
+    retired = rotate.finalize(str(key_path))
+
+    assert key_path.read_bytes() == new_key
+    assert not os.path.exists(keys.next_key_path(str(key_path)))
+    assert open(retired, "rb").read() == old_key
+    assert stat.S_IMODE(os.stat(retired).st_mode) == 0o600
+    # Readers go back to a single key
+    assert keys.load_fernet(str(key_path)).decrypt(Fernet(new_key).encrypt(b"x")) == b"x"
+    with pytest.raises(InvalidToken):
+        keys.load_fernet(str(key_path)).decrypt(Fernet(old_key).encrypt(b"x"))
+
+
+def test_rekey_rewrites_the_query_index_or_drops_a_foreign_one(tmp_path, governance):
+    query = governance("receipt_query")
+    old, new, foreign = (Fernet(Fernet.generate_key()) for _ in range(3))
+    path = str(tmp_path / query.INDEX_NAME)
+    entries = [query.index_entry(f"receipt_{i}.ben", r) for i, r in enumerate(synthetic_ben_receipts(3))]
+    query.append_entries(path, entries[:2], old)
+    query.append_entries(path, entries[2:], old)
+
+    assert query.rekey(path, old, new)
+    lines = open(path, "rb").read().splitlines()
+    assert [e for line in lines for e in json.loads(new.decrypt(line))] == entries
+    with pytest.raises(InvalidToken):
+        old.decrypt(lines[0])
+
+    query.append_entries(path, entries, foreign)
+    assert not query.rekey(path, new, Fernet(Fernet.generate_key()))
+    assert not os.path.exists(path)
+    assert query.rekey(path, old, new)                   # nothing to rewrite
@@ -0,0 +1,44 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import load_harness  # noqa: E402
+import run_benchmarks  # noqa: E402
+from synthetic import synthetic_chain, take  # noqa: E402
+
+from ben.verify_chain import ChainVerifier
+
+
+def test_synthetic_chain_is_valid():
+    receipts = take(synthetic_chain(50, seed=1), 50)
+    assert ChainVerifier().verify_chain(receipts) == (True, None)
+    # Same seed, same chain
+    assert take(synthetic_chain(5, seed=1), 5)[4].trace_id == receipts[4].trace_id
+
+
+def test_suite_flags_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "20", "--repeat", "1", "--baseline", str(baseline)]
+    assert run_benchmarks.main(args + ["--save-baseline"]) == 0
+
+    data = json.loads(baseline.read_text())
+    assert set(data["results"]) == set(run_benchmarks.CASES)
+    data["results"]["verify_chain"]["20"]["ops_per_s"] *= 100
+    baseline.write_text(json.dumps(data))
+    assert run_benchmarks.main(args + ["--cases", "verify_chain"]) == 1
+
+
+def test_load_test_reports_percentiles_in_process(tmp_path):
+    mix = load_harness.parse_mix("verify-path=2,list=1,ingest=1")
+    result = asyncio.run(load_harness.run_load_test(
+        store_size=20, concurrency=[1, 4], duration=0.3, mix=mix, workdir=str(tmp_path)
+    ))
+
+    assert [level["concurrency"] for level in result["levels"]] == [1, 4]
+    for level in result["levels"]:
+        assert level["requests"] > 0 and level["errors"] == 0
+        assert level["p50_ms"] <= level["p95_ms"] <= level["p99_ms"]
+        assert set(level["operations"]) <= set(mix)
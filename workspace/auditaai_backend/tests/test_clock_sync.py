@@ -0,0 +1,97 @@
+import asyncio
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.clock_sync import (
+    ClockSync,
+    DirectoryHeadTransport,
+    InMemoryHeadTransport,
+    merge_receipt_streams,
+)
+from ben.db import DataAccess
+from ben.types import ReceiptType, BandLevel, Track
+from ben.verify_chain import ChainVerifier
+
+
+def _mint(processor, n=1):
+    return [
+        processor.create_receipt(
+            receipt_type=ReceiptType.ACT_REQUEST,
+            band=BandLevel.BAND_1,
+            track=Track.TRACK_A,
+            trace_id="t-1",
+        )
+        for _ in range(n)
+    ]
+
+
+def test_merge_lamport_uses_receive_semantics():
+    processor = BENEventProcessor(node_id="a")
+    _mint(processor, 2)
+    assert processor.merge_lamport(10) == 11
+    assert processor.merge_lamport(3) == 12
+
+
+def test_nodes_produce_one_verifiable_total_order(tmp_path):
+    transport = DirectoryHeadTransport(str(tmp_path))
+    a = BENEventProcessor(node_id="a")
+    b = BENEventProcessor(node_id="b")
+    sync_a, sync_b = ClockSync(a, transport), ClockSync(b, transport)
+
+    stream_a = _mint(a, 3)
+    sync_a.exchange()
+    sync_b.exchange()  # b observes a@3 and jumps to 4
+    stream_b = _mint(b, 2)
+    stream_a += _mint(a, 1)  # concurrent with b: same lamport, ordered by node id
+
+    merged = list(merge_receipt_streams(stream_a, stream_b))
+    assert [(r.lamport, r.node_id) for r in merged] == [
+        (1, "a"), (2, "a"), (3, "a"), (4, "a"), (5, "b"), (6, "b")
+    ]
+    assert ChainVerifier().verify_chain(merged) == (True, None)
+    assert sync_b.remote_heads() == {"a": 3}
+
+
+def test_verify_chain_rejects_duplicate_order_key():
+    a = BENEventProcessor(node_id="a")
+    sync = ClockSync(a, InMemoryHeadTransport())
+    sync.exchange()
+    receipts = _mint(a, 2)
+    duplicate = receipts[1].model_copy()
+    ok, error = ChainVerifier().verify_chain(receipts + [duplicate])
+    assert not ok and "Non-monotonic" in error
+
+
+def test_rewind_after_a_failed_write_keeps_a_merged_clock():
+    a = BENEventProcessor(node_id="a")
+    head = a.head()
+    _mint(a, 3)
+    assert a.merge_lamport(10) == 11
+    a.restore_head(*head)  # the block's write failed
+
+    [receipt] = _mint(a)
+    assert receipt.lamport == 11 and receipt.prev_digest is None
+
+
+def test_service_merges_peer_heads_under_the_chain_write_lock(fake_prisma):
+    transport = InMemoryHeadTransport()
+    peer = BENEventProcessor(node_id="b")
+    _mint(peer, 20)
+    ClockSync(peer, transport).publish()
+    client = fake_prisma(delay=0.02)
+    service = AuditService(node_id="a", db=DataAccess(client), clock_transport=transport)
+
+    async def scenario():
+        client.fail = True
+        write = asyncio.create_task(service.process_event(
+            ReceiptType.ACT_REQUEST, BandLevel.BAND_1, Track.TRACK_A, "t-1"
+        ))
+        await asyncio.sleep(0.01)  # the write holds the lock, waiting on the database
+        results = await asyncio.gather(write, service.sync_clock(), return_exceptions=True)
+        client.fail = False
+        return results, await service.process_event(ReceiptType.ACT_REQUEST, BandLevel.BAND_1, Track.TRACK_A, "t-1")
+
+    (failed, merged), receipt = asyncio.run(scenario())
+    assert isinstance(failed, RuntimeError) and merged == 21
+    assert receipt.lamport == 22 and service.clock_sync.remote_heads() == {"b": 20}
+    assert transport.fetch()[-1].node_id == "a"
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from ben.db import DataAccess, DeadlineExceeded, PoolConfig, deadline
+
+
+def test_identical_concurrent_reads_share_one_query(fake_prisma):
+    client = fake_prisma(delay=0.01)
+    client.receipt.insert({"self_hash": f"{i:064x}", "lamport": i} for i in range(150))
+    db = DataAccess(client)
+
+    async def scenario():
+        return await asyncio.gather(
+            *[db.receipt.find_many(take=100) for _ in range(5)],
+            db.receipt.find_many(take=10),
+        )
+
+    assert [len(rows) for rows in asyncio.run(scenario())] == [100] * 5 + [10]
+    assert len(client.receipt.calls) == 2
+    [stats] = db.stats()
+    assert (stats.query, stats.count, stats.coalesced) == ("receipt.find_many", 2, 4)
+    assert stats.p50_ms >= 10 and stats.max_ms >= stats.p99_ms
+
+
+def test_deadlines_bound_reads_and_refuse_late_writes(fake_prisma):
+    client = fake_prisma(delay=0.5)
+    db = DataAccess(client, PoolConfig(query_timeout=5, timeouts={"receipt.create": 0.01}))
+
+    async def scenario():
+        with deadline(10), deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                await db.receipt.find_many(take=1)
+        with deadline(0.2):
+            # A started write is not abandoned, but none starts past the deadline
+            await db.receipt.create(data={"self_hash": "a", "lamport": 1})
+            with pytest.raises(DeadlineExceeded):
+                await db.receipt.create(data={"self_hash": "b", "lamport": 2})
+
+    asyncio.run(scenario())
+    assert [op for op, _ in client.receipt.calls] == ["find_many", "create"]
+    stats = {s.query: s for s in db.stats()}
+    assert stats["receipt.find_many"].timeouts == 1
+    assert (stats["receipt.create"].count, stats["receipt.create"].timeouts) == (1, 1)
+
+
+def test_batched_writes_commit_once_and_pool_settings_reach_the_url(fake_prisma):
+    client = fake_prisma()
+    db = DataAccess(client)
+
+    async def scenario():
+        async with db.batch() as batch:
+            batch.receipt.create(data={"self_hash": "a", "lamport": 1})
+            batch.receipt.create(data={"self_hash": "b", "lamport": 2})
+            assert client.receipt.rows == []
+
+    asyncio.run(scenario())
+    assert client.commits == 1 and [r.lamport for r in client.receipt.rows] == [1, 2]
+    assert db.stats()[0].query == "batch"
+
+    config = PoolConfig(url="postgresql://db/ben?schema=audit", connection_limit=20, pool_timeout=2.5)
+    assert config.datasource_url() == "postgresql://db/ben?schema=audit&connection_limit=20&pool_timeout=2.5"
+    with pytest.raises(ValueError):
+        PoolConfig(connection_limit=5).datasource_url()
@@ -0,0 +1,41 @@
+import hashlib
+
+from ben.dedup import DuplicateFilter
+
+
+def _hashes(start, stop):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(start, stop)]
+
+
+def test_no_false_negatives_across_growing_slices():
+    dedup = DuplicateFilter(initial_capacity=100, error_rate=0.01, salt=b"fixed-test-salt!")
+    stored = _hashes(0, 1000)
+    dedup.add_many(stored[:500])
+    for h in stored[500:]:
+        dedup.add(h)
+
+    assert len(dedup) == 1000 and len(dedup.slices) > 1
+    assert all(dedup.might_contain_many(stored))
+    assert all(dedup.might_contain(h) for h in stored)
+
+    fresh = _hashes(1000, 21000)
+    false_positives = sum(dedup.might_contain_many(fresh))
+    # Small slices round their sizes, so allow some slack over error_rate
+    assert false_positives / len(fresh) < 0.02
+    assert false_positives == sum(dedup.might_contain(h) for h in fresh)
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "dedup.bloom")
+    dedup = DuplicateFilter(path=path, initial_capacity=64, save_interval=0)
+    dedup.rebuild(_hashes(0, 200))
+    assert dedup.maybe_save() and not dedup.maybe_save()
+
+    loaded = DuplicateFilter.load(path)
+    assert len(loaded) == 200 and loaded.salt == dedup.salt
+    assert all(loaded.might_contain_many(_hashes(0, 200)))
+
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    assert DuplicateFilter.load(path) is None
+    assert DuplicateFilter.load(str(tmp_path / "missing")) is None
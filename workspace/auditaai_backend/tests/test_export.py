@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from ben import export
+from ben.export import MANIFEST_NAME, ReceiptExporter
+from ben.receipt_utils import canonicalize_receipts
+from ben.types import BaseReceipt, ReceiptType, BandLevel, Track
+from ben.verify_hash import HashVerifier
+
+
+def _receipts(n):
+    prev = None
+    for i in range(1, n + 1):
+        r = BaseReceipt(
+            receipt_type=ReceiptType.ACT_REQUEST,
+            lamport=i,
+            prev_digest=prev,
+            self_hash=f"{i:064x}",
+            trace_id=f"t-{i % 3}",
+            band=BandLevel.BAND_1,
+            track=Track.TRACK_A,
+            timestamp=datetime(2025, 10, 21, 12, 0, 0, tzinfo=timezone.utc),
+        )
+        prev = r.self_hash
+        yield r
+
+
+def test_canonicalize_receipts_batches():
+    batches = list(canonicalize_receipts(_receipts(7), batch_size=3))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert batches[-1][0]["lamport"] == 7
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_chunks_and_manifest(tmp_path):
+    exporter = ReceiptExporter(str(tmp_path), chunk_size=4, batch_size=3)
+    manifest = await exporter.export(_receipts(10), start_lamport=1, end_lamport=10)
+
+    assert manifest.receipt_count == 10
+    assert [c.receipt_count for c in manifest.chunks] == [4, 4, 2]
+    assert manifest.merkle_root == HashVerifier.compute_merkle_root(
+        [r.self_hash for r in _receipts(10)]
+    )
+
+    lines = (tmp_path / manifest.chunks[0].path).read_text().splitlines()
+    first = json.loads(lines[0])
+    assert list(first)[:3] == ["receipt_type", "lamport", "timestamp"]
+    assert first["receipt_type"] == ReceiptType.ACT_REQUEST.value
+
+    on_disk = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert on_disk["merkle_root"] == manifest.merkle_root
+
+
+@pytest.mark.asyncio
+async def test_export_skips_rows_without_self_hash(tmp_path):
+    rows = [r.model_dump() for r in _receipts(4)]
+    rows[1]["self_hash"] = ""
+    del rows[2]["self_hash"]
+
+    manifest = await ReceiptExporter(str(tmp_path), chunk_size=10).export(rows)
+
+    assert (manifest.receipt_count, manifest.invalid_count) == (2, 2)
+    assert manifest.merkle_root == HashVerifier.compute_merkle_root(
+        [rows[0]["self_hash"], rows[3]["self_hash"]]
+    )
+    lines = (tmp_path / manifest.chunks[0].path).read_text().splitlines()
+    assert [json.loads(line)["lamport"] for line in lines] == [1, 4]
+
+
+@pytest.mark.asyncio
+async def test_export_writes_off_the_event_loop(tmp_path, monkeypatch):
+    loop_thread = threading.get_ident()
+    threads, fetched_while_writing = [], []
+    writing = threading.Event()
+    write, close = export._ChunkWriter.write, export._ChunkWriter.close
+
+    def slow_write(self, batch):
+        threads.append(threading.get_ident())
+        writing.set()
+        time.sleep(0.05)
+        writing.clear()
+        write(self, batch)
+
+    def tracked_close(self):
+        threads.append(threading.get_ident())
+        close(self)
+
+    monkeypatch.setattr(export._ChunkWriter, "write", slow_write)
+    monkeypatch.setattr(export._ChunkWriter, "close", tracked_close)
+
+    async def rows():
+        for r in _receipts(9):
+            await asyncio.sleep(0.01)
+            fetched_while_writing.append(writing.is_set())
+            yield r
+
+    exporter = ReceiptExporter(str(tmp_path), chunk_size=4, batch_size=3)
+    manifest = await exporter.export(rows())
+
+    assert manifest.receipt_count == 9 and [c.receipt_count for c in manifest.chunks] == [4, 4, 1]
+    assert threads and loop_thread not in threads
+    assert any(fetched_while_writing)                  # the next batch is read during a write
+
+    sync = await ReceiptExporter(str(tmp_path / "sync"), batch_size=3).export(_receipts(5))
+    assert sync.receipt_count == 5 and loop_thread not in threads
+
+
+@pytest.mark.asyncio
+async def test_export_arrow(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc as ipc
+
+    exporter = ReceiptExporter(str(tmp_path), formats=("ndjson", "arrow"), chunk_size=100)
+    manifest = await exporter.export(_receipts(5))
+
+    arrow_chunk = next(c for c in manifest.chunks if c.format == "arrow")
+    table = ipc.open_file(pa.OSFile(str(tmp_path / arrow_chunk.path))).read_all()
+    assert table.num_rows == 5
+    assert table.column("lamport").to_pylist() == [1, 2, 3, 4, 5]
@@ -0,0 +1,103 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess, PartialWriteError
+from ben.field_engine import FieldEngine
+from ben.shards import ShardedEventProcessor
+from ben.types import BandLevel, EventRequest, ReceiptType, Track
+
+
+def _points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.uniform(0.5, 1.5, n))
+    return t, 3.0 * t + rng.normal(0, 0.1, n)
+
+
+def test_windows_match_a_direct_computation_regardless_of_batching():
+    t, v = _points(100)
+    whole = FieldEngine(window=16, stride=8)
+    assert whole.add("f", t, v) == 11
+
+    chunked = FieldEngine(window=16, stride=8)
+    for start, end in [(0, 1), (1, 15), (15, 16), (16, 53), (53, 100)]:
+        chunked.add("f", t[start:end], v[start:end])
+    windows = whole.take()
+    assert windows == chunked.take()
+    assert whole.buffered("f") == 100 - 11 * 8
+
+    third = windows[2]
+    wt, wv = t[16:32], v[16:32]
+    assert (third.start_t, third.end_t, third.count) == (wt[0], wt[-1], 16)
+    assert third.gradient == pytest.approx(np.polyfit(wt, wv, 1)[0])
+    assert third.flux == pytest.approx(float(np.sum((wv[1:] + wv[:-1]) * np.diff(wt)) / 2))
+    assert (third.minimum, third.maximum) == (wv.min(), wv.max())
+
+
+def test_memory_is_bounded_by_evicting_the_least_recent_field():
+    engine = FieldEngine(window=8, max_fields=2)
+    size = engine.buffer_bytes
+    engine.add_many(["a", "b", "a"], [1.0, 1.0, 2.0], [1.0, 5.0, 3.0])
+    engine.add("c", [1.0], [0.0])  # evicts a, whose partial window is summarised
+
+    [evicted] = engine.take()
+    assert (evicted.field_id, evicted.count, evicted.mean) == ("a", 2, 2.0)
+    assert engine.buffered("a") == 0 and engine.buffered("b") == 1
+    assert engine.buffer_bytes == size
+    with pytest.raises(ValueError):
+        engine.add("a", [3.0], [float("nan")])
+
+
+def test_consumed_points_become_summary_receipts():
+    class _Service:
+        def __init__(self):
+            self.processor = BENEventProcessor()
+            self.events = []
+
+        async def process_events(self, events):
+            self.events.extend(events)
+            return self.processor.create_receipts([
+                {"receipt_type": e.receipt_type, "band": e.band, "track": e.track,
+                 "trace_id": e.trace_id, "commitment": e.commitment}
+                for e in events
+            ])
+
+    service = _Service()
+    engine = FieldEngine(service, window=4, batch_size=2)
+    points = [
+        EventRequest(receipt_type=ReceiptType.FIELD_POINT, band=BandLevel.BAND_3,
+                     track=Track.TRACK_A, trace_id=f"f{i % 2}", metadata={"t": i, "value": i * 2})
+        for i in range(10)
+    ]
+
+    assert asyncio.run(engine.consume(points)) == 2
+    types = [e.receipt_type for e in service.events]
+    assert types == [ReceiptType.FIELD_GRADIENT, ReceiptType.FIELD_FLUX] * 2
+    gradient = service.events[0]
+    assert gradient.metadata["gradient"] == pytest.approx(2.0) and gradient.commitment
+    assert service.events[1].metadata["flux"] == pytest.approx((0 + 12) / 2 * 6)
+
+    assert len(asyncio.run(engine.flush(partial=True))) == 2
+    assert len(service.events) == 8 and engine.pending == 0
+
+
+def test_partial_write_keeps_only_the_unstored_windows(fake_prisma):
+    db = fake_prisma(down={"f1"})
+    service = AuditService(shards=ShardedEventProcessor(shard_key=lambda e: e["trace_id"]), db=DataAccess(db))
+    engine = FieldEngine(service, window=4, batch_size=10)
+    points = [
+        EventRequest(receipt_type=ReceiptType.FIELD_POINT, band=BandLevel.BAND_3,
+                     track=Track.TRACK_A, trace_id=f"f{i % 2}", metadata={"t": i, "value": i * 2})
+        for i in range(8)
+    ]
+    asyncio.run(engine.consume(points))
+
+    with pytest.raises(PartialWriteError):
+        asyncio.run(engine.flush())
+    db.down.clear()
+    assert [w.field_id for w in asyncio.run(engine.flush())] == ["f1"]
+    gradients = [row.trace_id for row in db.receipt.rows if row.receipt_type == ReceiptType.FIELD_GRADIENT.value]
+    assert sorted(gradients) == ["f0", "f1"]
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from synthetic import synthetic_ben_receipts, take, write_ben_files  # noqa: E402
+
+from ben.importer import BenDecoder, ReceiptImporter, decode_chunk, governance_row  # noqa: E402
+from ben.receipt_utils import receipt_from_row  # noqa: E402
+from ben.types import ReceiptType  # noqa: E402
+
+
+def _store(tmp_path, count):
+    key = Fernet.generate_key()
+    key_path = tmp_path / "ben.key"
+    key_path.write_bytes(key)
+    receipts_dir = tmp_path / "receipts"
+    write_ben_files(str(receipts_dir), synthetic_ben_receipts(count), Fernet(key))
+    return str(receipts_dir), str(key_path), key
+
+
+def test_governance_receipt_maps_to_a_readable_row():
+    receipt = take(synthetic_ben_receipts(2, seed=3), 2)[1]
+    row = governance_row("receipt_1.ben", receipt)
+
+    parsed = receipt_from_row(SimpleNamespace(
+        actor_signature=None, commitment=None, hash_alg=None, **{k: v for k, v in row.items() if k != "metadata"}
+    ))
+    assert parsed.lamport == receipt["lamport_counter"]
+    assert parsed.prev_digest == receipt["prev_hash"] and parsed.self_hash == receipt["self_hash"]
+    assert row["chain_id"] == "governance" and row["node_id"] == "bench-node"
+    assert row["metadata"]["event"] == receipt["event"] and row["metadata"]["source"] == "receipt_1.ben"
+
+    boot = dict(receipt, event="Δ-BOOTCONFIRM")
+    assert governance_row("boot.ben", boot)["receipt_type"] == ReceiptType.MERKLE_ROOT.value
+
+
+def test_decoder_reads_governance_envelopes(governance):
+    envelope = governance("ben_envelope")
+    key = Fernet.generate_key()
+    receipt = take(synthetic_ben_receipts(1), 1)[0]
+    decoder = BenDecoder([key])
+    for fmt in ("fernet", "aes-gcm", "chacha20"):
+        blob = envelope.ReceiptCodec([key], fmt).seal(receipt)
+        assert decoder.open(blob) == receipt
+
+
+@pytest.mark.parametrize("fmt", ("aes-gcm", "chacha20"))
+def test_decoder_rejects_a_header_lamport_its_body_disagrees_with(tmp_path, governance, fmt):
+    envelope = governance("ben_envelope")
+    key = Fernet.generate_key()
+    receipt = take(synthetic_ben_receipts(3), 3)[2]
+    codec = envelope.ReceiptCodec([key], fmt)
+    decoder = BenDecoder([key])
+    blob = codec.seal(receipt)
+    lamport = 10                                       # offset of the header's lamport
+
+    tampered = blob[:lamport + 7] + bytes([blob[lamport + 7] ^ 0x01]) + blob[lamport + 8:]
+    with pytest.raises(InvalidToken):
+        decoder.open(tampered)
+
+    # Sealed with a key holder's own header: authentic, but the lamport is relabelled
+    kid = envelope.key_id(key)
+    digest = bytes.fromhex(receipt["self_hash"])
+    aad = envelope._FIXED.pack(envelope.MAGIC, envelope.VERSION, envelope.ALGS[fmt][0], kid,
+                               receipt["lamport_counter"] + 5, len(digest)) + digest + os.urandom(envelope.NONCE)
+    relabelled = aad + codec._cipher(kid, fmt).encrypt(aad[-envelope.NONCE:], json.dumps(receipt).encode(), aad)
+    with pytest.raises(InvalidToken):
+        decoder.open(relabelled)
+
+    (tmp_path / "receipt_1.ben").write_bytes(relabelled)
+    assert decode_chunk(str(tmp_path), ["receipt_1.ben"], [key]) == [("receipt_1.ben", None, "undecryptable")]
+
+
+def test_import_skips_existing_and_resumes_from_checkpoint(tmp_path, fake_prisma):
+    receipts_dir, key_path, _ = _store(tmp_path, 25)
+    with open(os.path.join(receipts_dir, "corrupt.ben"), "wb") as w:
+        w.write(b"not a token")
+    db = fake_prisma()
+    importer = ReceiptImporter(db, receipts_dir, key_path, workers=2, chunk_size=4, batch_size=10)
+
+    report = asyncio.run(importer.run())
+    assert (report.imported, report.duplicates, report.invalid) == (25, 0, 1)
+    assert report.failures == [("corrupt.ben", "undecryptable")]
+    assert db.transactions >= 2 and len(db.receipt.rows) == 25
+
+    # Checkpointed files are skipped; the corrupt one is retried
+    again = asyncio.run(importer.run())
+    assert (again.resumed, again.imported, again.invalid) == (25, 0, 1)
+
+    # Without the checkpoint every row is found to exist already
+    os.remove(importer.checkpoint_path)
+    fresh = asyncio.run(importer.run())
+    assert (fresh.imported, fresh.duplicates) == (0, 25)
+    assert {r.node_id for r in db.receipt.rows} == {"bench-node"}
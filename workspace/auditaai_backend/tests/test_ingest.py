@@ -0,0 +1,168 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess
+from ben.ingest import create_ingest_app
+from ben.shards import ShardedEventProcessor
+from ben.types import BandLevel, ReceiptType, Track
+
+
+class _Service:
+    """Minimal stand-in exposing the `process_events` contract"""
+
+    def __init__(self):
+        self.processor = BENEventProcessor()
+        self.batches = []
+
+    async def process_events(self, events):
+        self.batches.append(len(events))
+        return self.processor.create_receipts(
+            [
+                {
+                    "receipt_type": e.receipt_type,
+                    "band": e.band,
+                    "track": e.track,
+                    "trace_id": e.trace_id,
+                }
+                for e in events
+            ]
+        )
+
+
+def _line(trace_id):
+    return json.dumps(
+        {
+            "receipt_type": "Δ-ACT-REQUEST",
+            "band": "band-1",
+            "track": "track-a",
+            "trace_id": trace_id,
+        }
+    )
+
+
+def test_ingest_returns_per_line_results():
+    service = _Service()
+    client = TestClient(create_ingest_app(service, batch_size=2))
+
+    body = "\n".join([_line("a"), "{not json", _line("b"), "", '{"trace_id": "c"}', _line("d")])
+    response = client.post("/ingest", content=body.encode())
+
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2, 3, 5, 6]
+    assert [r["ok"] for r in results] == [True, False, True, False, True]
+    assert [r["lamport"] for r in results if r["ok"]] == [1, 2, 3]
+    assert response.headers["X-Ingest-Rejected"] == "2"
+    assert service.batches == [1, 1, 1]
+
+
+class _ReceiptService:
+    """Stand-in for `AuditService.ingest_receipts` backed by a set"""
+
+    def __init__(self):
+        self.stored = set()
+
+    async def ingest_receipts(self, receipts):
+        statuses = []
+        for receipt in receipts:
+            statuses.append("duplicate" if receipt.self_hash in self.stored else "stored")
+            self.stored.add(receipt.self_hash)
+        return statuses
+
+
+def test_receipt_replay_is_idempotent():
+    service = _ReceiptService()
+    client = TestClient(create_ingest_app(service, batch_size=2))
+    processor = BENEventProcessor()
+    receipts = processor.create_receipts([
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1,
+         "track": Track.TRACK_A, "trace_id": "r"}
+        for _ in range(3)
+    ])
+    body = "\n".join(r.model_dump_json() for r in receipts).encode()
+
+    first = [json.loads(l) for l in client.post("/ingest/receipts", content=body).text.splitlines()]
+    second = [json.loads(l) for l in client.post("/ingest/receipts", content=body).text.splitlines()]
+
+    assert [r["duplicate"] for r in first] == [False, False, False]
+    assert [r["duplicate"] for r in second] == [True, True, True]
+    assert all(r["ok"] for r in first + second)
+
+
+def test_failed_shard_only_fails_its_own_lines(fake_prisma):
+    db = fake_prisma(down={"s2"})
+    service = AuditService(shards=ShardedEventProcessor(), db=DataAccess(db))
+    client = TestClient(create_ingest_app(service))
+
+    body = "\n".join(
+        json.dumps({**json.loads(_line(str(i))), "station_id": station})
+        for i, station in enumerate(["s1", "s2", "s1", "s2"])
+    )
+    results = [json.loads(line) for line in client.post("/ingest", content=body).text.splitlines()]
+
+    assert [r["ok"] for r in results] == [True, False, True, False]
+    assert [r["lamport"] for r in results if r["ok"]] == [1, 2]
+    assert results[1]["error"] == "storage_error: shard down"
+    assert [row.trace_id for row in db.receipt.rows] == ["0", "2"]
+
+
+def test_foreign_receipts_are_checked_and_chained_per_lane(fake_prisma):
+    edge = BENEventProcessor(node_id="edge")
+    receipts = edge.create_receipts([
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1,
+         "track": Track.TRACK_A, "trace_id": "e"}
+        for _ in range(4)
+    ])
+    [forged] = BENEventProcessor(node_id="edge").create_receipts([   # Another key
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1, "track": Track.TRACK_A, "trace_id": "e"}
+    ])
+    [ours] = BENEventProcessor(node_id="primary").create_receipts([
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1, "track": Track.TRACK_A, "trace_id": "p"}
+    ])
+    db = fake_prisma()
+    service = AuditService(node_id="primary", ingest_keys={"edge": edge.public_key}, db=DataAccess(db))
+    client = TestClient(create_ingest_app(service))
+
+    body = "\n".join(r.model_dump_json() for r in [receipts[0], receipts[1], receipts[3], forged, ours])
+    results = [json.loads(line) for line in client.post("/ingest/receipts", content=body).text.splitlines()]
+    assert [r["ok"] for r in results] == [True, True, False, False, False]
+    assert [r["error"] for r in results[2:]] == ["out_of_order", "invalid_signature", "own_lane"]
+    head = db.chainhead.get("/edge")
+    assert (head.lamport, head.digest) == (2, receipts[1].self_hash)
+
+    # The gap is filled: the rest extends the stored head
+    statuses = asyncio.run(service.ingest_receipts(receipts[1:]))
+    assert statuses == ["duplicate", "stored", "stored"]
+    assert [row.lamport for row in db.receipt.rows] == [1, 2, 3, 4]
+
+
+class _BrokenService:
+    """Answers without receipts, which fails the storage writer"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def process_events(self, events):
+        self.calls += 1
+        return None
+
+
+def test_failing_writer_aborts_the_request_instead_of_hanging():
+    service = _BrokenService()
+    app = create_ingest_app(service, batch_size=1, max_pending_batches=1)
+    body = "\n".join(_line(str(i)) for i in range(20)).encode()
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/ingest", content=body)
+
+    with pytest.raises(TypeError):
+        asyncio.run(asyncio.wait_for(post(), timeout=5))
+    assert service.calls == 1
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from ben.ingest import create_ingest_app
+from ben.metrics import MetricsRegistry
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry(enabled=True)
+    writes = registry.counter("writes_total", "Writes", ["op"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    writes.inc("create")
+    writes.inc("create", amount=2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert 'writes_total{op="create"} 3' in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("c_total", "C")
+    histogram = registry.histogram("h_seconds", "H")
+
+    counter.inc()
+    with histogram.time():
+        pass
+    assert counter.value() == 0
+    assert histogram.count() == 0
+    assert histogram.time() is histogram.time()  # shared no-op timer
+
+
+def test_ingest_app_serves_metrics():
+    client = TestClient(create_ingest_app(service=None))
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE ben_db_write_seconds histogram" in response.text
@@ -0,0 +1,94 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from research_station.policy_engine import CompiledPolicySet, PolicyEngine
+from research_station.types import Policy, PolicyRule
+
+
+def _policy(*rules, **kwargs):
+    return Policy(name=kwargs.pop("name", "p"), description="", rules=list(rules), **kwargs)
+
+
+def _naive(policies, receipt):
+    """Reference evaluator: linear scan of every rule in priority order"""
+    ops = {
+        "gt": lambda v, t: float(v) > float(t),
+        "gte": lambda v, t: float(v) >= float(t),
+        "lt": lambda v, t: float(v) < float(t),
+        "lte": lambda v, t: float(v) <= float(t),
+        "eq": lambda v, t: str(v) == t,
+        "in": lambda v, t: str(v) in t.split(","),
+    }
+    candidates = [
+        (-rule.priority, order, rule.action)
+        for order, rule in enumerate(r for p in policies for r in p.rules)
+        if rule.field in receipt and ops[rule.operator](receipt[rule.field], rule.value)
+    ]
+    return min(candidates)[2] if candidates else None
+
+
+def test_priority_and_indexed_operators():
+    compiled = CompiledPolicySet([
+        _policy(
+            PolicyRule(field="band", operator="eq", value="band-5", action="block", priority=10),
+            PolicyRule(field="score", operator="gte", value="0.9", action="review", priority=5),
+            PolicyRule(field="score", operator="lt", value="0.2", action="flag", priority=1),
+            PolicyRule(field="model.id", operator="regex", value="^gpt-", action="tag", priority=3),
+        ),
+    ], default_action="allow")
+
+    assert compiled.evaluate({"band": "band-5", "score": 0.95}).action == "block"
+    assert compiled.evaluate({"band": "band-1", "score": "0.95"}).action == "review"
+    assert compiled.evaluate({"score": 0.1, "model": {"id": "gpt-4"}}).action == "tag"
+    assert compiled.evaluate({"score": 0.1}).action == "flag"
+    decision = compiled.evaluate({"score": 0.5})
+    assert decision.action == "allow" and decision.policy_name == "default"
+
+
+def test_matches_linear_scan():
+    rng = random.Random(7)
+    ops = ["gt", "gte", "lt", "lte", "eq", "in"]
+    rules = []
+    for i in range(300):
+        op = rng.choice(ops)
+        if op in ("eq", "in"):
+            value = ",".join(str(rng.randint(0, 20)) for _ in range(1 if op == "eq" else 3))
+        else:
+            value = str(rng.randint(0, 20))
+        rules.append(PolicyRule(
+            field=rng.choice(["a", "b"]), operator=op, value=value,
+            action=f"r{i}", priority=rng.randint(0, 5),
+        ))
+    policies = [_policy(*rules)]
+    compiled = CompiledPolicySet(policies)
+
+    for _ in range(500):
+        receipt = {f: rng.randint(-1, 21) for f in ("a", "b") if rng.random() < 0.8}
+        decision = compiled.evaluate(receipt)
+        assert (decision.action if decision else None) == _naive(policies, receipt)
+
+
+def test_engine_recompiles_only_on_change():
+    policy = _policy(PolicyRule(field="x", operator="eq", value="1", action="hit"), id="p1")
+    engine = PolicyEngine()
+
+    assert engine.evaluate_batch("s1", [policy], [{"x": 1}, {"x": 2}])[0].action == "hit"
+    engine.evaluate_batch("s1", [policy], [{"x": 1}])
+    assert engine.compilations == 1
+
+    policy.rules[0].action = "changed"
+    policy.updated_at = policy.updated_at + timedelta(seconds=1)
+    assert engine.evaluate_batch("s1", [policy], [{"x": 1}])[0].action == "changed"
+    assert engine.compilations == 2
+
+    policy.is_active = False
+    assert engine.evaluate_batch("s1", [policy], [{"x": 1}]) == [None]
+
+
+def test_rejects_bad_rules():
+    with pytest.raises(ValueError):
+        CompiledPolicySet([_policy(PolicyRule(field="x", operator="between", value="1", action="a"))])
+    with pytest.raises(ValueError):
+        CompiledPolicySet([_policy(PolicyRule(field="x", operator="gt", value="high", action="a"))])
@@ -0,0 +1,171 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess
+from ben.ingest import create_ingest_app
+from ben.quota import QuotaExceededError, QuotaStore, QuotaTracker, SECONDS_PER_DAY
+from ben.types import BandLevel, EventRequest, ReceiptType, Track
+from research_station.types import ResearchStation, StationLimits, StationType
+
+
+def test_workers_share_one_bucket(tmp_path):
+    path = str(tmp_path / "quota.db")
+    a = QuotaTracker(QuotaStore(path), lease_size=4)
+    b = QuotaTracker(QuotaStore(path), lease_size=4)
+    for tracker in (a, b):
+        tracker.set_limit("s1", 10)
+
+    granted = 0
+    for _ in range(20):
+        granted += a.try_consume("s1")
+        granted += b.try_consume("s1")
+    assert granted == 10
+
+    # Unlimited stations never touch the store
+    assert all(a.try_consume("other") for _ in range(100))
+
+
+def test_bucket_refills_and_persists(tmp_path):
+    path = str(tmp_path / "quota.db")
+    store = QuotaStore(path)
+    assert store.lease("s1", 100, 100, now=0.0) == (100, 0.0)
+    granted, _ = store.lease("s1", 100, 100, now=SECONDS_PER_DAY / 2)
+    assert granted == 50
+    store.close()
+
+    # A restarted worker sees the same bucket
+    reopened = QuotaStore(path)
+    assert reopened.lease("s1", 100, 100, now=SECONDS_PER_DAY / 2) == (0, 0.0)
+
+
+def test_refund_flush_and_rebuild(tmp_path):
+    tracker = QuotaTracker(QuotaStore(str(tmp_path / "quota.db")), lease_size=8)
+    tracker.set_limit("s1", 1000)
+
+    tracker.consume("s1", 5)
+    tracker.refund("s1", 2)
+    tracker.flush()
+    assert tracker.remaining("s1") == 997
+
+    # A live bucket is not reseeded; a lost file is
+    assert tracker.missing() == []
+    tracker.rebuild({"s1": 1000})
+    assert tracker.remaining("s1") == 997
+
+    reseeded = QuotaTracker(QuotaStore(str(tmp_path / "lost.db")), lease_size=8)
+    reseeded.set_limit("s1", 1000)
+    assert reseeded.missing() == ["s1"]
+    reseeded.rebuild({"s1": 1000})
+    assert not reseeded.try_consume("s1")
+    try:
+        reseeded.consume("s1")
+    except QuotaExceededError as exc:
+        assert exc.station_id == "s1"
+    else:
+        raise AssertionError("expected QuotaExceededError")
+
+
+def test_station_remaining_daily_audits(tmp_path):
+    station = ResearchStation(
+        id="s1",
+        name="Lab",
+        tier=StationType.BASIC,
+        limits=StationLimits.get_limits(StationType.BASIC),
+    )
+    assert station.remaining_daily_audits == 1000
+
+    tracker = QuotaTracker(QuotaStore(str(tmp_path / "quota.db")))
+    station.attach_quota(tracker)
+    tracker.consume("s1", 3)
+    assert station.remaining_daily_audits == 997
+
+
+def _service(tmp_path, limits, client):
+    quota = QuotaTracker(QuotaStore(str(tmp_path / "quota.db")))
+    for station, limit in limits.items():
+        quota.set_limit(station, limit)
+    return AuditService(quota=quota, db=DataAccess(client))
+
+
+def _minted(n):
+    return BENEventProcessor().create_receipts([
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1,
+         "track": Track.TRACK_A, "trace_id": "t"}
+        for _ in range(n)
+    ])
+
+
+def _event(station_id, trace_id="t"):
+    return EventRequest(
+        receipt_type=ReceiptType.ACT_REQUEST,
+        band=BandLevel.BAND_1,
+        track=Track.TRACK_A,
+        trace_id=trace_id,
+        station_id=station_id,
+    )
+
+
+def test_batches_are_charged_all_or_nothing(tmp_path, fake_prisma):
+    service = _service(tmp_path, {"a": 3, "b": 1}, fake_prisma())
+
+    with pytest.raises(QuotaExceededError) as exc:
+        asyncio.run(service.process_events([_event("a"), _event("a"), _event("b"), _event("b")]))
+    assert (exc.value.station_id, service.quota.remaining("a"), service.quota.remaining("b")) == ("b", 3, 1)
+    assert service.db.client.receipt.rows == []
+
+    # Receipts that never reached storage are refunded by _mint_block
+    service.db.client.fail = True
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.process_events([_event("a"), _event("a")]))
+    assert service.quota.remaining("a") == 3
+
+    service.db.client.fail = False
+    asyncio.run(service.process_events([_event("a"), _event("b")]))
+    assert (service.quota.remaining("a"), service.quota.remaining("b")) == (2, 0)
+    assert [row.station_id for row in service.db.client.receipt.rows] == ["a", "b"]
+
+
+def test_quota_is_rebuilt_from_stored_receipts(tmp_path, fake_prisma):
+    client = fake_prisma()
+    for station, used in {"a": 4, "other": 9}.items():
+        client.receipt.insert(_minted(used), station_id=station)
+    # Spent more than a day ago
+    client.receipt.insert(_minted(3), station_id="a", timestamp=datetime.utcnow() - timedelta(days=2))
+    service = _service(tmp_path, {"a": 5, "b": 5}, client)
+    asyncio.run(service.rebuild_quota())
+    assert (service.quota.remaining("a"), service.quota.remaining("b")) == (1, 5)
+
+    # Another worker starting on the same file keeps the first one's lease and spending
+    assert service.quota.try_consume("b", 2)
+    worker = _service(tmp_path, {"a": 5, "b": 5}, client)
+    asyncio.run(worker.rebuild_quota())
+    assert [call for call, _ in client.receipt.calls].count("group_by") == 1
+    # 5 - 2 spent - 1 still leased by the first worker
+    assert worker.quota.remaining("b") == 2
+
+
+def test_ingest_rejects_only_exhausted_station(tmp_path, fake_prisma):
+    quota = QuotaTracker(QuotaStore(str(tmp_path / "quota.db")))
+    quota.set_limit("full", 0)
+    client = TestClient(create_ingest_app(AuditService(quota=quota, db=DataAccess(fake_prisma()))))
+
+    body = "\n".join(
+        json.dumps({
+            "receipt_type": "Δ-ACT-REQUEST",
+            "band": "band-1",
+            "track": "track-a",
+            "trace_id": str(i),
+            "station_id": station,
+        })
+        for i, station in enumerate(["ok", "full", "ok"])
+    )
+    results = [json.loads(line) for line in client.post("/ingest", content=body).text.splitlines()]
+
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "quota_exceeded: full"
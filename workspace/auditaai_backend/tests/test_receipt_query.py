@@ -0,0 +1,166 @@
+import json
+import os
+import sys
+import time
+
+from cryptography.fernet import Fernet
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from load_harness import Store, load_governance_service  # noqa: E402
+from synthetic import synthetic_ben_receipts, take, write_ben_files  # noqa: E402
+
+
+def _store(tmp_path, count):
+    key = Fernet.generate_key()
+    key_path = tmp_path / "ben.key"
+    key_path.write_bytes(key)
+    receipts = take(synthetic_ben_receipts(count), count)
+    write_ben_files(str(tmp_path / "receipts"), receipts, Fernet(key))
+    return str(tmp_path / "receipts"), str(key_path), receipts
+
+
+def _name(i):
+    return f"receipt_{i:010d}.ben"
+
+
+class _CountingDict(dict):
+    """Counts entry lookups, i.e. how many candidates a query scanned"""
+
+    reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return super().__getitem__(key)
+
+
+def test_time_window_is_bisected_like_lamport_ranges(tmp_path, governance):
+    receipts_dir, key_path, receipts = _store(tmp_path, 40)
+    index = governance("receipt_query").QueryIndex(receipts_dir, key_path)
+    index.open()
+
+    def expected(event=None, lamport_min=None, since=None, until=None):
+        return [
+            _name(i) for i, r in enumerate(receipts)
+            if (event is None or r["event"] == event)
+            and (lamport_min is None or r["lamport_counter"] >= lamport_min)
+            and (since is None or r["timestamp"] >= since)
+            and (until is None or r["timestamp"] <= until)
+        ]
+
+    ts = [r["timestamp"] for r in receipts]
+    for query in (
+        {"since": ts[10], "until": ts[12]},
+        {"since": ts[35]},
+        {"until": ts[3]},
+        {"since": ts[5], "until": ts[30], "lamport_min": 28},
+        {"event": receipts[0]["event"], "since": ts[20]},
+        {"since": ts[-1] + "0"},
+    ):
+        assert index.query(**query) == expected(**query), query
+
+    # A time-only query reads its window, not the whole index
+    index._entries = _CountingDict(index._entries)
+    assert index.query(since=ts[10], until=ts[12]) == [_name(10), _name(11), _name(12)]
+    assert index._entries.reads <= 6
+
+    index.remove(_name(11))
+    assert index.query(since=ts[10], until=ts[12]) == [_name(10), _name(12)]
+
+
+def test_open_rebuilds_a_missing_index_incrementally(tmp_path, governance, monkeypatch):
+    query = governance("receipt_query")
+    monkeypatch.setattr(query, "CHUNK", 4)
+    receipts_dir, key_path, _ = _store(tmp_path, 10)
+    index = query.QueryIndex(receipts_dir, key_path)
+
+    assert index.open() == {"entries": 10, "added": 10, "removed": 0}
+    lines = open(index.path, "rb").read().splitlines(keepends=True)
+    assert len(lines) == 3
+
+    # A rebuild interrupted after its first chunk resumes from it
+    with open(index.path, "wb") as w:
+        w.write(lines[0])
+    resumed = query.QueryIndex(receipts_dir, key_path)
+    assert resumed.open() == {"entries": 10, "added": 6, "removed": 0}
+    assert resumed.query() == [_name(i) for i in range(10)]
+
+
+def test_sync_reads_lines_another_process_appended(tmp_path, governance):
+    query = governance("receipt_query")
+    receipts_dir, key_path, _ = _store(tmp_path, 5)
+    service = query.QueryIndex(receipts_dir, key_path)
+    service.open()
+
+    # ben_event.py in another process writes a receipt and indexes it
+    [extra] = take(synthetic_ben_receipts(6), 6)[5:]
+    with open(os.path.join(receipts_dir, _name(5)), "wb") as w:
+        w.write(Fernet(open(key_path, "rb").read()).encrypt(json.dumps(extra).encode()))
+    writer = query.QueryIndex(receipts_dir, key_path)
+    assert writer.add(_name(5), extra)
+
+    assert _name(5) not in service
+    assert service.sync() == 1
+    assert service.query(lamport_min=extra["lamport_counter"]) == [_name(5)]
+
+    # Compacted elsewhere: the new file is re-read from the start
+    writer.open()
+    writer.compact()
+    assert service.sync() == 6 and len(service) == 6
+
+
+def _service(tmp_path, size):
+    store = Store(str(tmp_path), size)
+    return store, load_governance_service(store)
+
+
+def test_query_pages_and_counts_without_decrypting(tmp_path, monkeypatch):
+    store, service = _service(tmp_path, 25)
+    inspected = []
+    inspect = service._inspect
+    monkeypatch.setattr(service, "_inspect", lambda path: inspected.append(path) or inspect(path))
+
+    with TestClient(service.app) as client:
+        assert service._query_ready.wait(10)
+
+        assert client.get("/query", params={"count_only": True}).json() == {"total": 25}
+        assert client.get("/query", params={"count_only": True, "lamport_min": 20}).json() == {"total": 7}
+        assert inspected == []
+
+        names, offsets, offset = [], [], 0
+        while offset is not None:
+            page = client.get("/query", params={"offset": offset, "limit": 10}).json()
+            assert page["total"] == 25 and all(r["verified"] for r in page["receipts"])
+            names += [r["name"] for r in page["receipts"]]
+            offset = page["next_offset"]
+            offsets.append(offset)
+    assert offsets == [10, 20, None]
+    assert names == store.names and len(inspected) == 25
+
+
+def test_query_recovers_after_a_failed_open(tmp_path, monkeypatch):
+    _, service = _service(tmp_path, 10)
+    attempts = []
+    open_index = service.QUERY.open
+
+    def flaky_open():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise OSError("disk not ready")
+        return open_index()
+
+    monkeypatch.setattr(service.QUERY, "open", flaky_open)
+    monkeypatch.setattr(service, "QUERY_RETRY_SECONDS", 0.0)
+
+    with TestClient(service.app) as client:
+        assert service._query_ready.wait(10)
+        response = client.get("/query")
+        assert (response.status_code, response.json()) == (503, {"error": "OSError"})
+
+        deadline = time.monotonic() + 10
+        while service._query_error and time.monotonic() < deadline:
+            time.sleep(0.01)
+        response = client.get("/query")
+        assert response.status_code == 200 and response.json()["total"] == 10
+    assert len(attempts) == 2
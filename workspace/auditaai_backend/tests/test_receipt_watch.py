@@ -0,0 +1,32 @@
+import os
+
+
+def test_index_loads_stats_only_and_decrypts_on_demand(tmp_path, governance):
+    for name in ("receipt_1.ben", "receipt_2.ben", "__upload__x.ben", "registry.json"):
+        (tmp_path / name).write_text(name)
+    opened = []
+
+    def inspect(path):
+        opened.append(os.path.basename(path))
+        if open(path).read() == "partial":
+            raise ValueError("partial write")
+        return {"verified": True, "receipt": {"body": open(path).read()}}
+
+    index = governance("receipt_watch").ReceiptIndex(str(tmp_path), inspect, use_inotify=False)
+    assert index.load() == 2 and opened == []
+    assert index.names() == ["receipt_1.ben", "receipt_2.ben"]
+
+    # Bodies are read when asked for, and not kept
+    assert index.get("receipt_2.ben")["receipt"] == {"body": "receipt_2.ben"}
+    assert index.get("receipt_2.ben") is not None and opened == ["receipt_2.ben"] * 2
+    assert index.get("missing.ben") is None
+
+    # New receipts are published once they decrypt; rewrites of known ones are not
+    sub = index.subscribe()
+    (tmp_path / "receipt_3.ben").write_text("partial")
+    index.poll_once()
+    (tmp_path / "receipt_3.ben").write_text("complete")
+    (tmp_path / "receipt_1.ben").write_text("rotated")
+    index.poll_once()
+    assert [sub.queue.get_nowait()["name"] for _ in range(sub.queue.qsize())] == ["receipt_3.ben"]
+    assert index.names() == ["receipt_1.ben", "receipt_2.ben", "receipt_3.ben"]
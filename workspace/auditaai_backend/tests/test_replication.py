@@ -0,0 +1,225 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess
+from ben.replication import (
+    DirectoryLogTransport,
+    InMemoryLogTransport,
+    LogServer,
+    ReadReplica,
+    ReplicaWindowError,
+    ReplicationLog,
+    SocketLogTransport,
+    create_replica_app,
+)
+from ben.state import head_lane
+from ben.types import BandLevel, ReceiptType, Track
+
+
+def _block(processor, n, trace_id="t-1", receipt_type=ReceiptType.ACT_REQUEST):
+    return processor.create_receipts([
+        {
+            "receipt_type": receipt_type,
+            "band": BandLevel.BAND_1,
+            "track": Track.TRACK_A,
+            "trace_id": trace_id,
+        }
+        for _ in range(n)
+    ])
+
+
+def test_follower_verifies_and_serves_the_shipped_chain():
+    writer = BENEventProcessor(node_id="primary")
+    log = ReplicationLog(InMemoryLogTransport())
+    replica = ReadReplica(log.transport, public_keys=writer.public_key, batch_size=2)
+
+    receipts = _block(writer, 3) + _block(writer, 2, receipt_type=ReceiptType.RISK_GATE)
+    log.append(receipts[:3])
+    log.append(receipts[3:])
+    log.append(_block(writer, 1, trace_id="t-2"))
+
+    assert asyncio.run(replica.poll()) == 3
+    status = replica.status()
+    assert (status.applied_seq, status.entries_behind, status.lamport_behind) == (3, 0, 0)
+    assert status.receipts == 6 and status.error is None
+
+    assert asyncio.run(replica.verify_receipt_chain(1, 6))
+    proof = replica.get_trace_proof("t-1", receipts[2].self_hash)
+    assert proof.index == 2 and proof.merkle_root == replica.get_trace_timeline("t-1").summary.merkle_root
+    assert asyncio.run(replica.get_cries_metrics()).safety == pytest.approx(0.95 ** 2)
+
+
+def test_follower_stops_at_a_tampered_entry_and_keeps_the_verified_prefix():
+    writer = BENEventProcessor(node_id="primary")
+    log = ReplicationLog(InMemoryLogTransport())
+    replica = ReadReplica(log.transport)
+
+    log.append(_block(writer, 2))
+    forged = _block(writer, 2)
+    forged[1] = forged[1].model_copy(update={"trace_id": "t-1", "prev_digest": "0" * 64})
+    log.append(forged)
+    log.append(_block(writer, 1))
+
+    assert asyncio.run(replica.poll()) == 1
+    status = replica.status()
+    assert status.applied_seq == 1 and status.entries_behind == 2 and status.lamport_behind == 3
+    assert "prev_digest" in status.error
+    # Nothing of the rejected entry is visible
+    assert replica.applied_lamport() == 2
+    assert asyncio.run(replica.verify_receipt_chain(1, 5))
+    assert asyncio.run(replica.poll()) == 0
+
+
+def test_directory_log_resumes_across_segments_and_restarts(tmp_path):
+    writer = BENEventProcessor()
+    path = str(tmp_path / "log")
+    log = ReplicationLog(DirectoryLogTransport(path, segment_entries=2))
+    for _ in range(5):
+        log.append(_block(writer, 2))
+
+    follower = DirectoryLogTransport(path, segment_entries=2)
+    assert [e.seq for e in follower.fetch(0, 3)] == [1, 2, 3]
+    assert [e.seq for e in follower.fetch(3, 10)] == [4, 5]
+
+    # A restarted primary continues numbering; a torn tail line waits for its newline
+    restarted = ReplicationLog(DirectoryLogTransport(path, segment_entries=2))
+    assert restarted.head.seq == 5 and restarted.head.lamports == {"": 10}
+    restarted.append(_block(writer, 1))
+    with open(os.path.join(path, "000000000007.log"), "wb") as w:
+        w.write(b'{"seq": 7')
+    assert [e.seq for e in follower.fetch(5, 10)] == [6]
+
+    replica = ReadReplica(DirectoryLogTransport(path, segment_entries=2))
+    assert asyncio.run(replica.poll()) == 6 and replica.applied_lamport() == 11
+
+
+def test_read_your_writes_over_a_socket(tmp_path):
+    writer = BENEventProcessor()
+    transport = InMemoryLogTransport()
+    log = ReplicationLog(transport)
+    server = LogServer(transport, str(tmp_path / "log.sock"))
+
+    async def scenario():
+        await server.start()
+        replica = ReadReplica(SocketLogTransport(server.path))
+        try:
+            log.append(_block(writer, 2))
+            assert await replica.wait_for(2)
+
+            async def write_later():
+                await asyncio.sleep(0.05)
+                return log.append(_block(writer, 3))
+
+            entry, caught_up = await asyncio.gather(write_later(), replica.wait_for(5, timeout=2))
+            assert caught_up and entry.receipts[-1].lamport == 5
+            assert not await replica.wait_for(6, timeout=0.05)
+            return replica.status()
+        finally:
+            replica.transport.close()
+            await server.close()
+
+    status = asyncio.run(scenario())
+    assert status.applied_seq == 2 and status.lamports == {"": 5}
+
+
+def test_replica_app_answers_503_until_the_write_is_applied():
+    writer = BENEventProcessor()
+    log = ReplicationLog(InMemoryLogTransport())
+    replica = ReadReplica(log.transport)
+    [receipt] = _block(writer, 1)
+    log.append([receipt])
+
+    with TestClient(create_replica_app(replica, interval=10, wait_timeout=0.05)) as client:
+        response = client.get("/verify", params={"start_lamport": 1, "end_lamport": 1, "min_lamport": 1})
+        assert response.json() == {"valid": True}
+        proof = client.get(f"/traces/t-1/proof/{receipt.self_hash}").json()
+        assert proof["index"] == 0
+
+        behind = client.get("/cries", params={"min_lamport": 2})
+        assert behind.status_code == 503 and behind.json()["status"]["applied_seq"] == 1
+        assert client.get("/replication/status").json()["entries_behind"] == 0
+
+
+def test_follower_keeps_a_window_per_chain_and_refuses_older_ranges():
+    writer = BENEventProcessor()
+    log = ReplicationLog(InMemoryLogTransport())
+    replica = ReadReplica(log.transport, chain_window=8, max_traces=2)
+    for i in range(6):
+        log.append(_block(writer, 5, trace_id=f"t-{i}"))
+
+    assert asyncio.run(replica.poll()) == 6
+    status = replica.status()
+    assert status.receipts == 30 and status.lamports == {"": 30}
+    assert 8 <= len(replica._chains[None]) <= 10
+    start = status.window_start[""]
+    assert replica._chains[None][0].lamport == start
+
+    assert asyncio.run(replica.verify_receipt_chain(start, 30))
+    assert asyncio.run(replica.verify_receipt_chain(start + 3, 28))  # links onto the receipts before it
+    with pytest.raises(ReplicaWindowError):
+        asyncio.run(replica.verify_receipt_chain(start - 1, 30))
+    assert len(replica.trace_index) == 2 and replica.get_trace_timeline("t-0") is None
+
+    with TestClient(create_replica_app(replica, interval=10)) as client:
+        response = client.get("/verify", params={"start_lamport": 1, "end_lamport": 30})
+        assert response.status_code == 409 and response.json()["error"] == "outside_window"
+        assert client.get("/verify", params={"start_lamport": start, "end_lamport": 30}).json() == {"valid": True}
+
+
+class _FlakyTransport(InMemoryLogTransport):
+    def __init__(self):
+        super().__init__()
+        self.down = True
+        self.threads = set()
+
+    def ship(self, entries, head):
+        self.threads.add(threading.get_ident())
+        if self.down:
+            raise OSError("transport down")
+        super().ship(entries, head)
+
+
+def test_background_shipping_retries_off_the_event_loop():
+    transport = _FlakyTransport()
+    log = ReplicationLog(transport, retry_interval=0.01)
+    writer = BENEventProcessor()
+
+    async def scenario():
+        log.start()
+        log.append(_block(writer, 2))
+        log.append(_block(writer, 1))
+        await asyncio.sleep(0.05)
+        assert log.pending == 2 and transport.head().seq == 0
+        transport.down = False
+        await asyncio.sleep(0.05)
+        return await log.stop()
+
+    assert asyncio.run(scenario())
+    assert log.pending == 0 and transport.head().seq == 2
+    assert transport.head().lanes == {"/": 3}
+    assert threading.get_ident() not in transport.threads
+
+
+def test_restart_re_logs_blocks_the_transport_never_got(fake_prisma):
+    writer = BENEventProcessor(node_id="primary")
+    receipts = _block(writer, 5)
+    transport = InMemoryLogTransport()
+    ReplicationLog(transport).append(receipts[:2])  # The rest was pending when the primary crashed
+
+    heads = [{"lane": head_lane(None, "primary"), "node_id": "primary", "lamport": 5}]
+    client = fake_prisma(receipts=receipts, heads=heads)
+    service = AuditService(node_id="primary", replication=ReplicationLog(transport), db=DataAccess(client))
+
+    assert asyncio.run(service.replay_unshipped(batch_size=2)) == 3
+    assert [len(e.receipts) for e in transport.fetch(0, 10)] == [2, 2, 1]
+    assert asyncio.run(service.replay_unshipped()) == 0
+
+    replica = ReadReplica(transport, public_keys=writer.public_key)
+    assert asyncio.run(replica.poll()) == 3 and replica.status().error is None
+    assert replica.applied_lamport() == 5
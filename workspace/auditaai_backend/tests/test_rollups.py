@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ben.rollups import MetricRollupStore, compute_buckets, grouped_stats
+
+
+def test_grouped_stats_matches_numpy():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 20, size=2000)
+    values = rng.random((2000, 3))
+
+    ids, counts, stats = grouped_stats(groups, values)
+    for g, group in enumerate(ids):
+        subset = values[groups == group]
+        assert counts[g] == len(subset)
+        np.testing.assert_allclose(stats["mean"][g], subset.mean(axis=0))
+        np.testing.assert_allclose(stats["min"][g], subset.min(axis=0))
+        np.testing.assert_allclose(stats["p95"][g], np.percentile(subset, 95, axis=0))
+
+
+def test_compute_buckets_by_resolution_and_slice():
+    timestamps = np.array([0.0, 30.0, 61.0, 3700.0])
+    values = np.array([[0.1], [0.3], [0.5], [0.9]])
+    slices = {"model_id": ["m1", "m2", "m1", None]}
+
+    buckets = compute_buckets("cries", "1m", timestamps, values, ["clarity"], slices)
+    overall = [b for b in buckets if b.dimension == "all"]
+    assert [(b.bucket_start.timestamp(), b.count) for b in overall] == [(0, 2), (60, 1), (3660, 1)]
+    assert abs(overall[0].mean - 0.2) < 1e-12 and overall[0].max == 0.3
+
+    by_model = {(b.slice_value, b.bucket_start.timestamp()): b.count for b in buckets if b.dimension == "model_id"}
+    assert by_model == {("m1", 0): 1, ("m1", 60): 1, ("m2", 0): 1}
+
+    hourly = compute_buckets("cries", "1h", timestamps, values, ["clarity"])
+    assert [b.count for b in hourly] == [3, 1]
+
+
+def test_pick_resolution_respects_span_and_retention():
+    store = MetricRollupStore(db=None, max_points=100)
+    now = datetime(2025, 1, 10)
+    assert store.pick_resolution(now - timedelta(minutes=90), now, now=now) == "1m"
+    assert store.pick_resolution(now - timedelta(days=3), now, now=now) == "1h"
+    # Minute buckets older than their retention are gone
+    start = now - timedelta(days=8)
+    assert store.pick_resolution(start, start + timedelta(minutes=10), now=now) == "1h"
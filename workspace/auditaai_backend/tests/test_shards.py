@@ -0,0 +1,56 @@
+from ben.shards import ShardedEventProcessor, group_by_chain, verify_anchor
+from ben.types import ReceiptType, BandLevel, Track
+from ben.verify_chain import ChainVerifier
+from ben.verify_hash import HashVerifier
+
+
+def _event(station_id):
+    return {
+        "receipt_type": ReceiptType.ACT_REQUEST,
+        "band": BandLevel.BAND_1,
+        "track": Track.TRACK_A,
+        "trace_id": "t-1",
+        "station_id": station_id,
+    }
+
+
+def _mint(sharded, stations):
+    receipts = []
+    for station in stations:
+        event = _event(station)
+        chain_id = sharded.shard_id(event)
+        event.pop("station_id")
+        receipts.extend(sharded.create_receipts(chain_id, [event]))
+    return receipts
+
+
+def test_each_shard_has_its_own_chain():
+    sharded = ShardedEventProcessor(anchor_every=4)
+    receipts = _mint(sharded, ["s1", "s2", "s1", None])
+
+    assert [(r.chain_id, r.lamport) for r in receipts] == [
+        ("s1", 1), ("s2", 1), ("s1", 2), ("unassigned", 1)
+    ]
+    # Same lamport and prev_digest on different shards must not collide
+    assert receipts[0].self_hash != receipts[1].self_hash
+    assert all(HashVerifier.verify_receipt_hash(r).is_valid for r in receipts)
+    assert sharded.needs_anchor()
+
+    results = ChainVerifier().verify_shards(group_by_chain(receipts), max_workers=2)
+    assert all(ok for ok, _ in results.values())
+
+
+def test_anchor_commits_to_shard_heads():
+    sharded = ShardedEventProcessor()
+    receipts = _mint(sharded, ["s1", "s2", "s2"])
+
+    anchor = sharded.anchor()
+    assert anchor.receipt.receipt_type == ReceiptType.MERKLE_ROOT
+    assert anchor.receipt.commitment == anchor.merkle_root
+    assert not sharded.needs_anchor()
+
+    chains = group_by_chain(receipts)
+    assert verify_anchor(anchor.receipt, anchor.heads, chains) == (True, None)
+
+    tampered = [h.model_copy(update={"lamport": 1}) if h.chain_id == "s2" else h for h in anchor.heads]
+    assert verify_anchor(anchor.receipt, tampered, chains)[0] is False
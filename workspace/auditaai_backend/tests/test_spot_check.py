@@ -0,0 +1,207 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from synthetic import synthetic_ben_receipts, write_ben_files  # noqa: E402
+
+from ben.ben_event import BENEventProcessor  # noqa: E402
+from ben.db import PartialWriteError  # noqa: E402
+from ben.importer import CHECKPOINT_NAME, decode_chunk  # noqa: E402
+from ben.metrics import INTEGRITY_MISMATCHES  # noqa: E402
+from ben.shards import ANCHOR_CHAIN_ID, ShardHead, compute_anchor_root  # noqa: E402
+from ben.spot_check import IntegritySpotChecker, SpotCheckBudget  # noqa: E402
+from ben.trace_index import TraceIndex  # noqa: E402
+from ben.types import BandLevel, ReceiptType, Track  # noqa: E402
+
+
+class _Service:
+    """Audit service stand-in over an in-memory database holding `receipts`"""
+
+    def __init__(self, db, receipts, processor=None):
+        self.event_processor = processor or BENEventProcessor()
+        self.shards = None
+        self.trace_index = TraceIndex()
+        self.trace_index.add_many(receipts)
+        self.db = db
+        self.events = []
+        self.fail = set()  # Batch indexes the next call fails to store
+
+    async def process_events(self, events):
+        self.events.extend(events)
+        receipts = self.event_processor.create_receipts([
+            {"receipt_type": e.receipt_type, "band": e.band, "track": e.track, "trace_id": e.trace_id}
+            for e in events
+        ])
+        if self.fail:
+            errors, self.fail = {i: RuntimeError("shard down") for i in self.fail}, set()
+            raise PartialWriteError([None if i in errors else r for i, r in enumerate(receipts)], errors)
+        return receipts
+
+
+def _receipts(processor, n):
+    return processor.create_receipts([
+        {"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1,
+         "track": Track.TRACK_A, "trace_id": f"t-{i % 3}"}
+        for i in range(n)
+    ])
+
+
+def test_tampered_rows_are_reported_once_as_risk_gates(fake_prisma):
+    writer = BENEventProcessor()
+    receipts = _receipts(writer, 20)
+    db = fake_prisma(receipts=receipts, heads=[{"lane": "/", "lamport": 20}])
+    service = _Service(db, receipts, writer)
+    rows = db.receipt.rows
+    rows[4].receipt_type = ReceiptType.RISK_GATE.value
+    forger = BENEventProcessor()  # Another key
+    forger.restore_head(8, receipts[7].self_hash)
+    [forged] = forger.create_receipts([{"receipt_type": ReceiptType.ACT_REQUEST, "band": BandLevel.BAND_1,
+                                        "track": Track.TRACK_A, "trace_id": "t-2"}])
+    rows[8] = db.receipt.row(forged)
+    before = INTEGRITY_MISMATCHES.value("db", "signature")
+
+    checker = IntegritySpotChecker(service, SpotCheckBudget(batch_size=20, recent_fraction=1.0), seed=1)
+    found = asyncio.run(checker.check_once())
+
+    assert sorted((m.check, m.lamport) for m in found) == [("hash", 5), ("signature", 9)]
+    assert [e.receipt_type for e in service.events] == [ReceiptType.RISK_GATE] * 2
+    assert service.events[0].metadata["self_hash"] == receipts[4].self_hash
+    assert found[0].receipt is not None
+    assert INTEGRITY_MISMATCHES.value("db", "signature") == before + 1
+
+    checker.budget.recent_fraction = 0.0
+    assert asyncio.run(checker.check_once()) == [] and len(service.events) == 2
+    coverage = checker.coverage()
+    assert (coverage.population, coverage.distinct_checked, coverage.coverage) == (20, 20, 1.0)
+    assert coverage.recent_checked == 20 and coverage.random_checked > 0
+    assert coverage.detection_probability(0.1) == pytest.approx(1 - 0.9 ** coverage.random_checked)
+    assert checker.pause >= checker.budget.min_pause
+
+
+def test_merkle_checks_catch_re_signed_receipts_and_missing_anchored_heads(fake_prisma):
+    writer = BENEventProcessor()
+    receipts = _receipts(writer, 6)
+    anchorer = BENEventProcessor(chain_id=ANCHOR_CHAIN_ID, private_key=writer._private_key)
+    heads = [ShardHead(chain_id="s-1", lamport=3, digest="f" * 64)]
+    [anchor] = anchorer.create_receipts([{"receipt_type": ReceiptType.MERKLE_ROOT, "band": BandLevel.BAND_4,
+                                          "track": Track.TRACK_B, "trace_id": "ANCHOR:1",
+                                          "commitment": compute_anchor_root(heads)}])
+    lanes = [{"lane": "/", "lamport": 6}, {"lane": f"{ANCHOR_CHAIN_ID}/", "chain_id": ANCHOR_CHAIN_ID, "lamport": 1}]
+    db = fake_prisma(receipts=receipts + [anchor], heads=lanes)
+    service = _Service(db, receipts + [anchor], writer)
+    db.receipt.rows[-1].metadata = {"heads": [h.model_dump() for h in heads]}
+
+    # Valid hash and signature (a leaked key), but not the receipt the trace tree recorded
+    rewriter = BENEventProcessor(private_key=writer._private_key)
+    rewriter.restore_head(2, receipts[1].self_hash)
+    [rewritten] = rewriter.create_receipts([{"receipt_type": ReceiptType.RISK_GATE, "band": BandLevel.BAND_1,
+                                             "track": Track.TRACK_A, "trace_id": "t-2"}])
+    db.receipt.rows[2] = db.receipt.row(rewritten)
+
+    checker = IntegritySpotChecker(service, SpotCheckBudget(batch_size=14, recent_fraction=1.0))
+    first = asyncio.run(checker.check_once())
+    assert [(m.check, m.chain_id) for m in first] == [("merkle", ANCHOR_CHAIN_ID)]
+    assert "s-1@3" in first[0].detail
+
+    # Not in the tree may mean mid-write; still missing a round later, it is reported
+    [second] = asyncio.run(checker.check_once())
+    assert (second.check, second.self_hash) == ("merkle", rewritten.self_hash)
+
+    # An index not rebuilt from storage (or that evicted the trace) proves nothing
+    service.trace_index = TraceIndex(complete=False)
+    service.trace_index.add_many(receipts)
+    checker = IntegritySpotChecker(service, SpotCheckBudget(batch_size=14, recent_fraction=1.0))
+    assert [m.check for m in asyncio.run(checker.check_once())] == ["merkle"]
+    assert asyncio.run(checker.check_once()) == []
+
+
+def test_ben_files_are_rehashed_and_compared_with_their_rows(tmp_path, fake_prisma):
+    key = Fernet.generate_key()
+    key_path = tmp_path / "ben.key"
+    key_path.write_bytes(key)
+    receipts_dir = str(tmp_path / "receipts")
+    write_ben_files(receipts_dir, synthetic_ben_receipts(4), Fernet(key))
+    names = sorted(os.listdir(receipts_dir))
+    db = fake_prisma()
+    imported = db.receipt.insert(row for _, row, _ in decode_chunk(receipts_dir, names, [key]))
+    imported[1].prev_digest = "0" * 64
+    with open(os.path.join(receipts_dir, names[3]), "wb") as w:
+        w.write(b"not a token")
+
+    service = _Service(db, [])
+    checker = IntegritySpotChecker(
+        service, SpotCheckBudget(ben_files=4), receipts_dir=receipts_dir, key_path=str(key_path)
+    )
+    found = asyncio.run(checker.check_once())
+
+    assert sorted((m.check, m.name) for m in found) == [("ben_row", names[1]), ("hash", names[3])]
+    assert "prev_digest" in next(m.detail for m in found if m.check == "ben_row")
+    coverage = checker.coverage()
+    assert (coverage.ben_files, coverage.ben_checked, coverage.mismatches) == (4, 4, 2)
+    assert coverage.bytes_read > 0
+
+
+def test_partial_write_re_reports_only_the_unstored_mismatches(fake_prisma):
+    writer = BENEventProcessor()
+    receipts = _receipts(writer, 10)
+    db = fake_prisma(receipts=receipts, heads=[{"lane": "/", "lamport": 10}])
+    service = _Service(db, receipts, writer)
+    db.receipt.rows[2].receipt_type = ReceiptType.RISK_GATE.value
+    db.receipt.rows[6].receipt_type = ReceiptType.RISK_GATE.value
+    service.fail = {1}
+
+    checker = IntegritySpotChecker(service, SpotCheckBudget(batch_size=10, recent_fraction=1.0), seed=1)
+    with pytest.raises(PartialWriteError):
+        asyncio.run(checker.check_once())
+    assert [e.metadata["lamport"] for e in service.events] == [3, 7]
+
+    assert asyncio.run(checker.check_once()) == []
+    assert [e.metadata["lamport"] for e in service.events] == [3, 7, 7]
+
+
+def test_deleted_rows_are_told_apart_from_merged_lamports(fake_prisma):
+    writer = BENEventProcessor()
+    receipts = _receipts(writer, 5)
+    writer.merge_lamport(9)                          # lamports 6-10 are never written
+    receipts += _receipts(writer, 5)
+    assert [r.lamport for r in receipts[4:6]] == [5, 11]
+    db = fake_prisma(receipts=receipts, heads=[{"lane": "/", "lamport": 15, "digest": receipts[-1].self_hash}])
+    service = _Service(db, receipts, writer)
+    by_lamport = {row.lamport: row for row in db.receipt.rows}
+    db.receipt.rows.remove(by_lamport[13])
+    db.receipt.rows.remove(by_lamport[15])           # the head itself
+
+    checker = IntegritySpotChecker(service, SpotCheckBudget(batch_size=200, recent_fraction=0.0), seed=3)
+    found = asyncio.run(checker.check_once())
+
+    assert sorted((m.check, m.lamport, m.self_hash) for m in found) == [
+        ("missing_row", 13, receipts[7].self_hash),
+        ("missing_row", 15, receipts[9].self_hash),
+    ]
+    assert [e.trace_id for e in service.events] == [f"db:{m.self_hash}" for m in found]
+    assert asyncio.run(checker.check_once()) == []   # reported once
+
+
+def test_imported_ben_files_must_keep_their_rows(tmp_path, fake_prisma):
+    key = Fernet.generate_key()
+    key_path = tmp_path / "ben.key"
+    key_path.write_bytes(key)
+    receipts_dir = str(tmp_path / "receipts")
+    write_ben_files(receipts_dir, synthetic_ben_receipts(4), Fernet(key))
+    names = sorted(os.listdir(receipts_dir))
+    db = fake_prisma()
+    db.receipt.insert(row for _, row, _ in decode_chunk(receipts_dir, names[1:3], [key]))
+    # names[0] was imported and its row deleted since; names[3] is not imported yet
+    with open(os.path.join(receipts_dir, CHECKPOINT_NAME), "w") as w:
+        w.write("".join(f"{name}\n" for name in names[:3]))
+
+    checker = IntegritySpotChecker(
+        _Service(db, []), SpotCheckBudget(ben_files=4), receipts_dir=receipts_dir, key_path=str(key_path)
+    )
+    [found] = asyncio.run(checker.check_once())
+    assert (found.check, found.name, found.lamport) == ("missing_row", names[0], 2)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess
+from ben.state import head_upsert, key_id, lane_upsert, load_signing_key, recover_head
+from ben.types import BandLevel, EventRequest, ReceiptType, Track
+
+
+def _db(fake_prisma, receipts, record=None):
+    return fake_prisma(receipts=receipts, heads=[record["data"]["create"]] if record else [])
+
+
+def _mint(processor, n):
+    return [
+        processor.create_receipt(
+            receipt_type=ReceiptType.ACT_REQUEST,
+            band=BandLevel.BAND_1,
+            track=Track.TRACK_A,
+            trace_id="t-1",
+        )
+        for _ in range(n)
+    ]
+
+
+def _event():
+    return EventRequest(
+        receipt_type=ReceiptType.ACT_REQUEST,
+        band=BandLevel.BAND_1,
+        track=Track.TRACK_A,
+        trace_id="t-1",
+    )
+
+
+def test_signing_key_is_created_once_with_private_mode(tmp_path):
+    path = str(tmp_path / "keys" / "node.key")
+
+    first = load_signing_key(path)
+    second = load_signing_key(path)
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert first.public_key().public_bytes_raw() == second.public_key().public_bytes_raw()
+    assert [p.name for p in (tmp_path / "keys").iterdir()] == ["node.key"]
+
+
+def test_restart_continues_chain_from_head_record(tmp_path, fake_prisma):
+    key = load_signing_key(str(tmp_path / "node.key"))
+    writer = BENEventProcessor(private_key=key, node_id="n1")
+    receipts = _mint(writer, 3)
+    db = _db(fake_prisma, receipts, head_upsert(writer, None))
+
+    restarted = BENEventProcessor(private_key=key, node_id="n1")
+    result = asyncio.run(recover_head(db, restarted, None))
+
+    assert (result.lamport, result.digest, result.source) == (3, receipts[-1].self_hash, "record")
+    [following] = _mint(restarted, 1)
+    assert following.lamport == 4 and following.prev_digest == receipts[-1].self_hash
+
+
+def test_missing_record_adopts_tail_and_empty_lane_starts_fresh(fake_prisma):
+    writer = BENEventProcessor(node_id="n1")
+    receipts = _mint(writer, 2)
+
+    result = asyncio.run(recover_head(_db(fake_prisma, receipts), writer, None))
+    assert result.source == "tail" and result.lamport == 2
+
+    fresh = asyncio.run(recover_head(_db(fake_prisma, []), BENEventProcessor(node_id="n1"), None))
+    assert (fresh.lamport, fresh.digest, fresh.source) == (0, None, "empty")
+
+
+def test_disagreeing_record_or_foreign_key_refuses_to_start(fake_prisma):
+    writer = BENEventProcessor(node_id="n1")
+    receipts = _mint(writer, 3)
+    stale = BENEventProcessor(node_id="n1")
+    _mint(stale, 2)
+
+    with pytest.raises(RuntimeError, match="records"):
+        asyncio.run(recover_head(_db(fake_prisma, receipts, head_upsert(stale, None)), writer, None))
+
+    # The record says this key signed the head, but another key signed the stored tail
+    forged = _mint(BENEventProcessor(node_id="n1"), 3)
+    record = lane_upsert(None, "n1", 3, forged[-1].self_hash, signer=key_id(writer.public_key))
+    with pytest.raises(RuntimeError, match="not signed"):
+        asyncio.run(recover_head(_db(fake_prisma, forged, record), writer, None))
+
+
+def test_configuring_a_key_file_adopts_the_existing_tail(tmp_path, fake_prisma):
+    db = fake_prisma()
+    # Written before signing_key_path was set, with a per-process key
+    before = AuditService(node_id="n1", db=DataAccess(db))
+    asyncio.run(before.process_events([_event() for _ in range(3)]))
+
+    key_path = str(tmp_path / "node.key")
+    upgraded = AuditService(node_id="n1", signing_key_path=key_path, db=DataAccess(db))
+    [result] = asyncio.run(upgraded.recover_heads())
+    assert (result.lamport, result.source) == (3, "record")
+    [receipt] = asyncio.run(upgraded.process_events([_event()]))
+    assert receipt.prev_digest == db.receipt.rows[2].self_hash
+    assert db.chainhead.get("/n1").signer == key_id(upgraded.event_processor.public_key)
+
+    # From now on the key is known: restarts verify the tail against it
+    restarted = AuditService(node_id="n1", signing_key_path=key_path, db=DataAccess(db))
+    assert asyncio.run(restarted.recover_heads())[0].lamport == 4
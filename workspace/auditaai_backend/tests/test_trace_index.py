@@ -0,0 +1,98 @@
+import asyncio
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess
+from ben.trace_index import TraceIndex
+from ben.types import ReceiptType, BandLevel, Track
+from ben.verify_chain import ChainVerifier
+from ben.verify_hash import HashVerifier
+
+
+def _mint(processor, trace_id, receipt_type=ReceiptType.ACT_REQUEST, band=BandLevel.BAND_1):
+    return processor.create_receipt(
+        receipt_type=receipt_type,
+        band=band,
+        track=Track.TRACK_A,
+        trace_id=trace_id,
+    )
+
+
+def test_timeline_and_summary():
+    processor = BENEventProcessor()
+    receipts = [
+        _mint(processor, "x"),
+        _mint(processor, "y"),
+        _mint(processor, "x", ReceiptType.RISK_GATE, BandLevel.BAND_5),
+        _mint(processor, "x"),
+    ]
+    index = TraceIndex()
+    # Out-of-order arrival still yields a Lamport-ordered timeline
+    assert index.add_many(reversed(receipts)) == 4
+    assert index.add(receipts[0]) is False
+
+    timeline = index.timeline("x")
+    assert [e.lamport for e in timeline.entries] == [1, 3, 4]
+    summary = timeline.summary
+    assert summary.receipt_count == 3
+    assert summary.band_counts == {"band-1": 2, "band-5": 1}
+    assert summary.risk_gate_hits == 1
+    assert summary.merkle_root == HashVerifier.compute_merkle_root(
+        [receipts[0], receipts[2], receipts[3]]
+    )
+    assert index.timeline("missing") is None
+
+
+def test_inclusion_proof_verifies():
+    processor = BENEventProcessor()
+    receipts = [_mint(processor, "x") for _ in range(5)]
+    index = TraceIndex()
+    index.add_many(receipts)
+
+    proof = index.inclusion_proof("x", receipts[4].self_hash)
+    assert proof.index == 4
+    assert ChainVerifier().verify_merkle_proof(
+        receipts[4], proof.merkle_root, proof.proof, index=proof.index
+    )
+    assert index.inclusion_proof("x", "nope") is None
+
+
+def test_evicted_traces_are_reloaded_before_reads():
+    processor = BENEventProcessor()
+    receipts = [_mint(processor, trace_id) for trace_id in ("x", "y", "x", "z")]
+    index = TraceIndex(max_traces=2)
+    index.add_many(receipts[:3])
+    assert index.complete and index.covers("x")
+
+    # Writing z evicts y, the least recently used trace
+    index.add(receipts[3])
+    assert "y" not in index and index.evictions == 1 and not index.complete
+    assert index.needs_load("y") and not index.needs_load("x")
+    # Unloaded traces are not indexed piecemeal
+    assert index.add(_mint(processor, "y")) is False
+
+    token = index.reserve("y")
+    late = _mint(processor, "y")
+    index.add(late)  # Written while the load is in flight
+    assert not index.covers("y")
+    assert index.loaded("y", token, [receipts[1]]) == 1
+    assert [e.lamport for e in index.timeline("y").entries] == [2, late.lamport]
+
+    # A trace storage does not know either is not kept
+    index.loaded("w", index.reserve("w"), [])
+    assert "w" not in index and index.timeline("w") is None
+
+
+def test_service_loads_traces_lazily_from_storage(fake_prisma):
+    writer = BENEventProcessor()
+    stored = [_mint(writer, trace_id) for trace_id in ("x", "y", "x")]
+    db = fake_prisma(receipts=stored)
+    service = AuditService(db=DataAccess(db), max_traces=10)
+    assert len(service.trace_index) == 0
+
+    timeline = asyncio.run(service.get_trace_timeline("x"))
+    assert [e.lamport for e in timeline.entries] == [1, 3]
+    assert [kwargs["where"] for op, kwargs in db.receipt.calls] == [{"trace_id": "x"}]
+    # Loaded once; later reads are served from the index
+    asyncio.run(service.get_trace_proof("x", stored[2].self_hash))
+    assert len(db.receipt.calls) == 1 and "y" not in service.trace_index
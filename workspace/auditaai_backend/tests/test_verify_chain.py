@@ -0,0 +1,91 @@
+from ben.ben_event import BENEventProcessor
+from ben.types import BandLevel, ReceiptType, Track
+from ben.verify_chain import (
+    BandTransitionRule,
+    ChainValidator,
+    ChainVerifier,
+    LamportOrderRule,
+    PrevDigestRule,
+    default_rules,
+)
+
+
+def _chain(processor, bands):
+    return [
+        processor.create_receipt(
+            receipt_type=ReceiptType.ACT_REQUEST,
+            band=band,
+            track=Track.TRACK_A,
+            trace_id="t-1",
+        )
+        for band in bands
+    ]
+
+
+def test_valid_chain_passes_every_rule_without_sorting():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_0, BandLevel.BAND_0, BandLevel.BAND_1])
+    rules = default_rules(processor.public_key, bands=True)
+
+    report = ChainValidator(rules).validate(receipts)
+
+    assert report.is_valid and report.checked == 3 and report.sorted_input
+    assert report.violations == []
+
+
+def test_collects_all_violations_with_input_positions():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_1] * 5)
+    receipts[1] = receipts[1].model_copy(update={"self_hash": "f" * 64})
+    receipts[3] = receipts[3].model_copy(update={"actor_signature": None})
+
+    report = ChainValidator(default_rules(processor.public_key)).validate(receipts)
+
+    found = [(v.position, v.rule) for v in report.violations]
+    # The signature covers the digest content, not self_hash itself
+    assert found == [(1, "self_hash"), (2, "prev_digest"), (3, "signature")]
+    assert report.error == f"Self-hash mismatch at {receipts[1].lamport}"
+
+
+def test_fail_fast_stops_at_first_violation():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_1] * 4)
+    receipts[2] = receipts[2].model_copy(update={"prev_digest": None})
+
+    report = ChainValidator(fail_fast=True).validate(receipts)
+
+    assert not report.is_valid and report.checked == 3
+    assert [v.position for v in report.violations] == [2]
+
+
+def test_unordered_sequence_is_sorted_and_positions_refer_to_input():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_1] * 4)
+    shuffled = [receipts[2], receipts[0], receipts[3], receipts[1]]
+
+    report = ChainValidator().validate(shuffled)
+    assert report.is_valid and not report.sorted_input
+
+    # Streams are taken as given: disorder is a violation, not re-sorted
+    streamed = ChainValidator([LamportOrderRule(), PrevDigestRule()]).validate(iter(shuffled))
+    assert ("lamport_order", 1) in [(v.rule, v.position) for v in streamed.violations]
+
+
+def test_band_state_machine_per_trace():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_1, BandLevel.BAND_2, BandLevel.BAND_0])
+
+    report = ChainValidator([BandTransitionRule()]).validate(receipts)
+
+    assert [(v.position, v.message) for v in report.violations] == [
+        (2, f"Invalid band transition band-2 -> band-0 at {receipts[2].lamport}")
+    ]
+
+
+def test_verify_chain_keeps_first_error_contract():
+    processor = BENEventProcessor()
+    receipts = _chain(processor, [BandLevel.BAND_1] * 3)
+    receipts[1] = receipts[1].model_copy(update={"prev_digest": "0" * 64})
+
+    ok, error = ChainVerifier().verify_chain(receipts)
+    assert not ok and error == f"Hash chain broken at {receipts[1].lamport}"
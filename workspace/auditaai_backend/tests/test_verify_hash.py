@@ -0,0 +1,84 @@
+import hashlib
+
+from ben.hashing import BLAKE2B_256, HASH_ALGORITHMS
+from ben.verify_hash import HashVerifier, MerkleAccumulator
+
+
+def _leaves(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+
+def test_merkle_root_handles_odd_levels():
+    # 6 leaves produce an odd level (3 nodes) above the leaves
+    assert len(HashVerifier.compute_merkle_root(_leaves(6))) == 64
+
+
+def test_single_leaf_root_pairs_the_leaf_with_itself():
+    [leaf] = _leaves(1)
+    root = hashlib.sha256(f"{leaf}{leaf}".encode()).hexdigest()
+    assert HashVerifier.compute_merkle_root([leaf]) == root
+    proof = HashVerifier.generate_merkle_proof([leaf], leaf)
+    assert proof == [leaf] and HashVerifier.verify_merkle_proof(leaf, root, proof, 0)
+
+
+def test_accumulator_matches_compute_merkle_root():
+    for n in range(0, 40):
+        acc = MerkleAccumulator()
+        for leaf in _leaves(n):
+            acc.add(leaf)
+        assert acc.count == n
+        assert acc.root() == HashVerifier.compute_merkle_root(_leaves(n))
+
+
+def test_mixed_algorithm_chain_verifies():
+    from ben.ben_event import BENEventProcessor
+    from ben.hashing import BLAKE2B_256, SHA256
+    from ben.types import BandLevel, ReceiptType, Track
+    from ben.verify_chain import ChainVerifier
+
+    processor = BENEventProcessor()
+    receipts = []
+    for alg in (SHA256, BLAKE2B_256, SHA256, BLAKE2B_256):
+        processor.hash_alg = alg
+        receipts.append(processor.create_receipt(
+            receipt_type=ReceiptType.ACT_REQUEST,
+            band=BandLevel.BAND_1,
+            track=Track.TRACK_A,
+            trace_id="mixed",
+        ))
+    assert [r.hash_alg for r in receipts] == [SHA256, BLAKE2B_256, SHA256, BLAKE2B_256]
+    assert all(HashVerifier.verify_receipt_hash(r).is_valid for r in receipts)
+    assert ChainVerifier().verify_chain(receipts, verify_hashes=True) == (True, None)
+
+    # The tag is part of the signed content, so it cannot be swapped afterwards
+    tampered = receipts[1].model_copy(update={"hash_alg": SHA256})
+    assert not HashVerifier.verify_receipt_hash(tampered).is_valid
+    assert not processor.verify_signature(tampered)
+    unknown = receipts[1].model_copy(update={"hash_alg": "md5"})
+    assert HashVerifier.verify_receipt_hash(unknown).error == "Unsupported hash algorithm: md5"
+
+
+def test_untagged_receipts_keep_their_sha256_hash():
+    from ben.types import BaseReceipt, BandLevel, ReceiptType, Track, receipt_digest_content
+
+    receipt = BaseReceipt(
+        receipt_type=ReceiptType.ACT_REQUEST, lamport=1, prev_digest=None,
+        self_hash="", trace_id="t", band=BandLevel.BAND_1, track=Track.TRACK_A,
+    )
+    receipt.self_hash = hashlib.sha256(receipt_digest_content(receipt).encode()).hexdigest()
+    assert ":alg=" not in receipt_digest_content(receipt)
+    assert HashVerifier.verify_receipt_hash(receipt).is_valid
+
+
+def test_merkle_trees_per_algorithm():
+    leaves = _leaves(13)
+    for alg in HASH_ALGORITHMS:
+        root = HashVerifier.compute_merkle_root(leaves, hash_alg=alg)
+        acc = MerkleAccumulator(hash_alg=alg)
+        for leaf in leaves:
+            acc.add(leaf)
+        assert acc.root() == root
+        proof = HashVerifier.generate_merkle_proof(leaves, leaves[7], hash_alg=alg)
+        assert HashVerifier.verify_merkle_proof(leaves[7], root, proof, 7, hash_alg=alg)
+    assert HashVerifier.compute_merkle_root(leaves, hash_alg=BLAKE2B_256) != \
+        HashVerifier.compute_merkle_root(leaves)
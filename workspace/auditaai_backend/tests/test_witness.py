@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from ben.audit_service import AuditService
+from ben.ben_event import BENEventProcessor
+from ben.db import DataAccess, PartialWriteError
+from ben.shards import ShardedEventProcessor
+from ben.types import ReceiptType
+from ben.verify_hash import HashVerifier
+from ben.witness import WitnessAggregator, WitnessClaim, claim_leaf, claim_message
+
+
+class _Service:
+    """Stand-in recording each `process_events` call"""
+
+    def __init__(self):
+        self.processor = BENEventProcessor()
+        self.calls = []
+
+    async def process_events(self, events):
+        self.calls.append(events)
+        return self.processor.create_receipts([
+            {
+                "receipt_type": e.receipt_type,
+                "band": e.band,
+                "track": e.track,
+                "trace_id": e.trace_id,
+                "commitment": e.commitment,
+            }
+            for e in events
+        ])
+
+
+def _witnesses(n):
+    return {f"w{i}": ed25519.Ed25519PrivateKey.generate() for i in range(n)}
+
+
+def _claim(keys, witness_id, trace_id="t-1", statement="digest-1", signer=None):
+    signer = signer or keys[witness_id]
+    return WitnessClaim(
+        trace_id=trace_id,
+        statement=statement,
+        witness_id=witness_id,
+        signature=signer.sign(claim_message(trace_id, statement, witness_id)).hex(),
+    )
+
+
+def test_quorum_mints_one_consensus_receipt_per_flush():
+    keys = _witnesses(4)
+    service = _Service()
+    aggregator = WitnessAggregator(service, {w: k.public_key() for w, k in keys.items()}, quorum=3)
+
+    async def scenario():
+        for trace_id in ("t-1", "t-2"):
+            for w in ("w2", "w0", "w1"):
+                await aggregator.submit(_claim(keys, w, trace_id))
+        await aggregator.submit(_claim(keys, "w0", "t-1"))                 # duplicate
+        await aggregator.submit(_claim(keys, "w3", "t-1", signer=keys["w0"]))  # forged
+        outcomes = await aggregator.flush()
+        await aggregator.submit(_claim(keys, "w3", "t-2"))                 # late
+        return outcomes, await aggregator.flush()
+
+    outcomes, after = asyncio.run(scenario())
+
+    assert len(service.calls) == 1 and len(service.calls[0]) == 2 and after == []
+    first = outcomes[0]
+    assert first.reached and first.witnesses == ["w0", "w1", "w2"]
+    assert first.receipt.receipt_type == ReceiptType.WITNESS_CONSENSUS
+    assert first.receipt.commitment == first.commitment
+    assert service.calls[0][0].metadata["witnesses"] == ["w0", "w1", "w2"]
+
+    leaf = claim_leaf(_claim(keys, "w1"))
+    index, proof = first.proof("w1")
+    assert HashVerifier.verify_merkle_proof(leaf, first.commitment, proof, index)
+    assert aggregator.pending == 0
+
+
+def test_group_below_quorum_times_out_as_one_claim_receipt():
+    keys = _witnesses(3)
+    service = _Service()
+    aggregator = WitnessAggregator(
+        service, {w: k.public_key() for w, k in keys.items()}, quorum=3, timeout=10
+    )
+
+    async def scenario():
+        await aggregator.submit(_claim(keys, "w0"))
+        await aggregator.submit(_claim(keys, "w1"))
+        waiting = await aggregator.flush(now=0.0)
+        expired = await aggregator.flush(now=20.0)
+        return waiting, expired
+
+    waiting, [outcome] = asyncio.run(scenario())
+    assert waiting == [] and not outcome.reached and outcome.witnesses == ["w0", "w1"]
+    assert outcome.receipt.receipt_type == ReceiptType.WITNESS_CLAIM
+    assert len(service.calls) == 1
+
+
+def test_claim_encoding_keeps_field_boundaries():
+    # Joined with a separator, these would be the same bytes
+    assert claim_message("t:1", "digest", "w0") != claim_message("t", "1:digest", "w0")
+    keys = _witnesses(1)
+    shifted = _claim(keys, "w0", trace_id="t:1", statement="digest")
+    shifted = shifted.model_copy(update={"trace_id": "t", "statement": "1:digest"})
+    assert claim_leaf(shifted) != claim_leaf(_claim(keys, "w0", trace_id="t:1", statement="digest"))
+
+
+def test_partial_write_retries_only_the_failed_outcomes(fake_prisma):
+    keys = _witnesses(3)
+    db = fake_prisma(down={"t-2"})
+    service = AuditService(shards=ShardedEventProcessor(shard_key=lambda e: e["trace_id"]), db=DataAccess(db))
+    aggregator = WitnessAggregator(service, {w: k.public_key() for w, k in keys.items()}, quorum=3)
+
+    async def scenario():
+        for trace_id in ("t-1", "t-2"):
+            for w in keys:
+                await aggregator.submit(_claim(keys, w, trace_id))
+        with pytest.raises(PartialWriteError):
+            await aggregator.flush()
+        db.down.clear()
+        return await aggregator.flush()
+
+    [retried] = asyncio.run(scenario())
+    assert retried.trace_id == "t-2" and retried.receipt is not None
+    consensus = [row.trace_id for row in db.receipt.rows if row.receipt_type == ReceiptType.WITNESS_CONSENSUS.value]
+    assert sorted(consensus) == ["t-1", "t-2"]